@@ -210,6 +210,21 @@ CREATE INDEX IF NOT EXISTS attendance_summary_user_idx
 ON attendance_summary(user_id, date DESC);
 
 
+-- 5. ATTENDANCE AGGREGATION STATE
+-- Newest attendance_logs.event_timestamp folded into attendance_summary.
+-- Advanced in the same transaction as the summary upsert (single row); the
+-- aggregator re-reads an overlap window before it to pick up late commits.
+CREATE TABLE IF NOT EXISTS attendance_aggregation_state (
+    state_id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (state_id = 1),
+    last_event_at TIMESTAMP NOT NULL DEFAULT 'epoch',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO attendance_aggregation_state (state_id)
+VALUES (1)
+ON CONFLICT (state_id) DO NOTHING;
+
+
 -- ============================================================================
 -- FUNCTIONS & TRIGGERS
 -- ============================================================================
@@ -0,0 +1,59 @@
+-- ============================================================================
+-- Service Recommendation Store
+-- ============================================================================
+-- Precomputed top-k service lists per guest, written by the recommendation
+-- refresh flows (src/flow/recommendation_flow.py) and read by
+-- /api/ml/recommend/services with one primary-key lookup.
+
+-- 1. PRECOMPUTED RECOMMENDATIONS
+-- One row per guest; arrays are aligned and ordered best first
+CREATE TABLE IF NOT EXISTS service_recommendations (
+    guest_id VARCHAR(64) PRIMARY KEY,
+    service_ids VARCHAR(64)[] NOT NULL,
+    scores REAL[] NOT NULL,
+    confidences REAL[] NOT NULL,
+
+    -- Factor model version the list was scored with
+    model_version VARCHAR(50) NOT NULL,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Index for deleting lists of old model versions
+CREATE INDEX IF NOT EXISTS service_recommendations_version_idx
+ON service_recommendations(model_version);
+
+
+-- 2. BOOKING CHANGE TRACKING
+-- Set on every insert and update (status changes such as cancellations
+-- included), so the incremental refresh sees changes to old bookings too
+ALTER TABLE Booking
+ADD COLUMN IF NOT EXISTS changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS booking_changed_at_idx
+ON Booking(changed_at);
+
+CREATE OR REPLACE FUNCTION touch_booking_changed_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.changed_at = clock_timestamp();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS booking_changed_at ON Booking;
+CREATE TRIGGER booking_changed_at
+    BEFORE INSERT OR UPDATE ON Booking
+    FOR EACH ROW EXECUTE FUNCTION touch_booking_changed_at();
+
+
+-- 3. REFRESH STATE
+-- Latest Booking.changed_at whose guest was re-scored (single row)
+CREATE TABLE IF NOT EXISTS recommendation_refresh_state (
+    state_id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (state_id = 1),
+    last_changed_at TIMESTAMP NOT NULL DEFAULT 'epoch',
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO recommendation_refresh_state (state_id)
+VALUES (1)
+ON CONFLICT (state_id) DO NOTHING;
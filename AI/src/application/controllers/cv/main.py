@@ -60,6 +60,19 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         app_logger.error(f"Failed to initialize image search service: {e}", exc_info=True)
 
+    # Keep attendance_summary up to date from attendance_logs
+    aggregator = None
+    if settings.attendance_aggregator_enabled:
+        from src.application.services.cv.attendance_aggregator import get_attendance_aggregator
+        try:
+            aggregator = get_attendance_aggregator()
+            await aggregator.initialize()
+            await aggregator.start()
+            app_logger.info("Attendance aggregator started successfully")
+        except Exception as e:
+            aggregator = None
+            app_logger.error(f"Failed to start attendance aggregator: {e}", exc_info=True)
+
     app_logger.info("CV Service started successfully")
 
     yield  # Application is running
@@ -67,6 +80,13 @@ async def lifespan(app: FastAPI):
     # Shutdown
     app_logger.info("Shutting down CV Service")
 
+    # Stop attendance aggregator (flushes pending summary rows)
+    if aggregator is not None:
+        try:
+            await aggregator.stop()
+        except Exception as e:
+            app_logger.error(f"Failed to stop attendance aggregator: {e}", exc_info=True)
+
     # Shutdown Face Recognition Service
     try:
         await shutdown_face_service()
@@ -20,6 +20,7 @@ from src.utils.logger import (
 from .router import router as llm_router
 from .email_router import router as email_router
 from .rag_router_v2 import router as rag_router
+from .rag_router import router as rag_chat_router
 from .tools_router import router as tools_router
 from src.application.controllers.hotel.upload_controller import router as hotel_upload_router
 
@@ -57,12 +58,35 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         app_logger.error(f"Failed to initialize LLM service: {e}", exc_info=True)
 
+    # Load embedding model and RAG indexes once, before the first request
+    try:
+        import asyncio
+        from src.application.services.llm.rag.runtime import get_rag_runtime
+
+        loaded = await asyncio.to_thread(get_rag_runtime().preload)
+        app_logger.info(f"RAG runtime preloaded tables: {loaded}")
+    except Exception as e:
+        app_logger.error(f"Failed to preload RAG runtime: {e}", exc_info=True)
+
     app_logger.info("LLM Service started successfully")
 
     yield  # Application is running
 
     # Shutdown
     app_logger.info("Shutting down LLM Service")
+
+    try:
+        from src.application.services.llm.async_llm_client import shutdown_async_llm_client
+        await shutdown_async_llm_client()
+    except Exception as e:
+        app_logger.error(f"Failed to close LLM client: {e}", exc_info=True)
+
+    try:
+        from src.application.services.llm.rag.runtime import shutdown_rag_runtime
+        shutdown_rag_runtime()
+    except Exception as e:
+        app_logger.error(f"Failed to close RAG runtime: {e}", exc_info=True)
+
     app_logger.info("LLM Service shut down successfully")
 
 
@@ -215,6 +239,7 @@ async def health_check() -> dict[str, Any]:
 
 app.include_router(llm_router, prefix="/api/llm", tags=["LLM Chat"])
 app.include_router(rag_router, prefix="/api/llm", tags=["RAG (PDF Q&A)"])
+app.include_router(rag_chat_router, prefix="/api/llm", tags=["RAG (PDF Q&A)"])
 app.include_router(email_router, prefix="/api/email", tags=["Email Service"])
 app.include_router(tools_router, prefix="/api/llm", tags=["LLM with Tools (DB Query)"])
 app.include_router(hotel_upload_router, prefix="/api", tags=["Hotel Upload Management"])
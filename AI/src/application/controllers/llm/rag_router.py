@@ -5,11 +5,16 @@ Query PDF documents để trả lời câu hỏi
 
 from fastapi import APIRouter, HTTPException
 from src.application.dtos.llm.rag_dto import RAGChatRequest, RAGChatResponse, RAGSource
+from .sse import sse_response
+import asyncio
 import uuid
-from pathlib import Path
+from contextlib import aclosing
 
 router = APIRouter()
 
+# Table của documents hotel (cùng table với /search và chat_with_images)
+RAG_TABLE = "rag_embeddings"
+
 # Global RAG components (lazy load)
 _rag_indexer = None
 _rag_query_engine = None
@@ -19,7 +24,7 @@ _rag_initialized = False
 def initialize_rag():
     """
     Initialize RAG components (lazy load)
-    Chỉ load khi cần thiết để tiết kiệm memory
+    Query engine dùng index đã load sẵn của RAG runtime (dùng chung trong process)
     """
     global _rag_indexer, _rag_query_engine, _rag_initialized
     
@@ -27,57 +32,11 @@ def initialize_rag():
         return
     
     try:
-        from src.application.services.llm.rag import RAGIndexer, PDFQueryEngine
-        from src.application.services.llm.rag.pdf_loader import PDFLoader
-        import os
-
-
-        # Get project root
-        project_root = Path(__file__).parent.parent.parent.parent.parent
-        pdf_folder = project_root / "folder_pdf"
-        chroma_dir = project_root / "chroma_db"
-        
-        print(f"[RAG] Initializing RAG system...")
-        print(f"[RAG] PDF folder: {pdf_folder}")
-        print(f"[RAG] ChromaDB dir: {chroma_dir}")
-        
-        # Check if index exists
-        if not chroma_dir.exists() or not any(chroma_dir.iterdir()):
-            print(f"[RAG] ChromaDB not found. Creating index from PDFs...")
-            
-            # Check PDF folder
-            if not pdf_folder.exists():
-                raise FileNotFoundError(f"PDF folder not found: {pdf_folder}")
-            
-            # Load and index PDFs
-            loader = PDFLoader(pdf_directory=str(pdf_folder))
-            print(f"[RAG] Loading PDF documents...")
-            documents = loader.load_documents()
-            print(f"[RAG] Loaded {len(documents)} documents")
-            
-            print(f"[RAG] Chunking documents...")
-            nodes = loader.chunk_documents(documents)
-            print(f"[RAG] Created {len(nodes)} nodes")
-            
-            # Create index
-            print(f"[RAG] Creating vector index (this may take a while)...")
-            _rag_indexer = RAGIndexer(
-                persist_dir=str(chroma_dir),
-                collection_name="android_pdf_docs"
-            )
-            _rag_indexer.create_index(nodes)
-            print(f"[RAG] Index created successfully!")
-        else:
-            # Load existing index
-            print(f"[RAG] Loading existing index from ChromaDB...")
-            _rag_indexer = RAGIndexer(
-                persist_dir=str(chroma_dir),
-                collection_name="android_pdf_docs"
-            )
-            _rag_indexer.load_index()
-            print(f"[RAG] Index loaded successfully!")
+        from src.application.services.llm.rag import PDFQueryEngine
+        from src.application.services.llm.rag.runtime import get_rag_runtime
         
-        # Create query engine
+        print(f"[RAG] Initializing RAG system on table '{RAG_TABLE}'...")
+        _rag_indexer = get_rag_runtime().indexer(RAG_TABLE)
         _rag_query_engine = PDFQueryEngine(_rag_indexer)
         
         _rag_initialized = True
@@ -118,7 +77,7 @@ async def chat_rag(request: RAGChatRequest):
     try:
         # Initialize RAG if not already done
         if not _rag_initialized:
-            initialize_rag()
+            await asyncio.to_thread(initialize_rag)
         
         conversation_id = request.conversation_id or f"rag-{uuid.uuid4()}"
         
@@ -129,15 +88,7 @@ async def chat_rag(request: RAGChatRequest):
         print(f"[RAG API] Query: {request.message}")
         result = _rag_query_engine.query_with_sources(request.message)
         
-        # Format sources
-        sources = []
-        for src in result.get("sources", []):
-            sources.append(RAGSource(
-                text=src.get("text", "")[:200] + "...",  # Preview
-                score=src.get("score", 0.0),
-                file_name=src.get("metadata", {}).get("file_name"),
-                page=src.get("metadata", {}).get("page_label")
-            ))
+        sources = _format_sources(result.get("sources", []))
         
         print(f"[RAG API] Answer generated with {len(sources)} sources")
         
@@ -147,11 +98,6 @@ async def chat_rag(request: RAGChatRequest):
             sources=sources
         )
         
-    except FileNotFoundError as e:
-        raise HTTPException(
-            status_code=404,
-            detail=f"PDF folder or ChromaDB not found: {str(e)}"
-        )
     except Exception as e:
         print(f"[RAG API] Error: {e}")
         import traceback
@@ -162,6 +108,87 @@ async def chat_rag(request: RAGChatRequest):
         )
 
 
+@router.post('/chat_rag/stream')
+async def chat_rag_stream(request: RAGChatRequest):
+    """
+    Streaming variant của /chat_rag (Server-Sent Events)
+    
+    Events: start, sources (sau khi retrieve), token (từng phần câu trả lời),
+    done (câu trả lời đầy đủ) hoặc error
+    """
+    if not _rag_initialized:
+        try:
+            await asyncio.to_thread(initialize_rag)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"RAG error: {str(e)}"
+            )
+    
+    conversation_id = request.conversation_id or f"rag-{uuid.uuid4()}"
+    return sse_response(conversation_id, _stream_rag_answer(request, conversation_id))
+
+
+async def _stream_rag_answer(request: RAGChatRequest, conversation_id: str):
+    """Retrieve sources, then stream the answer from the LLM"""
+    from src.application.services.llm.async_llm_client import get_async_llm_client
+    
+    generation = _rag_query_engine.cache_generation()
+    cached = await asyncio.to_thread(_rag_query_engine.cached_answer, request.message)
+    if cached is not None:
+        # Same events as a live answer, with the whole answer in one token
+        sources = _format_sources(cached["sources"])
+        yield "sources", {"sources": [source.model_dump() for source in sources]}
+        yield "token", {"content": cached["answer"]}
+        yield "done", {
+            "conversation_id": conversation_id,
+            "response": cached["answer"],
+            "sources": len(sources),
+            "cached": True
+        }
+        return
+    
+    nodes = await asyncio.to_thread(
+        _rag_query_engine.retrieve, request.message, request.top_k or 3
+    )
+    sources = _format_sources(_rag_query_engine.source_dicts(nodes))
+    yield "sources", {"sources": [source.model_dump() for source in sources]}
+    
+    prompt = _rag_query_engine.build_prompt(request.message, nodes)
+    parts = []
+    async with aclosing(get_async_llm_client().stream([{"role": "user", "content": prompt}])) as deltas:
+        async for delta in deltas:
+            parts.append(delta)
+            yield "token", {"content": delta}
+    
+    answer = "".join(parts)
+    await asyncio.to_thread(
+        _rag_query_engine.cache_answer,
+        request.message,
+        {"answer": answer, "sources": _rag_query_engine.source_dicts(nodes)},
+        nodes,
+        generation
+    )
+    yield "done", {
+        "conversation_id": conversation_id,
+        "response": answer,
+        "sources": len(sources)
+    }
+
+
+def _format_sources(raw_sources: list) -> list:
+    """Query engine source dicts -> RAGSource"""
+    sources = []
+    for src in raw_sources:
+        sources.append(RAGSource(
+            text=src.get("text", "")[:200] + "...",  # Preview
+            score=src.get("score", 0.0),
+            file_name=src.get("metadata", {}).get("file_name"),
+            page=src.get("metadata", {}).get("page_label")
+        ))
+    return sources
+
+
 @router.get('/rag/stats')
 async def rag_stats():
     """
@@ -174,13 +201,12 @@ async def rag_stats():
                 "message": "RAG system chưa được khởi tạo"
             }
         
-        count = _rag_indexer.get_collection_count()
+        from src.application.services.llm.rag.indexer import EMBED_MODEL_NAME
         
         return {
             "initialized": True,
-            "total_chunks": count,
-            "collection_name": "android_pdf_docs",
-            "embedding_model": "sentence-transformers/all-MiniLM-L6-v2"
+            "table_name": _rag_indexer.table_name,
+            "embedding_model": EMBED_MODEL_NAME
         }
         
     except Exception as e:
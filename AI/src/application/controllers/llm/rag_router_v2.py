@@ -79,6 +79,10 @@ async def upload_and_index_pdf(
         
         print(f"[RAG Upload] ✅ Flow completed: {result}")
         
+        # Cached answers were built from the old chunks
+        from src.application.services.llm.semantic_cache import get_semantic_cache
+        get_semantic_cache().invalidate(result['table_name'])
+        
         return RAGUploadResponse(
             status="success",
             message=f"File '{file.filename}' indexed successfully",
@@ -114,38 +118,26 @@ async def search_documents(request: RAGSearchRequest):
         print(f"[RAG Search] Top K: {request.top_k}")
         print(f"[RAG Search] Table: {request.table_name}")
         
-        from src.application.services.llm.rag import RAGIndexer
+        from src.application.services.llm.rag.runtime import get_rag_runtime
         
-        # Initialize indexer
-        indexer = RAGIndexer(
-            connection_string=settings.postgres_chat_url,
+        # Index, vector store pool và retriever dùng chung giữa các request;
+        # chỉ embed query + vector search (không gọi LLM)
+        print(f"[RAG Search] Searching...")
+        nodes = await asyncio.to_thread(
+            get_rag_runtime().retrieve,
+            request.query,
             table_name=request.table_name,
-            embed_dim=384
-        )
-        
-        # Load index
-        print(f"[RAG Search] Loading index from PGVector...")
-        indexer.load_index()
-        
-        # Get query engine
-        query_engine = indexer.get_query_engine(
-            similarity_top_k=request.top_k,
-            response_mode="compact"
+            top_k=request.top_k
         )
         
-        # Search (không dùng LLM, chỉ retrieve)
-        print(f"[RAG Search] Searching...")
-        response = query_engine.query(request.query)
-        
         # Format results
         results = []
-        if hasattr(response, 'source_nodes'):
-            for node in response.source_nodes:
-                results.append(RAGSearchResult(
-                    text=node.text,
-                    score=node.score if hasattr(node, 'score') else 0.0,
-                    metadata=node.metadata if hasattr(node, 'metadata') else {}
-                ))
+        for node in nodes:
+            results.append(RAGSearchResult(
+                text=node.text,
+                score=node.score if node.score is not None else 0.0,
+                metadata=node.metadata or {}
+            ))
         
         print(f"[RAG Search] ✅ Found {len(results)} results")
         
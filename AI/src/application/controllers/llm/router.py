@@ -6,7 +6,7 @@ from fastapi import APIRouter, HTTPException
 from src.application.dtos.llm.chat_dto import ChatRequest, ChatResponse
 from src.application.dtos.llm.chat_image_dto import ChatWithImageSearchRequest, ChatWithImageSearchResponse
 from src.utils.logger import app_logger
-from langchain_core.messages import HumanMessage
+from .sse import sse_response
 import uuid
 
 router = APIRouter()
@@ -38,29 +38,15 @@ async def chat(request: ChatRequest):
 
     try:
         # Lazy import to catch initialization errors
-        from src.application.services.llm.graph import chat_graph
-        import asyncio
+        from src.application.services.llm.graph import run_chat_turn
         
         conversation_id = request.conversation_id or str(uuid.uuid4())
 
-        # PostgresSaver doesn't support async, use sync invoke in thread
-        result = await asyncio.to_thread(
-            chat_graph.invoke,
-            {
-                "messages": [HumanMessage(content=request.message)],
-                "conversation_id": conversation_id
-            },
-            config= {
-                "configurable": {
-                    "thread_id": conversation_id
-                }
-            }
-        )
-        
-        ai_message = result["messages"][-1]
+        # Async completion; only checkpoint I/O runs in worker threads
+        response = await run_chat_turn(conversation_id, request.message)
 
         return ChatResponse(
-            response=ai_message.content,
+            response=response,
             conversation_id=conversation_id
         )
     
@@ -70,6 +56,57 @@ async def chat(request: ChatRequest):
             detail= f"LLM error: {str(e)}"
         )
 
+@router.post('/chat/stream')
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming variant của /chat (Server-Sent Events)
+    
+    Events: start, token (từng phần câu trả lời), done (câu trả lời đầy đủ)
+    hoặc error. Conversation được lưu vào checkpointer khi stream kết thúc.
+    """
+    try:
+        from src.application.services.llm.graph import stream_chat_turn
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"LLM error: {str(e)}"
+        )
+
+    conversation_id = request.conversation_id or str(uuid.uuid4())
+    return sse_response(conversation_id, stream_chat_turn(conversation_id, request.message))
+
+@router.get('/chat/context/stats')
+async def chat_context_stats():
+    """
+    Context window settings, summarization cost and background compactions
+    """
+    try:
+        from src.application.services.llm.context_window import get_context_window, get_summarizer
+        from src.application.services.llm.graph import pending_compactions
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"LLM error: {str(e)}"
+        )
+
+    window = get_context_window()
+    return {
+        'token_budget': window.token_budget,
+        'summary_trigger_tokens': window.trigger_tokens,
+        'summary_keep_tokens': window.keep_tokens,
+        'tokenizer': window.counter.encoding_name if window.counter.exact else 'estimate',
+        'pending_compactions': pending_compactions(),
+        'summarizer': get_summarizer().stats,
+    }
+
+@router.get('/cache/stats')
+async def semantic_cache_stats():
+    """
+    Semantic cache hit rate, saved tokens and entries per scope
+    """
+    from src.application.services.llm.semantic_cache import get_semantic_cache
+    return get_semantic_cache().stats
+
 @router.post('/chat2testEimg', response_model=ChatWithImageSearchResponse)
 async def chat_with_image_search(request: ChatWithImageSearchRequest):
     """
@@ -0,0 +1,142 @@
+"""
+Server-Sent Events helpers for the streaming chat endpoints
+
+Chat services yield (event, data) tuples; the helpers here format them as
+SSE frames and wrap them in a StreamingResponse that proxies do not buffer.
+Every stream opens with a `start` event sent before any model or database
+work, so the client gets its first byte immediately, and ends with either
+`done` or `error`. A client that disconnects mid-stream gets the chat
+generator closed right after the response ends, so it releases its LLM
+slot without waiting for garbage collection.
+
+Events:
+    start        {"conversation_id"}
+    token        {"content"}                          LLM content delta
+    tool_call    {"id", "name", "args"}               tool execution started
+    tool_result  {"id", "name", "success", "preview"} tool execution finished
+    sources      {"sources": [RAGSource, ...]}        retrieved documents
+    done         {"conversation_id", "response", ...}
+    error        {"detail"}
+"""
+import asyncio
+import json
+import logging
+import threading
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Tuple
+
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+logger = logging.getLogger(__name__)
+
+SSE_MEDIA_TYPE = "text/event-stream"
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    # nginx buffers proxied responses unless told otherwise
+    "X-Accel-Buffering": "no",
+}
+
+ChatEvent = Tuple[str, Dict[str, Any]]
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """One SSE frame with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def sse_response(conversation_id: str, events: AsyncIterator[ChatEvent]) -> StreamingResponse:
+    """
+    Stream chat events as SSE
+
+    Args:
+        conversation_id: Sent in the leading `start` event
+        events: (event, data) tuples from a chat service
+
+    Returns:
+        StreamingResponse with text/event-stream body
+    """
+    frames = _frames(conversation_id, events)
+
+    async def close_frames():
+        # A coroutine function, so Starlette awaits it instead of running
+        # the bound aclose() in a thread and dropping its coroutine
+        await frames.aclose()
+
+    return StreamingResponse(
+        frames,
+        media_type=SSE_MEDIA_TYPE,
+        headers=SSE_HEADERS,
+        # Runs after a disconnect too; a finished stream is already closed
+        background=BackgroundTask(close_frames),
+    )
+
+
+async def _frames(conversation_id: str, events: AsyncIterator[ChatEvent]) -> AsyncIterator[str]:
+    yield sse_event("start", {"conversation_id": conversation_id})
+    try:
+        async with aclosing(events):
+            async for event, data in events:
+                yield sse_event(event, data)
+    except Exception as e:
+        # Headers are already sent; report the failure in-band
+        logger.error(f"❌ Chat stream {conversation_id} failed: {e}", exc_info=True)
+        yield sse_event("error", {"detail": str(e)})
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+async def iterate_in_thread(make_iter: Callable[..., Iterator[Any]], *args: Any) -> AsyncIterator[Any]:
+    """
+    Consume a blocking iterator (e.g. a sync LangGraph stream) from async code
+
+    The iterator runs in a worker thread and hands items to the event loop
+    as they are produced. When the consumer stops early (client
+    disconnect), the worker stops after its current item.
+
+    Args:
+        make_iter: Called in the worker thread to create the iterator
+        *args: Arguments for make_iter
+
+    Yields:
+        Items of the iterator; its exceptions are re-raised here
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+    stop = threading.Event()
+
+    def put(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # Event loop already closed
+            stop.set()
+
+    def run():
+        try:
+            for item in make_iter(*args):
+                if stop.is_set():
+                    break
+                put(item)
+        except BaseException as e:
+            put(_Failure(e))
+        finally:
+            put(finished)
+
+    loop.run_in_executor(None, run)
+    try:
+        while True:
+            item = await queue.get()
+            if item is finished:
+                break
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
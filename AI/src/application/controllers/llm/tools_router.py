@@ -5,6 +5,7 @@ API endpoint cho chat với database query tools
 from fastapi import APIRouter, HTTPException
 from src.application.dtos.llm.chat_dto import ChatRequest, ChatResponse
 from langchain_core.messages import HumanMessage
+from .sse import iterate_in_thread, sse_response
 import uuid
 
 router = APIRouter()
@@ -81,6 +82,36 @@ async def chat_with_tools(request: ChatRequest):
         )
 
 
+@router.post('/chat_with_tools/stream')
+async def chat_with_tools_stream(request: ChatRequest):
+    """
+    Streaming variant của /chat_with_tools (Server-Sent Events)
+    
+    Events: start, tool_call (tool bắt đầu chạy), tool_result (tool xong),
+    token (từng phần câu trả lời), done hoặc error. Mỗi bước của graph
+    vẫn được lưu qua PostgresSaver checkpointer như khi invoke.
+    """
+    try:
+        from src.application.services.llm.graph_with_tools_sync import (
+            get_chat_graph_with_tools,
+            iter_chat_events,
+        )
+        graph = get_chat_graph_with_tools()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"LLM error: {str(e)}"
+        )
+    
+    conversation_id = request.conversation_id or str(uuid.uuid4())
+    
+    # Sync graph (PostgresSaver) runs in a worker thread
+    return sse_response(
+        conversation_id,
+        iterate_in_thread(iter_chat_events, graph, conversation_id, request.message)
+    )
+
+
 @router.get('/tools')
 async def list_tools():
     """
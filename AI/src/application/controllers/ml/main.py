@@ -42,6 +42,8 @@ async def lifespan(app: FastAPI):
     configure_third_party_loggers()
 
     # Initialize ML models
+    from src.application.ml_models.model_registry import get_model_registry
+    registry = get_model_registry()
     try:
         from src.application.services.ml.churn_predictor import get_churn_predictor
         predictor = get_churn_predictor()
@@ -49,12 +51,56 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         app_logger.error(f"Failed to load ML models: {e}", exc_info=True)
 
+    # Hot-swap new model versions dropped into the model directory
+    if settings.ml_model_watch_interval_seconds > 0:
+        await registry.start_watching(settings.ml_model_watch_interval_seconds)
+
+    # Connect guest history loader (CLV falls back to mock history without DB)
+    from src.application.services.ml.guest_history import get_guest_history_loader
+    history_loader = get_guest_history_loader()
+    try:
+        await history_loader.initialize()
+    except Exception as e:
+        app_logger.warning(f"Guest history database unavailable, using mock history: {e}")
+
+    # Shared guest features for churn, CLV and recommendations (Redis + booking events)
+    from src.application.services.ml.feature_store import get_feature_store
+    feature_store = get_feature_store()
+    await feature_store.start()
+
+    # Serve precomputed service recommendations (online scoring without DB)
+    from src.application.services.ml.recommendation_store import get_recommendation_store
+    recommendation_store = get_recommendation_store()
+    try:
+        await recommendation_store.initialize()
+    except Exception as e:
+        app_logger.warning(f"Recommendation store unavailable, scoring online: {e}")
+
+    # Live room availability for room recommendations (mock rooms without DB)
+    from src.application.services.ml.room_inventory import get_room_inventory_loader
+    room_inventory = get_room_inventory_loader()
+    try:
+        await room_inventory.initialize()
+    except Exception as e:
+        app_logger.warning(f"Room inventory database unavailable, using mock rooms: {e}")
+
+    # Precompute current prices and refresh them when they expire
+    from src.application.services.ml.price_cache import get_price_cache
+    price_cache = get_price_cache()
+    await price_cache.start()
+
     app_logger.info("ML Service started successfully")
 
     yield  # Application is running
 
     # Shutdown
     app_logger.info("Shutting down ML Service")
+    await registry.stop_watching()
+    await price_cache.stop()
+    await feature_store.stop()
+    await history_loader.shutdown()
+    await recommendation_store.shutdown()
+    await room_inventory.shutdown()
     app_logger.info("ML Service shut down successfully")
 
 
@@ -2,9 +2,10 @@
 """
 ML Service Router
 """
-from typing import List
+from typing import AsyncIterator, List
+from collections import Counter
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 
 from src.application.dtos.ml.churn_dto import (
     ChurnPredictRequest,
@@ -29,6 +30,7 @@ from src.application.dtos.ml.pricing_dto import (
     CurrentPriceResponse,
 )
 from src.application.services.ml.pricing_optimizer import get_pricing_optimizer
+from src.application.services.ml.price_cache import get_price_cache
 
 # Add CLV imports
 from src.application.dtos.ml.clv_dto import (
@@ -42,6 +44,18 @@ from src.application.services.ml.clv_calculator import get_clv_calculator
 from src.application.services.ml.recommender import get_recommender
 from src.application.services.ml.churn_predictor import get_churn_predictor
 from src.application.ml_models.model_registry import get_model_registry
+from src.application.controllers.ml.streaming import (
+    NDJSON_MEDIA_TYPE,
+    NDJSONStreamingResponse,
+    DEFAULT_MICRO_BATCH_SIZE,
+    MAX_MICRO_BATCH_SIZE,
+    NDJSONLineError,
+    iter_ndjson_lines,
+    iter_micro_batches,
+    ndjson_chunk,
+    error_record,
+    summary_record,
+)
 from src.utils.logger import app_logger
 
 router = APIRouter()
@@ -105,6 +119,11 @@ async def recommend_rooms(request: RoomRecommendationRequest) -> RoomRecommendat
         
         return response
         
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         app_logger.error(f"Room recommendation failed: {e}", exc_info=True)
         raise HTTPException(
@@ -173,13 +192,9 @@ async def predict_churn_batch(request: ChurnBatchPredictRequest) -> ChurnBatchPr
         predictor = get_churn_predictor()
         
         # In production, fetch booking data from database
-        # For now, generate mock predictions
-        predictions = []
-        high_risk = medium_risk = low_risk = 0
-        
-        for booking_id in request.booking_ids:
-            # Mock feature generation - in production, fetch from DB
-            mock_features = {
+        # For now, generate mock features
+        bookings = [
+            {
                 'booking_id': booking_id,
                 'features': {
                     'booking_lead_time_days': 14,
@@ -192,17 +207,16 @@ async def predict_churn_batch(request: ChurnBatchPredictRequest) -> ChurnBatchPr
                     'loyalty_tier': 'gold'
                 }
             }
-            
-            batch_predictions = await predictor.predict_batch([mock_features])
-            
-            for pred in batch_predictions:
-                predictions.append(pred)
-                if pred.risk_level == 'high':
-                    high_risk += 1
-                elif pred.risk_level == 'medium':
-                    medium_risk += 1
-                else:
-                    low_risk += 1
+            for booking_id in request.booking_ids
+        ]
+        
+        # Single vectorized scoring pass over all bookings
+        predictions = await predictor.predict_batch(bookings, explain=request.include_factors)
+        
+        risk_counts = Counter(pred.risk_level for pred in predictions)
+        high_risk = risk_counts['high']
+        medium_risk = risk_counts['medium']
+        low_risk = risk_counts['low']
         
         return ChurnBatchPredictResponse(
             predictions=predictions,
@@ -220,6 +234,101 @@ async def predict_churn_batch(request: ChurnBatchPredictRequest) -> ChurnBatchPr
         )
 
 
+@router.post(
+    "/churn/batch/stream",
+    response_class=NDJSONStreamingResponse,
+    summary="Stream churn predictions for an NDJSON upload",
+    description=(
+        "Accepts an NDJSON body with one {booking_id, features} object per line "
+        "and streams predictions back as NDJSON in micro-batches"
+    ),
+    openapi_extra={"requestBody": {"content": {NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}}}}},
+)
+async def predict_churn_batch_stream(
+    request: Request,
+    batch_size: int = Query(DEFAULT_MICRO_BATCH_SIZE, ge=1, le=MAX_MICRO_BATCH_SIZE),
+    include_factors: bool = Query(False, description="Add top risk and protective factors per booking"),
+) -> NDJSONStreamingResponse:
+    """
+    Streaming churn prediction for large scoring jobs
+
+    Each input line is scored in micro-batches of `batch_size` with the
+    vectorized batch path. Output lines are BatchPrediction objects,
+    {"line", "error"} objects for rejected input lines, and a final
+    {"done": true, ...} summary. Only one micro-batch is held in memory.
+    """
+    return NDJSONStreamingResponse(_stream_churn_predictions(request, batch_size, include_factors))
+
+
+async def _stream_churn_predictions(
+    request: Request, batch_size: int, include_factors: bool = False
+) -> AsyncIterator[bytes]:
+    """Score NDJSON bookings micro-batch by micro-batch"""
+    predictor = get_churn_predictor()
+    total_processed = 0
+    total_errors = 0
+    risk_counts: Counter = Counter()
+
+    async for batch in iter_micro_batches(iter_ndjson_lines(request), batch_size):
+        bookings = []
+        line_numbers = []
+        errors = []
+
+        for line_no, item in batch:
+            if isinstance(item, NDJSONLineError):
+                errors.append(error_record(line_no, str(item)))
+            elif (
+                not isinstance(item, dict)
+                or item.get('booking_id') is None
+                or not isinstance(item.get('features'), dict)
+            ):
+                errors.append(error_record(line_no, "Expected an object with booking_id and features"))
+            else:
+                bookings.append({
+                    'booking_id': str(item['booking_id']),
+                    'guest_id': item.get('guest_id'),
+                    'features': item['features']
+                })
+                line_numbers.append(line_no)
+
+        # One vectorized schema check per micro-batch; invalid lines become errors
+        if bookings:
+            _, feature_errors = predictor.validate_batch([b['features'] for b in bookings])
+            valid = [error is None for error in feature_errors]
+            errors.extend(
+                error_record(line_no, f"Invalid features: {error}")
+                for line_no, error in zip(line_numbers, feature_errors) if error is not None
+            )
+            bookings = [b for b, ok in zip(bookings, valid) if ok]
+            line_numbers = [line_no for line_no, ok in zip(line_numbers, valid) if ok]
+
+        records = []
+        if bookings:
+            try:
+                predictions = await predictor.predict_batch(bookings, explain=include_factors)
+                risk_counts.update(pred.risk_level for pred in predictions)
+                records = [pred.model_dump(exclude_none=True) for pred in predictions]
+            except Exception as e:
+                app_logger.error(f"Streaming churn micro-batch failed: {e}", exc_info=True)
+                errors.extend(error_record(line_no, f"Prediction failed: {e}") for line_no in line_numbers)
+
+        total_processed += len(records)
+        total_errors += len(errors)
+        yield ndjson_chunk(records + errors)
+
+    app_logger.info(
+        "Streaming churn prediction completed",
+        extra={"total_processed": total_processed, "total_errors": total_errors}
+    )
+    yield ndjson_chunk([summary_record(
+        total_processed,
+        total_errors,
+        high_risk_count=risk_counts['high'],
+        medium_risk_count=risk_counts['medium'],
+        low_risk_count=risk_counts['low'],
+    )])
+
+
 # ========== Model Management Endpoints ==========
 
 @router.get(
@@ -261,6 +370,24 @@ async def ml_health_check():
     }
 
 
+@router.get(
+    "/batching/stats",
+    summary="Micro-batching statistics",
+    description="Batch-size and wait-time histograms of the request coalescing layer"
+)
+async def micro_batching_stats():
+    """Coalescing stats per predictor (null when batching is disabled)"""
+    batchers = {
+        "churn": get_churn_predictor().batcher,
+        "clv": get_clv_calculator().batcher,
+        "recommend_services": get_recommender().batcher,
+    }
+    return {
+        name: batcher.stats if batcher is not None else None
+        for name, batcher in batchers.items()
+    }
+
+
 
 
 # ========== Dynamic Pricing Endpoints ==========
@@ -301,17 +428,22 @@ async def optimize_pricing(
     description="Get current optimized price for a room type"
 )
 async def get_current_pricing(
-    request: CurrentPriceRequest
+    request: CurrentPriceRequest,
+    response: Response
 ) -> CurrentPriceResponse:
     """
     Get current optimized price for a room type
+    
+    Served from the precomputed price cache; the quote's valid_until is
+    also exposed as Cache-Control max-age for the polling frontend.
     """
     try:
-        optimizer = get_pricing_optimizer()
+        price_cache = get_price_cache()
         
-        response = await optimizer.get_current_price(request)
+        quote = await price_cache.get_current_price(request)
+        response.headers["Cache-Control"] = f"public, max-age={price_cache.seconds_until_expiry()}"
         
-        return response
+        return quote
         
     except Exception as e:
         app_logger.error(f"Get current pricing failed: {e}", exc_info=True)
@@ -410,6 +542,98 @@ async def predict_clv_batch(request: CLVBatchPredictRequest) -> CLVBatchPredictR
         )
 
 
+@router.post(
+    "/clv/batch/stream",
+    response_class=NDJSONStreamingResponse,
+    summary="Stream CLV predictions for an NDJSON upload",
+    description=(
+        "Accepts an NDJSON body with one {guest_id} object per line "
+        "and streams CLV predictions back as NDJSON in micro-batches"
+    ),
+    tags=["CLV"],
+    openapi_extra={"requestBody": {"content": {NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}}}}},
+)
+async def predict_clv_batch_stream(
+    request: Request,
+    time_horizon_months: int = Query(12, ge=1, le=60),
+    batch_size: int = Query(DEFAULT_MICRO_BATCH_SIZE, ge=1, le=MAX_MICRO_BATCH_SIZE),
+) -> NDJSONStreamingResponse:
+    """
+    Streaming CLV prediction for portfolio-wide scoring
+
+    Output lines are CLVBatchPrediction objects, {"line", "error"} objects
+    for rejected or failed guests, and a final {"done": true, ...} summary
+    with running totals. Only one micro-batch is held in memory.
+    """
+    return NDJSONStreamingResponse(
+        _stream_clv_predictions(request, time_horizon_months, batch_size)
+    )
+
+
+async def _stream_clv_predictions(
+    request: Request,
+    time_horizon_months: int,
+    batch_size: int,
+) -> AsyncIterator[bytes]:
+    """Predict CLV for NDJSON guests micro-batch by micro-batch"""
+    calculator = get_clv_calculator()
+    total_processed = 0
+    total_errors = 0
+    total_clv = 0.0
+    segment_counts: Counter = Counter()
+
+    async for batch in iter_micro_batches(iter_ndjson_lines(request), batch_size):
+        guests = []
+        errors = []
+
+        for line_no, item in batch:
+            if isinstance(item, NDJSONLineError):
+                errors.append(error_record(line_no, str(item)))
+            elif not isinstance(item, dict) or item.get('guest_id') is None:
+                errors.append(error_record(line_no, "Expected an object with guest_id"))
+            else:
+                guests.append((line_no, str(item['guest_id'])))
+
+        records = []
+        if guests:
+            # Micro-batch size is bounded by the query parameter, not the
+            # 100-guest limit of the JSON batch endpoint
+            batch_request = CLVBatchPredictRequest.model_construct(
+                guest_ids=[guest_id for _, guest_id in guests],
+                time_horizon_months=time_horizon_months,
+            )
+            try:
+                response = await calculator.predict_clv_batch(batch_request)
+                predicted = {pred.guest_id for pred in response.predictions}
+                for pred in response.predictions:
+                    total_clv += pred.predicted_clv
+                    segment_counts[pred.segment] += 1
+                records = [pred.model_dump() for pred in response.predictions]
+                errors.extend(
+                    error_record(line_no, f"Prediction failed for guest {guest_id}")
+                    for line_no, guest_id in guests
+                    if guest_id not in predicted
+                )
+            except Exception as e:
+                app_logger.error(f"Streaming CLV micro-batch failed: {e}", exc_info=True)
+                errors.extend(error_record(line_no, f"Prediction failed: {e}") for line_no, _ in guests)
+
+        total_processed += len(records)
+        total_errors += len(errors)
+        yield ndjson_chunk(records + errors)
+
+    app_logger.info(
+        f"Streaming CLV prediction completed: {total_processed} guests processed, "
+        f"Total CLV: {total_clv:,.0f} VND"
+    )
+    yield ndjson_chunk([summary_record(
+        total_processed,
+        total_errors,
+        total_clv=total_clv,
+        segment_counts=dict(segment_counts),
+    )])
+
+
 @router.get(
     "/clv/segments",
     summary="Get CLV segment definitions",
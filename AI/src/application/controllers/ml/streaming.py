@@ -0,0 +1,164 @@
+"""
+NDJSON streaming helpers for ML batch endpoints
+
+Request bodies are read incrementally from the ASGI receive channel and
+split into lines, so a client can upload hundreds of thousands of rows
+without the service buffering the whole payload. Responses are produced
+as NDJSON micro-batches from an async generator; the server only pulls
+the next chunk once the previous one has been written to the socket,
+which keeps memory bounded to one micro-batch on both sides.
+"""
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, List, Tuple
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from starlette.requests import ClientDisconnect
+from starlette.types import Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+DEFAULT_MICRO_BATCH_SIZE = 500
+MAX_MICRO_BATCH_SIZE = 5000
+MAX_LINE_BYTES = 64 * 1024
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for bodies that are produced while the request is read
+
+    The stock StreamingResponse listens for client disconnects by reading
+    from receive() in parallel, which would steal request body messages
+    from the generator. Here the body iterator is the only reader; a
+    disconnect surfaces as ClientDisconnect from request.stream() or as
+    an OSError on send.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except (ClientDisconnect, OSError):
+            logger.warning("⚠️ Client disconnected during NDJSON stream")
+            return
+
+        if self.background is not None:
+            await self.background()
+
+
+class NDJSONLineError(ValueError):
+    """Raised for a single malformed NDJSON line"""
+
+    def __init__(self, line_no: int, message: str):
+        super().__init__(message)
+        self.line_no = line_no
+
+
+async def iter_ndjson_lines(
+    request: Request,
+    max_line_bytes: int = MAX_LINE_BYTES,
+) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Parse an NDJSON request body as it arrives
+
+    Args:
+        request: Incoming request with a (possibly chunked) NDJSON body
+        max_line_bytes: Upper bound for a single line, guards the buffer
+
+    Yields:
+        (line_no, parsed_object) tuples; blank lines are skipped.
+        Lines that fail to parse are yielded as (line_no, NDJSONLineError).
+    """
+    buffer = b""
+    line_no = 0
+    skipping = False
+
+    async for chunk in request.stream():
+        if skipping:
+            # Drop the rest of an oversized line up to its newline
+            if b"\n" not in chunk:
+                continue
+            chunk = chunk.split(b"\n", 1)[1]
+            skipping = False
+
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+
+        for raw in lines:
+            line_no += 1
+            parsed = _parse_line(line_no, raw)
+            if parsed is not None:
+                yield line_no, parsed
+
+        if len(buffer) > max_line_bytes:
+            line_no += 1
+            yield line_no, NDJSONLineError(line_no, f"Line exceeds {max_line_bytes} bytes")
+            buffer = b""
+            skipping = True
+
+    if buffer.strip():
+        line_no += 1
+        parsed = _parse_line(line_no, buffer)
+        if parsed is not None:
+            yield line_no, parsed
+
+
+def _parse_line(line_no: int, raw: bytes) -> Any:
+    """Decode one NDJSON line, returning None for blank lines"""
+    raw = raw.strip()
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        return NDJSONLineError(line_no, f"Invalid JSON: {e}")
+
+
+async def iter_micro_batches(
+    lines: AsyncIterator[Tuple[int, Any]],
+    batch_size: int,
+) -> AsyncIterator[List[Tuple[int, Any]]]:
+    """
+    Group parsed lines into lists of at most batch_size items
+
+    Args:
+        lines: Output of iter_ndjson_lines
+        batch_size: Maximum number of lines per micro-batch
+
+    Yields:
+        Lists of (line_no, parsed_object) tuples
+    """
+    batch: List[Tuple[int, Any]] = []
+    async for item in lines:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ndjson_chunk(records: List[Dict[str, Any]]) -> bytes:
+    """Serialize records into one NDJSON chunk"""
+    if not records:
+        return b""
+    return ("\n".join(json.dumps(r, default=str) for r in records) + "\n").encode("utf-8")
+
+
+def error_record(line_no: int, message: str) -> Dict[str, Any]:
+    """Per-line error emitted in place of a prediction"""
+    return {"line": line_no, "error": message}
+
+
+def summary_record(total_processed: int, total_errors: int, **extra: Any) -> Dict[str, Any]:
+    """Trailing record so clients can detect truncated streams"""
+    return {
+        "done": True,
+        "total_processed": total_processed,
+        "total_errors": total_errors,
+        **extra,
+    }
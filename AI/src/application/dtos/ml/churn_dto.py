@@ -68,6 +68,7 @@ class ChurnPredictRequest(BaseModel):
 class ChurnBatchPredictRequest(BaseModel):
     """" Request for batch churn prediction """
     booking_ids: List[str] = Field(..., min_length=1, max_length=100)
+    include_factors: bool = Field(default=False, description="Add top risk and protective factors per booking")
 
 class RiskFactor(BaseModel):
     """ Risk factor contributing to churn """
@@ -101,6 +102,8 @@ class BatchPrediction(BaseModel):
     booking_id: str
     churn_probability: float = Field(..., ge=0, le=1)
     risk_level: Literal["low", "medium", "high"]
+    risk_factors: Optional[List[RiskFactor]] = None
+    protective_factors: Optional[List[RiskFactor]] = None
 
 class ChurnBatchPredictResponse(BaseModel):
     """ Response for batch churn prediction """
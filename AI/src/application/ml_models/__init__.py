@@ -1,3 +1,8 @@
-from src.application.ml_models.model_registry import ModelRegistry, get_model_registry
+from src.application.ml_models.model_registry import (
+    CompiledTreePredictor,
+    ModelRegistry,
+    get_model_registry,
+    save_model_artifact,
+)
 
-__all__ = ["ModelRegistry", "get_model_registry"]
\ No newline at end of file
+__all__ = ["CompiledTreePredictor", "ModelRegistry", "get_model_registry", "save_model_artifact"]
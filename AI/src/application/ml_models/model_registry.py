@@ -1,48 +1,328 @@
 """
 Model Registry for ML Models
+
+Artifacts live in a model directory as ``<model_name>_v<version>.pkl``
+(the naming used by the training scripts). An optional ``registry.json``
+manifest in the same directory pins versions explicitly and stands in for
+the MLflow model registry when the tracking server is not reachable.
+
+The registry polls the directory and hot-swaps new versions: the new
+artifact is fully loaded (and optionally compiled) off the event loop,
+then the reference is replaced in one assignment. In-flight requests keep
+using the model object they already hold, so no request is dropped.
+
+Artifacts are loaded with joblib ``mmap_mode`` so that numpy arrays in
+uncompressed pickles are memory-mapped and shared between uvicorn workers
+through the page cache.
 """
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import datetime
 from pathlib import Path
+import asyncio
+import json
 import logging
+import os
+import re
+import threading
+import time
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+ARTIFACT_PATTERN = re.compile(
+    r'^(?P<name>[A-Za-z0-9_]+?)_v(?P<version>\d+(?:\.\d+)*)\.(?:pkl|joblib)$'
+)
+MANIFEST_FILENAME = 'registry.json'
+
+ModelListener = Callable[[str, Any, Dict], None]
+
+
+def parse_version(version: str) -> Tuple[int, ...]:
+    """Turn '1.10' into (1, 10) so versions sort numerically"""
+    try:
+        return tuple(int(part) for part in str(version).split('.'))
+    except ValueError:
+        return (0,)
+
+
+def save_model_artifact(model: Any, model_path: Path) -> Path:
+    """
+    Write a model artifact atomically
+
+    The artifact is dumped to a temporary file in the same directory and
+    renamed into place, so a watching registry never sees a partial file.
+
+    Args:
+        model: Model object to persist
+        model_path: Final artifact path
+
+    Returns:
+        The artifact path
+    """
+    import joblib
+
+    model_path = Path(model_path)
+    tmp_path = model_path.with_name(f".{model_path.name}.tmp")
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, model_path)
+    return model_path
+
+
+def _current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux only)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# ========== Compiled Tree Predictors ==========
+
+class BoosterClassifier:
+    """
+    Binary classifier interface over a raw LightGBM booster
+
+    Trainers that use the native lgb.train API (binary Dataset files,
+    warm starts) save this wrapper, so services can keep calling
+    predict_proba as they do on sklearn estimators.
+    """
+
+    def __init__(self, booster: Any, threshold: float = 0.5):
+        self.booster_ = booster
+        self.threshold = threshold
+        self.classes_ = np.array([0, 1])
+
+    @property
+    def n_features_in_(self) -> int:
+        return self.booster_.num_feature()
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        """Class probabilities of shape (N, 2)"""
+        proba = np.asarray(self.booster_.predict(X), dtype=np.float64)
+        return np.vstack((1 - proba, proba)).T
+
+    def predict(self, X: Any) -> np.ndarray:
+        """Class labels at the decision threshold"""
+        return (self.booster_.predict(X) >= self.threshold).astype(np.int64)
+
+
+class CompiledTreePredictor:
+    """
+    Low-latency predictor over a raw XGBoost/LightGBM booster
+
+    Skips the sklearn wrapper's input validation and pins the booster to a
+    single thread, which is what matters for single-row requests where
+    thread fan-out costs more than the trees themselves. Exposes the same
+    predict/predict_proba interface as the wrapped estimator.
+    """
+
+    def __init__(self, model: Any, backend: str, booster: Any, is_classifier: bool):
+        self.model = model
+        self.backend = backend
+        self.booster = booster
+        self.is_classifier = is_classifier
+        self.classes_ = getattr(model, 'classes_', np.array([0, 1]))
+        self._iteration_range = (0, 0)
+
+        if backend == 'xgboost':
+            try:
+                self._iteration_range = (0, int(model.best_iteration) + 1)
+            except (AttributeError, TypeError, ValueError):
+                pass
+
+    @classmethod
+    def compile(cls, model: Any) -> Optional['CompiledTreePredictor']:
+        """
+        Build a compiled predictor, or None for unsupported model types
+
+        Args:
+            model: XGBoost/LightGBM sklearn estimator or raw booster
+        """
+        module = type(model).__module__.split('.')[0]
+
+        if module == 'xgboost':
+            booster = model.get_booster() if hasattr(model, 'get_booster') else model
+            booster = booster.copy()
+            booster.set_param({'nthread': 1})
+            is_classifier = hasattr(model, 'predict_proba')
+            return cls(model, 'xgboost', booster, is_classifier)
+
+        if isinstance(model, BoosterClassifier):
+            return cls(model, 'lightgbm', model.booster_, True)
+
+        if module == 'lightgbm':
+            booster = getattr(model, 'booster_', model)
+            is_classifier = hasattr(model, 'predict_proba')
+            return cls(model, 'lightgbm', booster, is_classifier)
+
+        return None
+
+    def _raw_predict(self, X: Any) -> np.ndarray:
+        if self.backend == 'xgboost':
+            return self.booster.inplace_predict(X, iteration_range=self._iteration_range)
+        return self.booster.predict(X, num_threads=1)
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        """Class probabilities, shaped like the sklearn estimator's output"""
+        proba = self._raw_predict(X)
+        if proba.ndim == 2:
+            return proba
+        return np.vstack((1 - proba, proba)).T
+
+    def predict(self, X: Any) -> np.ndarray:
+        """Regression values, or class labels for classifiers"""
+        if not self.is_classifier:
+            return self._raw_predict(X)
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
 
 class ModelRegistry:
-    """Centralized model loading and versioning"""
-    
-    def __init__(self):
+    """Centralized model loading, versioning and hot-swap"""
+
+    def __init__(
+        self,
+        model_dir: Optional[str] = None,
+        mmap_mode: Optional[str] = None,
+        compile_trees: bool = False,
+    ):
+        """
+        Initialize model registry
+
+        Args:
+            model_dir: Directory watched for model artifacts
+            mmap_mode: joblib mmap_mode for artifact loading ('r' to share pages)
+            compile_trees: Wrap tree models in CompiledTreePredictor
+        """
         self.models: Dict[str, Any] = {}
         self.model_info: Dict[str, Dict] = {}
-        
-    def load_model(self, model_name: str, model_path: str) -> Any:
-        """Load model from disk"""
-        if model_name in self.models:
+        self.model_dir = Path(model_dir) if model_dir else None
+        self.mmap_mode = mmap_mode or None
+        self.compile_trees = compile_trees
+
+        # model_name -> (path, mtime_ns, size) of the artifact currently served
+        self._loaded_from: Dict[str, Tuple[str, int, int]] = {}
+        self._listeners: List[ModelListener] = []
+        self._lock = threading.Lock()
+        self._watch_task: Optional[asyncio.Task] = None
+
+    def load_model(
+        self,
+        model_name: str,
+        model_path: str,
+        version: Optional[str] = None,
+        force: bool = False,
+    ) -> Any:
+        """
+        Load model from disk
+
+        Args:
+            model_name: Registry name of the model
+            model_path: Artifact path
+            version: Version label reported in model info
+            force: Reload and swap even if the model is already loaded
+
+        Returns:
+            The loaded model, or None if loading failed. On failure the
+            previously loaded version (if any) keeps serving.
+        """
+        if model_name in self.models and not force:
             return self.models[model_name]
-            
+
         path = Path(model_path)
         if not path.exists():
             logger.warning(f"Model not found: {model_path}, using mock")
             return None
-            
+
         try:
             import joblib
-            model = joblib.load(model_path)
-            self.models[model_name] = model
-            logger.info(f"Loaded model: {model_name} from {model_path}")
-            return model
+            stat = path.stat()
+            rss_before = _current_rss_bytes()
+            start = time.perf_counter()
+
+            model = joblib.load(path, mmap_mode=self.mmap_mode)
+
+            compiled = None
+            if self.compile_trees:
+                compiled = CompiledTreePredictor.compile(model)
+                if compiled is not None:
+                    model = compiled
+
+            load_time_ms = (time.perf_counter() - start) * 1000
+            rss_after = _current_rss_bytes()
         except Exception as e:
             logger.error(f"Failed to load model {model_name}: {e}")
             return None
-    
+
+        match = ARTIFACT_PATTERN.match(path.name)
+        stats = {
+            'model_name': model_name,
+            'version': version or (match.group('version') if match else 'unknown'),
+            'artifact_path': str(path),
+            'artifact_size_bytes': stat.st_size,
+            'loaded_at': datetime.utcnow().isoformat(),
+            'load_time_ms': round(load_time_ms, 2),
+            'memory_rss_delta_bytes': (
+                rss_after - rss_before
+                if rss_before is not None and rss_after is not None else None
+            ),
+            'mmap_mode': self.mmap_mode,
+            'compiled': compiled is not None,
+            'predictor': compiled.backend if compiled is not None else type(model).__name__,
+        }
+        self._swap(model_name, model, stats, (str(path), stat.st_mtime_ns, stat.st_size))
+        logger.info(
+            f"✅ Loaded model: {model_name} v{stats['version']} from {model_path} "
+            f"({stats['load_time_ms']} ms)"
+        )
+        return model
+
+    def _swap(
+        self,
+        model_name: str,
+        model: Any,
+        stats: Dict,
+        source: Tuple[str, int, int],
+    ):
+        """Publish a freshly loaded model and notify listeners"""
+        with self._lock:
+            previous = self.model_info.get(model_name, {})
+            info = {**previous, **stats}
+            info.setdefault('status', 'loaded')
+            if model_name in self.models:
+                info['previous_version'] = previous.get('version')
+                info['swap_count'] = previous.get('swap_count', 0) + 1
+
+            # Single reference assignment: readers see either old or new model
+            self.models[model_name] = model
+            self.model_info[model_name] = info
+            self._loaded_from[model_name] = source
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            try:
+                listener(model_name, model, info)
+            except Exception as e:
+                logger.error(f"Model listener failed for {model_name}: {e}")
+
     def get_model(self, model_name: str) -> Optional[Any]:
         """Get loaded model"""
         return self.models.get(model_name)
-    
+
+    def subscribe(self, listener: ModelListener):
+        """
+        Register a callback invoked after every model swap
+
+        Args:
+            listener: Called as listener(model_name, model, info)
+        """
+        self._listeners.append(listener)
+
     def register_model_info(self, model_name: str, info: Dict):
         """Register model metadata"""
         self.model_info[model_name] = info
-        
+
     def get_model_info(self, model_name: str) -> Dict:
         """Get model information"""
         return self.model_info.get(model_name, {
@@ -50,7 +330,7 @@ class ModelRegistry:
             'version': 'unknown',
             'status': 'not_loaded'
         })
-    
+
     def list_models(self) -> Dict[str, str]:
         """List all registered models and their versions"""
         return {
@@ -58,6 +338,115 @@ class ModelRegistry:
             for name, info in self.model_info.items()
         }
 
+    # ========== Directory Watching ==========
+
+    def discover_artifacts(self, directory: Optional[Path] = None) -> Dict[str, Dict]:
+        """
+        Find the artifact to serve for each model in a directory
+
+        The manifest, if present, wins; otherwise the highest
+        ``_v<version>`` file per model name is selected, searching
+        subdirectories too (trainers write to e.g. ``models/clv``).
+
+        Args:
+            directory: Directory to scan (defaults to model_dir)
+
+        Returns:
+            model_name -> {'path', 'version', **manifest metadata}
+        """
+        directory = Path(directory) if directory else self.model_dir
+        if directory is None or not directory.is_dir():
+            return {}
+
+        manifest_path = directory / MANIFEST_FILENAME
+        if manifest_path.exists():
+            try:
+                manifest = json.loads(manifest_path.read_text())
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"Invalid model manifest {manifest_path}: {e}")
+                return {}
+            return {
+                name: {**entry, 'path': str(directory / entry['path'])}
+                for name, entry in manifest.get('models', {}).items()
+                if 'path' in entry
+            }
+
+        artifacts: Dict[str, Dict] = {}
+        for path in directory.rglob('*'):
+            match = ARTIFACT_PATTERN.match(path.name)
+            if not match:
+                continue
+            name, version = match.group('name'), match.group('version')
+            current = artifacts.get(name)
+            if current is None or parse_version(version) > parse_version(current['version']):
+                artifacts[name] = {'path': str(path), 'version': version}
+        return artifacts
+
+    def scan_directory(self, directory: Optional[Path] = None) -> List[str]:
+        """
+        Load every new or changed artifact and swap it in
+
+        Args:
+            directory: Directory to scan (defaults to model_dir)
+
+        Returns:
+            Names of models that were (re)loaded
+        """
+        swapped = []
+        for name, entry in self.discover_artifacts(directory).items():
+            path = Path(entry['path'])
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if self._loaded_from.get(name) == (str(path), stat.st_mtime_ns, stat.st_size):
+                continue
+
+            model = self.load_model(name, str(path), version=entry.get('version'), force=True)
+            if model is None:
+                continue
+
+            metadata = {k: v for k, v in entry.items() if k not in ('path', 'version')}
+            if metadata:
+                with self._lock:
+                    self.model_info[name] = {**self.model_info[name], **metadata}
+            swapped.append(name)
+        return swapped
+
+    async def start_watching(self, interval_seconds: float):
+        """
+        Poll the model directory in the background
+
+        Args:
+            interval_seconds: Seconds between scans
+        """
+        if self._watch_task is not None or self.model_dir is None:
+            return
+
+        async def _watch():
+            while True:
+                await asyncio.sleep(interval_seconds)
+                try:
+                    swapped = await asyncio.to_thread(self.scan_directory)
+                    if swapped:
+                        logger.info(f"🔄 Hot-swapped models: {', '.join(swapped)}")
+                except Exception as e:
+                    logger.error(f"Model directory scan failed: {e}")
+
+        self._watch_task = asyncio.create_task(_watch())
+        logger.info(f"👀 Watching {self.model_dir} for model updates every {interval_seconds}s")
+
+    async def stop_watching(self):
+        """Cancel the background directory watcher"""
+        if self._watch_task is None:
+            return
+        self._watch_task.cancel()
+        try:
+            await self._watch_task
+        except asyncio.CancelledError:
+            pass
+        self._watch_task = None
+
 
 # Singleton
 _registry: Optional[ModelRegistry] = None
@@ -67,8 +456,15 @@ def get_model_registry() -> ModelRegistry:
     """Get or create model registry instance"""
     global _registry
     if _registry is None:
-        _registry = ModelRegistry()
-        
+        from src.infrastructure.config import get_settings
+        settings = get_settings()
+
+        _registry = ModelRegistry(
+            model_dir=settings.ml_model_dir,
+            mmap_mode=settings.ml_model_mmap_mode,
+            compile_trees=settings.ml_compile_tree_models,
+        )
+
         # Register default model info
         _registry.register_model_info('churn_predictor', {
             'model_name': 'churn_predictor',
@@ -84,5 +480,7 @@ def get_model_registry() -> ModelRegistry:
             'feature_count': 25,
             'inference_latency_ms': 15
         })
-        
-    return _registry
\ No newline at end of file
+
+        _registry.scan_directory()
+
+    return _registry
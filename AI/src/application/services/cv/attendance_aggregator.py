@@ -0,0 +1,523 @@
+"""
+Attendance Aggregation Engine
+
+Maintains the attendance_summary table incrementally:
+1. Reads attendance_logs rows after a persisted cursor (event_timestamp),
+   re-reading an overlap window so rows committed late are not skipped
+2. Collects the (user, day) keys touched by CHECK_IN / CHECK_OUT events
+3. Recomputes the summary rows of those keys from attendance_logs in one
+   batched upsert per interval (default: 1 minute)
+4. Derives total_hours and status (PRESENT, LATE, EARLY_LEAVE, INCOMPLETE)
+
+Summary rows are rebuilt from the log rather than incremented, so reading a
+row twice (overlap window, restart before the cursor was saved) is harmless.
+
+RabbitMQ attendance events (published by FaceRecognitionService) are used as a
+wake-up signal, so the aggregator does not poll the database while nobody is
+checking in. The rows themselves are always read from attendance_logs, which
+keeps the summary in database time. The worker runs inside the CV service
+(see controllers/cv/main.py); the aggregate-attendance flow does the same
+catch-up where that service is not deployed.
+
+Daily reports read precomputed attendance_summary rows instead of scanning
+the raw log.
+"""
+
+import asyncio
+import json
+import logging
+from datetime import date, datetime, time as dtime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import asyncpg
+import aio_pika
+
+from src.infrastructure.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+
+# Events that contribute to the daily summary
+CHECK_IN_EVENTS = {"CHECK_IN"}
+CHECK_OUT_EVENTS = {"CHECK_OUT"}
+
+# Cursor before the first run (attendance_logs.event_timestamp is naive UTC)
+EPOCH = datetime(1970, 1, 1)
+
+
+# ============================================================================
+# SQL
+# ============================================================================
+
+# Keyset pagination on (event_timestamp, log_id): timestamps are not unique
+FETCH_LOGS_SQL = """
+    SELECT log_id, user_id, event_type, event_timestamp
+    FROM attendance_logs
+    WHERE (event_timestamp, log_id) > ($1, $2)
+      AND user_id IS NOT NULL
+      AND event_type = ANY($3::varchar[])
+    ORDER BY event_timestamp, log_id
+    LIMIT $4
+"""
+
+FETCH_CURSOR_SQL = """
+    SELECT last_event_at FROM attendance_aggregation_state WHERE state_id = 1
+"""
+
+ADVANCE_CURSOR_SQL = """
+    INSERT INTO attendance_aggregation_state (state_id, last_event_at, updated_at)
+    VALUES (1, $1, CURRENT_TIMESTAMP)
+    ON CONFLICT (state_id) DO UPDATE SET
+        last_event_at = GREATEST(attendance_aggregation_state.last_event_at, EXCLUDED.last_event_at),
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# Rebuilds the summary of each (user_id, date) key from all of that day's
+# log rows (attendance_logs_user_idx), so re-reading a row never double counts
+UPSERT_SUMMARY_SQL = """
+    INSERT INTO attendance_summary (
+        user_id, date, first_check_in, last_check_out, check_in_count, check_out_count
+    )
+    SELECT
+        k.user_id,
+        k.date,
+        MIN(l.event_timestamp) FILTER (WHERE l.event_type = ANY($3::varchar[])),
+        MAX(l.event_timestamp) FILTER (WHERE l.event_type = ANY($4::varchar[])),
+        COUNT(*) FILTER (WHERE l.event_type = ANY($3::varchar[])),
+        COUNT(*) FILTER (WHERE l.event_type = ANY($4::varchar[]))
+    FROM unnest($1::integer[], $2::date[]) AS k(user_id, date)
+    JOIN attendance_logs l
+      ON l.user_id = k.user_id
+     AND l.event_timestamp >= k.date
+     AND l.event_timestamp < k.date + 1
+    GROUP BY k.user_id, k.date
+    ON CONFLICT (user_id, date) DO UPDATE SET
+        first_check_in = EXCLUDED.first_check_in,
+        last_check_out = EXCLUDED.last_check_out,
+        check_in_count = EXCLUDED.check_in_count,
+        check_out_count = EXCLUDED.check_out_count,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# Derived columns are recomputed from the rebuilt first/last timestamps
+REFRESH_DERIVED_SQL = """
+    UPDATE attendance_summary AS s SET
+        total_hours = CASE
+            WHEN s.first_check_in IS NOT NULL AND s.last_check_out > s.first_check_in
+            THEN EXTRACT(EPOCH FROM (s.last_check_out - s.first_check_in)) / 3600.0
+        END,
+        status = CASE
+            WHEN s.first_check_in IS NULL THEN 'INCOMPLETE'
+            WHEN s.first_check_in > s.date + $3::time + make_interval(mins => $5) THEN 'LATE'
+            WHEN s.last_check_out IS NULL OR s.last_check_out <= s.first_check_in THEN 'INCOMPLETE'
+            WHEN s.last_check_out < s.date + $4::time THEN 'EARLY_LEAVE'
+            ELSE 'PRESENT'
+        END
+    FROM unnest($1::integer[], $2::date[]) AS k(user_id, date)
+    WHERE s.user_id = k.user_id AND s.date = k.date
+"""
+
+DAILY_REPORT_SQL = """
+    SELECT
+        staff.user_id,
+        u.name,
+        s.first_check_in,
+        s.last_check_out,
+        s.total_hours,
+        s.status,
+        EXTRACT(EPOCH FROM (s.first_check_in - (s.date + $2::time))) / 60.0 AS minutes_late
+    FROM (
+        SELECT DISTINCT user_id FROM employee_faces WHERE is_active = TRUE
+    ) AS staff
+    JOIN "User" u ON u.user_id = staff.user_id
+    LEFT JOIN attendance_summary s ON s.user_id = staff.user_id AND s.date = $1
+    ORDER BY staff.user_id
+"""
+
+
+def _parse_hhmm(value: str) -> dtime:
+    """Parse 'HH:MM' into a time object"""
+    hours, minutes = value.split(":")
+    return dtime(int(hours), int(minutes))
+
+
+class AttendanceAggregator:
+    """
+    Incremental aggregation of attendance_logs into attendance_summary
+
+    Usage:
+        aggregator = AttendanceAggregator(db_pool=pool)
+        await aggregator.start()          # background worker
+        report = await aggregator.get_daily_report(date.today())
+        await aggregator.stop()
+    """
+
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        db_pool: Optional[asyncpg.Pool] = None,
+        page_size: int = 5000,
+    ):
+        """
+        Initialize attendance aggregator
+
+        Args:
+            settings: Application settings (if None, will call get_settings())
+            db_pool: asyncpg pool (created in initialize() if not given);
+                an injected pool is left open by shutdown()
+            page_size: Max attendance_logs rows read per catch-up page
+        """
+        self.settings = settings or get_settings()
+        self.db_pool = db_pool
+        self._owns_pool = False
+        self.page_size = page_size
+
+        self.work_start = _parse_hhmm(self.settings.attendance_work_start)
+        self.work_end = _parse_hhmm(self.settings.attendance_work_end)
+        self.late_grace_minutes = self.settings.attendance_late_grace_minutes
+        self.flush_interval = self.settings.attendance_flush_interval_seconds
+        self.overlap = timedelta(seconds=self.settings.attendance_cursor_overlap_seconds)
+
+        # (user_id, date) keys touched since last flush
+        self._dirty: Set[Tuple[int, date]] = set()
+        self._max_event_at = EPOCH
+        self._cursor: Optional[datetime] = None
+
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._flush_lock = asyncio.Lock()
+        self._worker_task: Optional[asyncio.Task] = None
+
+        self.rabbitmq_connection: Optional[aio_pika.abc.AbstractRobustConnection] = None
+
+        self.stats = {
+            "events_ingested": 0,
+            "rows_upserted": 0,
+            "flushes": 0,
+            "last_flush_at": None,
+        }
+
+    async def initialize(self):
+        """Create the database pool if it was not injected"""
+        if self.db_pool is None:
+            self.db_pool = await asyncpg.create_pool(
+                self.settings.asyncpg_url, min_size=1, max_size=4
+            )
+            self._owns_pool = True
+        logger.info("✅ Attendance aggregator connected to PostgreSQL")
+
+    async def shutdown(self):
+        """Flush pending buckets and close connections (the pool only if created here)"""
+        self._stopping = True
+        self._wakeup.set()
+        if self.db_pool is not None:
+            await self.flush()
+
+        if self.rabbitmq_connection:
+            await self.rabbitmq_connection.close()
+        if self.db_pool is not None and self._owns_pool:
+            await self.db_pool.close()
+            self.db_pool = None
+            self._owns_pool = False
+
+    async def start(self, use_events: bool = True):
+        """Start the aggregation worker as a background task"""
+        if self._worker_task is None:
+            self._stopping = False
+            self._worker_task = asyncio.create_task(self.run(use_events=use_events))
+
+    async def stop(self):
+        """Stop the background worker, flush and close connections"""
+        if self._worker_task is not None:
+            self._worker_task.cancel()
+            try:
+                await self._worker_task
+            except asyncio.CancelledError:
+                pass
+            self._worker_task = None
+        await self.shutdown()
+
+    # ------------------------------------------------------------------
+    # Change tracking
+    # ------------------------------------------------------------------
+
+    def ingest(
+        self,
+        user_id: Optional[int],
+        event_type: str,
+        event_timestamp: datetime,
+    ) -> bool:
+        """
+        Mark the (user, day) of a single attendance event for recomputation
+
+        Returns:
+            True if the event affects the summary
+        """
+        if event_timestamp > self._max_event_at:
+            self._max_event_at = event_timestamp
+
+        if user_id is None:
+            return False
+        if event_type not in CHECK_IN_EVENTS and event_type not in CHECK_OUT_EVENTS:
+            return False
+
+        self._dirty.add((user_id, event_timestamp.date()))
+        self.stats["events_ingested"] += 1
+        return True
+
+    def ingest_rows(self, rows: Iterable[Any]) -> int:
+        """
+        Fold attendance_logs rows (asyncpg Records or dicts)
+
+        Returns:
+            Number of rows that affected the summary
+        """
+        applied = 0
+        for row in rows:
+            if self.ingest(
+                user_id=row["user_id"],
+                event_type=row["event_type"],
+                event_timestamp=row["event_timestamp"],
+            ):
+                applied += 1
+        return applied
+
+    @property
+    def pending_count(self) -> int:
+        """Number of (user, day) keys waiting to be flushed"""
+        return len(self._dirty)
+
+    def _build_batch(self) -> Tuple[List[int], List[date]]:
+        """Convert pending keys into column arrays for unnest()"""
+        keys = sorted(self._dirty)
+        return [user_id for user_id, _ in keys], [day for _, day in keys]
+
+    # ------------------------------------------------------------------
+    # Database
+    # ------------------------------------------------------------------
+
+    async def flush(self) -> int:
+        """
+        Recompute all pending summary rows in one transaction and advance the cursor
+
+        Returns:
+            Number of summary rows upserted
+        """
+        async with self._flush_lock:
+            if not self._dirty and self._max_event_at <= (self._cursor or EPOCH):
+                return 0
+
+            user_ids, dates = self._build_batch()
+            max_event_at = self._max_event_at
+
+            async with self.db_pool.acquire() as conn:
+                async with conn.transaction():
+                    if user_ids:
+                        await conn.execute(
+                            UPSERT_SUMMARY_SQL,
+                            user_ids,
+                            dates,
+                            sorted(CHECK_IN_EVENTS),
+                            sorted(CHECK_OUT_EVENTS),
+                        )
+                        await conn.execute(
+                            REFRESH_DERIVED_SQL,
+                            user_ids,
+                            dates,
+                            self.work_start,
+                            self.work_end,
+                            self.late_grace_minutes,
+                        )
+                    if max_event_at > EPOCH:
+                        await conn.execute(ADVANCE_CURSOR_SQL, max_event_at)
+
+            self._dirty.clear()
+            self._cursor = max(self._cursor or EPOCH, max_event_at)
+
+            self.stats["rows_upserted"] += len(user_ids)
+            self.stats["flushes"] += 1
+            self.stats["last_flush_at"] = datetime.utcnow().isoformat()
+
+            if user_ids:
+                logger.info(
+                    f"📊 Attendance summary flushed: {len(user_ids)} rows, "
+                    f"cursor={self._cursor.isoformat()}"
+                )
+            return len(user_ids)
+
+    async def _load_cursor(self) -> datetime:
+        """Load the persisted event_timestamp cursor"""
+        async with self.db_pool.acquire() as conn:
+            cursor = await conn.fetchval(FETCH_CURSOR_SQL)
+        self._cursor = cursor or EPOCH
+        self._max_event_at = max(self._max_event_at, self._cursor)
+        return self._cursor
+
+    async def catch_up(self) -> int:
+        """
+        Fold every attendance_logs row after the cursor, flushing per page
+
+        Starts ATTENDANCE_CURSOR_OVERLAP_SECONDS before the cursor: a row whose
+        transaction committed after newer rows were read has an older
+        event_timestamp than the cursor, and would otherwise be skipped.
+
+        Returns:
+            Number of log rows read
+        """
+        if self._cursor is None:
+            await self._load_cursor()
+
+        event_types = sorted(CHECK_IN_EVENTS | CHECK_OUT_EVENTS)
+        after = (max(self._cursor - self.overlap, EPOCH), 0)
+        total = 0
+
+        while True:
+            async with self.db_pool.acquire() as conn:
+                rows = await conn.fetch(
+                    FETCH_LOGS_SQL, after[0], after[1], event_types, self.page_size
+                )
+            if not rows:
+                break
+
+            self.ingest_rows(rows)
+            total += len(rows)
+            await self.flush()
+
+            if len(rows) < self.page_size:
+                break
+            after = (rows[-1]["event_timestamp"], rows[-1]["log_id"])
+
+        return total
+
+    async def get_daily_report(self, report_date: date) -> Dict[str, Any]:
+        """
+        Build the staff attendance report from precomputed summary rows
+
+        Returns:
+            Dict matching notify_staff_attendance_flow parameters:
+            total_staff, present_count, absent_count, late_count,
+            absent_staff [{name, id, reason}], late_staff [{name, id, minutes_late}]
+        """
+        async with self.db_pool.acquire() as conn:
+            rows = await conn.fetch(DAILY_REPORT_SQL, report_date, self.work_start)
+
+        absent_staff: List[Dict] = []
+        late_staff: List[Dict] = []
+        present_count = 0
+
+        for row in rows:
+            if row["first_check_in"] is None:
+                absent_staff.append({
+                    "name": row["name"],
+                    "id": row["user_id"],
+                    "reason": "No check-in recorded",
+                })
+                continue
+
+            present_count += 1
+            if row["status"] == "LATE":
+                late_staff.append({
+                    "name": row["name"],
+                    "id": row["user_id"],
+                    "minutes_late": int(row["minutes_late"] or 0),
+                })
+
+        return {
+            "report_date": report_date.isoformat(),
+            "total_staff": len(rows),
+            "present_count": present_count,
+            "absent_count": len(absent_staff),
+            "late_count": len(late_staff),
+            "absent_staff": absent_staff,
+            "late_staff": late_staff,
+        }
+
+    # ------------------------------------------------------------------
+    # Worker loop
+    # ------------------------------------------------------------------
+
+    def notify(self):
+        """Signal that new attendance events are available"""
+        self._wakeup.set()
+
+    async def consume_events(self):
+        """
+        Subscribe to attendance events on RabbitMQ and use them as wake-ups
+
+        Events are acknowledged immediately: the data is re-read from
+        attendance_logs, so a lost message only delays aggregation until
+        the next event or the idle poll.
+        """
+        self.rabbitmq_connection = await aio_pika.connect_robust(self.settings.rabbitmq_url)
+        channel = await self.rabbitmq_connection.channel()
+        exchange = await channel.declare_exchange(
+            self.settings.face_rabbitmq_exchange,
+            aio_pika.ExchangeType.TOPIC,
+            durable=True,
+        )
+        queue = await channel.declare_queue(self.settings.attendance_queue_name, durable=True)
+        await queue.bind(exchange, routing_key=self.settings.face_rabbitmq_routing_key)
+
+        async def on_message(message: aio_pika.abc.AbstractIncomingMessage):
+            async with message.process():
+                try:
+                    event = json.loads(message.body)
+                    logger.debug(f"📥 Attendance event: {event.get('event_type')} log_id={event.get('log_id')}")
+                except ValueError:
+                    logger.warning("Malformed attendance event ignored")
+                self.notify()
+
+        await queue.consume(on_message)
+        logger.info("✅ Attendance aggregator subscribed to RabbitMQ events")
+
+    async def run(self, use_events: bool = True, idle_poll_seconds: float = 900.0):
+        """
+        Run the aggregation worker until shutdown() is called
+
+        Each cycle waits for a wake-up (RabbitMQ event or idle poll timeout),
+        then lets the flush interval elapse so all events of the window are
+        folded into a single batched upsert.
+
+        Args:
+            use_events: Subscribe to RabbitMQ attendance events
+            idle_poll_seconds: Poll interval when no events arrive
+        """
+        if self.db_pool is None:
+            await self.initialize()
+
+        if use_events:
+            try:
+                await self.consume_events()
+            except Exception as e:
+                logger.warning(f"RabbitMQ unavailable, falling back to polling: {e}")
+                idle_poll_seconds = self.flush_interval
+
+        await self.catch_up()
+
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=idle_poll_seconds)
+                if self._stopping:
+                    break
+                # Batch window: collect everything that arrives within the interval
+                await asyncio.sleep(self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            self._wakeup.clear()
+            try:
+                await self.catch_up()
+            except Exception as e:
+                logger.error(f"Attendance aggregation cycle failed: {e}", exc_info=True)
+
+
+# Singleton instance
+_aggregator: Optional[AttendanceAggregator] = None
+
+
+def get_attendance_aggregator() -> AttendanceAggregator:
+    """Get or create attendance aggregator instance"""
+    global _aggregator
+    if _aggregator is None:
+        _aggregator = AttendanceAggregator()
+    return _aggregator
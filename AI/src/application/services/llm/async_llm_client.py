@@ -0,0 +1,313 @@
+"""
+Async LLM Client (NVIDIA API, OpenAI-compatible)
+
+AsyncOpenAI on one shared httpx connection pool (HTTP/2 when the h2
+package is installed), so concurrent chats reuse a few multiplexed
+connections instead of opening one per request:
+
+1. A per-process semaphore caps in-flight completions (LLM_MAX_CONCURRENCY);
+   callers beyond the cap wait instead of piling onto the provider
+2. Connect/read timeouts come from settings; the SDK's own retries are
+   disabled and replaced by full-jitter exponential backoff on 429, 5xx,
+   timeouts and connection errors, honoring Retry-After when sent
+3. stream_chat() yields content deltas as they arrive; a failed stream,
+   including a connection dropped mid-body, is retried only if no token
+   has been yielded yet. Closing the generator releases its slot at once
+
+base_url and http_client can be overridden, so tests run the client
+against a local stub server that imitates the OpenAI API.
+"""
+import asyncio
+import logging
+import random
+from contextlib import aclosing, asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    AsyncOpenAI,
+    InternalServerError,
+    RateLimitError,
+)
+
+from src.infrastructure.config import Settings, get_settings
+from .gpt_client import SYSTEM_PROMPT
+
+# HTTP/2 needs the optional h2 package (httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Completion parameters (same as GPTClient)
+DEFAULT_PARAMS = {
+    "temperature": 0.7,
+    "max_tokens": 1024,
+    "reasoning_effort": "low",
+}
+
+RETRYABLE_ERRORS = (RateLimitError, InternalServerError, APIConnectionError)
+
+# The SDK wraps transport errors only while sending the request; a connection
+# dropped while the stream body is read surfaces as the raw httpx error
+# (e.g. RemoteProtocolError)
+STREAM_RETRYABLE_ERRORS = RETRYABLE_ERRORS + (httpx.TransportError,)
+
+
+def build_messages(message: str, history: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, str]]:
+    """System prompt, then history, then the new user message"""
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    if history:
+        messages.extend(history)
+    messages.append({"role": "user", "content": message})
+    return messages
+
+
+class AsyncLLMClient:
+    """
+    Async chat completions with pooling, concurrency limit and retries
+
+    Usage:
+        client = get_async_llm_client()
+        reply = await client.chat("Hello", history=[...])
+        async for token in client.stream_chat("Hello"):
+            ...
+    """
+
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ):
+        """
+        Initialize async LLM client
+
+        Args:
+            settings: Application settings (if None, will call get_settings())
+            base_url: API base URL (default: LLM_BASE_URL)
+            api_key: API key (default: NVIDIA_API_KEY)
+            http_client: Pre-built httpx client, e.g. bound to a stub server
+        """
+        self.settings = settings or get_settings()
+        self.model_name = self.settings.llm_model
+        self.max_retries = self.settings.llm_max_retries
+        self.base_delay = self.settings.llm_retry_base_delay_seconds
+        self.max_delay = self.settings.llm_retry_max_delay_seconds
+
+        timeout = httpx.Timeout(
+            self.settings.llm_timeout_seconds,
+            connect=self.settings.llm_connect_timeout_seconds,
+        )
+        self.http_client = http_client or httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=self.settings.llm_max_connections,
+                max_keepalive_connections=self.settings.llm_max_connections,
+            ),
+        )
+        self.client = AsyncOpenAI(
+            base_url=base_url or self.settings.llm_base_url,
+            api_key=api_key or self.settings.nvidia_api_key or "not-set",
+            http_client=self.http_client,
+            timeout=timeout,
+            max_retries=0,
+        )
+        self.semaphore = asyncio.Semaphore(self.settings.llm_max_concurrency)
+
+        self._in_flight = 0
+        self._stats = {"requests": 0, "retries": 0, "failures": 0, "streams": 0}
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Request, retry and failure counts plus current load"""
+        return {
+            **self._stats,
+            "in_flight": self._in_flight,
+            "max_concurrency": self.settings.llm_max_concurrency,
+            "http2": HTTP2_AVAILABLE,
+        }
+
+    # ========== Public API ==========
+
+    async def generate(self, prompt: str, **params) -> str:
+        """
+        Generate text from a single prompt
+
+        Args:
+            prompt: Question or prompt
+
+        Returns:
+            str: Response from the LLM
+        """
+        return await self.chat(prompt, **params)
+
+    async def chat(self, message: str, history: Optional[List[Dict[str, str]]] = None, **params) -> str:
+        """
+        Chat with history and return the full completion
+
+        Args:
+            message: Current user message
+            history: Previous turns - list of {"role": "user/assistant", "content": "..."}
+            **params: Overrides for DEFAULT_PARAMS
+
+        Returns:
+            str: Response from the LLM
+        """
+        response = await self.complete(build_messages(message, history), **params)
+        return response.choices[0].message.content or ""
+
+    async def complete(self, messages: List[Dict[str, Any]], **params):
+        """
+        Raw chat completion (e.g. with tools) under the concurrency limit
+
+        Returns:
+            openai ChatCompletion
+        """
+        async with self._slot():
+            for attempt in range(self.max_retries + 1):
+                try:
+                    return await self.client.chat.completions.create(
+                        model=self.model_name,
+                        messages=messages,
+                        **{**DEFAULT_PARAMS, **params},
+                    )
+                except RETRYABLE_ERRORS as e:
+                    await self._backoff(e, attempt)
+
+    async def stream_chat(
+        self,
+        message: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        **params,
+    ) -> AsyncIterator[str]:
+        """
+        Chat with history, yielding content deltas as they arrive
+
+        Args:
+            message: Current user message
+            history: Previous turns
+            **params: Overrides for DEFAULT_PARAMS
+
+        Yields:
+            str: Non-empty content deltas
+        """
+        async with aclosing(self.stream(build_messages(message, history), **params)) as deltas:
+            async for delta in deltas:
+                yield delta
+
+    async def stream(self, messages: List[Dict[str, Any]], **params) -> AsyncIterator[str]:
+        """
+        Raw streaming completion; holds a concurrency slot until the stream ends
+
+        Callers that stop early should aclose() the generator, so the slot
+        is released right away instead of when the generator is collected.
+        """
+        await self._acquire()
+        try:
+            self._stats["streams"] += 1
+            for attempt in range(self.max_retries + 1):
+                yielded = False
+                try:
+                    stream = await self.client.chat.completions.create(
+                        model=self.model_name,
+                        messages=messages,
+                        stream=True,
+                        **{**DEFAULT_PARAMS, **params},
+                    )
+                    try:
+                        async for chunk in stream:
+                            delta = chunk.choices[0].delta.content if chunk.choices else None
+                            if delta:
+                                yielded = True
+                                yield delta
+                    finally:
+                        await stream.close()
+                    return
+                except STREAM_RETRYABLE_ERRORS as e:
+                    # Tokens already sent to the caller cannot be taken back
+                    if yielded:
+                        self._stats["failures"] += 1
+                        raise
+                    await self._backoff(e, attempt)
+        finally:
+            self._release()
+
+    async def aclose(self):
+        """Close the shared connection pool"""
+        await self.client.close()
+        await self.http_client.aclose()
+
+    # ========== Internals ==========
+
+    @asynccontextmanager
+    async def _slot(self):
+        """Hold one of the process's concurrency slots"""
+        await self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self):
+        await self.semaphore.acquire()
+        self._in_flight += 1
+        self._stats["requests"] += 1
+
+    def _release(self):
+        self._in_flight -= 1
+        self.semaphore.release()
+
+    def retry_delay(self, error: Exception, attempt: int) -> float:
+        """
+        Full-jitter backoff, or the server's Retry-After when it sent one
+        """
+        if isinstance(error, APIStatusError):
+            retry_after = error.response.headers.get("retry-after")
+            try:
+                if retry_after is not None:
+                    return min(float(retry_after), self.max_delay)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def _backoff(self, error: Exception, attempt: int):
+        """Sleep before the next attempt, or re-raise when retries are used up"""
+        if attempt >= self.max_retries:
+            self._stats["failures"] += 1
+            logger.error(f"❌ LLM request failed after {attempt + 1} attempts: {error}")
+            raise error
+        delay = self.retry_delay(error, attempt)
+        self._stats["retries"] += 1
+        logger.warning(
+            f"⚠️ LLM request failed ({type(error).__name__}), "
+            f"retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+        )
+        await asyncio.sleep(delay)
+
+
+# Singleton
+_async_llm_client: Optional[AsyncLLMClient] = None
+
+
+def get_async_llm_client() -> AsyncLLMClient:
+    """Get async LLM client instance (singleton)"""
+    global _async_llm_client
+    if _async_llm_client is None:
+        _async_llm_client = AsyncLLMClient()
+    return _async_llm_client
+
+
+async def shutdown_async_llm_client():
+    """Close the shared client's connection pool (app shutdown)"""
+    global _async_llm_client
+    if _async_llm_client is not None:
+        await _async_llm_client.aclose()
+        _async_llm_client = None
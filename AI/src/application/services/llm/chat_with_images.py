@@ -3,6 +3,7 @@ Chat with Image Search Service
 Combines LLM chat with semantic image search
 """
 
+import asyncio
 from typing import List, Dict, Any, Optional
 from langchain_core.messages import HumanMessage
 import uuid
@@ -65,23 +66,15 @@ class ChatWithImageSearchService:
         rag_context = ""
         sources = []
         try:
-            from src.application.services.llm.rag import RAGIndexer
-            from src.infrastructure.config import get_settings
+            from src.application.services.llm.rag.runtime import get_rag_runtime
 
-            settings = get_settings()
-            conn_str = settings.postgres_chat_url
-
-            # Load RAG index
-            indexer = RAGIndexer(
-                connection_string=conn_str,
+            # Retrieve relevant documents (no LLM synthesis), shared index and retriever
+            nodes = await asyncio.to_thread(
+                get_rag_runtime().retrieve,
+                message,
                 table_name="rag_embeddings",
-                embed_dim=384
+                top_k=3
             )
-            indexer.load_index()
-
-            # Retrieve relevant documents (no LLM synthesis)
-            retriever = indexer.index.as_retriever(similarity_top_k=3)
-            nodes = retriever.retrieve(message)
 
             if nodes:
                 rag_context = "\n\nTHÔNG TIN TỪ CƠ SỞ DỮ LIỆU:\n"
@@ -95,7 +88,6 @@ class ChatWithImageSearchService:
             # Continue without RAG context
 
         # 3. Get LLM response with RAG context and user context
-        import asyncio
         user_message_with_context = message + user_context + rag_context
 
         result = await asyncio.to_thread(
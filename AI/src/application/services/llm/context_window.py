@@ -0,0 +1,280 @@
+"""
+Token-Budgeted Chat Context
+
+Keeps the history sent to the LLM bounded however long a conversation
+runs:
+
+1. Messages are counted with a local tokenizer (tiktoken, o200k_base by
+   default); without tiktoken a 4-characters-per-token estimate is used
+2. Each turn sends the running summary plus the newest messages that fit
+   CHAT_CONTEXT_TOKEN_BUDGET
+3. Once the history passes CHAT_SUMMARY_TRIGGER_RATIO of the budget, the
+   oldest messages (all but CHAT_SUMMARY_KEEP_RATIO of the budget) are
+   folded into the summary by a background task after the turn has been
+   answered, and removed from the graph state, so neither prompts nor
+   checkpoints keep growing
+
+Summarization calls are counted with their token usage, latency and
+estimated cost (LLM_PROMPT_COST_PER_1K / LLM_COMPLETION_COST_PER_1K).
+"""
+import logging
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+from src.infrastructure.config import Settings, get_settings
+
+# Local tokenizer (optional)
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Role/separator tokens the chat format adds per message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Fallback estimate without tiktoken
+CHARS_PER_TOKEN = 4
+
+SUMMARY_PREFIX = "Tóm tắt cuộc trò chuyện trước đó:\n"
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a conversation between a hotel guest and "
+    "the hotel assistant. Merge the previous summary with the new messages into one "
+    "concise summary. Keep facts the assistant will need later: the guest's name, "
+    "dates, room types, bookings, preferences, requests and open questions. Drop "
+    "greetings and small talk. Write in the language of the conversation."
+)
+
+
+class TokenCounter:
+    """Counts tokens with tiktoken, or estimates them from length"""
+
+    def __init__(self, encoding_name: str = "o200k_base"):
+        self.encoding_name = encoding_name
+        self._encoding = None
+        if TIKTOKEN_AVAILABLE:
+            try:
+                self._encoding = tiktoken.get_encoding(encoding_name)
+            except Exception as e:
+                # The BPE file is fetched once and cached; offline hosts estimate
+                logger.warning(f"⚠️ Tokenizer {encoding_name} unavailable, estimating tokens: {e}")
+
+    @property
+    def exact(self) -> bool:
+        return self._encoding is not None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+    def message_tokens(self, message: Dict[str, str]) -> int:
+        return self.count(message.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+
+
+class ContextWindow:
+    """
+    Chooses which messages go into the prompt and which get summarized
+
+    Usage:
+        plan = get_context_window().plan(history, summary)
+        await client.chat(message, history=with_summary(plan['window'], summary))
+        if plan['to_summarize']:
+            ...  # fold history[:plan['to_summarize']] into the summary
+    """
+
+    def __init__(self, settings: Optional[Settings] = None, counter: Optional[TokenCounter] = None):
+        """
+        Initialize context window
+
+        Args:
+            settings: Application settings (if None, will call get_settings())
+            counter: Token counter (default: CHAT_TOKENIZER_ENCODING)
+        """
+        settings = settings or get_settings()
+        self.token_budget = settings.chat_context_token_budget
+        self.trigger_tokens = int(self.token_budget * settings.chat_summary_trigger_ratio)
+        self.keep_tokens = int(self.token_budget * settings.chat_summary_keep_ratio)
+        self.counter = counter or TokenCounter(settings.chat_tokenizer_encoding)
+
+    def plan(self, history: List[Dict[str, str]], summary: str = "") -> Dict[str, Any]:
+        """
+        Split a history into the prompt window and the part to summarize
+
+        Args:
+            history: Previous turns, oldest first ({"role", "content"})
+            summary: Current running summary
+
+        Returns:
+            Dict with:
+            - window: newest messages fitting the budget next to the summary
+            - to_summarize: number of oldest messages to fold into the summary
+              (0 while the history is below the trigger)
+            - history_tokens / window_tokens / summary_tokens
+        """
+        tokens = [self.counter.message_tokens(m) for m in history]
+        summary_tokens = self.counter.count(summary) + MESSAGE_OVERHEAD_TOKENS if summary else 0
+
+        window_start = self._newest_fitting(tokens, self.token_budget - summary_tokens)
+        history_tokens = sum(tokens) + summary_tokens
+
+        to_summarize = 0
+        if history_tokens > self.trigger_tokens:
+            to_summarize = self._newest_fitting(tokens, self.keep_tokens)
+
+        return {
+            "window": history[window_start:],
+            "to_summarize": to_summarize,
+            "history_tokens": history_tokens,
+            "window_tokens": sum(tokens[window_start:]) + summary_tokens,
+            "summary_tokens": summary_tokens,
+        }
+
+    @staticmethod
+    def _newest_fitting(tokens: List[int], budget: int) -> int:
+        """Start index of the longest suffix whose tokens fit the budget"""
+        start = len(tokens)
+        used = 0
+        while start > 0 and used + tokens[start - 1] <= budget:
+            start -= 1
+            used += tokens[start]
+        return start
+
+
+def with_summary(window: List[Dict[str, str]], summary: str = "") -> List[Dict[str, str]]:
+    """Prompt history: the summary as a system message, then the window"""
+    if not summary:
+        return list(window)
+    return [{"role": "system", "content": SUMMARY_PREFIX + summary}] + list(window)
+
+
+class ConversationSummarizer:
+    """
+    Folds old messages into the running summary with the LLM
+
+    Tracks calls, token usage, latency and estimated cost in stats.
+    """
+
+    def __init__(self, client=None, settings: Optional[Settings] = None):
+        """
+        Initialize summarizer
+
+        Args:
+            client: AsyncLLMClient (default: the shared client)
+            settings: Application settings (if None, will call get_settings())
+        """
+        self.settings = settings or get_settings()
+        if client is None:
+            from .async_llm_client import get_async_llm_client
+            client = get_async_llm_client()
+        self.client = client
+        self._stats = {
+            "summaries": 0,
+            "failures": 0,
+            "messages_summarized": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "cost_usd": 0.0,
+            "total_seconds": 0.0,
+        }
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Summarization counts, token usage and estimated cost"""
+        stats = dict(self._stats)
+        stats["cost_usd"] = round(stats["cost_usd"], 6)
+        stats["total_seconds"] = round(stats["total_seconds"], 3)
+        stats["avg_seconds"] = round(stats["total_seconds"] / stats["summaries"], 3) if stats["summaries"] else 0.0
+        return stats
+
+    def cost(self, prompt_tokens: int, completion_tokens: int) -> float:
+        """Estimated USD cost of one call"""
+        return (
+            prompt_tokens * self.settings.llm_prompt_cost_per_1k
+            + completion_tokens * self.settings.llm_completion_cost_per_1k
+        ) / 1000
+
+    async def summarize(self, summary: str, messages: List[Dict[str, str]]) -> str:
+        """
+        New running summary covering the previous summary and messages
+
+        Args:
+            summary: Current summary (may be empty)
+            messages: Messages to fold in, oldest first
+
+        Returns:
+            str: Updated summary
+        """
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        prompt = (
+            f"Previous summary:\n{summary or '(none)'}\n\n"
+            f"New messages:\n{transcript}\n\n"
+            "Updated summary:"
+        )
+
+        start = time.perf_counter()
+        try:
+            response = await self.client.complete(
+                [
+                    {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0.2,
+                max_tokens=self.settings.chat_summary_max_tokens,
+            )
+        except Exception:
+            self._stats["failures"] += 1
+            raise
+        elapsed = time.perf_counter() - start
+
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        cost = self.cost(prompt_tokens, completion_tokens)
+
+        # Tokens are billed whether or not the summary is usable
+        self._stats["prompt_tokens"] += prompt_tokens
+        self._stats["completion_tokens"] += completion_tokens
+        self._stats["cost_usd"] += cost
+        self._stats["total_seconds"] += elapsed
+
+        logger.info(
+            f"🧾 Summarized {len(messages)} messages in {elapsed:.2f}s "
+            f"(prompt={prompt_tokens}, completion={completion_tokens}, cost=${cost:.6f})"
+        )
+        new_summary = (response.choices[0].message.content or "").strip()
+        if not new_summary:
+            # Never drop messages for an empty summary
+            self._stats["failures"] += 1
+            raise ValueError("LLM returned an empty summary")
+
+        self._stats["summaries"] += 1
+        self._stats["messages_summarized"] += len(messages)
+        return new_summary
+
+
+# Singletons
+_context_window: Optional[ContextWindow] = None
+_summarizer: Optional[ConversationSummarizer] = None
+
+
+def get_context_window() -> ContextWindow:
+    """Get context window instance (singleton)"""
+    global _context_window
+    if _context_window is None:
+        _context_window = ContextWindow()
+    return _context_window
+
+
+def get_summarizer() -> ConversationSummarizer:
+    """Get conversation summarizer instance (singleton)"""
+    global _summarizer
+    if _summarizer is None:
+        _summarizer = ConversationSummarizer()
+    return _summarizer
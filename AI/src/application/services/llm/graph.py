@@ -1,8 +1,28 @@
 from langgraph.graph import StateGraph, END
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage, RemoveMessage
 from .state import ChatState
 from .checkpointer import get_checkpointer
 from .gpt_client import get_gpt_client
+from .async_llm_client import get_async_llm_client
+from .context_window import get_context_window, get_summarizer, with_summary
+from src.utils.logger import app_logger
+import asyncio
+import threading
+import weakref
+from contextlib import aclosing
+
+
+def to_history(messages) -> list:
+    """
+    LangChain messages -> OpenAI-style history (user/assistant turns only)
+    """
+    history = []
+    for msg in messages:
+        if isinstance(msg, HumanMessage):
+            history.append({"role": "user", "content": msg.content})
+        elif isinstance(msg, AIMessage):
+            history.append({"role": "assistant", "content": msg.content})
+    return history
 
 def create_chat_graph():
     """
@@ -23,14 +43,11 @@ def create_chat_graph():
             
             print(f"[LLM Node] User message: {user_message}")
 
-            history = []
-            for msg in messages[:-1]:
-                if isinstance(msg, HumanMessage):
-                    history.append({"role": "user", "content": msg.content})
-                elif isinstance(msg, AIMessage):
-                    history.append({"role": "assistant", "content": msg.content})
-
-            history = history if history else None
+            # Summary + newest turns within the token budget
+            summary = state.get("summary", "")
+            turns = [m for m in messages[:-1] if isinstance(m, (HumanMessage, AIMessage))]
+            plan = get_context_window().plan(to_history(turns), summary)
+            history = with_summary(plan["window"], summary) or None
             print(f"[LLM Node] History: {history}")
 
             # Sync client for sync node
@@ -61,4 +78,164 @@ def create_chat_graph():
 
     return graph.compile(checkpointer=get_checkpointer())
 
-chat_graph = create_chat_graph()
\ No newline at end of file
+chat_graph = create_chat_graph()
+
+
+# ========== Async Turns ==========
+
+# Background compactions in flight, one per conversation
+_compactions = {}
+
+
+async def load_conversation(conversation_id: str):
+    """
+    Stored turns and running summary of a conversation
+    
+    Returns:
+        (turns, summary): HumanMessage/AIMessage list, oldest first
+    """
+    config = {"configurable": {"thread_id": conversation_id}}
+    # PostgresSaver is sync; reads are short, so a thread is fine here
+    snapshot = await asyncio.to_thread(chat_graph.get_state, config)
+    values = snapshot.values or {}
+    turns = [m for m in values.get("messages", []) if isinstance(m, (HumanMessage, AIMessage))]
+    return turns, values.get("summary", "")
+
+
+async def prepare_context(conversation_id: str):
+    """
+    Prompt history for the next turn, within the token budget
+    
+    Returns:
+        (history, after_turn): history for the LLM client, and a callable
+        to run once the turn is saved (schedules compaction when due)
+    """
+    turns, summary = await load_conversation(conversation_id)
+    plan = get_context_window().plan(to_history(turns), summary)
+    
+    def after_turn():
+        if plan["to_summarize"]:
+            schedule_compaction(conversation_id, turns[:plan["to_summarize"]], summary)
+    
+    return with_summary(plan["window"], summary), after_turn
+
+
+def schedule_compaction(conversation_id: str, messages: list, summary: str):
+    """
+    Fold messages into the summary in the background
+    
+    Runs after the response has been sent, so summarization never adds
+    latency to a turn. At most one compaction runs per conversation; a
+    later turn picks up whatever is still over the trigger.
+    """
+    if conversation_id in _compactions:
+        return
+    task = asyncio.get_running_loop().create_task(_compact(conversation_id, messages, summary))
+    _compactions[conversation_id] = task
+    task.add_done_callback(lambda _: _compactions.pop(conversation_id, None))
+
+
+async def _compact(conversation_id: str, messages: list, summary: str, summarizer=None):
+    """Summarize messages, then drop them from the conversation state"""
+    try:
+        summarizer = summarizer or get_summarizer()
+        new_summary = await summarizer.summarize(summary, to_history(messages))
+        await asyncio.to_thread(
+            update_conversation,
+            conversation_id,
+            {
+                "messages": [RemoveMessage(id=m.id) for m in messages],
+                "summary": new_summary
+            }
+        )
+    except Exception as e:
+        # The messages stay in state; the next turn retries
+        app_logger.error(f"❌ Compaction of conversation {conversation_id} failed: {e}", exc_info=True)
+
+
+# Checkpoint writers per conversation; update_state reads the latest
+# checkpoint and writes a new one, so concurrent writers would drop a turn
+_conversation_locks = weakref.WeakValueDictionary()
+_conversation_locks_guard = threading.Lock()
+
+
+def _conversation_lock(conversation_id: str) -> threading.Lock:
+    with _conversation_locks_guard:
+        lock = _conversation_locks.get(conversation_id)
+        if lock is None:
+            lock = _conversation_locks[conversation_id] = threading.Lock()
+        return lock
+
+
+def update_conversation(conversation_id: str, values: dict):
+    """
+    chat_graph.update_state as the llm node, one writer per conversation
+    
+    Blocking; call from a worker thread.
+    """
+    config = {"configurable": {"thread_id": conversation_id}}
+    with _conversation_lock(conversation_id):
+        chat_graph.update_state(config, values, as_node="llm")
+
+
+def pending_compactions() -> int:
+    """Number of background compactions in flight"""
+    return len(_compactions)
+
+
+async def save_turn(conversation_id: str, message: str, response: str):
+    """
+    Persist one turn as if the llm node had produced it
+    
+    The resulting checkpoint is the same as chat_graph.invoke would write,
+    so sync and async turns can be mixed within a conversation.
+    """
+    await asyncio.to_thread(
+        update_conversation,
+        conversation_id,
+        {
+            "messages": [HumanMessage(content=message), AIMessage(content=response)],
+            "conversation_id": conversation_id
+        }
+    )
+
+
+async def run_chat_turn(conversation_id: str, message: str) -> str:
+    """
+    One chat turn on the async LLM client
+    
+    Only the checkpoint read and write use worker threads; the completion
+    itself is awaited on the event loop instead of blocking a thread.
+    
+    Returns:
+        str: Response from the LLM
+    """
+    history, after_turn = await prepare_context(conversation_id)
+    response = await get_async_llm_client().chat(message, history=history or None)
+    await save_turn(conversation_id, message, response)
+    after_turn()
+    return response
+
+
+async def stream_chat_turn(conversation_id: str, message: str):
+    """
+    One chat turn, streamed
+    
+    The turn is persisted once the completion has finished; a stream
+    abandoned by the client leaves the conversation unchanged.
+    
+    Yields:
+        ("token", {"content"}) per delta, then ("done", {...})
+    """
+    history, after_turn = await prepare_context(conversation_id)
+    
+    parts = []
+    async with aclosing(get_async_llm_client().stream_chat(message, history=history or None)) as deltas:
+        async for delta in deltas:
+            parts.append(delta)
+            yield "token", {"content": delta}
+    
+    response = "".join(parts)
+    await save_turn(conversation_id, message, response)
+    after_turn()
+    yield "done", {"conversation_id": conversation_id, "response": response}
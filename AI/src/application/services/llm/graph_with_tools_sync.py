@@ -3,7 +3,7 @@ Enhanced Chat Graph with Tool Calling Support (Synchronous version)
 Graph hỗ trợ AI gọi database tools - dùng sync tools
 """
 from langgraph.graph import StateGraph, END
-from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk, ToolMessage
 from langchain_openai import ChatOpenAI
 from .state import ChatState
 from .checkpointer import get_checkpointer
@@ -213,3 +213,80 @@ def get_chat_graph_with_tools():
     if _graph_with_tools is None:
         _graph_with_tools = create_chat_graph_with_tools()
     return _graph_with_tools
+
+
+def _tool_succeeded(content) -> bool:
+    """Tools report failures as JSON {"success": false, ...}"""
+    try:
+        payload = json.loads(content)
+    except (TypeError, ValueError):
+        return True
+    return not (isinstance(payload, dict) and payload.get("success") is False)
+
+
+def iter_chat_events(graph, conversation_id: str, message: str):
+    """
+    Run one turn through the tool graph, yielding events as it progresses
+    
+    Uses LangGraph's "messages" mode for LLM tokens and "updates" mode for
+    node outputs. The graph persists every step through its checkpointer
+    exactly as graph.invoke does. Blocking: consume it from a worker
+    thread in async code.
+    
+    Yields:
+        ("token", {"content"}), ("tool_call", {"id", "name", "args"}),
+        ("tool_result", {"id", "name", "success", "preview"}) and finally
+        ("done", {"conversation_id", "response", "tool_calls"})
+    """
+    response = ""
+    tool_calls = 0
+    
+    for mode, payload in graph.stream(
+        {
+            "messages": [HumanMessage(content=message)],
+            "conversation_id": conversation_id
+        },
+        config={
+            "configurable": {
+                "thread_id": conversation_id
+            },
+            "recursion_limit": 50
+        },
+        stream_mode=["messages", "updates"]
+    ):
+        if mode == "messages":
+            chunk, metadata = payload
+            if (
+                metadata.get("langgraph_node") == "llm"
+                and isinstance(chunk, AIMessageChunk)
+                and isinstance(chunk.content, str)
+                and chunk.content
+            ):
+                yield "token", {"content": chunk.content}
+            continue
+        
+        for node, update in payload.items():
+            for msg in (update or {}).get("messages", []):
+                if node == "llm" and getattr(msg, "tool_calls", None):
+                    for tool_call in msg.tool_calls:
+                        tool_calls += 1
+                        yield "tool_call", {
+                            "id": tool_call["id"],
+                            "name": tool_call["name"],
+                            "args": tool_call["args"]
+                        }
+                elif node == "llm" and isinstance(msg, AIMessage):
+                    response = msg.content
+                elif node == "tools" and isinstance(msg, ToolMessage):
+                    yield "tool_result", {
+                        "id": msg.tool_call_id,
+                        "name": msg.name,
+                        "success": _tool_succeeded(msg.content),
+                        "preview": str(msg.content)[:200]
+                    }
+    
+    yield "done", {
+        "conversation_id": conversation_id,
+        "response": response,
+        "tool_calls": tool_calls
+    }
@@ -2,11 +2,15 @@
 RAG Package - PDF Question Answering System
 """
 from .pdf_loader import PDFLoader
-from .indexer import RAGIndexer
+from .indexer import RAGIndexer, get_embed_model
 from .query_engine import PDFQueryEngine
+from .runtime import RAGRuntime, get_rag_runtime
 
 __all__ = [
     "PDFLoader",
     "RAGIndexer",
     "PDFQueryEngine",
+    "RAGRuntime",
+    "get_embed_model",
+    "get_rag_runtime",
 ]
@@ -4,28 +4,48 @@ from llama_index.embeddings.huggingface import HuggingFaceEmbedding
 from llama_index.core.settings import Settings
 from sqlalchemy import make_url
 from typing import Optional
+import threading
+
+# Multilingual model for Vietnamese support (~420MB), 384 dims
+EMBED_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+# Embedding model dùng chung trong process (load một lần)
+_embed_model: Optional[HuggingFaceEmbedding] = None
+_embed_model_lock = threading.Lock()
+
+
+def get_embed_model() -> HuggingFaceEmbedding:
+    """Get embedding model instance (singleton, thread-safe)"""
+    global _embed_model
+    if _embed_model is None:
+        with _embed_model_lock:
+            if _embed_model is None:
+                _embed_model = HuggingFaceEmbedding(model_name=EMBED_MODEL_NAME)
+    return _embed_model
+
 
 class RAGIndexer:
     def __init__(self, 
                 connection_string: str,
                 table_name: str = "rag_embeddings",
-                embed_dim: int = 384):
+                embed_dim: int = 384,
+                embed_model: Optional[HuggingFaceEmbedding] = None):
         """
         Initialize RAG Indexer với PGVector
         
         Args:
             connection_string: PostgreSQL connection string
             table_name: Tên table trong PostgreSQL để lưu embeddings
-            embed_dim: Dimension của embedding (384 cho all-MiniLM-L6-v2)
+            embed_dim: Dimension của embedding (384 cho paraphrase-multilingual-MiniLM-L12-v2)
+            embed_model: Embedding model (default: model dùng chung get_embed_model())
         """
         self.connection_string = connection_string
         self.table_name = table_name
         self.embed_dim = embed_dim
+        self._url = make_url(connection_string)
         
         # Setup embedding model - Multilingual model for Vietnamese support
-        self.embed_model = HuggingFaceEmbedding(
-            model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"  # Multilingual (~420MB), 384 dims
-        )
+        self.embed_model = embed_model or get_embed_model()
         
         # Set global settings
         Settings.embed_model = self.embed_model
@@ -47,28 +67,23 @@ class RAGIndexer:
     
     def _get_db_name(self) -> str:
         """Extract database name from connection string"""
-        url = make_url(self.connection_string)
-        return url.database
+        return self._url.database
     
     def _get_host(self) -> str:
         """Extract host from connection string"""
-        url = make_url(self.connection_string)
-        return url.host
+        return self._url.host
     
     def _get_port(self) -> int:
         """Extract port from connection string"""
-        url = make_url(self.connection_string)
-        return url.port or 5432
+        return self._url.port or 5432
     
     def _get_user(self) -> str:
         """Extract user from connection string"""
-        url = make_url(self.connection_string)
-        return url.username
+        return self._url.username
     
     def _get_password(self) -> str:
         """Extract password from connection string"""
-        url = make_url(self.connection_string)
-        return url.password
+        return self._url.password
         
     def create_index(self, nodes):
         """Tạo vector index từ nodes và insert vào PGVector"""
@@ -125,6 +140,23 @@ class RAGIndexer:
         
         return query_engine
     
+    def get_retriever(self, similarity_top_k: int = 5):
+        """
+        Tạo retriever (chỉ embed query + vector search, không gọi LLM)
+        
+        Args:
+            similarity_top_k: Số lượng chunks relevant trả về
+        """
+        if self.index is None:
+            raise ValueError("Index chưa được tạo. Gọi create_index() hoặc load_index() trước")
+        return self.index.as_retriever(similarity_top_k=similarity_top_k)
+    
+    def close(self):
+        """Đóng connection pool của vector store"""
+        close = getattr(self.vector_store, "close", None)
+        if callable(close):
+            close()
+    
     def delete_table(self):
         """Xóa table (để re-index từ đầu)"""
         # PGVector sẽ tự động drop/recreate table khi cần
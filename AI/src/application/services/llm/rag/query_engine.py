@@ -37,13 +37,18 @@ TRẢ LỜI:
 class PDFQueryEngine:
     """Query engine wrapper với custom prompts"""
     
-    def __init__(self, indexer):
+    def __init__(self, indexer, cache=None):
         """
         Args:
             indexer: RAGIndexer instance đã load/create index
+            cache: SemanticCache cho câu trả lời (default: shared cache)
         """
         self.indexer = indexer
         self.query_engine = None
+        if cache is None:
+            from ..semantic_cache import get_semantic_cache
+            cache = get_semantic_cache()
+        self.cache = cache
         
     def setup(self, similarity_top_k: int = 5, custom_prompt: Optional[str] = None):
         """
@@ -75,11 +80,7 @@ class PDFQueryEngine:
         Returns:
             str: Câu trả lời
         """
-        if self.query_engine is None:
-            self.setup()
-        
-        response = self.query_engine.query(question)
-        return str(response)
+        return self.query_with_sources(question)["answer"]
     
     def query_with_sources(self, question: str) -> dict:
         """
@@ -91,22 +92,89 @@ class PDFQueryEngine:
         Returns:
             dict: {"answer": str, "sources": list}
         """
+        generation = self.cache_generation()
+        cached = self.cached_answer(question)
+        if cached is not None:
+            return cached
+        
         if self.query_engine is None:
             self.setup()
         
         response = self.query_engine.query(question)
-        
-        # Lấy source nodes
-        sources = []
-        if hasattr(response, 'source_nodes'):
-            for node in response.source_nodes:
-                sources.append({
-                    "text": node.text[:200] + "...",  # Preview
-                    "score": node.score,
-                    "metadata": node.metadata
-                })
-        
-        return {
+        nodes = getattr(response, 'source_nodes', [])
+        result = {
             "answer": str(response),
-            "sources": sources
+            "sources": self.source_dicts(nodes)
         }
+        self.cache_answer(question, result, nodes, generation)
+        return result
+    
+    # ========== Semantic Cache ==========
+    
+    def cache_generation(self) -> int:
+        """Generation của cache cho table, lấy trước cached_answer()"""
+        return self.cache.generation(self.indexer.table_name)
+    
+    def cached_answer(self, question: str) -> Optional[dict]:
+        """
+        Câu trả lời đã cache cho câu hỏi tương tự trong cùng table
+        
+        Returns:
+            dict: {"answer", "sources", "cached_question", "similarity"} hoặc None
+        """
+        return self.cache.lookup(question, self.indexer.table_name)
+    
+    def cache_answer(self, question: str, result: dict, nodes: list, generation: Optional[int] = None):
+        """
+        Cache câu trả lời; tokens tiết kiệm = prompt (context + câu hỏi) + answer
+        
+        Args:
+            generation: cache_generation() lấy trước cached_answer(); câu trả lời
+                bị bỏ nếu table đã re-index trong lúc tạo
+        """
+        prompt = self.build_prompt(question, nodes)
+        tokens = self.cache.counter.count(prompt) + self.cache.counter.count(result["answer"])
+        self.cache.store(
+            question,
+            {"answer": result["answer"], "sources": result["sources"]},
+            self.indexer.table_name,
+            tokens=tokens,
+            generation=generation
+        )
+    
+    def retrieve(self, question: str, similarity_top_k: int = 5) -> list:
+        """
+        Chỉ retrieve source nodes (không gọi LLM), dùng cho streaming
+        
+        Args:
+            question: Câu hỏi từ user
+            similarity_top_k: Số chunks để retrieve
+            
+        Returns:
+            list: NodeWithScore, relevant nhất trước
+        """
+        retriever = self.indexer.get_retriever(similarity_top_k=similarity_top_k)
+        return retriever.retrieve(question)
+    
+    @staticmethod
+    def build_prompt(question: str, nodes: list) -> str:
+        """
+        RAG_QA_TEMPLATE với context từ retrieved nodes
+        
+        Cùng prompt với query engine, để gửi trực tiếp tới LLM (streaming)
+        """
+        context = "\n\n".join(node.get_content() for node in nodes)
+        # replace (not format): system prompt may contain braces
+        return RAG_QA_TEMPLATE.replace("{context_str}", context).replace("{query_str}", question)
+    
+    @staticmethod
+    def source_dicts(nodes: list) -> list:
+        """Source nodes -> [{"text", "score", "metadata"}]"""
+        return [
+            {
+                "text": node.text[:200] + "...",  # Preview
+                "score": node.score,
+                "metadata": node.metadata
+            }
+            for node in nodes
+        ]
@@ -0,0 +1,162 @@
+"""
+RAG Runtime - tài nguyên RAG dùng chung trong process
+
+Trước đây mỗi request search tạo RAGIndexer mới: load embedding model
+(~420MB), tạo PGVectorStore (engine + connection pool mới) và load index.
+Runtime giữ:
+
+1. Một embedding model cho cả process (get_embed_model)
+2. Một RAGIndexer đã load_index() cho mỗi table_name, với vector store
+   và connection pool riêng của table đó
+3. Retriever đã tạo sẵn theo (table_name, top_k)
+
+nên mỗi request chỉ còn embed query và chạy vector search. Lifespan của
+LLM service gọi preload() cho RAG_PRELOAD_TABLES và close() khi shutdown.
+
+Usage:
+    nodes = get_rag_runtime().retrieve("Giờ check-in?", table_name="rag_embeddings", top_k=3)
+"""
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from src.infrastructure.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+EMBED_DIM = 384
+
+
+class RAGRuntime:
+    """Indexers và retrievers dùng chung, theo table_name (thread-safe)"""
+
+    def __init__(self, settings: Optional[Settings] = None, indexer_factory=None):
+        """
+        Initialize RAG runtime
+
+        Args:
+            settings: Application settings (if None, will call get_settings())
+            indexer_factory: table_name -> RAGIndexer chưa load (default: PGVector
+                với postgres_chat_url và embedding model dùng chung)
+        """
+        self.settings = settings or get_settings()
+        self._indexer_factory = indexer_factory or self._create_indexer
+        self._indexers: Dict[str, object] = {}
+        self._retrievers: Dict[Tuple[str, int], object] = {}
+        self._lock = threading.Lock()
+        self._table_locks: Dict[str, threading.Lock] = {}
+
+    def _create_indexer(self, table_name: str):
+        from .indexer import RAGIndexer
+        return RAGIndexer(
+            connection_string=self.settings.postgres_chat_url,
+            table_name=table_name,
+            embed_dim=EMBED_DIM
+        )
+
+    def indexer(self, table_name: str):
+        """
+        RAGIndexer đã load index của table (tạo một lần)
+
+        Request đầu tiên của một table chờ load; các table khác không bị chặn.
+        """
+        indexer = self._indexers.get(table_name)
+        if indexer is not None:
+            return indexer
+        with self._lock:
+            table_lock = self._table_locks.setdefault(table_name, threading.Lock())
+        with table_lock:
+            indexer = self._indexers.get(table_name)
+            if indexer is None:
+                indexer = self._indexer_factory(table_name)
+                indexer.load_index()
+                self._indexers[table_name] = indexer
+                logger.info(f"📚 RAG index loaded for table '{table_name}'")
+        return indexer
+
+    def retriever(self, table_name: str, top_k: int = 5):
+        """Retriever của table với top_k (tạo một lần)"""
+        key = (table_name, top_k)
+        retriever = self._retrievers.get(key)
+        if retriever is None:
+            retriever = self.indexer(table_name).get_retriever(similarity_top_k=top_k)
+            self._retrievers[key] = retriever
+        return retriever
+
+    def retrieve(self, query: str, table_name: str = "rag_embeddings", top_k: int = 5) -> list:
+        """
+        Documents liên quan nhất (không gọi LLM)
+
+        Args:
+            query: Câu hỏi / query text
+            table_name: Table trong PGVector
+            top_k: Số chunks trả về
+
+        Returns:
+            list: NodeWithScore, relevant nhất trước
+        """
+        return self.retriever(table_name, top_k).retrieve(query)
+
+    def preload(self, table_names: Optional[List[str]] = None) -> List[str]:
+        """
+        Load embedding model và index trước request đầu tiên
+
+        Chạy một query thử cho mỗi table để mở connection pool. Table lỗi
+        (chưa tồn tại, DB chưa sẵn sàng) được bỏ qua và load lại khi có request.
+
+        Returns:
+            list: Các table đã load
+        """
+        loaded = []
+        for table_name in table_names if table_names is not None else self.settings.rag_preload_tables:
+            try:
+                self.retrieve("warmup", table_name=table_name, top_k=1)
+                loaded.append(table_name)
+            except Exception as e:
+                self._discard(table_name)
+                logger.warning(f"⚠️ RAG preload failed for table '{table_name}': {e}")
+        return loaded
+
+    def _discard(self, table_name: str):
+        with self._lock:
+            indexer = self._indexers.pop(table_name, None)
+            for key in [k for k in self._retrievers if k[0] == table_name]:
+                del self._retrievers[key]
+        if indexer is not None:
+            try:
+                indexer.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to close RAG vector store '{table_name}': {e}")
+
+    def close(self):
+        """Đóng connection pools của mọi table"""
+        for table_name in list(self._indexers):
+            self._discard(table_name)
+
+    @property
+    def stats(self) -> Dict[str, object]:
+        """Tables đã load và retrievers đang cache"""
+        return {
+            "tables": sorted(self._indexers),
+            "retrievers": sorted(f"{table}:{top_k}" for table, top_k in self._retrievers),
+        }
+
+
+# Singleton
+_rag_runtime: Optional[RAGRuntime] = None
+
+
+def get_rag_runtime() -> RAGRuntime:
+    """Get RAG runtime instance (singleton)"""
+    global _rag_runtime
+    if _rag_runtime is None:
+        _rag_runtime = RAGRuntime()
+    return _rag_runtime
+
+
+def shutdown_rag_runtime():
+    """Close vector store pools (app shutdown)"""
+    global _rag_runtime
+    if _rag_runtime is not None:
+        _rag_runtime.close()
+        _rag_runtime = None
@@ -0,0 +1,338 @@
+"""
+Semantic Response Cache
+
+Answers repeated questions without calling the LLM. Questions are
+normalized and embedded with the RAG embedding model (multilingual
+MiniLM, 384 dims); a new question whose cosine similarity to a cached one
+reaches SEMANTIC_CACHE_THRESHOLD gets the cached answer.
+
+Entries are scoped by the RAG table the answer was built from, so answers
+never cross document sets, and a scope is dropped when its table is
+re-indexed. Only RAG answers are cached: they depend on the question and
+the table's documents alone, while chat replies may quote a user's name or
+bookings. Each scope keeps at most SEMANTIC_CACHE_MAX_ENTRIES entries
+(oldest evicted first) for SEMANTIC_CACHE_TTL_SECONDS.
+
+Every invalidation bumps the scope's generation. Callers take the
+generation before lookup and pass it to store, so an answer computed
+before a re-index is not written back after it.
+
+The index lives in process memory: a scope is a small matrix of unit
+vectors, so a lookup is one matrix-vector product. Every API worker keeps
+its own cache; the TTL bounds how long another worker can serve answers
+from before a re-index.
+
+Usage:
+    cache = get_semantic_cache()
+    generation = cache.generation(table_name)
+    hit = cache.lookup(question, table_name)
+    if hit is None:
+        answer = ...
+        cache.store(question, {"answer": answer}, table_name, tokens=used, generation=generation)
+"""
+import logging
+import re
+import threading
+import time
+import unicodedata
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.infrastructure.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+# Questions embedded recently, so lookup + store embed once
+EMBEDDING_CACHE_SIZE = 1024
+
+_WHITESPACE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " \t\n?!.,;:…\"'"
+
+
+def normalize_question(question: str) -> str:
+    """
+    Canonical form of a question for matching
+
+    NFC (Vietnamese diacritics typed as combining marks or precomposed),
+    lowercase, single spaces, no trailing punctuation.
+    """
+    text = unicodedata.normalize("NFC", question or "").lower()
+    text = _WHITESPACE.sub(" ", text)
+    return text.strip(_EDGE_PUNCTUATION)
+
+
+def default_embed_fn() -> Callable[[str], Sequence[float]]:
+    """Embedding function of the shared RAG embedding model"""
+    from .rag.indexer import get_embed_model
+    return get_embed_model().get_text_embedding
+
+
+class _Scope:
+    """Cached questions of one table_name"""
+
+    def __init__(self, dim: int):
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.entries: List[Dict[str, Any]] = []
+        self.exact: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def append(self, vector: np.ndarray, entry: Dict[str, Any]):
+        self.vectors = np.vstack([self.vectors, vector[None, :]])
+        self.entries.append(entry)
+        self.exact[entry["question"]] = len(self.entries) - 1
+
+    def keep(self, mask: np.ndarray):
+        """Drop entries where mask is False"""
+        self.vectors = self.vectors[mask]
+        self.entries = [e for e, k in zip(self.entries, mask) if k]
+        self.exact = {e["question"]: i for i, e in enumerate(self.entries)}
+
+
+class SemanticCache:
+    """
+    Embedding-similarity cache of LLM answers
+
+    Thread-safe: the sync RAG engine calls it from worker threads.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Optional[Callable[[str], Sequence[float]]] = None,
+        settings: Optional[Settings] = None,
+        counter=None,
+    ):
+        """
+        Initialize semantic cache
+
+        Args:
+            embed_fn: text -> embedding (default: RAG embedding model, loaded on first use)
+            settings: Application settings (if None, will call get_settings())
+            counter: TokenCounter for saved-token estimates (default: CHAT_TOKENIZER_ENCODING)
+        """
+        settings = settings or get_settings()
+        self.enabled = settings.semantic_cache_enabled
+        self.threshold = settings.semantic_cache_threshold
+        self.max_entries = settings.semantic_cache_max_entries
+        self.ttl_seconds = settings.semantic_cache_ttl_seconds
+        if counter is None:
+            from .context_window import TokenCounter
+            counter = TokenCounter(settings.chat_tokenizer_encoding)
+        self.counter = counter
+
+        self._embed_fn = embed_fn
+        self._embed = lru_cache(maxsize=EMBEDDING_CACHE_SIZE)(self._embed_normalized)
+        self._scopes: Dict[str, _Scope] = {}
+        # Bumped by invalidate(): per table, and for all tables at once
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "lookups": 0,
+            "hits": 0,
+            "exact_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "stale_stores": 0,
+            "tokens_saved": 0,
+        }
+
+    # ========== Embedding ==========
+
+    def _embed_normalized(self, text: str) -> np.ndarray:
+        if self._embed_fn is None:
+            self._embed_fn = default_embed_fn()
+        vector = np.asarray(self._embed_fn(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    # ========== Lookup / Store ==========
+
+    def generation(self, table_name: str) -> int:
+        """
+        Current generation of a scope; changes on every invalidation
+
+        Take it before lookup and pass it to store for the answer computed
+        on a miss.
+        """
+        with self._lock:
+            return self._generation(table_name)
+
+    def _generation(self, table_name: str) -> int:
+        return self._epoch + self._generations.get(table_name, 0)
+
+    def lookup(self, question: str, table_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Cached answer for a question similar enough to a previous one
+
+        Args:
+            question: Raw user question
+            table_name: RAG table the answer was built from
+
+        Returns:
+            The stored value plus "cached_question" and "similarity",
+            or None on a miss
+        """
+        if not self.enabled:
+            return None
+        normalized = normalize_question(question)
+        if not normalized:
+            return None
+
+        with self._lock:
+            self._stats["lookups"] += 1
+            scope = self._scopes.get(table_name)
+            exact = scope is not None and normalized in scope.exact
+        # Embed outside the lock; the model call is the slow part. Empty
+        # scopes and exact repeats need no embedding at all.
+        vector = None if scope is None or exact else self._embed(normalized)
+
+        now = time.time()
+        with self._lock:
+            match = self._match(self._scopes.get(table_name), normalized, vector)
+            if match is not None:
+                entry, similarity = match
+                if similarity >= self.threshold and now - entry["created_at"] <= self.ttl_seconds:
+                    entry["hits"] += 1
+                    self._stats["hits"] += 1
+                    self._stats["exact_hits"] += entry["question"] == normalized
+                    self._stats["tokens_saved"] += entry["tokens"]
+                    logger.debug(f"🎯 Semantic cache hit ({similarity:.3f}) in {table_name}: {question[:50]}")
+                    return dict(entry["value"], cached_question=entry["question"], similarity=round(similarity, 4))
+            self._stats["misses"] += 1
+            return None
+
+    @staticmethod
+    def _match(scope: Optional[_Scope], normalized: str, vector: Optional[np.ndarray]):
+        """(entry, similarity) of the closest cached question, if any"""
+        if scope is None or not len(scope):
+            return None
+        if normalized in scope.exact:
+            return scope.entries[scope.exact[normalized]], 1.0
+        if vector is None:
+            # The exact entry was evicted meanwhile
+            return None
+        scores = scope.vectors @ vector
+        index = int(np.argmax(scores))
+        return scope.entries[index], float(scores[index])
+
+    def store(
+        self,
+        question: str,
+        value: Dict[str, Any],
+        table_name: str,
+        tokens: Optional[int] = None,
+        generation: Optional[int] = None,
+    ):
+        """
+        Cache an answer
+
+        Args:
+            question: Raw user question
+            value: What lookup returns on a hit (e.g. {"answer", "sources"})
+            table_name: RAG table the answer was built from
+            tokens: LLM tokens the answer cost (default: estimated from
+                question and answer), counted as saved on every hit
+            generation: generation(table_name) taken before the lookup; the
+                answer is dropped if the scope was invalidated since
+        """
+        if not self.enabled:
+            return
+        normalized = normalize_question(question)
+        if not normalized:
+            return
+        if tokens is None:
+            tokens = self.counter.count(question) + self.counter.count(str(value.get("answer", "")))
+        vector = self._embed(normalized)
+
+        entry = {
+            "question": normalized,
+            "value": value,
+            "tokens": int(tokens),
+            "created_at": time.time(),
+            "hits": 0,
+        }
+        with self._lock:
+            if generation is not None and generation != self._generation(table_name):
+                # Built from documents that have been re-indexed meanwhile
+                self._stats["stale_stores"] += 1
+                return
+            scope = self._scopes.get(table_name)
+            if scope is None:
+                scope = self._scopes[table_name] = _Scope(vector.shape[0])
+            if normalized in scope.exact:
+                # Newer answer replaces the old one
+                scope.keep(np.array([e["question"] != normalized for e in scope.entries], dtype=bool))
+            self._prune(scope)
+            scope.append(vector, entry)
+            self._stats["stores"] += 1
+
+    def _prune(self, scope: _Scope):
+        """Drop expired entries, then the oldest until there is room for one more"""
+        if not len(scope):
+            return
+        now = time.time()
+        keep = np.array([now - e["created_at"] <= self.ttl_seconds for e in scope.entries], dtype=bool)
+        overflow = int(keep.sum()) - self.max_entries + 1
+        if overflow > 0:
+            # Entries are in insertion order
+            keep[np.flatnonzero(keep)[:overflow]] = False
+        dropped = len(scope) - int(keep.sum())
+        if dropped:
+            scope.keep(keep)
+            self._stats["evictions"] += dropped
+
+    # ========== Invalidation ==========
+
+    def invalidate(self, table_name: Optional[str] = None) -> int:
+        """
+        Drop cached answers, e.g. after a RAG table is re-indexed
+
+        Args:
+            table_name: Table whose answers to drop (None: every table)
+
+        Returns:
+            int: Number of entries dropped
+        """
+        with self._lock:
+            keys = [key for key in self._scopes if table_name is None or key == table_name]
+            dropped = sum(len(self._scopes.pop(key)) for key in keys)
+            if table_name is None:
+                self._epoch += 1
+            else:
+                self._generations[table_name] = self._generations.get(table_name, 0) + 1
+            self._stats["invalidations"] += 1
+        logger.info(f"🧹 Semantic cache invalidated for {table_name or 'all tables'}: {dropped} entries dropped")
+        return dropped
+
+    # ========== Stats ==========
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate, saved tokens and entries per scope"""
+        with self._lock:
+            stats = dict(self._stats)
+            scopes = {table: len(scope) for table, scope in self._scopes.items()}
+        stats["hit_rate"] = round(stats["hits"] / stats["lookups"], 4) if stats["lookups"] else 0.0
+        stats["entries"] = sum(scopes.values())
+        stats["scopes"] = scopes
+        stats["enabled"] = self.enabled
+        stats["threshold"] = self.threshold
+        return stats
+
+
+# Singleton
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Get semantic cache instance (singleton)"""
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache()
+    return _semantic_cache
@@ -13,4 +13,6 @@ class ChatState(TypedDict):
     messages: Annotated[Sequence[BaseMessage], add_messages]
     conversation_id: str
     user_id: str | None
-    context: str
\ No newline at end of file
+    context: str
+    # Running summary of messages compacted out of `messages`
+    summary: str
\ No newline at end of file
@@ -0,0 +1,488 @@
+"""
+Risk-Factor Explanations for Churn Predictions
+
+Explanations are built for N bookings at once from a contribution matrix
+C of shape (N, M), where C[i, j] is how much factor j moves booking i's
+churn probability (positive = risk, negative = protective):
+
+- Model mode: per-feature contributions from the tree model itself
+  (LightGBM pred_contrib / XGBoost pred_contribs, i.e. tree SHAP), in
+  log-odds, scaled to probability space with p * (1 - p)
+- Rule mode (no trained model): a table of vectorized rules over the
+  encoded feature matrix, with the same thresholds and impact scores as
+  the original per-booking if/else rules
+
+Top risk and protective factors for every booking come from one argsort
+over C; RiskFactor objects are only built for the selected entries.
+
+Recommended actions come from the same rule table: a rule may carry an
+action, suggested wherever the rule fires (and its extra condition holds),
+next to a few actions driven by the risk level alone.
+"""
+
+import logging
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.application.dtos.ml.churn_dto import RecommendedAction, RiskFactor
+from src.application.services.ml.feature_engineering import CHURN_FEATURES, ChurnFeatureEncoder
+
+logger = logging.getLogger(__name__)
+
+_COL = {name: i for i, name in enumerate(CHURN_FEATURES)}
+
+# Factors returned per side (risk / protective); 7 is the most risk rules
+# that can fire together, so rule-mode explanations are never truncated
+MAX_FACTORS = 7
+
+# Model-mode contributions below this probability impact are not reported
+MIN_MODEL_IMPACT = 0.005
+
+# Recommended actions returned per booking
+MAX_ACTIONS = 5
+
+# Code given to categories the encoder does not know; no rule matches it
+UNKNOWN_CODE = -1
+
+Explanation = Tuple[List[RiskFactor], List[RiskFactor]]
+
+
+def _decoder(mapping: dict) -> Callable[[float], str]:
+    names = {code: name for name, code in mapping.items()}
+    return lambda code: names.get(int(code), 'unknown')
+
+
+_LOYALTY_NAME = _decoder(ChurnFeatureEncoder.LOYALTY_TIER_ENCODING)
+_PAYMENT = ChurnFeatureEncoder.PAYMENT_METHOD_ENCODING
+_LOYALTY = ChurnFeatureEncoder.LOYALTY_TIER_ENCODING
+
+
+# ============================================================================
+# Rule table (mock path)
+# ============================================================================
+
+def _col(X: np.ndarray, name: str) -> np.ndarray:
+    return X[:, _COL[name]]
+
+
+class Action(NamedTuple):
+    """Recommended action; when/details work on encoded rows"""
+    action: str
+    priority: str
+    timing: str
+    expected_impact: float
+    when: Optional[Callable[[np.ndarray], np.ndarray]] = None
+    details: Optional[Callable[[np.ndarray], Dict[str, Any]]] = None
+
+
+class Rule(NamedTuple):
+    """Risk-factor rule, with the action it calls for (if any)"""
+    name: str
+    impact: Callable[[np.ndarray], np.ndarray]
+    describe: Callable[[np.ndarray], str]
+    action: Optional[Action] = None
+
+
+# Each rule: factor name, vectorized impact (0 where the rule does not
+# fire), and a description built from the encoded row of a selected booking.
+# Thresholds compare in float32 so values like 0.3 are not pushed over
+# their own threshold by the encoding.
+RULES: List[Rule] = [
+    Rule(
+        'long_lead_time',
+        lambda X: np.select(
+            [_col(X, 'booking_lead_time_days') > 60, _col(X, 'booking_lead_time_days') > 30], [0.15, 0.08], 0.0
+        ),
+        lambda x: f"Bookings made {int(x[_COL['booking_lead_time_days']])}+ days in advance have higher cancellation rates",
+        Action(
+            'send_reminder_communications', 'medium', 'weekly_until_checkin', 0.03,
+            when=lambda X: _col(X, 'days_until_checkin') > 7,
+        ),
+    ),
+    Rule(
+        'short_lead_time',
+        lambda X: np.where(_col(X, 'booking_lead_time_days') < 7, -0.10, 0.0),
+        lambda x: "Short booking window indicates urgency and commitment",
+    ),
+    Rule(
+        'first_time_guest',
+        lambda X: np.where(_col(X, 'is_first_booking') == 1, 0.10, 0.0),
+        lambda x: "First-time guests have higher cancellation rates",
+        Action('send_welcome_package', 'medium', 'after_booking', 0.05),
+    ),
+    Rule(
+        'repeat_guest',
+        lambda X: np.where((_col(X, 'is_first_booking') == 0) & (_col(X, 'previous_bookings_count') > 3), -0.10, 0.0),
+        lambda x: f"Guest has completed {int(x[_COL['previous_bookings_count']])} previous stays",
+    ),
+    Rule(
+        'high_historical_cancellation',
+        lambda X: np.where(
+            _col(X, 'cancellation_rate') > np.float32(0.3),
+            _col(X, 'cancellation_rate').astype(np.float64) * 0.3,
+            0.0,
+        ),
+        lambda x: f"Guest has {x[_COL['cancellation_rate']] * 100:.0f}% historical cancellation rate",
+    ),
+    Rule(
+        'loyalty_member',
+        lambda X: np.select(
+            [_col(X, 'loyalty_tier_encoded') == _LOYALTY['gold'], _col(X, 'loyalty_tier_encoded') == _LOYALTY['platinum']],
+            [-0.08, -0.12],
+            0.0,
+        ),
+        lambda x: f"{_LOYALTY_NAME(x[_COL['loyalty_tier_encoded']]).capitalize()} member status indicates commitment",
+        Action(
+            'apply_loyalty_discount', 'high', 'immediate', 0.12,
+            when=lambda X: _col(X, 'discount_applied') == 0,
+            details=lambda x: {
+                'discount_percentage': 10 if x[_COL['loyalty_tier_encoded']] == _LOYALTY['gold'] else 15,
+                # total_amount is encoded in M VND
+                'estimated_cost': int(round(float(x[_COL['total_amount']]) * 1_000_000) * 0.10),
+            },
+        ),
+    ),
+    Rule(
+        'no_loyalty_membership',
+        lambda X: np.where(_col(X, 'loyalty_tier_encoded') == _LOYALTY['none'], 0.05, 0.0),
+        lambda x: "Non-loyalty member has less commitment",
+    ),
+    Rule(
+        'credit_card_payment',
+        lambda X: np.where(_col(X, 'payment_method_encoded') == _PAYMENT['credit_card'], -0.05, 0.0),
+        lambda x: "Credit card payment indicates commitment",
+    ),
+    Rule(
+        'cash_payment',
+        lambda X: np.where(_col(X, 'payment_method_encoded') == _PAYMENT['cash'], 0.05, 0.0),
+        lambda x: "Cash payment has no financial commitment",
+    ),
+    Rule(
+        'price_sensitivity',
+        lambda X: np.where(_col(X, 'price_vs_avg_ratio') > np.float32(1.2), 0.12, 0.0),
+        lambda x: "Price point above guest's typical spending",
+    ),
+    Rule(
+        'good_value',
+        lambda X: np.where(_col(X, 'price_vs_avg_ratio') < np.float32(0.9), -0.05, 0.0),
+        lambda x: "Booking price is below typical spending",
+    ),
+    Rule(
+        'multiple_modifications',
+        lambda X: np.where(
+            _col(X, 'booking_modifications_count') > 2,
+            np.minimum(_col(X, 'booking_modifications_count').astype(np.float64) * 0.05, 0.15),
+            0.0,
+        ),
+        lambda x: f"Booking has been modified {int(x[_COL['booking_modifications_count']])} times",
+    ),
+]
+
+
+def rule_contributions(X: np.ndarray) -> np.ndarray:
+    """
+    Rule impacts for an encoded (N, 25) matrix
+
+    Returns:
+        float64 array of shape (N, len(RULES)), 0 where a rule does not fire
+    """
+    C = np.zeros((len(X), len(RULES)), dtype=np.float64)
+    for j, rule in enumerate(RULES):
+        C[:, j] = rule.impact(X)
+    return C
+
+
+# Actions suggested by risk level alone
+RISK_LEVEL_ACTIONS: List[Tuple[Tuple[str, ...], Action]] = [
+    (('medium', 'high'), Action('send_confirmation_email', 'high', 'immediate', 0.05)),
+    (('high',), Action('personal_outreach', 'high', 'within_24_hours', 0.10)),
+    (('high',), Action('offer_flexible_cancellation', 'medium', '7_days_before', 0.08)),
+]
+
+_PRIORITY_ORDER = {'high': 0, 'medium': 1, 'low': 2}
+
+
+def recommend_batch(X: np.ndarray, risk_levels: Sequence[str], top_k: int = MAX_ACTIONS) -> List[List[RecommendedAction]]:
+    """
+    Recommended actions for N encoded bookings
+
+    An action of RULES is suggested where its rule fires and its extra
+    condition holds; RISK_LEVEL_ACTIONS by risk level.
+
+    Args:
+        X: Encoded (N, 25) feature matrix
+        risk_levels: 'low' / 'medium' / 'high' per booking
+        top_k: Actions per booking, by priority then expected impact
+
+    Returns:
+        One list of RecommendedAction per booking
+    """
+    X = np.asarray(X, dtype=np.float32)
+    levels = np.asarray(risk_levels, dtype=str)
+    candidates: List[Tuple[Action, np.ndarray]] = [
+        (action, np.isin(levels, applies_to)) for applies_to, action in RISK_LEVEL_ACTIONS
+    ]
+    fired = rule_contributions(X) != 0
+    for j, rule in enumerate(RULES):
+        if rule.action is not None:
+            mask = fired[:, j] if rule.action.when is None else fired[:, j] & rule.action.when(X)
+            candidates.append((rule.action, mask))
+    candidates.sort(key=lambda c: (_PRIORITY_ORDER[c[0].priority], -c[0].expected_impact))
+
+    selected = np.column_stack([mask for _, mask in candidates]) if candidates else np.zeros((len(X), 0), dtype=bool)
+    results = []
+    for i in range(len(X)):
+        results.append([
+            RecommendedAction(
+                action=action.action,
+                priority=action.priority,
+                timing=action.timing,
+                expected_impact=action.expected_impact,
+                details=action.details(X[i]) if action.details is not None else None,
+            )
+            for action, _ in (candidates[j] for j in np.flatnonzero(selected[i])[:top_k])
+        ])
+    return results
+
+
+def mask_unknown_payment(X: np.ndarray, payment_methods: Optional[Sequence[Optional[str]]]) -> np.ndarray:
+    """
+    X with UNKNOWN_CODE as payment method where the raw method is not known
+
+    The encoder maps unknown methods to the cash code, which the model was
+    trained on; explanations must not report them as cash payments.
+    """
+    if payment_methods is None:
+        return X
+    known = np.fromiter(
+        ((m or '').lower() in _PAYMENT for m in payment_methods), dtype=bool, count=len(payment_methods)
+    )
+    if known.all():
+        return X
+    X = X.copy()
+    X[~known, _COL['payment_method_encoded']] = UNKNOWN_CODE
+    return X
+
+
+# ============================================================================
+# Model contributions
+# ============================================================================
+
+# Human-readable feature labels for model-mode descriptions
+FEATURE_LABELS = {
+    'booking_lead_time_days': 'Booking lead time (days)',
+    'total_amount': 'Booking amount (M VND)',
+    'length_of_stay': 'Length of stay (nights)',
+    'room_type_encoded': 'Room type',
+    'payment_method_encoded': 'Payment method',
+    'booking_source_encoded': 'Booking source',
+    'is_first_booking': 'First booking',
+    'previous_bookings_count': 'Previous bookings',
+    'previous_cancellations_count': 'Previous cancellations',
+    'cancellation_rate': 'Historical cancellation rate',
+    'avg_previous_booking_value': 'Average previous booking value (M VND)',
+    'days_since_last_booking': 'Days since last booking',
+    'special_requests_count': 'Special requests',
+    'booking_modifications_count': 'Booking modifications',
+    'loyalty_tier_encoded': 'Loyalty tier',
+    'loyalty_points_balance': 'Loyalty points (thousands)',
+    'time_spent_on_website_minutes': 'Time on website (minutes)',
+    'pages_viewed': 'Pages viewed',
+    'price_comparison_searches': 'Price comparison searches',
+    'days_until_checkin': 'Days until check-in',
+    'booking_dow': 'Booking day of week',
+    'booking_hour': 'Booking hour',
+    'season_encoded': 'Season',
+    'price_vs_avg_ratio': 'Price vs. typical spending',
+    'discount_applied': 'Discount applied',
+}
+
+# Encoded categorical columns shown by name
+_CATEGORY_NAMES = {
+    'room_type_encoded': _decoder(ChurnFeatureEncoder.ROOM_TYPE_ENCODING),
+    'payment_method_encoded': _decoder(ChurnFeatureEncoder.PAYMENT_METHOD_ENCODING),
+    'booking_source_encoded': _decoder(ChurnFeatureEncoder.BOOKING_SOURCE_ENCODING),
+    'loyalty_tier_encoded': _LOYALTY_NAME,
+    'season_encoded': _decoder(ChurnFeatureEncoder.SEASON_ENCODING),
+    'is_first_booking': lambda v: 'yes' if v else 'no',
+    'discount_applied': lambda v: 'yes' if v else 'no',
+}
+
+
+def _describe_feature(j: int, value: float, impact: float) -> str:
+    name = CHURN_FEATURES[j]
+    shown = _CATEGORY_NAMES[name](value) if name in _CATEGORY_NAMES else f"{value:g}"
+    direction = "raises" if impact > 0 else "lowers"
+    return f"{FEATURE_LABELS[name]}: {shown} {direction} cancellation risk"
+
+
+def _tree_booster(model: Any) -> Optional[Tuple[str, Any]]:
+    """(backend, booster) of a tree model, or None when unsupported"""
+    backend = getattr(model, 'backend', None)
+    if backend in ('lightgbm', 'xgboost') and hasattr(model, 'booster'):
+        return backend, model.booster
+
+    booster = getattr(model, 'booster_', None)
+    if booster is None and hasattr(model, 'get_booster'):
+        booster = model.get_booster()
+    if booster is None:
+        booster = model
+
+    module = type(booster).__module__.split('.')[0]
+    if module in ('lightgbm', 'xgboost'):
+        return module, booster
+    return None
+
+
+def model_contributions(model: Any, X: np.ndarray, probabilities: np.ndarray) -> Optional[np.ndarray]:
+    """
+    Per-feature probability impacts from tree SHAP values
+
+    Args:
+        model: Trained tree model (sklearn wrapper, BoosterClassifier,
+            CompiledTreePredictor or raw booster)
+        X: Encoded (N, 25) feature matrix
+        probabilities: Predicted churn probabilities for X
+
+    Returns:
+        float64 array of shape (N, 25), or None if the model does not
+        expose tree contributions
+    """
+    found = _tree_booster(model)
+    if found is None:
+        return None
+    backend, booster = found
+
+    try:
+        if backend == 'lightgbm':
+            raw = booster.predict(X, pred_contrib=True)
+        else:
+            import xgboost as xgb
+            raw = booster.predict(xgb.DMatrix(X), pred_contribs=True)
+    except Exception as e:
+        logger.warning(f"Tree contributions unavailable, using rule explanations: {e}")
+        return None
+
+    # Drop the bias column; log-odds -> probability by the logistic slope
+    raw = np.asarray(raw, dtype=np.float64)[:, :X.shape[1]]
+    slope = probabilities * (1 - probabilities)
+    return raw * slope[:, None]
+
+
+# ============================================================================
+# Top-k selection
+# ============================================================================
+
+def top_factors(
+    C: np.ndarray,
+    names: List[str],
+    describe: Callable[[int, int], str],
+    top_k: int = MAX_FACTORS,
+    min_impact: float = 0.0,
+) -> List[Explanation]:
+    """
+    Top risk and protective factors of every row of a contribution matrix
+
+    Args:
+        C: (N, M) contributions (positive = risk)
+        names: Factor name per column
+        describe: describe(row, column) -> description text
+        top_k: Factors per side
+        min_impact: Contributions with |impact| <= this are dropped
+
+    Returns:
+        One (risk_factors, protective_factors) pair per row, each sorted
+        by decreasing |impact|
+    """
+    n, m = C.shape
+    k = min(top_k, m)
+    if n == 0 or k == 0:
+        return [([], []) for _ in range(n)]
+
+    # Stable sort keeps table order among equal impacts
+    order = np.argsort(-C, axis=1, kind='stable')
+    risk_cols = order[:, :k]
+    protective_cols = np.argsort(C, axis=1, kind='stable')[:, :k]
+    rows = np.arange(n)[:, None]
+    risk_keep = C[rows, risk_cols] > min_impact
+    protective_keep = C[rows, protective_cols] < -min_impact
+
+    impacts = np.round(C, 4)
+    results = []
+    for i in range(n):
+        risk = [
+            RiskFactor.model_construct(factor=names[j], impact_score=float(impacts[i, j]), description=describe(i, j))
+            for j in risk_cols[i][risk_keep[i]]
+        ]
+        protective = [
+            RiskFactor.model_construct(factor=names[j], impact_score=float(impacts[i, j]), description=describe(i, j))
+            for j in protective_cols[i][protective_keep[i]]
+        ]
+        results.append((risk, protective))
+    return results
+
+
+class ChurnExplainer:
+    """
+    Batch risk-factor explanations for churn predictions
+
+    Usage:
+        explainer = ChurnExplainer()
+        explanations = explainer.explain_batch(X, model, probabilities)
+        risk_factors, protective_factors = explanations[0]
+        actions = explainer.recommend_batch(X, ['high'])[0]
+    """
+
+    def __init__(self, top_k: int = MAX_FACTORS):
+        """
+        Args:
+            top_k: Factors returned per side
+        """
+        self.top_k = top_k
+
+    def explain_batch(
+        self,
+        X: np.ndarray,
+        model: Any = None,
+        probabilities: Optional[np.ndarray] = None,
+        payment_methods: Optional[Sequence[Optional[str]]] = None,
+    ) -> List[Explanation]:
+        """
+        Explain N encoded bookings in one pass
+
+        Args:
+            X: Encoded (N, 25) feature matrix
+            model: Trained tree model (None for the rule table)
+            probabilities: Churn probabilities for X (needed in model mode)
+            payment_methods: Raw payment method per booking; unknown
+                methods fire no payment rule and are described as unknown
+
+        Returns:
+            One (risk_factors, protective_factors) pair per booking
+        """
+        X = np.asarray(X, dtype=np.float32)
+        shown = mask_unknown_payment(X, payment_methods)
+
+        if model is not None and probabilities is not None:
+            C = model_contributions(model, X, np.asarray(probabilities, dtype=np.float64))
+            if C is not None:
+                return top_factors(
+                    C,
+                    list(CHURN_FEATURES),
+                    lambda i, j: _describe_feature(j, float(shown[i, j]), C[i, j]),
+                    self.top_k,
+                    MIN_MODEL_IMPACT,
+                )
+
+        C = rule_contributions(shown)
+        return top_factors(
+            C,
+            [rule.name for rule in RULES],
+            lambda i, j: RULES[j].describe(shown[i]),
+            self.top_k,
+        )
+
+    def recommend_batch(self, X: np.ndarray, risk_levels: Sequence[str]) -> List[List[RecommendedAction]]:
+        """Recommended actions for N encoded bookings (see recommend_batch)"""
+        return recommend_batch(X, risk_levels)
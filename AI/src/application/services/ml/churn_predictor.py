@@ -2,8 +2,9 @@
 Uses LightGBM for prediction with AUC > 0.75 target
 """
 
-from typing import Dict, Any, List, Optional, Tuple, cast, Literal
+from typing import Dict, Any, List, Optional, Tuple, Union, cast, Literal
 import numpy as np 
+import pandas as pd
 from datetime import datetime 
 import logging
 
@@ -14,7 +15,9 @@ from src.application.dtos.ml.churn_dto import (
     RecommendedAction, 
     BatchPrediction, 
 )
-from src.application.services.ml.feature_engineering import ChurnFeatureEncoder
+from src.application.services.ml.feature_engineering import ChurnFeatureEncoder, CHURN_FEATURES
+from src.application.services.ml.churn_explainer import ChurnExplainer
+from src.application.services.ml.micro_batching import MicroBatcher, build_batcher
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +28,29 @@ RISK_THRESHOLDS = {
     'high': 1.0, 
 }
 
+# Risk levels in threshold order (index returned by get_risk_levels)
+RISK_LEVELS = np.array(['low', 'medium', 'high'])
+_RISK_EDGES = np.array([RISK_THRESHOLDS['low'], RISK_THRESHOLDS['medium']])
+
+# Loyalty discount indexed by LOYALTY_TIER_ENCODING code (none, silver, gold, platinum)
+_LOYALTY_DISCOUNT_BY_CODE = np.array([0.0, 0.05, 0.10, 0.15])
+
+# Encoded matrix columns used by the vectorized mock predictor
+_COL = {name: i for i, name in enumerate(CHURN_FEATURES)}
+
+# Model registry name for the trained churn model
+CHURN_MODEL_NAME = 'churn_predictor'
+
+# ChurnFeatures guest-history field <- online feature store key
+HISTORY_FEATURE_MAP = {
+    'previous_bookings_count': 'total_bookings',
+    'previous_cancellations_count': 'cancelled_bookings',
+    'cancellation_rate': 'cancellation_rate',
+    'avg_previous_booking_value': 'avg_booking_value',
+    'days_since_last_booking': 'days_since_last_booking',
+    'loyalty_tier': 'loyalty_tier',
+}
+
 # Feature importance for explanation (from trained model)
 FEATURE_IMPORTANCE = { 
     'booking_lead_time_days': 0.15,
@@ -56,18 +82,56 @@ class ChurnPredictor:
     - n_estimators: 500
     """
 
-    def __init__(self, model=None):
+    def __init__(self, model=None, feature_store=None):
         """ 
         Initialize churn predictor
 
         Args:
             model: Pre-trained LightGBM model (optional)
+            feature_store: OnlineFeatureStore; while connected, its guest
+                history features replace the ones sent with the request
         """
 
         self.model = model
+        self.feature_store = feature_store
         self.model_version = "churn_v1.8"
         self.feature_encoder = ChurnFeatureEncoder()
+        self.explainer = ChurnExplainer()
+        # Coalesces concurrent predict_single calls (set by get_churn_predictor)
+        self.batcher: Optional[MicroBatcher] = None
     
+    def on_model_swapped(self, model_name: str, model, info: Dict):
+        """Pick up a hot-swapped model version from the registry"""
+        if model_name != CHURN_MODEL_NAME:
+            return
+        self.model = model
+        self.model_version = f"churn_v{str(info.get('version', '')).lstrip('v')}"
+        logger.info(f"🔄 Churn model swapped to {self.model_version}")
+
+    @staticmethod
+    def history_overrides(guest_features: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        ChurnFeatures guest-history fields from online store features
+
+        Returns:
+            Field updates (empty for guests without booking history)
+        """
+        if not guest_features.get('has_history'):
+            return {}
+        overrides = {field: guest_features[key] for field, key in HISTORY_FEATURE_MAP.items()}
+        overrides['is_first_booking'] = False
+        return overrides
+
+    async def _load_guest_features(self, guest_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Store features for the guests, or nothing while the store is offline"""
+        if not guest_ids or self.feature_store is None or not self.feature_store.is_connected:
+            return {}
+        try:
+            return await self.feature_store.get_features(guest_ids)
+        except Exception as e:
+            logger.warning(f"Feature store lookup failed, using request features: {e}")
+            return {}
+
     def predict(self, features: ChurnFeatures) -> Tuple[float, float]:
         """ 
         Predict churn probability for a single booking
@@ -143,6 +207,65 @@ class ChurnPredictor:
         
         return churn_prob, confidence
 
+    def predict_proba_batch(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict churn probabilities for an encoded (N, 25) feature matrix
+
+        Makes a single predict_proba call on the whole matrix.
+
+        Returns:
+            float64 array of shape (N,)
+        """
+        if len(X) == 0:
+            return np.empty(0, dtype=np.float64)
+        if self.model is not None:
+            return np.asarray(self.model.predict_proba(X)[:, 1], dtype=np.float64)
+        return self._mock_predict_batch(X)
+
+    def _mock_predict_batch(self, X: np.ndarray) -> np.ndarray:
+        """
+        Vectorized version of _mock_predict over an encoded feature matrix
+        """
+        lead_time = X[:, _COL['booking_lead_time_days']].astype(np.float64)
+        # Compare in float32 so ratios like 1.1 are not pushed over their own threshold
+        price_ratio = X[:, _COL['price_vs_avg_ratio']]
+        mods = X[:, _COL['booking_modifications_count']].astype(np.float64)
+        loyalty_code = X[:, _COL['loyalty_tier_encoded']].astype(np.intp)
+        credit_card = ChurnFeatureEncoder.PAYMENT_METHOD_ENCODING['credit_card']
+
+        prob = np.full(len(X), 0.2)
+        prob += np.select([lead_time > 60, lead_time > 30, lead_time > 14], [0.15, 0.08, 0.03], 0.0)
+        prob += 0.10 * X[:, _COL['is_first_booking']].astype(np.float64)
+        prob += X[:, _COL['cancellation_rate']].astype(np.float64) * 0.3
+        prob -= _LOYALTY_DISCOUNT_BY_CODE[loyalty_code]
+        prob -= 0.05 * (X[:, _COL['payment_method_encoded']] == credit_card)
+        prob += np.select(
+            [price_ratio > np.float32(1.3), price_ratio > np.float32(1.1)], [0.10, 0.05], 0.0
+        )
+        prob += np.minimum(mods * 0.05, 0.15)
+
+        return np.clip(prob, 0.0, 1.0)
+
+    def _predict_coalesced(self, features: List[ChurnFeatures]) -> List[Tuple[float, float]]:
+        """
+        Batch version of predict for coalesced single-booking requests
+
+        Scores all bookings with one predict_proba_batch call.
+
+        Returns:
+            (churn_probability, confidence) per booking, as predict returns them
+        """
+        feature_dicts = [f.model_dump() for f in features]
+        X = self.feature_encoder.encode_batch(feature_dicts)
+        probabilities = self.predict_proba_batch(X)
+
+        if self.model is not None:
+            confidence = np.minimum(0.95, 0.70 + (np.count_nonzero(X, axis=1) / X.shape[1]) * 0.25)
+        else:
+            confidence = np.array([self._calculate_mock_confidence(d) for d in feature_dicts])
+
+        return list(zip(probabilities.tolist(), confidence.tolist()))
+
     def _calculate_confidence(self, features: np.ndarray) -> float:
         """Calculate prediction confidence"""
         # In production, this would use model uncertainty estimation
@@ -170,115 +293,34 @@ class ChurnPredictor:
         else:
             return 'high'
     
+    def get_risk_levels(self, probabilities: np.ndarray) -> np.ndarray:
+        """
+        Vectorized get_risk_level
+
+        Returns:
+            Index array into RISK_LEVELS (0=low, 1=medium, 2=high)
+        """
+        return np.searchsorted(_RISK_EDGES, probabilities, side='right')
+
     def analyze_risk_factors(
         self, 
-        features: ChurnFeatures
+        features: ChurnFeatures,
+        probability: Optional[float] = None
     ) -> Tuple[List[RiskFactor], List[RiskFactor]]:
         """
         Analyze risk and protective factors
+
+        Args:
+            features: Booking features
+            probability: Predicted churn probability; with a trained model
+                the factors come from its tree contributions
         
         Returns:
             Tuple of (risk_factors, protective_factors)
         """
-        feature_dict = features.model_dump()
-        risk_factors = []
-        protective_factors = []
-        
-        # Lead time analysis
-        lead_time = feature_dict.get('booking_lead_time_days', 0)
-        if lead_time > 30:
-            risk_factors.append(RiskFactor(
-                factor='long_lead_time',
-                impact_score=0.15 if lead_time > 60 else 0.08,
-                description=f"Bookings made {lead_time}+ days in advance have higher cancellation rates"
-            ))
-        elif lead_time < 7:
-            protective_factors.append(RiskFactor(
-                factor='short_lead_time',
-                impact_score=-0.10,
-                description="Short booking window indicates urgency and commitment"
-            ))
-            
-        # First booking analysis
-        if feature_dict.get('is_first_booking', True):
-            risk_factors.append(RiskFactor(
-                factor='first_time_guest',
-                impact_score=0.10,
-                description="First-time guests have higher cancellation rates"
-            ))
-        else:
-            prev_bookings = feature_dict.get('previous_bookings_count', 0)
-            if prev_bookings > 3:
-                protective_factors.append(RiskFactor(
-                    factor='repeat_guest',
-                    impact_score=-0.10,
-                    description=f"Guest has completed {prev_bookings} previous stays"
-                ))
-        
-        # Historical cancellation rate
-        cancel_rate = feature_dict.get('cancellation_rate', 0)
-        if cancel_rate > 0.3:
-            risk_factors.append(RiskFactor(
-                factor='high_historical_cancellation',
-                impact_score=cancel_rate * 0.3,
-                description=f"Guest has {cancel_rate*100:.0f}% historical cancellation rate"
-            ))
-            
-        # Loyalty tier analysis
-        loyalty = feature_dict.get('loyalty_tier', 'none').lower()
-        if loyalty in ['gold', 'platinum']:
-            protective_factors.append(RiskFactor(
-                factor='loyalty_member',
-                impact_score=-0.08 if loyalty == 'gold' else -0.12,
-                description=f"{loyalty.capitalize()} member status indicates commitment"
-            ))
-        elif loyalty == 'none':
-            risk_factors.append(RiskFactor(
-                factor='no_loyalty_membership',
-                impact_score=0.05,
-                description="Non-loyalty member has less commitment"
-            ))
-        
-        # Payment method
-        payment = feature_dict.get('payment_method', '').lower()
-        if payment == 'credit_card':
-            protective_factors.append(RiskFactor(
-                factor='credit_card_payment',
-                impact_score=-0.05,
-                description="Credit card payment indicates commitment"
-            ))
-        elif payment == 'cash':
-            risk_factors.append(RiskFactor(
-                factor='cash_payment',
-                impact_score=0.05,
-                description="Cash payment has no financial commitment"
-            ))
-            
-        # Price sensitivity
-        price_ratio = feature_dict.get('price_vs_avg_ratio', 1.0)
-        if price_ratio > 1.2:
-            risk_factors.append(RiskFactor(
-                factor='price_sensitivity',
-                impact_score=0.12,
-                description="Price point above guest's typical spending"
-            ))
-        elif price_ratio < 0.9:
-            protective_factors.append(RiskFactor(
-                factor='good_value',
-                impact_score=-0.05,
-                description="Booking price is below typical spending"
-            ))
-            
-        # Modifications
-        mods = feature_dict.get('booking_modifications', 0)
-        if mods > 2:
-            risk_factors.append(RiskFactor(
-                factor='multiple_modifications',
-                impact_score=min(mods * 0.05, 0.15),
-                description=f"Booking has been modified {mods} times"
-            ))
-            
-        return risk_factors, protective_factors
+        X = self.feature_encoder.encode_batch([features.model_dump()])
+        probabilities = None if probability is None else np.array([probability])
+        return self.explainer.explain_batch(X, self.model, probabilities, [features.payment_method])[0]
     
     def generate_recommendations(
         self,
@@ -287,77 +329,9 @@ class ChurnPredictor:
         features: ChurnFeatures,
         risk_factors: List[RiskFactor]
     ) -> List[RecommendedAction]:
-        """Generate actionable recommendations to reduce churn"""
-        recommendations = []
-        feature_dict = features.model_dump()
-        
-        # Always recommend confirmation for medium+ risk
-        if risk_level in ['medium', 'high']:
-            recommendations.append(RecommendedAction(
-                action='send_confirmation_email',
-                priority='high',
-                timing='immediate',
-                expected_impact=0.05
-            ))
-        
-        # Lead time specific recommendations
-        lead_time = feature_dict.get('booking_lead_time_days', 0)
-        days_until = feature_dict.get('days_until_checkin', 0)
-        
-        if lead_time > 30 and days_until > 7:
-            recommendations.append(RecommendedAction(
-                action='send_reminder_communications',
-                priority='medium',
-                timing='weekly_until_checkin',
-                expected_impact=0.03
-            ))
-        
-        # Loyalty member recommendations
-        loyalty = feature_dict.get('loyalty_tier', 'none').lower()
-        if loyalty in ['gold', 'platinum']:
-            # Check if benefits applied
-            if not feature_dict.get('discount_applied', False):
-                recommendations.append(RecommendedAction(
-                    action='apply_loyalty_discount',
-                    priority='high',
-                    timing='immediate',
-                    expected_impact=0.12,
-                    details={
-                        'discount_percentage': 10 if loyalty == 'gold' else 15,
-                        'estimated_cost': int(feature_dict.get('total_amount', 0) * 0.10)
-                    }
-                ))
-        
-        # High risk specific recommendations
-        if risk_level == 'high':
-            recommendations.append(RecommendedAction(
-                action='personal_outreach',
-                priority='high',
-                timing='within_24_hours',
-                expected_impact=0.10
-            ))
-            
-            recommendations.append(RecommendedAction(
-                action='offer_flexible_cancellation',
-                priority='medium',
-                timing='7_days_before',
-                expected_impact=0.08
-            ))
-        
-        # First-time guest recommendations
-        if feature_dict.get('is_first_booking', True):
-            recommendations.append(RecommendedAction(
-                action='send_welcome_package',
-                priority='medium',
-                timing='after_booking',
-                expected_impact=0.05
-            ))
-            
-        # Sort by priority and expected impact
-        priority_order = {'high': 0, 'medium': 1, 'low': 2}
-        recommendations.sort(key=lambda x: (priority_order[x.priority], -x.expected_impact))
-        
-        return recommendations[:5]  # Return top 5 recommendations
+        """Generate actionable recommendations to reduce churn (top 5, from the explainer's rule table)"""
+        X = self.feature_encoder.encode_batch([features.model_dump()])
+        return self.explainer.recommend_batch(X, [risk_level])[0]
     
     async def predict_single(
         self,
@@ -368,12 +342,21 @@ class ChurnPredictor:
         """
         Complete prediction pipeline for single booking
         """
-        # Get prediction
-        probability, confidence = self.predict(features)
+        guest_features = (await self._load_guest_features([guest_id])).get(str(guest_id))
+        if guest_features:
+            overrides = self.history_overrides(guest_features)
+            if overrides:
+                features = features.model_copy(update=overrides)
+
+        # Get prediction, coalesced with concurrent requests when batching is on
+        if self.batcher is not None:
+            probability, confidence = await self.batcher.submit(features)
+        else:
+            probability, confidence = self.predict(features)
         risk_level = cast(Literal['low', 'medium', 'high'], self.get_risk_level(probability))
         
         # Analyze factors
-        risk_factors, protective_factors = self.analyze_risk_factors(features)
+        risk_factors, protective_factors = self.analyze_risk_factors(features, probability)
         
         # Generate recommendations
         recommendations = self.generate_recommendations(
@@ -392,29 +375,88 @@ class ChurnPredictor:
             predicted_at=datetime.utcnow()
         )
 
+    def validate_batch(
+        self,
+        features: List[Union[ChurnFeatures, Dict[str, Any]]]
+    ) -> Tuple[pd.DataFrame, List[Optional[str]]]:
+        """
+        Check N feature rows against ChurnFeatures in one vectorized pass
+        
+        Raw dicts get the same schema check as the single-booking endpoint
+        (required fields, ranges, aliases) without a model per row;
+        ChurnFeatures are only dumped.
+        
+        Returns:
+            (frame, errors): coerced features keyed by ChurnFeatures field
+            names, and per row None or the first problem found
+        """
+        frame = pd.DataFrame.from_records([
+            f.model_dump() if isinstance(f, ChurnFeatures) else f for f in features
+        ])
+        return self.feature_encoder.validate_frame(frame)
+
     async def predict_batch(
         self,
-        bookings: List[Dict[str, Any]]
+        bookings: List[Dict[str, Any]],
+        explain: bool = False
     ) -> List[BatchPrediction]:
         """
         Batch prediction for multiple bookings
         
+        Validates all rows against ChurnFeatures column by column, then
+        encodes them into one matrix and scores it with a single model call.
+        
         Args:
-            bookings: List of booking dictionaries with features
-        """
-        predictions = []
+            bookings: List of booking dictionaries with features (raw dict
+                or ChurnFeatures, and an optional guest_id whose store
+                features are merged in)
+            explain: Add top risk and protective factors, computed for the
+                whole batch from one contribution matrix
         
-        for booking in bookings:
-            features = ChurnFeatures(**booking.get('features', {}))
-            probability, _ = self.predict(features)
-            risk_level = cast(Literal['low', 'medium', 'high'], self.get_risk_level(probability))
-            
-            predictions.append(BatchPrediction(
+        Raises:
+            ValueError: If a booking's features do not match ChurnFeatures
+        """
+        if not bookings:
+            return []
+
+        frame, errors = self.validate_batch([b.get('features', {}) for b in bookings])
+        for booking, error in zip(bookings, errors):
+            if error is not None:
+                raise ValueError(f"Invalid features for booking {booking.get('booking_id')}: {error}")
+
+        guest_ids = [str(b['guest_id']) for b in bookings if b.get('guest_id') is not None]
+        guest_features = await self._load_guest_features(list(dict.fromkeys(guest_ids)))
+        if guest_features:
+            for position, booking in enumerate(bookings):
+                overrides = self.history_overrides(guest_features.get(str(booking.get('guest_id')), {}))
+                for field, value in overrides.items():
+                    # Bools are stored as 0/1 in the validated frame
+                    frame.iat[position, frame.columns.get_loc(field)] = (
+                        float(value) if isinstance(value, bool) else value
+                    )
+
+        X = self.feature_encoder.encode_frame(frame)
+        probabilities = np.round(self.predict_proba_batch(X), 4)
+        risk_levels = RISK_LEVELS[self.get_risk_levels(probabilities)]
+
+        # Values are already range-checked, skip per-row validation
+        predictions = [
+            BatchPrediction.model_construct(
                 booking_id=booking['booking_id'],
-                churn_probability=round(probability, 4),
+                churn_probability=probability,
                 risk_level=risk_level
-            ))
-            
+            )
+            for booking, probability, risk_level in zip(
+                bookings, probabilities.tolist(), risk_levels.tolist()
+            )
+        ]
+        if explain:
+            explanations = self.explainer.explain_batch(
+                X, self.model, probabilities, frame['payment_method'].tolist()
+            )
+            for prediction, (risk_factors, protective_factors) in zip(predictions, explanations):
+                prediction.risk_factors = risk_factors
+                prediction.protective_factors = protective_factors
         return predictions
 
 # Singleton instance
@@ -425,5 +467,13 @@ def get_churn_predictor() -> ChurnPredictor:
     """Get or create churn predictor instance"""
     global _predictor
     if _predictor is None:
-        _predictor = ChurnPredictor()
+        from src.application.ml_models.model_registry import get_model_registry
+        from src.application.services.ml.feature_store import get_feature_store
+        registry = get_model_registry()
+        _predictor = ChurnPredictor(
+            model=registry.get_model(CHURN_MODEL_NAME),
+            feature_store=get_feature_store()
+        )
+        registry.subscribe(_predictor.on_model_swapped)
+        _predictor.batcher = build_batcher("churn", _predictor._predict_coalesced)
     return _predictor
\ No newline at end of file
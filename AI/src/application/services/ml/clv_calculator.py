@@ -10,7 +10,7 @@ CLV Formula:
 CLV = (Avg Booking Value) × (Bookings per Period) × (Retention Rate) × (Time Horizon)
 """
 
-from typing import Dict, Any, Optional, Literal, Tuple
+from typing import Dict, Any, List, Optional, Literal, Tuple
 import numpy as np
 from datetime import datetime, timedelta
 import logging
@@ -26,6 +26,9 @@ from src.application.dtos.ml.clv_dto import (
     CLVBatchPredictResponse,
     CLVBatchPrediction,
 )
+from src.application.services.ml.clv_feature_engineering import CLVFeatureEngineer
+from src.application.services.ml.guest_history import summarize_bookings
+from src.application.services.ml.micro_batching import MicroBatcher, build_batcher
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +40,24 @@ CLV_SEGMENTS = {
     'low_value': 0,           # < 20M VND
 }
 
+# Segment lookup for vectorized scoring (ordered by ascending threshold)
+SEGMENT_NAMES = np.array(['low_value', 'medium_value', 'high_value', 'vip'])
+_SEGMENT_EDGES = np.array([
+    CLV_SEGMENTS['medium_value'],
+    CLV_SEGMENTS['high_value'],
+    CLV_SEGMENTS['vip'],
+], dtype=np.float64)
+LOYALTY_TIERS = np.array(['bronze', 'silver', 'gold', 'platinum'])
+PRIORITY_LEVELS = np.array(['low', 'medium', 'high', 'critical'])
+
+# Industry baseline for guests without history (see _predict_new_guest_clv)
+NEW_GUEST_BASELINE = {
+    'avg_booking_value': 5_000_000,
+    'bookings_per_year': 2.0,
+    'retention_rate': 0.35,
+    'confidence': 0.40,
+}
+
 # RFM scoring bins (quintiles)
 RFM_BINS = {
     'recency': [0, 30, 90, 180, 365, float('inf')],  # days
@@ -44,6 +65,13 @@ RFM_BINS = {
     'monetary': [0, 5_000_000, 10_000_000, 20_000_000, 50_000_000, float('inf')],  # VND
 }
 
+# Registry name -> CLVCalculator attribute
+_MODEL_ATTRS = {
+    'clv_booking_frequency': 'booking_frequency_model',
+    'clv_booking_value': 'booking_value_model',
+    'clv_retention': 'retention_model',
+}
+
 
 class CLVCalculator:
     """
@@ -52,16 +80,24 @@ class CLVCalculator:
     Uses ensemble of three XGBoost models for comprehensive prediction
     """
     
-    def __init__(self, model_registry, config):
+    def __init__(self, model_registry, config, history_loader=None, feature_store=None):
         """
         Initialize CLV calculator with trained models
         
         Args:
             model_registry: Model registry instance
             config: Service configuration
+            history_loader: GuestHistoryLoader (mock history is used while
+                it is missing or not connected)
+            feature_store: OnlineFeatureStore serving cached guest features
+                (preferred over the history loader while connected)
         """
         self.config = config
         self.model_registry = model_registry
+        self.history_loader = history_loader
+        self.feature_store = feature_store
+        # Coalesces concurrent predict_clv calls (set by get_clv_calculator)
+        self.batcher: Optional[MicroBatcher] = None
         
         # Load three specialized models
         self.booking_frequency_model = None
@@ -69,7 +105,15 @@ class CLVCalculator:
         self.retention_model = None
         
         self._load_models()
+        self.model_registry.subscribe(self._on_model_swapped)
         
+    def _on_model_swapped(self, model_name: str, model, info: Dict):
+        """Pick up a hot-swapped model version from the registry"""
+        attr = _MODEL_ATTRS.get(model_name)
+        if attr is not None:
+            setattr(self, attr, model)
+            logger.info(f"🔄 CLV model {model_name} swapped to v{info.get('version')}")
+
     def _load_models(self):
         """Load all three CLV prediction models"""
         try:
@@ -110,12 +154,37 @@ class CLVCalculator:
         Returns:
             CLVPredictResponse with predictions and breakdown
         """
-        guest_id = request.guest_id
-        time_horizon_months = request.time_horizon_months
+        # Coalesced with concurrent requests when batching is on
+        if self.batcher is not None:
+            return await self.batcher.submit((request.guest_id, request.time_horizon_months))
         
         # 1. Load guest historical data
-        historical_data = await self._load_guest_history(guest_id)
+        historical_data = await self._load_guest_history(request.guest_id)
         
+        return await self._predict_from_history(
+            request.guest_id,
+            request.time_horizon_months,
+            historical_data
+        )
+
+
+    async def _predict_from_history(
+        self,
+        guest_id: str,
+        time_horizon_months: int,
+        historical_data: Dict[str, Any]
+    ) -> CLVPredictResponse:
+        """
+        Predict CLV from already loaded guest history
+        
+        Args:
+            guest_id: Guest identifier
+            time_horizon_months: Prediction horizon
+            historical_data: Output of _load_guest_history
+            
+        Returns:
+            CLVPredictResponse with predictions and breakdown
+        """
         if not historical_data['has_history']:
             # New guest - return baseline prediction
             return self._predict_new_guest_clv(guest_id, time_horizon_months)
@@ -132,6 +201,32 @@ class CLVCalculator:
             time_horizon_months
         )
         
+        return self._build_response(
+            guest_id, time_horizon_months, historical_data, rfm_scores, predictions
+        )
+
+
+    def _build_response(
+        self,
+        guest_id: str,
+        time_horizon_months: int,
+        historical_data: Dict[str, Any],
+        rfm_scores: Dict[str, Any],
+        predictions: Dict[str, float]
+    ) -> CLVPredictResponse:
+        """
+        Build the CLV response from model predictions
+        
+        Args:
+            guest_id: Guest identifier
+            time_horizon_months: Prediction horizon
+            historical_data: Guest history with has_history=True
+            rfm_scores: Output of _calculate_rfm_scores
+            predictions: Output of _run_prediction_models
+            
+        Returns:
+            CLVPredictResponse with predictions and breakdown
+        """
         # 5. Calculate final CLV
         clv_result = self._calculate_clv(
             predictions,
@@ -211,38 +306,57 @@ class CLVCalculator:
         Returns:
             CLVBatchPredictResponse with all predictions
         """
-        predictions = []
+        guest_ids = list(request.guest_ids)
         
-        for guest_id in request.guest_ids:
-            try:
-                single_request = CLVPredictRequest(
-                    guest_id=guest_id,
-                    time_horizon_months=request.time_horizon_months
-                )
-                result = await self.predict_clv(single_request)
-                
-                predictions.append(CLVBatchPrediction(
-                    guest_id=result.guest_id,
-                    predicted_clv=result.predicted_clv,
-                    segment=result.segment,
-                    retention_probability=result.retention_probability,
-                    confidence=result.confidence
-                ))
-            except Exception as e:
-                logger.error(f"Failed to predict CLV for guest {guest_id}: {e}")
-                continue
+        # One batched history load instead of a round trip per guest
+        histories = await self._load_guest_histories(guest_ids)
+        
+        try:
+            result = self._predict_batch_arrays(
+                [histories[guest_id] for guest_id in guest_ids],
+                request.time_horizon_months
+            )
+        except Exception as e:
+            logger.error(f"Vectorized CLV batch failed, scoring guests one by one: {e}")
+            result = await self._predict_batch_per_guest(
+                guest_ids, histories, request.time_horizon_months
+            )
+        
+        ok = result['ok']
+        clv = result['clv'][ok]
+        retention = result['retention_probability'][ok]
+        segment_codes = result['segment_code'][ok]
+        
+        # Values are produced by the engine, skip per-row validation
+        predictions = [
+            CLVBatchPrediction.model_construct(
+                guest_id=guest_id,
+                predicted_clv=predicted_clv,
+                segment=segment,
+                retention_probability=retention_probability,
+                confidence=confidence
+            )
+            for guest_id, predicted_clv, segment, retention_probability, confidence in zip(
+                np.asarray(guest_ids, dtype=object)[ok].tolist(),
+                clv.tolist(),
+                SEGMENT_NAMES[segment_codes].tolist(),
+                retention.tolist(),
+                result['confidence'][ok].tolist(),
+            )
+        ]
         
         # Calculate summary statistics
         if predictions:
+            segment_counts = np.bincount(segment_codes, minlength=len(SEGMENT_NAMES))
             summary = {
-                'avg_clv': np.mean([p.predicted_clv for p in predictions]),
-                'total_clv': np.sum([p.predicted_clv for p in predictions]),
-                'avg_retention': np.mean([p.retention_probability for p in predictions]),
+                'avg_clv': float(np.mean(clv)),
+                'total_clv': float(np.sum(clv)),
+                'avg_retention': float(np.mean(retention)),
                 'segment_counts': {
-                    'vip': sum(1 for p in predictions if p.segment == 'vip'),
-                    'high_value': sum(1 for p in predictions if p.segment == 'high_value'),
-                    'medium_value': sum(1 for p in predictions if p.segment == 'medium_value'),
-                    'low_value': sum(1 for p in predictions if p.segment == 'low_value'),
+                    'vip': int(segment_counts[3]),
+                    'high_value': int(segment_counts[2]),
+                    'medium_value': int(segment_counts[1]),
+                    'low_value': int(segment_counts[0]),
                 }
             }
         else:
@@ -257,6 +371,338 @@ class CLVCalculator:
         )
 
 
+    # ========== Batch Inference ==========
+
+    async def _predict_clv_coalesced(
+        self,
+        requests: List[Tuple[str, int]]
+    ) -> List[CLVPredictResponse]:
+        """
+        Batch version of predict_clv for coalesced single-guest requests
+        
+        Loads all histories in one call and runs each model once per
+        distinct horizon; responses match predict_clv for the same history.
+        
+        Args:
+            requests: (guest_id, time_horizon_months) per request
+            
+        Returns:
+            One CLVPredictResponse (or the Exception it raised) per request
+        """
+        histories = await self._load_guest_histories(list(dict.fromkeys(g for g, _ in requests)))
+        responses: List[Any] = [None] * len(requests)
+        
+        by_horizon: Dict[int, List[int]] = {}
+        for i, (guest_id, horizon) in enumerate(requests):
+            if histories[guest_id]['has_history']:
+                by_horizon.setdefault(horizon, []).append(i)
+            else:
+                responses[i] = self._predict_new_guest_clv(guest_id, horizon)
+        
+        for horizon, rows in by_horizon.items():
+            known = [histories[requests[i][0]] for i in rows]
+            try:
+                outputs = self._run_prediction_models_batch(self._build_feature_matrix(known), horizon)
+            except Exception as e:
+                logger.error(f"Coalesced CLV scoring failed for {len(rows)} guests: {e}")
+                for i in rows:
+                    responses[i] = e
+                continue
+            
+            for j, i in enumerate(rows):
+                guest_id = requests[i][0]
+                try:
+                    responses[i] = self._build_response(
+                        guest_id,
+                        horizon,
+                        histories[guest_id],
+                        self._calculate_rfm_scores(histories[guest_id]),
+                        {name: float(values[j]) for name, values in outputs.items()}
+                    )
+                except Exception as e:
+                    responses[i] = e
+        
+        return responses
+
+    def _predict_batch_arrays(
+        self,
+        histories: List[Dict[str, Any]],
+        time_horizon_months: int
+    ) -> Dict[str, np.ndarray]:
+        """
+        Score many guests with one call per model
+        
+        Builds a single (N, 19) feature matrix, runs each of the three
+        models once on it and derives CLV, confidence, segment and
+        recommendations with array operations. Element-wise the results
+        match predict_clv for the same history.
+        
+        Returns:
+            Dict of arrays (length N): clv, base_revenue, confidence,
+            predicted_bookings, avg_booking_value, ancillary_revenue,
+            retention_probability, segment_code, max_acquisition_cost,
+            loyalty_tier, personalized_offers, priority_level, ok
+        """
+        n = len(histories)
+        has_history = np.fromiter((h['has_history'] for h in histories), dtype=bool, count=n)
+        known = [h for h in histories if h['has_history']]
+        horizon_factor = time_horizon_months / 12
+        
+        clv = np.empty(n)
+        base_revenue = np.empty(n)
+        confidence = np.empty(n)
+        predicted_bookings = np.empty(n)
+        avg_booking_value = np.empty(n)
+        ancillary_revenue = np.empty(n)
+        retention = np.empty(n)
+        
+        if known:
+            X = self._build_feature_matrix(known)
+            model_outputs = self._run_prediction_models_batch(X, time_horizon_months)
+            bookings = model_outputs['booking_frequency']
+            value = model_outputs['avg_booking_value']
+            retention_known = model_outputs['retention_probability']
+            ancillary = model_outputs['ancillary_revenue']
+            base = value * bookings * retention_known
+            
+            # Data quality: booking count, recency and assumed completeness
+            count_score = np.minimum(X[:, 4] / 10, 1.0)
+            recency_score = np.maximum(0, 1 - (X[:, 9] / 365))
+            quality = count_score * 0.4 + recency_score * 0.4 + 0.9 * 0.2
+            
+            predicted_bookings[has_history] = bookings
+            avg_booking_value[has_history] = value
+            retention[has_history] = retention_known
+            ancillary_revenue[has_history] = ancillary
+            base_revenue[has_history] = base
+            clv[has_history] = base + ancillary
+            confidence[has_history] = quality * 0.6 + retention_known * 0.4
+        
+        # New guests: industry baseline
+        new = ~has_history
+        if new.any():
+            new_bookings = NEW_GUEST_BASELINE['bookings_per_year'] * horizon_factor
+            new_base = (
+                NEW_GUEST_BASELINE['avg_booking_value'] * new_bookings *
+                NEW_GUEST_BASELINE['retention_rate']
+            )
+            predicted_bookings[new] = new_bookings
+            avg_booking_value[new] = NEW_GUEST_BASELINE['avg_booking_value']
+            retention[new] = NEW_GUEST_BASELINE['retention_rate']
+            ancillary_revenue[new] = new_base * 0.10
+            base_revenue[new] = new_base
+            clv[new] = new_base + new_base * 0.10
+            confidence[new] = NEW_GUEST_BASELINE['confidence']
+        
+        # Segment: number of thresholds reached (new guests are always low_value)
+        segment_code = np.searchsorted(_SEGMENT_EDGES, clv, side='right')
+        segment_code[new | np.isnan(clv)] = 0
+        
+        # Recommendations (new guests get the baseline 20% acquisition cost)
+        max_acquisition_cost = np.where(new, clv * 0.20, clv * 0.25)
+        personalized_offers = ~new & ((segment_code >= 2) | (clv > 30_000_000))
+        
+        return {
+            'clv': clv,
+            'base_revenue': base_revenue,
+            'confidence': confidence,
+            'predicted_bookings': predicted_bookings,
+            'avg_booking_value': avg_booking_value,
+            'ancillary_revenue': ancillary_revenue,
+            'retention_probability': retention,
+            'segment_code': segment_code,
+            'max_acquisition_cost': max_acquisition_cost,
+            'loyalty_tier': LOYALTY_TIERS[segment_code],
+            'personalized_offers': personalized_offers,
+            'priority_level': PRIORITY_LEVELS[segment_code],
+            'ok': np.ones(n, dtype=bool),
+        }
+
+
+    def _run_prediction_models_batch(
+        self,
+        X: np.ndarray,
+        time_horizon_months: int
+    ) -> Dict[str, np.ndarray]:
+        """
+        Vectorized _run_prediction_models, one call per model
+        
+        Args:
+            X: Feature matrix (N, 19) from _build_feature_matrix
+            time_horizon_months: Prediction horizon
+            
+        Returns:
+            Dict of float64 arrays (length N): booking_frequency,
+            avg_booking_value, retention_probability, ancillary_revenue
+        """
+        horizon_factor = time_horizon_months / 12
+        
+        # Model 1: Booking Frequency (bookings per year, scaled to horizon)
+        if self.booking_frequency_model:
+            bookings = self._predict_model_batch(self.booking_frequency_model, X) * horizon_factor
+        else:
+            bookings = X[:, 11] * horizon_factor
+        
+        # Model 2: Booking Value
+        if self.booking_value_model:
+            value = self._predict_model_batch(self.booking_value_model, X)
+        else:
+            value = X[:, 7]
+        
+        # Model 3: Retention Probability
+        if self.retention_model:
+            retention = self._predict_model_batch(self.retention_model, X, proba=True)
+        else:
+            retention = (1 - X[:, 6]) * (1 - np.minimum(X[:, 9] / 365, 0.5))
+        
+        # Ancillary revenue: 10-20% of room revenue depending on service usage
+        ancillary = value * bookings * (0.10 + X[:, 13] * 0.10)
+        
+        return {
+            'booking_frequency': bookings.astype(np.float64),
+            'avg_booking_value': value.astype(np.float64),
+            'retention_probability': retention.astype(np.float64),
+            'ancillary_revenue': ancillary.astype(np.float64),
+        }
+
+
+    async def _predict_batch_per_guest(
+        self,
+        guest_ids: List[str],
+        histories: Dict[str, Dict[str, Any]],
+        time_horizon_months: int
+    ) -> Dict[str, np.ndarray]:
+        """
+        Fallback for _predict_batch_arrays that isolates failing guests
+        
+        Returns the subset of arrays used by predict_clv_batch; 'ok' marks
+        guests that were scored.
+        """
+        n = len(guest_ids)
+        clv = np.zeros(n)
+        retention = np.zeros(n)
+        confidence = np.zeros(n)
+        segment_code = np.zeros(n, dtype=np.intp)
+        ok = np.zeros(n, dtype=bool)
+        segment_index = {name: i for i, name in enumerate(SEGMENT_NAMES)}
+        
+        for i, guest_id in enumerate(guest_ids):
+            try:
+                result = await self._predict_from_history(
+                    guest_id, time_horizon_months, histories[guest_id]
+                )
+            except Exception as e:
+                logger.error(f"Failed to predict CLV for guest {guest_id}: {e}")
+                continue
+            clv[i] = result.predicted_clv
+            retention[i] = result.retention_probability
+            confidence[i] = result.confidence
+            segment_code[i] = segment_index[result.segment]
+            ok[i] = True
+        
+        return {
+            'clv': clv,
+            'retention_probability': retention,
+            'confidence': confidence,
+            'segment_code': segment_code,
+            'ok': ok,
+        }
+
+
+    def _build_feature_matrix(self, histories: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Vectorized _calculate_rfm_scores + _engineer_features
+        
+        Args:
+            histories: Guest histories with has_history=True
+            
+        Returns:
+            Feature matrix (N, 19) in _engineer_features column order
+        """
+        n = len(histories)
+        
+        def column(key: str) -> np.ndarray:
+            return np.fromiter((h[key] for h in histories), dtype=np.float64, count=n)
+        
+        total_bookings = column('total_bookings')
+        total_revenue = column('total_revenue')
+        avg_booking_value = column('avg_booking_value')
+        days_since_last = column('days_since_last_booking')
+        
+        # Single-booking guests have no interval (None)
+        raw_avg_days = np.array(
+            [h.get('avg_days_between_bookings') or 0 for h in histories], dtype=np.float64
+        )
+        has_interval = raw_avg_days != 0
+        avg_days_between = np.where(has_interval, raw_avg_days, 90)
+        bookings_per_year = np.divide(
+            365, raw_avg_days, out=np.zeros(n), where=has_interval
+        )
+        
+        recency_score = CLVFeatureEngineer._bin_scores(days_since_last, RFM_BINS['recency'], reverse=True)
+        frequency_score = CLVFeatureEngineer._bin_scores(total_bookings, RFM_BINS['frequency'])
+        monetary_score = CLVFeatureEngineer._bin_scores(total_revenue, RFM_BINS['monetary'])
+        overall_score = recency_score * 0.3 + frequency_score * 0.35 + monetary_score * 0.35
+        
+        first_booking = np.array([h['first_booking_date'] for h in histories], dtype='datetime64[us]')
+        last_booking = np.array([h['last_booking_date'] for h in histories], dtype='datetime64[us]')
+        customer_age_days = (last_booking - first_booking) // np.timedelta64(1, 'D')
+        
+        return np.column_stack([
+            recency_score,
+            frequency_score,
+            monetary_score,
+            overall_score,
+            total_bookings,
+            column('completed_bookings'),
+            column('cancellation_rate'),
+            avg_booking_value,
+            total_revenue,
+            days_since_last,
+            avg_days_between,
+            bookings_per_year,
+            column('avg_length_of_stay'),
+            column('service_usage_rate'),
+            column('unique_services_used'),
+            customer_age_days,
+            avg_booking_value,
+            np.zeros(n),
+            1.0 / (avg_days_between + 1),
+        ]).astype(np.float64)
+
+
+    @staticmethod
+    def _predict_model_batch(model, X: np.ndarray, proba: bool = False) -> np.ndarray:
+        """
+        Run one model over the whole feature matrix
+        
+        XGBoost models go through Booster.inplace_predict (no DMatrix copy),
+        honouring the best iteration found by early stopping. Other models
+        fall back to predict / predict_proba.
+        """
+        booster = None
+        if hasattr(model, 'inplace_predict'):
+            booster = model
+        elif hasattr(model, 'get_booster'):
+            try:
+                booster = model.get_booster()
+            except Exception:
+                booster = None
+        
+        if booster is not None:
+            iteration_range = (0, 0)
+            try:
+                iteration_range = (0, model.best_iteration + 1)
+            except AttributeError:
+                pass
+            # binary:logistic returns the positive class probability
+            return booster.inplace_predict(X, iteration_range=iteration_range)
+        
+        if proba:
+            return model.predict_proba(X)[:, 1]
+        return model.predict(X)
+
+
     async def _load_guest_history(self, guest_id: str) -> Dict[str, Any]:
         """
         Load complete guest booking history
@@ -264,10 +710,30 @@ class CLVCalculator:
         Returns:
             Dict with historical metrics and bookings
         """
-        # TODO: Replace with actual database queries
-        # This is a mock implementation
+        return (await self._load_guest_histories([guest_id]))[guest_id]
+
+
+    async def _load_guest_histories(self, guest_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Load booking histories for many guests
+        
+        Uses the online feature store (cached, event-refreshed) or the guest
+        history loader (O(1) queries per chunk of guests) when connected,
+        otherwise falls back to mock history.
+        
+        Returns:
+            Dict guest_id -> historical metrics
+        """
+        if self.feature_store is not None and self.feature_store.is_connected:
+            return await self.feature_store.get_features(guest_ids)
+        if self.history_loader is not None and self.history_loader.is_connected:
+            return await self.history_loader.load_many(guest_ids)
         
-        # Mock data for demonstration
+        return {guest_id: self._mock_guest_history(guest_id) for guest_id in guest_ids}
+
+
+    def _mock_guest_history(self, guest_id: str) -> Dict[str, Any]:
+        """Mock history used when the database is not available"""
         mock_bookings = [
             {
                 'booking_date': datetime(2024, 1, 15),
@@ -298,60 +764,7 @@ class CLVCalculator:
             },
         ]
         
-        if not mock_bookings:
-            return {'has_history': False}
-        
-        # Calculate metrics
-        total_bookings = len(mock_bookings)
-        completed_bookings = [b for b in mock_bookings if not b['cancelled']]
-        cancelled_bookings = [b for b in mock_bookings if b['cancelled']]
-        
-        total_revenue = sum(b['total_amount'] for b in completed_bookings)
-        avg_booking_value = total_revenue / len(completed_bookings) if completed_bookings else 0
-        
-        cancellation_rate = len(cancelled_bookings) / total_bookings if total_bookings > 0 else 0
-        
-        # Calculate booking frequency
-        booking_dates = sorted([b['booking_date'] for b in mock_bookings])
-        if len(booking_dates) > 1:
-            date_diffs = [(booking_dates[i+1] - booking_dates[i]).days 
-                         for i in range(len(booking_dates)-1)]
-            avg_days_between = float(np.mean(date_diffs))
-        else:
-            avg_days_between = None
-        
-        # Days since last booking
-        last_booking = max(booking_dates)
-        days_since_last = (datetime.now() - last_booking).days
-        
-        # Average length of stay
-        stays = [(b['checkout_date'] - b['checkin_date']).days 
-                for b in completed_bookings]
-        avg_length_of_stay = float(np.mean(stays)) if stays else 0
-        
-        # Service usage
-        all_services = [s for b in completed_bookings for s in b['services_used']]
-        unique_services = set(all_services)
-        
-        return {
-            'has_history': True,
-            'guest_id': guest_id,
-            'bookings': mock_bookings,
-            'total_bookings': total_bookings,
-            'completed_bookings': len(completed_bookings),
-            'cancelled_bookings': len(cancelled_bookings),
-            'total_revenue': float(total_revenue),
-            'avg_booking_value': float(avg_booking_value),
-            'cancellation_rate': float(cancellation_rate),
-            'first_booking_date': min(booking_dates).isoformat(),
-            'last_booking_date': last_booking.isoformat(),
-            'days_since_last_booking': days_since_last,
-            'avg_days_between_bookings': avg_days_between,
-            'avg_length_of_stay': avg_length_of_stay,
-            'unique_services_used': len(unique_services),
-            'total_service_usage': len(all_services),
-            'service_usage_rate': len(all_services) / len(completed_bookings) if completed_bookings else 0,
-        }
+        return summarize_bookings(guest_id, mock_bookings)
 
 
     def _calculate_rfm_scores(self, historical_data: Dict) -> Dict[str, Any]:
@@ -429,6 +842,9 @@ class CLVCalculator:
         Returns:
             Feature vector as numpy array
         """
+        # Single-booking guests have no interval (None); default to 90 days
+        avg_days_between = historical_data.get('avg_days_between_bookings') or 90
+        
         features = {
             # RFM features
             'rfm_recency_score': rfm_scores['recency_score'],
@@ -445,7 +861,7 @@ class CLVCalculator:
             
             # Temporal patterns
             'days_since_last_booking': historical_data['days_since_last_booking'],
-            'avg_days_between_bookings': historical_data.get('avg_days_between_bookings', 90),
+            'avg_days_between_bookings': avg_days_between,
             'booking_frequency_per_year': 365 / historical_data.get('avg_days_between_bookings', 90) if historical_data.get('avg_days_between_bookings') else 0,
             
             # Stay patterns
@@ -464,7 +880,7 @@ class CLVCalculator:
             # Derived features
             'revenue_per_booking': historical_data['avg_booking_value'],
             'revenue_growth_rate': 0.0,  # TODO: Calculate from time series
-            'booking_regularity': 1.0 / (historical_data.get('avg_days_between_bookings', 90) + 1),
+            'booking_regularity': 1.0 / (avg_days_between + 1),
         }
         
         # Convert to array in consistent order
@@ -722,11 +1138,16 @@ def get_clv_calculator() -> CLVCalculator:
     global _clv_calculator
     if _clv_calculator is None:
         from src.application.ml_models.model_registry import get_model_registry
+        from src.application.services.ml.feature_store import get_feature_store
+        from src.application.services.ml.guest_history import get_guest_history_loader
         # TODO: Import proper config
         # from src.utils.config import get_config
         
         _clv_calculator = CLVCalculator(
             model_registry=get_model_registry(),
-            config=None  # TODO: Add config
+            config=None,  # TODO: Add config
+            history_loader=get_guest_history_loader(),
+            feature_store=get_feature_store()
         )
+        _clv_calculator.batcher = build_batcher("clv", _clv_calculator._predict_clv_coalesced)
     return _clv_calculator
\ No newline at end of file
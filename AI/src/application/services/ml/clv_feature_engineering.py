@@ -171,6 +171,11 @@ class CLVFeatureEngineer:
         """
         Engineer features for training dataset
         
+        Columnar equivalent of calling engineer_features_from_history for
+        each guest: per-guest aggregates use bincount over factorized guest
+        codes, intervals come from dates sorted within each guest, and RFM
+        scores are binned with searchsorted.
+        
         Args:
             bookings_df: DataFrame with columns:
                 - guest_id
@@ -184,31 +189,179 @@ class CLVFeatureEngineer:
         Returns:
             DataFrame with engineered features, one row per guest
         """
-        features_list = []
+        if bookings_df.empty:
+            return pd.DataFrame([])
+        
+        df = bookings_df[bookings_df['guest_id'].notna()]
+        codes, guest_ids = pd.factorize(df['guest_id'], sort=True)
+        n_guests = len(guest_ids)
+        
+        # 1. Booking metrics (sums accumulate in row order like the per-guest code)
+        total = np.bincount(codes, minlength=n_guests)
+        cancelled = (
+            df['cancelled'].to_numpy().astype(bool)
+            if 'cancelled' in df.columns else np.zeros(len(df), dtype=bool)
+        )
+        completed = ~cancelled
+        completed_codes = codes[completed]
+        n_completed = np.bincount(completed_codes, minlength=n_guests)
+        has_completed = n_completed > 0
+        
+        amounts = df['total_amount'].to_numpy(dtype=np.float64)
+        total_revenue = np.bincount(completed_codes, weights=amounts[completed], minlength=n_guests)
+        avg_booking_value = np.divide(
+            total_revenue, n_completed,
+            out=np.zeros(n_guests), where=has_completed
+        )
+        cancellation_rate = (total - n_completed) / total
         
-        # Group by guest
-        for guest_id, guest_bookings in bookings_df.groupby('guest_id'):
-            try:
-                # Convert to list of dicts
-                booking_list = guest_bookings.to_dict('records')
-                
-                # Engineer features
-                feature_vector = self.engineer_features_from_history(booking_list)
-                
-                # Add guest_id
-                feature_dict = {
-                    'guest_id': guest_id,
-                    **{name: feature_vector[0, i] 
-                       for i, name in enumerate(self.feature_names)}
-                }
-                
-                features_list.append(feature_dict)
-                
-            except Exception as e:
-                logger.warning(f"Failed to engineer features for guest {guest_id}: {e}")
-                continue
+        stay_days = self._floor_days(
+            df['checkout_date'].to_numpy() - df['checkin_date'].to_numpy()
+        )
+        stay_sum = np.bincount(completed_codes, weights=stay_days[completed], minlength=n_guests)
+        avg_length_of_stay = np.divide(
+            stay_sum, n_completed,
+            out=np.zeros(n_guests), where=has_completed
+        )
+        
+        # 2. RFM scores (recency_days is still the placeholder 0, see _calculate_rfm_scores)
+        recency_score = self._bin_scores(np.zeros(n_guests), RFM_BINS['recency'], reverse=True)
+        frequency_score = self._bin_scores(total, RFM_BINS['frequency'])
+        monetary_score = self._bin_scores(total_revenue, RFM_BINS['monetary'])
+        overall_score = recency_score * 0.3 + frequency_score * 0.35 + monetary_score * 0.35
+        
+        # 3. Temporal features from booking dates sorted within each guest
+        booking_dates = df['booking_date'].to_numpy()
+        order = np.lexsort((booking_dates, codes))
+        sorted_codes = codes[order]
+        sorted_dates = booking_dates[order]
+        
+        same_guest = sorted_codes[1:] == sorted_codes[:-1]
+        gap_days = self._floor_days(sorted_dates[1:] - sorted_dates[:-1])
+        gap_sum = np.bincount(
+            sorted_codes[1:][same_guest], weights=gap_days[same_guest], minlength=n_guests
+        )
+        avg_days_between = np.divide(
+            gap_sum, total - 1,
+            out=np.full(n_guests, 90.0), where=total > 1
+        )
+        bookings_per_year = np.divide(
+            365, avg_days_between,
+            out=np.zeros(n_guests), where=avg_days_between > 0
+        )
         
-        return pd.DataFrame(features_list)
+        group_starts = np.flatnonzero(np.r_[True, ~same_guest])
+        group_ends = np.r_[group_starts[1:] - 1, len(sorted_codes) - 1]
+        first_booking = sorted_dates[group_starts]
+        last_booking = sorted_dates[group_ends]
+        days_since_last = self._floor_days(np.datetime64(datetime.now()) - last_booking)
+        
+        # 4. Engagement features
+        service_counts, unique_services, failed = self._service_usage(
+            df, codes, completed, n_guests
+        )
+        service_usage_rate = np.divide(
+            service_counts, n_completed,
+            out=np.zeros(n_guests), where=has_completed
+        )
+        
+        # 5. Lifecycle features
+        customer_age_days = self._floor_days(last_booking - first_booking)
+        
+        # 6. Derived features
+        booking_regularity = 1.0 / (avg_days_between + 1)
+        
+        columns = {
+            'rfm_recency_score': recency_score,
+            'rfm_frequency_score': frequency_score,
+            'rfm_monetary_score': monetary_score,
+            'rfm_overall_score': overall_score,
+            'total_bookings': total,
+            'completed_bookings': n_completed,
+            'cancellation_rate': cancellation_rate,
+            'avg_booking_value': avg_booking_value,
+            'total_revenue': total_revenue,
+            'days_since_last_booking': days_since_last,
+            'avg_days_between_bookings': avg_days_between,
+            'booking_frequency_per_year': bookings_per_year,
+            'avg_length_of_stay': avg_length_of_stay,
+            'service_usage_rate': service_usage_rate,
+            'unique_services_used': unique_services,
+            'customer_age_days': customer_age_days,
+            'revenue_per_booking': avg_booking_value,
+            'revenue_growth_rate': np.zeros(n_guests),
+            'booking_regularity': booking_regularity,
+        }
+        
+        features_df = pd.DataFrame({
+            'guest_id': guest_ids,
+            **{name: np.asarray(columns[name], dtype=np.float64) for name in self.feature_names}
+        })
+        
+        if failed.any():
+            logger.warning(
+                f"Failed to engineer features for {int(failed.sum())} guests: "
+                f"services_used is not iterable"
+            )
+            features_df = features_df[~failed].reset_index(drop=True)
+        
+        return features_df
+    
+    
+    @staticmethod
+    def _floor_days(deltas: np.ndarray) -> np.ndarray:
+        """Whole days of timedelta64 values, floored like timedelta.days (NaT -> NaN)"""
+        nat = np.isnat(deltas)
+        with np.errstate(invalid='ignore'):
+            days = (deltas // np.timedelta64(1, 'D')).astype(np.float64)
+        days[nat] = np.nan
+        return days
+    
+    
+    @staticmethod
+    def _service_usage(
+        df: pd.DataFrame,
+        codes: np.ndarray,
+        completed: np.ndarray,
+        n_guests: int
+    ):
+        """
+        Per-guest service usage over completed bookings
+        
+        Returns:
+            (total services used, unique services used, guests with
+            non-iterable services_used values)
+        """
+        service_counts = np.zeros(n_guests)
+        unique_services = np.zeros(n_guests)
+        failed = np.zeros(n_guests, dtype=bool)
+        
+        if 'services_used' not in df.columns:
+            return service_counts, unique_services, failed
+        
+        completed_codes = codes[completed]
+        services = df['services_used'].to_numpy()[completed]
+        iterable = np.fromiter(
+            (hasattr(v, '__iter__') for v in services), dtype=bool, count=len(services)
+        )
+        failed[completed_codes[~iterable]] = True
+        
+        service_lists = pd.Series(
+            [list(v) if ok else [] for v, ok in zip(services, iterable)],
+            index=completed_codes,
+            dtype=object
+        )
+        service_counts = np.bincount(
+            completed_codes, weights=service_lists.map(len).to_numpy(), minlength=n_guests
+        )
+        
+        exploded = service_lists.explode().dropna()
+        if len(exploded):
+            pairs = pd.DataFrame({'guest': exploded.index, 'service': exploded.to_numpy()})
+            distinct = pairs.drop_duplicates()['guest'].to_numpy()
+            unique_services = np.bincount(distinct, minlength=n_guests).astype(np.float64)
+        
+        return service_counts, unique_services, failed
     
     
     def _calculate_booking_metrics(
@@ -414,6 +567,28 @@ class CLVFeatureEngineer:
             score = (len(bins) - 1) - score + 1
         
         return min(max(score, 1), 5)  # Clamp to 1-5
+    
+    
+    @staticmethod
+    def _bin_scores(
+        values: np.ndarray,
+        bins: List[float],
+        reverse: bool = False
+    ) -> np.ndarray:
+        """
+        Vectorized _bin_score
+        
+        Score i is the first bin whose upper edge is greater than the value,
+        found with searchsorted over the upper edges.
+        """
+        upper_edges = np.asarray(bins[1:], dtype=np.float64)
+        scores = np.searchsorted(upper_edges, values, side='right') + 1
+        scores = np.minimum(scores, len(bins) - 1)
+        
+        if reverse:
+            scores = (len(bins) - 1) - scores + 1
+        
+        return np.clip(scores, 1, 5)
 
 
 
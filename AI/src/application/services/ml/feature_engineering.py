@@ -1,7 +1,10 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Union, get_args, get_origin
 import numpy as np
+import pandas as pd
 from datetime import datetime
 
+from src.application.dtos.ml.churn_dto import ChurnFeatures
+
 CHURN_FEATURES = [
     # Booking characteristics
     'booking_lead_time_days',
@@ -17,7 +20,7 @@ CHURN_FEATURES = [
     'previous_cancellations_count',
     'cancellation_rate',
     'avg_previous_booking_value',
-    'days_since_last_booking'
+    'days_since_last_booking',
 
     # Engagement
     'special_requests_count',
@@ -42,6 +45,30 @@ CHURN_FEATURES = [
 ]
 
 
+# Strings pydantic accepts for bool fields (lax mode), plus numeric 0/1
+_BOOL_VALUES = {
+    'true': 1.0, 't': 1.0, 'yes': 1.0, 'y': 1.0, 'on': 1.0, '1': 1.0, '1.0': 1.0,
+    'false': 0.0, 'f': 0.0, 'no': 0.0, 'n': 0.0, 'off': 0.0, '0': 0.0, '0.0': 0.0,
+}
+
+
+def _feature_schema() -> List[Tuple[str, Optional[str], type, bool, Any, Optional[float], Optional[float]]]:
+    """(name, alias, type, required, default, ge, le) per ChurnFeatures field"""
+    schema = []
+    for name, field in ChurnFeatures.model_fields.items():
+        kind = field.annotation
+        if get_origin(kind) is Union:
+            kind = next(arg for arg in get_args(kind) if arg is not type(None))
+        ge = next((m.ge for m in field.metadata if hasattr(m, 'ge')), None)
+        le = next((m.le for m in field.metadata if hasattr(m, 'le')), None)
+        default = None if field.is_required() else field.default
+        schema.append((name, field.alias, kind, field.is_required(), default, ge, le))
+    return schema
+
+
+CHURN_FEATURE_SCHEMA = _feature_schema()
+
+
 class ChurnFeatureEncoder:
     """ Encode categorical features for churn prediction """
 
@@ -134,6 +161,228 @@ class ChurnFeatureEncoder:
         
         return np.array(encoded, dtype=np.float32)
     
+    @staticmethod
+    def _encode_categorical(
+        values: Sequence[Any],
+        mapping: Dict[str, int],
+        default_code: int
+    ) -> np.ndarray:
+        """
+        Map categorical values to codes without a per-row dict lookup
+
+        Only the distinct values are looked up; rows are mapped with one
+        np.unique inverse index.
+        """
+        raw = np.asarray(values, dtype=object)
+        uniques, inverse = np.unique(raw.astype(str), return_inverse=True)
+        codes = np.fromiter(
+            (mapping.get(u.lower(), default_code) for u in uniques),
+            dtype=np.float32,
+            count=len(uniques)
+        )
+        return codes[inverse]
+
+    @classmethod
+    def encode_batch(cls, rows: Sequence[Dict[str, Any]]) -> np.ndarray:
+        """
+        Encode N raw feature dicts into one (N, 25) float32 matrix
+
+        Column-for-column equivalent to encode_features, but fills a
+        preallocated matrix column by column and maps categoricals through
+        their distinct values only.
+
+        Args:
+            rows: Raw feature dictionaries (same keys as ChurnFeatures)
+
+        Returns:
+            numpy array of shape (N, 25)
+        """
+        n = len(rows)
+        X = np.empty((n, len(CHURN_FEATURES)), dtype=np.float32)
+        if n == 0:
+            return X
+
+        def column(key: str, default: Any) -> List[Any]:
+            return [r.get(key, default) for r in rows]
+
+        def category(key: str, default: str) -> List[Any]:
+            return [r.get(key) or default for r in rows]
+
+        # Booking characteristics
+        X[:, 0] = column('booking_lead_time_days', 0)
+        X[:, 1] = np.asarray(column('total_amount', 0), dtype=np.float64) / 1_000_000
+        X[:, 2] = column('length_of_stay', 1)
+        X[:, 3] = cls._encode_categorical(category('room_type', 'standard'), cls.ROOM_TYPE_ENCODING, 0)
+        X[:, 4] = cls._encode_categorical(category('payment_method', 'cash'), cls.PAYMENT_METHOD_ENCODING, 0)
+        X[:, 5] = cls._encode_categorical(category('booking_source', 'direct'), cls.BOOKING_SOURCE_ENCODING, 0)
+
+        # Guest history
+        X[:, 6] = [1 if r.get('is_first_booking', True) else 0 for r in rows]
+        X[:, 7] = column('previous_bookings_count', 0)
+        X[:, 8] = column('previous_cancellations_count', 0)
+        X[:, 9] = column('cancellation_rate', 0.0)
+        X[:, 10] = np.asarray(column('avg_previous_booking_value', 0), dtype=np.float64) / 1_000_000
+        X[:, 11] = [r.get('days_since_last_booking', 365) or 365 for r in rows]
+
+        # Engagement
+        X[:, 12] = [r.get('special_requests', r.get('special_requests_count', 0)) for r in rows]
+        X[:, 13] = [r.get('booking_modifications', r.get('booking_modifications_count', 0)) for r in rows]
+        X[:, 14] = cls._encode_categorical(category('loyalty_tier', 'none'), cls.LOYALTY_TIER_ENCODING, 0)
+        X[:, 15] = np.asarray(column('loyalty_points_balance', 0), dtype=np.float64) / 1000
+
+        # Behavioral
+        X[:, 16] = column('time_spent_on_website_minutes', 0)
+        X[:, 17] = column('pages_viewed', 0)
+        X[:, 18] = column('price_comparison_searches', 0)
+
+        # Temporal
+        X[:, 19] = column('days_until_checkin', 0)
+        X[:, 20] = column('booking_dow', 0)
+        X[:, 21] = column('booking_hour', 12)
+        X[:, 22] = cls._encode_categorical(category('season', 'normal'), cls.SEASON_ENCODING, 1)
+
+        # Price sensitivity
+        X[:, 23] = column('price_vs_avg_ratio', 1.0)
+        X[:, 24] = [1 if r.get('discount_applied', False) else 0 for r in rows]
+
+        return X
+
+    @classmethod
+    def encode_frame(cls, df: pd.DataFrame) -> np.ndarray:
+        """
+        Encode a DataFrame of raw features into one (N, 25) float32 matrix
+
+        Column-for-column equivalent to encode_batch on the frame's rows,
+        but works on whole columns, which is what training on years of
+        bookings needs. Missing columns and NaN cells take the same
+        defaults as missing keys in encode_batch.
+
+        Args:
+            df: One row per booking, columns named like ChurnFeatures
+
+        Returns:
+            numpy array of shape (N, 25)
+        """
+        n = len(df)
+        X = np.empty((n, len(CHURN_FEATURES)), dtype=np.float32)
+        if n == 0:
+            return X
+
+        def column(key: str, default: float, fallback: Optional[str] = None) -> np.ndarray:
+            if key not in df and fallback is not None:
+                key = fallback
+            if key not in df:
+                return np.full(n, default, dtype=np.float64)
+            return df[key].astype(np.float64).fillna(default).to_numpy()
+
+        def category(key: str, mapping: Dict[str, int], default: str, default_code: int) -> np.ndarray:
+            if key not in df:
+                return np.full(n, mapping.get(default, default_code), dtype=np.float32)
+            values = df[key].where(df[key].notna() & (df[key] != ''), default)
+            return cls._encode_categorical(values.to_numpy(), mapping, default_code)
+
+        # Booking characteristics
+        X[:, 0] = column('booking_lead_time_days', 0)
+        X[:, 1] = column('total_amount', 0) / 1_000_000
+        X[:, 2] = column('length_of_stay', 1)
+        X[:, 3] = category('room_type', cls.ROOM_TYPE_ENCODING, 'standard', 0)
+        X[:, 4] = category('payment_method', cls.PAYMENT_METHOD_ENCODING, 'cash', 0)
+        X[:, 5] = category('booking_source', cls.BOOKING_SOURCE_ENCODING, 'direct', 0)
+
+        # Guest history
+        X[:, 6] = column('is_first_booking', 1) != 0
+        X[:, 7] = column('previous_bookings_count', 0)
+        X[:, 8] = column('previous_cancellations_count', 0)
+        X[:, 9] = column('cancellation_rate', 0.0)
+        X[:, 10] = column('avg_previous_booking_value', 0) / 1_000_000
+        days_since = column('days_since_last_booking', 365)
+        X[:, 11] = np.where(days_since == 0, 365, days_since)
+
+        # Engagement
+        X[:, 12] = column('special_requests', 0, fallback='special_requests_count')
+        X[:, 13] = column('booking_modifications', 0, fallback='booking_modifications_count')
+        X[:, 14] = category('loyalty_tier', cls.LOYALTY_TIER_ENCODING, 'none', 0)
+        X[:, 15] = column('loyalty_points_balance', 0) / 1000
+
+        # Behavioral
+        X[:, 16] = column('time_spent_on_website_minutes', 0)
+        X[:, 17] = column('pages_viewed', 0)
+        X[:, 18] = column('price_comparison_searches', 0)
+
+        # Temporal
+        X[:, 19] = column('days_until_checkin', 0)
+        X[:, 20] = column('booking_dow', 0)
+        X[:, 21] = column('booking_hour', 12)
+        X[:, 22] = category('season', cls.SEASON_ENCODING, 'normal', 1)
+
+        # Price sensitivity
+        X[:, 23] = column('price_vs_avg_ratio', 1.0)
+        X[:, 24] = column('discount_applied', 0) != 0
+
+        return X
+
+    @classmethod
+    def validate_frame(cls, df: pd.DataFrame) -> Tuple[pd.DataFrame, List[Optional[str]]]:
+        """
+        Check raw feature rows against ChurnFeatures, column by column
+
+        Same checks as ChurnFeatures.model_validate (required fields,
+        aliases, int/float/bool/str types, ge/le bounds), applied to whole
+        columns instead of building one model per row. Missing and null
+        cells of optional fields take the field default.
+
+        Args:
+            df: One row per booking, raw feature columns (names or aliases)
+
+        Returns:
+            (frame, errors): frame with ChurnFeatures field names and
+            coerced values (input for encode_frame), and per row None or
+            the first problem found
+        """
+        n = len(df)
+        errors = np.full(n, None, dtype=object)
+        out = pd.DataFrame(index=df.index)
+
+        def reject(mask, message: str):
+            mask = np.asarray(mask, dtype=bool) & pd.isna(errors)
+            errors[mask] = message
+
+        for name, alias, kind, required, default, ge, le in CHURN_FEATURE_SCHEMA:
+            column = None
+            for key in (alias, name):
+                if key and key in df:
+                    column = df[key] if column is None else column.where(column.notna(), df[key])
+            if column is None:
+                column = pd.Series([None] * n, index=df.index, dtype=object)
+            missing = column.isna().to_numpy()
+            if required:
+                reject(missing, f"{name}: Field required")
+
+            if kind is str:
+                is_str = column.map(lambda v: isinstance(v, str)).to_numpy()
+                reject(~missing & ~is_str, f"{name}: Input should be a valid string")
+                values = column.where(~missing, default)
+            else:
+                if kind is bool:
+                    values = column.astype(str).str.lower().map(_BOOL_VALUES).astype(np.float64)
+                    message = "Input should be a valid boolean"
+                else:
+                    values = pd.to_numeric(column, errors='coerce').astype(np.float64)
+                    message = "Input should be a valid number"
+                    if kind is int:
+                        values = values.where(values == np.floor(values))
+                        message = "Input should be a valid integer"
+                reject(~missing & values.isna().to_numpy(), f"{name}: {message}")
+                if ge is not None:
+                    reject(values.to_numpy() < ge, f"{name}: Input should be greater than or equal to {ge}")
+                if le is not None:
+                    reject(values.to_numpy() > le, f"{name}: Input should be less than or equal to {le}")
+                fill = np.nan if default is None else float(default)
+                values = values.where(~missing, fill)
+            out[name] = values
+
+        return out, errors.tolist()
+
     @classmethod
     def get_feature_names(cls) -> List[str]:
         """ Get ordered list of feature names """
@@ -0,0 +1,410 @@
+"""
+Online Feature Store for Guest-Level ML Features
+
+Churn, CLV and recommendation inference read guest features (booking
+counts, cancellation rate, recency, loyalty, ...) through one batched call:
+
+    features = await get_feature_store().get_features(["12", "57"])
+
+Lookups go through three tiers:
+1. In-process LRU with a short TTL
+2. Redis (one MGET per call) with a longer TTL, shared by all workers
+3. GuestHistoryLoader for the rest: one batched, version-checked query
+   per chunk of guests; results are written back to both caches
+
+Booking events from RabbitMQ (routing key booking.*) mark the guest dirty.
+Dirty guests skip both caches on the next read, and a background refresh
+recomputes them in batches, so caches never serve a guest's features from
+before their latest booking event. Recency is derived from the last
+booking date at read time, so a cached entry does not age.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import aio_pika
+
+from src.infrastructure.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+
+# Bump when the feature definitions change; old Redis entries are then ignored
+FEATURE_SET_VERSION = 1
+REDIS_KEY_PREFIX = f"ml:guest_features:v{FEATURE_SET_VERSION}:"
+
+# Loyalty tier from completed stays or revenue (VND), highest first
+LOYALTY_THRESHOLDS = [
+    ("platinum", 10, 100_000_000),
+    ("gold", 5, 50_000_000),
+    ("silver", 2, 15_000_000),
+]
+
+# Summary keys kept as features (booking rows are not cached)
+SUMMARY_FEATURES = (
+    'total_bookings',
+    'completed_bookings',
+    'cancelled_bookings',
+    'total_revenue',
+    'avg_booking_value',
+    'cancellation_rate',
+    'first_booking_date',
+    'last_booking_date',
+    'days_since_last_booking',
+    'avg_days_between_bookings',
+    'avg_length_of_stay',
+    'unique_services_used',
+    'total_service_usage',
+    'service_usage_rate',
+)
+
+NO_HISTORY_FEATURES = {
+    'has_history': False,
+    'total_bookings': 0,
+    'cancelled_bookings': 0,
+    'loyalty_tier': 'none',
+}
+
+
+def loyalty_tier(completed_bookings: int, total_revenue: float) -> str:
+    """Loyalty tier for a guest's completed stays and revenue"""
+    for tier, min_stays, min_revenue in LOYALTY_THRESHOLDS:
+        if completed_bookings >= min_stays or total_revenue >= min_revenue:
+            return tier
+    return "none"
+
+
+def features_from_summary(summary: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Guest features from a guest_history.summarize_bookings summary
+
+    Returns:
+        JSON-serializable feature dict
+    """
+    if not summary.get('has_history'):
+        return dict(NO_HISTORY_FEATURES)
+
+    features = {key: summary[key] for key in SUMMARY_FEATURES}
+    features['has_history'] = True
+    features['loyalty_tier'] = loyalty_tier(summary['completed_bookings'], summary['total_revenue'])
+    return features
+
+
+def with_recency(features: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    """Copy of features with days_since_last_booking as of now"""
+    features = dict(features)
+    if features.get('has_history'):
+        last_booking = datetime.fromisoformat(features['last_booking_date'])
+        features['days_since_last_booking'] = (now - last_booking).days
+    return features
+
+
+class OnlineFeatureStore:
+    """
+    Cached, event-refreshed guest features shared by all ML predictors
+
+    Usage:
+        store = OnlineFeatureStore(history_loader=loader)
+        await store.start()                        # Redis + booking events
+        features = await store.get_features(["12", "57"])
+        features["12"]["cancellation_rate"]
+    """
+
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        history_loader=None,
+        redis_client=None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize feature store
+
+        Args:
+            settings: Application settings (if None, will call get_settings())
+            history_loader: GuestHistoryLoader used to compute features
+            redis_client: redis.asyncio client (connected in start() if not given)
+            clock: Monotonic clock for in-process TTLs (injectable for tests)
+        """
+        self.settings = settings or get_settings()
+        self.history_loader = history_loader
+        self.redis = redis_client
+        self._clock = clock
+
+        self.ttl_seconds = self.settings.feature_store_ttl_seconds
+        self.local_ttl_seconds = self.settings.feature_store_local_ttl_seconds
+        self.local_cache_size = self.settings.feature_store_local_cache_size
+        self.refresh_interval = self.settings.feature_store_refresh_interval_seconds
+
+        # guest_id -> (expires_at, features)
+        self._local: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # guest_id -> event sequence number of the latest booking event
+        self._dirty: Dict[str, int] = {}
+        self._event_seq = 0
+        self._wakeup = asyncio.Event()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.rabbitmq_connection: Optional[aio_pika.abc.AbstractRobustConnection] = None
+
+        self.stats = {
+            "local_hits": 0,
+            "redis_hits": 0,
+            "computed": 0,
+            "redis_errors": 0,
+            "events": 0,
+        }
+
+    @property
+    def is_connected(self) -> bool:
+        """Features can be computed (the history loader has a database)"""
+        return self.history_loader is not None and self.history_loader.is_connected
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    async def get_features(self, guest_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Features for many guests in one call
+
+        Args:
+            guest_ids: Guest ids (numeric strings matching "User".user_id)
+
+        Returns:
+            Dict guest_id -> feature dict ({'has_history': False, ...} for
+            guests without bookings)
+        """
+        unique_ids = list(dict.fromkeys(str(g) for g in guest_ids))
+        now = datetime.now()
+        found: Dict[str, Dict[str, Any]] = {}
+
+        cached_ids = [g for g in unique_ids if g not in self._dirty]
+        missing = [g for g in unique_ids if g in self._dirty]
+
+        # 1. In-process
+        for guest_id in cached_ids:
+            features = self._local_get(guest_id)
+            if features is not None:
+                found[guest_id] = features
+            else:
+                missing.append(guest_id)
+        self.stats["local_hits"] += len(found)
+
+        # 2. Redis
+        from_redis = [g for g in missing if g not in self._dirty]
+        if from_redis and self.redis is not None:
+            for guest_id, features in (await self._redis_get(from_redis)).items():
+                found[guest_id] = features
+                self._local_put(guest_id, features)
+                self.stats["redis_hits"] += 1
+
+        # 3. Compute
+        to_compute = [g for g in missing if g not in found]
+        if to_compute:
+            computed = await self._compute(to_compute)
+            found.update(computed)
+
+        return {guest_id: with_recency(found[guest_id], now) for guest_id in unique_ids}
+
+    async def get(self, guest_id: str) -> Dict[str, Any]:
+        """Features for a single guest"""
+        return (await self.get_features([guest_id]))[str(guest_id)]
+
+    async def _compute(self, guest_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Compute features from booking history and write them to both caches"""
+        if self.history_loader is None:
+            raise RuntimeError("OnlineFeatureStore has no history loader")
+
+        # Events that arrive while loading keep their guest dirty
+        marks = {guest_id: self._dirty.get(guest_id) for guest_id in guest_ids}
+        summaries = await self.history_loader.load_many(guest_ids)
+        computed = {guest_id: features_from_summary(summaries[guest_id]) for guest_id in guest_ids}
+
+        fresh = {
+            guest_id: features for guest_id, features in computed.items()
+            if self._dirty.get(guest_id) == marks[guest_id]
+        }
+        for guest_id, features in fresh.items():
+            self._local_put(guest_id, features)
+            self._dirty.pop(guest_id, None)
+        if fresh and self.redis is not None:
+            await self._redis_set(fresh)
+
+        self.stats["computed"] += len(computed)
+        return computed
+
+    # ------------------------------------------------------------------
+    # Cache tiers
+    # ------------------------------------------------------------------
+
+    def _local_get(self, guest_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._local.get(guest_id)
+        if entry is None:
+            return None
+        if entry[0] <= self._clock():
+            del self._local[guest_id]
+            return None
+        self._local.move_to_end(guest_id)
+        return entry[1]
+
+    def _local_put(self, guest_id: str, features: Dict[str, Any]):
+        self._local[guest_id] = (self._clock() + self.local_ttl_seconds, features)
+        self._local.move_to_end(guest_id)
+        while len(self._local) > self.local_cache_size:
+            self._local.popitem(last=False)
+
+    async def _redis_get(self, guest_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        try:
+            values = await self.redis.mget([REDIS_KEY_PREFIX + g for g in guest_ids])
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            logger.warning(f"Feature store Redis read failed: {e}")
+            return {}
+        return {g: json.loads(v) for g, v in zip(guest_ids, values) if v is not None}
+
+    async def _redis_set(self, features: Dict[str, Dict[str, Any]]):
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for guest_id, values in features.items():
+                    pipe.set(REDIS_KEY_PREFIX + guest_id, json.dumps(values), ex=self.ttl_seconds)
+                await pipe.execute()
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            logger.warning(f"Feature store Redis write failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Booking events
+    # ------------------------------------------------------------------
+
+    def mark_dirty(self, guest_id: Any):
+        """A guest's bookings changed: bypass caches until recomputed"""
+        guest_id = str(guest_id)
+        self._event_seq += 1
+        self._dirty[guest_id] = self._event_seq
+        self._local.pop(guest_id, None)
+        self._wakeup.set()
+
+    def handle_booking_event(self, event: Dict[str, Any]):
+        """
+        Apply one booking event
+
+        Args:
+            event: Event body with the guest in user_id (or guest_id)
+        """
+        guest_id = event.get('user_id', event.get('guest_id'))
+        if guest_id is None:
+            logger.warning("Booking event without user_id ignored")
+            return
+        self.stats["events"] += 1
+        self.mark_dirty(guest_id)
+
+    async def refresh_dirty(self) -> int:
+        """
+        Recompute every dirty guest in one batched load
+
+        Returns:
+            Number of guests recomputed
+        """
+        dirty = list(self._dirty)
+        if not dirty or not self.is_connected:
+            return 0
+        await self._compute(dirty)
+        logger.info(f"🔄 Refreshed features for {len(dirty)} guests after booking events")
+        return len(dirty)
+
+    async def consume_events(self):
+        """
+        Subscribe to booking events on RabbitMQ
+
+        Each worker binds its own exclusive queue, so every process drops
+        its in-process copy of a changed guest.
+        """
+        self.rabbitmq_connection = await aio_pika.connect_robust(self.settings.rabbitmq_url)
+        channel = await self.rabbitmq_connection.channel()
+        exchange = await channel.declare_exchange(
+            self.settings.booking_events_exchange,
+            aio_pika.ExchangeType.TOPIC,
+            durable=True,
+        )
+        queue = await channel.declare_queue(exclusive=True)
+        await queue.bind(exchange, routing_key=self.settings.feature_store_routing_key)
+
+        async def on_message(message: aio_pika.abc.AbstractIncomingMessage):
+            async with message.process():
+                try:
+                    self.handle_booking_event(json.loads(message.body))
+                except (ValueError, AttributeError):
+                    logger.warning("Malformed booking event ignored")
+
+        await queue.consume(on_message)
+        logger.info("✅ Feature store subscribed to booking events")
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self, use_events: bool = True):
+        """Connect Redis, subscribe to booking events and start the refresh loop"""
+        if self.redis is None:
+            try:
+                import redis.asyncio as aioredis
+                client = aioredis.from_url(self.settings.redis_url)
+                await client.ping()
+                self.redis = client
+                logger.info("✅ Feature store connected to Redis")
+            except Exception as e:
+                logger.warning(f"Redis unavailable, feature store is in-process only: {e}")
+
+        if use_events:
+            try:
+                await self.consume_events()
+            except Exception as e:
+                logger.warning(f"RabbitMQ unavailable, features refresh on TTL only: {e}")
+
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        while True:
+            await self._wakeup.wait()
+            # Batch window: fold all events of the interval into one load
+            await asyncio.sleep(self.refresh_interval)
+            self._wakeup.clear()
+            try:
+                await self.refresh_dirty()
+            except Exception as e:
+                logger.error(f"Feature refresh failed: {e}")
+
+    async def stop(self):
+        """Stop the refresh loop and close connections"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+
+        if self.rabbitmq_connection is not None:
+            await self.rabbitmq_connection.close()
+            self.rabbitmq_connection = None
+        if self.redis is not None:
+            await self.redis.aclose()
+            self.redis = None
+
+
+# Singleton
+_feature_store: Optional[OnlineFeatureStore] = None
+
+
+def get_feature_store() -> OnlineFeatureStore:
+    """Get or create feature store instance (started in the ML lifespan)"""
+    global _feature_store
+    if _feature_store is None:
+        from src.application.services.ml.guest_history import get_guest_history_loader
+        _feature_store = OnlineFeatureStore(history_loader=get_guest_history_loader())
+    return _feature_store
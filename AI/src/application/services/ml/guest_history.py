@@ -0,0 +1,375 @@
+"""
+Guest History Loader for CLV
+
+Loads booking histories for many guests with a constant number of queries:
+1. Guest ids are split into chunks (default: 1000 ids)
+2. Per chunk, a version query (last booking date, last booking id,
+   cancellations) decides which cached summaries are still valid
+3. Booking rows for the remaining guests are fetched with one
+   `user_id = ANY($1)` query and grouped per guest in a single pass
+4. Chunks run concurrently, bounded by a semaphore below the pool size
+
+Summaries are kept in an LRU cache keyed by guest id and validated against
+the booking version (last booking timestamp/id, cancellations), so a new or
+cancelled booking invalidates the entry on the next lookup.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import date, datetime, time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import asyncpg
+import numpy as np
+
+from src.infrastructure.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+
+# Booking statuses that are not guest stays
+EXCLUDED_STATUSES = ['maintained', 'rejected']
+CANCELLED_STATUSES = ('cancelled', 'cancel requested')
+
+
+# ============================================================================
+# SQL
+# ============================================================================
+
+GUEST_VERSIONS_SQL = """
+    SELECT
+        user_id,
+        MAX(created_at) AS last_booking_at,
+        MAX(booking_id) AS last_booking_id,
+        COUNT(*) FILTER (WHERE status IN ('cancelled', 'cancel requested')) AS cancelled_count
+    FROM Booking
+    WHERE user_id = ANY($1::integer[])
+      AND status <> ALL($2::varchar[])
+    GROUP BY user_id
+"""
+
+# Services are the ones offered with the booked room type
+GUEST_BOOKINGS_SQL = """
+    SELECT
+        b.user_id,
+        b.booking_id,
+        b.created_at,
+        b.check_in_date,
+        b.check_out_date,
+        b.total_price,
+        b.status,
+        rt.type AS room_type,
+        ARRAY(
+            SELECT rs.name
+            FROM ServicePossessing sp
+            JOIN RoomService rs ON rs.service_id = sp.service_id
+            WHERE sp.type_id = r.type_id
+        ) AS services_used
+    FROM Booking b
+    LEFT JOIN Room r ON r.room_id = b.room_id
+    LEFT JOIN RoomType rt ON rt.type_id = r.type_id
+    WHERE b.user_id = ANY($1::integer[])
+      AND b.status <> ALL($2::varchar[])
+    ORDER BY b.user_id, b.created_at, b.booking_id
+"""
+
+
+def _to_datetime(value: Optional[date]) -> Optional[datetime]:
+    """DATE columns come back as date; metrics work on datetimes"""
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.combine(value, time.min)
+
+
+def booking_from_row(row: Any) -> Dict[str, Any]:
+    """Convert a GUEST_BOOKINGS_SQL row into the booking dict used by CLV"""
+    checkin = _to_datetime(row['check_in_date'])
+    return {
+        'booking_date': _to_datetime(row['created_at']) or checkin,
+        'checkin_date': checkin,
+        'checkout_date': _to_datetime(row['check_out_date']),
+        'total_amount': row['total_price'] or 0,
+        'room_type': row['room_type'],
+        'cancelled': row['status'] in CANCELLED_STATUSES,
+        'services_used': list(row['services_used'] or []),
+    }
+
+
+def summarize_bookings(
+    guest_id: str,
+    bookings: List[Dict[str, Any]],
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Calculate historical metrics for one guest
+
+    Args:
+        guest_id: Guest identifier
+        bookings: Booking dicts (booking_date, checkin_date, checkout_date,
+            total_amount, room_type, cancelled, services_used)
+        now: Reference time for recency (defaults to datetime.now())
+
+    Returns:
+        Dict with historical metrics and bookings
+    """
+    if not bookings:
+        return {'has_history': False}
+
+    now = now or datetime.now()
+
+    total_bookings = len(bookings)
+    completed_bookings = [b for b in bookings if not b['cancelled']]
+    cancelled_bookings = [b for b in bookings if b['cancelled']]
+
+    total_revenue = sum(b['total_amount'] for b in completed_bookings)
+    avg_booking_value = total_revenue / len(completed_bookings) if completed_bookings else 0
+
+    cancellation_rate = len(cancelled_bookings) / total_bookings if total_bookings > 0 else 0
+
+    # Calculate booking frequency
+    booking_dates = sorted([b['booking_date'] for b in bookings])
+    if len(booking_dates) > 1:
+        date_diffs = [(booking_dates[i+1] - booking_dates[i]).days
+                     for i in range(len(booking_dates)-1)]
+        avg_days_between = float(np.mean(date_diffs))
+    else:
+        avg_days_between = None
+
+    # Days since last booking
+    last_booking = max(booking_dates)
+    days_since_last = (now - last_booking).days
+
+    # Average length of stay
+    stays = [(b['checkout_date'] - b['checkin_date']).days
+            for b in completed_bookings
+            if b['checkout_date'] is not None and b['checkin_date'] is not None]
+    avg_length_of_stay = float(np.mean(stays)) if stays else 0
+
+    # Service usage
+    all_services = [s for b in completed_bookings for s in b['services_used']]
+    unique_services = set(all_services)
+
+    return {
+        'has_history': True,
+        'guest_id': guest_id,
+        'bookings': bookings,
+        'total_bookings': total_bookings,
+        'completed_bookings': len(completed_bookings),
+        'cancelled_bookings': len(cancelled_bookings),
+        'total_revenue': float(total_revenue),
+        'avg_booking_value': float(avg_booking_value),
+        'cancellation_rate': float(cancellation_rate),
+        'first_booking_date': min(booking_dates).isoformat(),
+        'last_booking_date': last_booking.isoformat(),
+        'days_since_last_booking': days_since_last,
+        'avg_days_between_bookings': avg_days_between,
+        'avg_length_of_stay': avg_length_of_stay,
+        'unique_services_used': len(unique_services),
+        'total_service_usage': len(all_services),
+        'service_usage_rate': len(all_services) / len(completed_bookings) if completed_bookings else 0,
+    }
+
+
+class GuestHistoryLoader:
+    """
+    Batched, cached access to guest booking histories
+
+    Usage:
+        loader = GuestHistoryLoader(db_pool=pool)
+        histories = await loader.load_many(["12", "57", "301"])
+        histories["12"]["total_revenue"]
+    """
+
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        db_pool: Optional[asyncpg.Pool] = None,
+        chunk_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        cache_size: Optional[int] = None,
+    ):
+        """
+        Initialize guest history loader
+
+        Args:
+            settings: Application settings (if None, will call get_settings())
+            db_pool: asyncpg pool (created in initialize() if not given)
+            chunk_size: Guest ids per ANY($1) query
+            max_concurrency: Chunks queried in parallel
+            cache_size: Max guest summaries kept in the LRU cache
+        """
+        self.settings = settings or get_settings()
+        self.db_pool = db_pool
+        self.chunk_size = chunk_size or self.settings.clv_history_chunk_size
+        self.max_concurrency = max_concurrency or self.settings.clv_history_max_concurrency
+        self.cache_size = cache_size or self.settings.clv_history_cache_size
+
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        # guest_id -> (version, summary); an entry is valid only for its version
+        self._cache: "OrderedDict[str, Tuple[Tuple, Dict[str, Any]]]" = OrderedDict()
+
+        self.stats = {
+            "cache_hits": 0,
+            "cache_misses": 0,
+            "queries": 0,
+        }
+
+    @property
+    def is_connected(self) -> bool:
+        return self.db_pool is not None
+
+    async def initialize(self):
+        """Create the database pool if it was not injected"""
+        if self.db_pool is None:
+            self.db_pool = await asyncpg.create_pool(
+                self.settings.asyncpg_url,
+                min_size=1,
+                max_size=self.max_concurrency + 1,
+                timeout=10,
+            )
+        logger.info("✅ Guest history loader connected to PostgreSQL")
+
+    async def shutdown(self):
+        """Close the database pool"""
+        if self.db_pool is not None:
+            await self.db_pool.close()
+            self.db_pool = None
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def load(self, guest_id: str) -> Dict[str, Any]:
+        """Load history for a single guest"""
+        return (await self.load_many([guest_id]))[guest_id]
+
+    async def load_many(self, guest_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Load histories for many guests
+
+        Args:
+            guest_ids: Guest ids (numeric strings matching "User".user_id)
+
+        Returns:
+            Dict guest_id -> history summary ({'has_history': False} for
+            unknown or non-numeric ids)
+        """
+        if self.db_pool is None:
+            raise RuntimeError("GuestHistoryLoader is not initialized")
+
+        unique_ids = list(dict.fromkeys(str(g) for g in guest_ids))
+        user_ids: Dict[int, str] = {}
+        for guest_id in unique_ids:
+            try:
+                user_ids[int(guest_id)] = guest_id
+            except ValueError:
+                continue
+
+        keys = list(user_ids)
+        chunks = [keys[i:i + self.chunk_size] for i in range(0, len(keys), self.chunk_size)]
+        now = datetime.now()
+
+        results = await asyncio.gather(*(self._load_chunk(chunk, user_ids, now) for chunk in chunks))
+
+        histories: Dict[str, Dict[str, Any]] = {g: {'has_history': False} for g in unique_ids}
+        for chunk_result in results:
+            histories.update(chunk_result)
+        return histories
+
+    def clear_cache(self):
+        """Drop all cached summaries"""
+        self._cache.clear()
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    async def _load_chunk(
+        self,
+        chunk: List[int],
+        user_ids: Dict[int, str],
+        now: datetime,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Resolve one chunk: version query, then full rows for cache misses"""
+        async with self._semaphore:
+            async with self.db_pool.acquire() as conn:
+                version_rows = await conn.fetch(GUEST_VERSIONS_SQL, chunk, EXCLUDED_STATUSES)
+                self.stats["queries"] += 1
+
+                histories: Dict[str, Dict[str, Any]] = {}
+                stale: Dict[int, Tuple] = {}
+                for row in version_rows:
+                    guest_id = user_ids[row['user_id']]
+                    version = (row['last_booking_at'], row['last_booking_id'], row['cancelled_count'])
+                    cached = self._cache_get(guest_id, version)
+                    if cached is not None:
+                        histories[guest_id] = self._refresh_recency(cached, now)
+                    else:
+                        stale[row['user_id']] = version
+
+                if not stale:
+                    return histories
+
+                booking_rows = await conn.fetch(GUEST_BOOKINGS_SQL, list(stale), EXCLUDED_STATUSES)
+                self.stats["queries"] += 1
+
+        # Rows are ordered by user_id: group in a single pass
+        current_user: Optional[int] = None
+        bookings: List[Dict[str, Any]] = []
+        for row in booking_rows:
+            if row['user_id'] != current_user:
+                if current_user is not None:
+                    self._store(user_ids[current_user], stale[current_user], bookings, now, histories)
+                current_user = row['user_id']
+                bookings = []
+            bookings.append(booking_from_row(row))
+        if current_user is not None:
+            self._store(user_ids[current_user], stale[current_user], bookings, now, histories)
+
+        return histories
+
+    def _store(
+        self,
+        guest_id: str,
+        version: Tuple,
+        bookings: List[Dict[str, Any]],
+        now: datetime,
+        histories: Dict[str, Dict[str, Any]],
+    ):
+        summary = summarize_bookings(guest_id, bookings, now)
+        self._cache_put(guest_id, version, summary)
+        histories[guest_id] = summary
+
+    @staticmethod
+    def _refresh_recency(summary: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+        """Cached summaries keep their metrics; only recency depends on today"""
+        last_booking = datetime.fromisoformat(summary['last_booking_date'])
+        return {**summary, 'days_since_last_booking': (now - last_booking).days}
+
+    def _cache_get(self, guest_id: str, version: Tuple) -> Optional[Dict[str, Any]]:
+        entry = self._cache.get(guest_id)
+        if entry is None or entry[0] != version:
+            self.stats["cache_misses"] += 1
+            return None
+        self._cache.move_to_end(guest_id)
+        self.stats["cache_hits"] += 1
+        return entry[1]
+
+    def _cache_put(self, guest_id: str, version: Tuple, summary: Dict[str, Any]):
+        self._cache[guest_id] = (version, summary)
+        self._cache.move_to_end(guest_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+# Singleton instance
+_loader: Optional[GuestHistoryLoader] = None
+
+
+def get_guest_history_loader() -> GuestHistoryLoader:
+    """Get or create guest history loader instance"""
+    global _loader
+    if _loader is None:
+        _loader = GuestHistoryLoader()
+    return _loader
@@ -0,0 +1,199 @@
+"""
+Request Coalescing for ML Predictors
+
+Single-item requests (one booking, one guest) that arrive within a short
+window are collected into one batch and dispatched to the predictor's
+vectorized batch path; every caller awaits only its own result. Under a
+burst this turns hundreds of one-row model calls into a few N-row calls,
+at the cost of at most max_wait_ms extra latency per request.
+
+Batch sizes and queueing delays are recorded in Prometheus-style
+cumulative histograms exposed through MicroBatcher.stats.
+"""
+import asyncio
+import inspect
+import logging
+import time
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from src.infrastructure.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+# Histogram upper bounds (value <= bound)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+WAIT_TIME_BUCKETS_MS = (0.5, 1.0, 2.0, 5.0, 10.0, 25.0, 50.0, 100.0)
+
+# batch_fn(items) -> one result (or Exception) per item, sync or async
+BatchFn = Callable[[List[Any]], Union[Sequence[Any], Awaitable[Sequence[Any]]]]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with sum and count"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self._counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Cumulative counts per upper bound, as exported by Prometheus"""
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, self._counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = self.count
+        return {"buckets": buckets, "sum": round(self.sum, 3), "count": self.count}
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item calls into batches
+
+    The first item of a batch starts a max_wait_ms timer; the batch is
+    dispatched when the timer fires or max_batch_size items are pending,
+    whichever comes first. batch_fn returns one result per item; an
+    Exception in the result list fails only that item's caller, while an
+    exception raised by batch_fn fails the whole batch.
+
+    Usage:
+        batcher = MicroBatcher("churn", predictor._score_coalesced)
+        probability, confidence = await batcher.submit(features)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        batch_fn: BatchFn,
+        max_wait_ms: float = 2.0,
+        max_batch_size: int = 256,
+    ):
+        """
+        Initialize micro-batcher
+
+        Args:
+            name: Predictor name used in logs and stats
+            batch_fn: Scores a list of items in one pass
+            max_wait_ms: Longest time the first item of a batch waits
+            max_batch_size: Dispatch as soon as this many items are pending
+        """
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_wait_ms = max_wait_ms
+        self.max_batch_size = max_batch_size
+
+        self._pending: List[Tuple[Any, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+        self.batch_size_histogram = Histogram(BATCH_SIZE_BUCKETS)
+        self.wait_time_histogram = Histogram(WAIT_TIME_BUCKETS_MS)
+        self._stats = {"requests": 0, "batches": 0, "failed_batches": 0}
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Request counts and batch-size / wait-time histograms"""
+        return {
+            **self._stats,
+            "pending": len(self._pending),
+            "max_wait_ms": self.max_wait_ms,
+            "max_batch_size": self.max_batch_size,
+            "batch_size": self.batch_size_histogram.snapshot(),
+            "wait_time_ms": self.wait_time_histogram.snapshot(),
+        }
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue one item and wait for its result
+
+        Returns:
+            The result batch_fn produced for this item
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        self._stats["requests"] += 1
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Hand the pending items to a dispatch task"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._dispatch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future, float]]):
+        """Run batch_fn and fan results out to the waiting callers"""
+        started = time.perf_counter()
+        self.batch_size_histogram.observe(len(batch))
+        for _, _, enqueued_at in batch:
+            self.wait_time_histogram.observe((started - enqueued_at) * 1000)
+        self._stats["batches"] += 1
+
+        try:
+            results = self.batch_fn([item for item, _, _ in batch])
+            if inspect.isawaitable(results):
+                results = await results
+            if len(results) != len(batch):
+                raise RuntimeError(f"batch_fn returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            self._stats["failed_batches"] += 1
+            logger.error(f"❌ {self.name} micro-batch of {len(batch)} failed: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            # Callers that went away (e.g. client disconnect) are skipped
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+def build_batcher(
+    name: str,
+    batch_fn: BatchFn,
+    settings: Optional[Settings] = None,
+) -> Optional[MicroBatcher]:
+    """
+    MicroBatcher configured from settings, or None when batching is disabled
+
+    Args:
+        name: Predictor name
+        batch_fn: Batch scoring function
+        settings: Application settings (if None, will call get_settings())
+    """
+    settings = settings or get_settings()
+    if not settings.ml_micro_batching_enabled:
+        return None
+    return MicroBatcher(
+        name,
+        batch_fn,
+        max_wait_ms=settings.ml_micro_batch_wait_ms,
+        max_batch_size=settings.ml_micro_batch_max_size,
+    )
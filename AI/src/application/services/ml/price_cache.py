@@ -0,0 +1,235 @@
+"""
+Current-Price Cache
+
+The booking frontend polls /pricing/current on every page view. Quotes for
+every known room type over today and the next N days are computed in one
+vectorized pricing grid, kept in memory and served until their
+valid_until. Pricing is deterministic per date, so a rebuild reproduces
+the same quotes unless the inputs changed.
+
+The cache is tied to a fingerprint of the base prices and constraints;
+changing either (through this class or directly) invalidates it on the
+next read.
+"""
+import asyncio
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+from src.application.dtos.ml.pricing_dto import (
+    CurrentPriceRequest,
+    CurrentPriceResponse,
+    PricingConstraints,
+)
+from src.application.services.ml import pricing_optimizer
+from src.application.services.ml.pricing_optimizer import PricingOptimizer
+from src.infrastructure.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+PriceKey = Tuple[str, date]
+
+
+def _utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class PriceCache:
+    """In-memory, TTL-bound cache of current-price quotes"""
+
+    def __init__(
+        self,
+        optimizer: PricingOptimizer,
+        days_ahead: int = 14,
+        constraints: Optional[PricingConstraints] = None,
+        clock: Callable[[], datetime] = _utc_now,
+    ):
+        """
+        Initialize price cache
+
+        Args:
+            optimizer: Pricing optimizer used to build quotes
+            days_ahead: Days after today to precompute
+            constraints: Multiplier bounds for current prices
+            clock: Returns the current UTC time (injectable for tests)
+        """
+        self.optimizer = optimizer
+        self.days_ahead = days_ahead
+        self.constraints = constraints
+        self._clock = clock
+
+        self._prices: Dict[PriceKey, CurrentPriceResponse] = {}
+        self._built_for: Optional[date] = None
+        self._expires_at: Optional[datetime] = None
+        self._fingerprint: Optional[tuple] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        self._stats = {"hits": 0, "misses": 0, "rebuilds": 0, "invalidations": 0}
+
+    @property
+    def stats(self) -> Dict:
+        """Cache statistics"""
+        return {
+            **self._stats,
+            "cached_quotes": len(self._prices),
+            "built_for": self._built_for.isoformat() if self._built_for else None,
+            "expires_at": self._expires_at.isoformat() if self._expires_at else None,
+        }
+
+    def _current_fingerprint(self) -> tuple:
+        constraints = self.constraints
+        return (
+            tuple(sorted(pricing_optimizer.BASE_PRICES.items())),
+            (constraints.min_price_multiplier, constraints.max_price_multiplier)
+            if constraints else None,
+        )
+
+    def _today(self) -> date:
+        """Current UTC date, from the same clock as the expiry check"""
+        return self._clock().astimezone(timezone.utc).date()
+
+    def _is_fresh(self) -> bool:
+        now = self._clock()
+        return (
+            bool(self._prices)
+            and self._built_for == now.astimezone(timezone.utc).date()
+            and now < self._expires_at
+            and self._fingerprint == self._current_fingerprint()
+        )
+
+    def refresh(self) -> int:
+        """
+        Rebuild quotes for all known room types, today through days_ahead
+
+        Returns:
+            Number of quotes cached
+        """
+        now = self._clock()
+        today = now.astimezone(timezone.utc).date()
+        fingerprint = self._current_fingerprint()
+        room_types = [rt for rt, _ in fingerprint[0]]
+
+        prices = self.optimizer.build_current_prices(
+            room_types=room_types,
+            start=today,
+            end=today + timedelta(days=self.days_ahead),
+            constraints=self.constraints,
+            now=now,
+        )
+        expires_at = datetime.fromisoformat(
+            next(iter(prices.values())).valid_until.replace("Z", "+00:00")
+        ) if prices else now
+
+        # Swap in the complete set at once
+        self._prices = prices
+        self._built_for = today
+        self._expires_at = expires_at
+        self._fingerprint = fingerprint
+        self._stats["rebuilds"] += 1
+        logger.info(f"💲 Precomputed {len(prices)} price quotes valid until {expires_at.isoformat()}")
+        return len(prices)
+
+    def get_quote(self, room_type: str, target_date: Optional[date] = None) -> CurrentPriceResponse:
+        """
+        Current price for a room type and date
+
+        Known room types inside the precomputed window are served from
+        memory; anything else is computed on demand and not cached.
+        """
+        target_date = target_date or self._today()
+
+        if not self._is_fresh():
+            self.refresh()
+
+        quote = self._prices.get((room_type, target_date))
+        if quote is not None:
+            self._stats["hits"] += 1
+            return quote
+
+        self._stats["misses"] += 1
+        prices = self.optimizer.build_current_prices(
+            room_types=[room_type],
+            start=target_date,
+            end=target_date,
+            constraints=self.constraints,
+            now=self._clock(),
+        )
+        return prices[(room_type, target_date)]
+
+    async def get_current_price(self, request: CurrentPriceRequest) -> CurrentPriceResponse:
+        """Async entry point matching PricingOptimizer.get_current_price"""
+        return self.get_quote(request.room_type, request.date)
+
+    def seconds_until_expiry(self) -> int:
+        """Remaining TTL of the cached quotes, for HTTP cache headers"""
+        if self._expires_at is None:
+            return 0
+        return max(0, int((self._expires_at - self._clock()).total_seconds()))
+
+    # ========== Invalidation ==========
+
+    def invalidate(self):
+        """Drop all cached quotes; the next read rebuilds"""
+        self._prices = {}
+        self._expires_at = None
+        self._stats["invalidations"] += 1
+
+    def update_base_prices(self, base_prices: Dict[str, int]):
+        """
+        Change base prices and invalidate the cache
+
+        Args:
+            base_prices: room_type -> base price (VND); merged into BASE_PRICES
+        """
+        pricing_optimizer.BASE_PRICES.update(base_prices)
+        self.invalidate()
+
+    def update_constraints(self, constraints: Optional[PricingConstraints]):
+        """Change current-price constraints and invalidate the cache"""
+        self.constraints = constraints
+        self.invalidate()
+
+    # ========== Scheduled Refresh ==========
+
+    async def start(self):
+        """Precompute now and refresh whenever the quotes expire"""
+        if self._refresh_task is not None:
+            return
+        self.refresh()
+
+        async def _refresh_loop():
+            while True:
+                await asyncio.sleep(max(1, self.seconds_until_expiry()))
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.error(f"Price cache refresh failed: {e}")
+
+        self._refresh_task = asyncio.create_task(_refresh_loop())
+
+    async def stop(self):
+        """Cancel the scheduled refresh"""
+        if self._refresh_task is None:
+            return
+        self._refresh_task.cancel()
+        try:
+            await self._refresh_task
+        except asyncio.CancelledError:
+            pass
+        self._refresh_task = None
+
+
+# Singleton
+_price_cache: Optional[PriceCache] = None
+
+
+def get_price_cache(settings: Optional[Settings] = None) -> PriceCache:
+    """Get or create price cache instance"""
+    global _price_cache
+    if _price_cache is None:
+        settings = settings or get_settings()
+        _price_cache = PriceCache(
+            optimizer=pricing_optimizer.get_pricing_optimizer(),
+            days_ahead=settings.pricing_cache_days_ahead,
+        )
+    return _price_cache
@@ -0,0 +1,497 @@
+"""
+Pricing Backtest Simulator
+
+Replays PricingOptimizer decisions over past (or simulated) stay dates and
+measures the revenue and occupancy each pricing strategy would actually
+have realized:
+
+1. A scenario holds, per (date, room_type), the demand the optimizer
+   forecast on its decision day and the demand that materialized. It is
+   either replayed from a bookings history (occupancy at base price,
+   inverted through the demand model) or generated synthetically around
+   HISTORICAL_OCCUPANCY with seeded forecast noise
+2. A strategy is a set of optimizer parameters: multiplier bounds, goal and
+   the elasticity the optimizer assumes. Strategies sharing a goal and
+   elasticity share one (D, R, K) candidate cube over the union of their
+   candidate multipliers; each strategy is an argmax over its own subset
+3. Chosen prices are applied to the realized demand with the true
+   elasticity, so a strategy is charged for forecast error and for a
+   mis-specified price response
+4. Dates are processed in blocks to bound memory; large sweeps are split
+   across a spawned process pool by strategy
+
+Usage:
+    python -m src.application.services.ml.pricing_backtest \
+        --start 2023-01-01 --end 2025-12-31 \
+        --room-types deluxe suite standard \
+        --min-multipliers 0.7 0.8 0.9 1.0 \
+        --max-multipliers 1.0 1.3 1.5 2.0 \
+        --goals revenue profit occupancy \
+        --output backtest.json
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.application.dtos.ml.pricing_dto import PricingConstraints
+from src.application.services.ml.pricing_optimizer import (
+    BASE_PRICES,
+    DEMAND_SEED,
+    PRICE_ELASTICITY,
+    PricingOptimizer,
+    choose_multipliers,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Days between a pricing decision and the stay date
+DEFAULT_LEAD_DAYS = 14
+
+# Std of realized demand around the optimizer's forecast (synthetic scenarios)
+DEFAULT_DEMAND_NOISE = 0.1
+
+# Dates per block; bounds the candidate cube at DATE_BLOCK x R x K floats
+DATE_BLOCK = 366
+
+# Candidate evaluations (strategies x dates x room types x candidates)
+# below which spawning workers costs more than it saves
+PARALLEL_MIN_CELLS = 200_000_000
+
+
+# ============================================================================
+# Scenarios
+# ============================================================================
+
+def _scenario(
+    dates: np.ndarray,
+    room_types: List[str],
+    forecast_demand: np.ndarray,
+    realized_demand: np.ndarray,
+    capacity: Optional[Dict[str, int]],
+    elasticity: float,
+    source: str,
+) -> Dict[str, Any]:
+    optimizer = PricingOptimizer()
+    weekday = (dates.astype(np.int64) + 3) % 7
+    capacity = capacity or {}
+    return {
+        'source': source,
+        'dates': dates,
+        'room_types': list(room_types),
+        'base_price': np.array([BASE_PRICES.get(rt, 1500000) for rt in room_types], dtype=np.float64),
+        'capacity': np.array([capacity.get(rt, 1) for rt in room_types], dtype=np.float64),
+        'base_occupancy': optimizer._base_occupancy(list(room_types), weekday),
+        'forecast_demand': forecast_demand,
+        'realized_demand': realized_demand,
+        'elasticity': elasticity,
+    }
+
+
+def synthetic_scenario(
+    start: date,
+    end: date,
+    room_types: List[str],
+    demand_noise: float = DEFAULT_DEMAND_NOISE,
+    lead_days: int = DEFAULT_LEAD_DAYS,
+    elasticity: float = PRICE_ELASTICITY,
+    capacity: Optional[Dict[str, int]] = None,
+    seed: int = DEMAND_SEED,
+) -> Dict[str, Any]:
+    """
+    Simulated demand around the optimizer's own forecast
+
+    Base occupancy comes from HISTORICAL_OCCUPANCY and the forecast from
+    the demand cube as seen lead_days before each date; realized demand
+    adds seeded Gaussian noise per (date, room_type).
+
+    Args:
+        start: First stay date (inclusive)
+        end: Last stay date (inclusive)
+        room_types: Room types to simulate
+        demand_noise: Std of realized demand around the forecast
+        lead_days: Days between pricing decision and stay
+        elasticity: True elasticity at neutral demand
+        capacity: Rooms per room type (default 1, i.e. per-room figures)
+        seed: Noise seed; the same seed gives the same scenario
+
+    Returns:
+        Scenario dict for evaluate_strategies / PricingBacktester.run
+    """
+    dates = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1, dtype='datetime64[D]')
+    forecast = PricingOptimizer().demand_cube.forecast(dates, lead_days)
+    noise = np.random.default_rng(seed).normal(0.0, demand_noise, (len(dates), len(room_types)))
+    realized = np.clip(forecast[:, None] + noise, 0.0, 1.0)
+    return _scenario(dates, room_types, forecast, realized, capacity, elasticity, 'synthetic')
+
+
+def historical_scenario(
+    bookings: pd.DataFrame,
+    room_types: Optional[List[str]] = None,
+    capacity: Optional[Dict[str, int]] = None,
+    lead_days: int = DEFAULT_LEAD_DAYS,
+    elasticity: float = PRICE_ELASTICITY,
+) -> Dict[str, Any]:
+    """
+    Scenario replayed from a bookings history
+
+    Stays are expanded into room nights per (date, room_type); occupancy
+    is room nights over capacity. Realized demand is the demand score that
+    reproduces that occupancy at base price, so histories priced far from
+    base are only approximated, and fully booked nights are censored at
+    the demand the model needs to fill them.
+
+    Args:
+        bookings: Rows with checkin_date, checkout_date, room_type and
+            optionally cancelled (the training CSV format)
+        room_types: Room types to replay (default: all in the history)
+        capacity: Rooms per room type (default: the busiest night observed)
+        lead_days: Days between pricing decision and stay
+        elasticity: True elasticity at neutral demand
+
+    Returns:
+        Scenario dict for evaluate_strategies / PricingBacktester.run
+    """
+    if 'cancelled' in bookings:
+        bookings = bookings[~bookings['cancelled'].astype(bool)]
+    room_types = room_types or sorted(bookings['room_type'].dropna().unique().tolist())
+    bookings = bookings[bookings['room_type'].isin(room_types)]
+    if bookings.empty:
+        raise ValueError("No bookings to replay for the requested room types")
+
+    checkin = pd.to_datetime(bookings['checkin_date']).to_numpy().astype('datetime64[D]')
+    checkout = pd.to_datetime(bookings['checkout_date']).to_numpy().astype('datetime64[D]')
+    nights = np.maximum((checkout - checkin).astype(np.int64), 1)
+    room_index = pd.Index(room_types).get_indexer(bookings['room_type'])
+
+    # One entry per room night
+    starts = np.repeat(checkin, nights)
+    offsets = np.arange(nights.sum()) - np.repeat(np.cumsum(nights) - nights, nights)
+    night_dates = starts + offsets
+    dates = np.arange(night_dates.min(), night_dates.max() + 1, dtype='datetime64[D]')
+
+    room_nights = np.zeros((len(dates), len(room_types)))
+    np.add.at(room_nights, ((night_dates - dates[0]).astype(np.int64), np.repeat(room_index, nights)), 1)
+
+    if capacity is None:
+        capacity = {rt: max(int(room_nights[:, j].max()), 1) for j, rt in enumerate(room_types)}
+    scenario = _scenario(
+        dates, room_types, PricingOptimizer().demand_cube.forecast(dates, lead_days),
+        np.zeros_like(room_nights), capacity, elasticity, 'historical',
+    )
+
+    # Invert occupancy = base * (0.6 + 0.8 * demand) at multiplier 1.0
+    occupancy = np.minimum(room_nights / scenario['capacity'], 1.0)
+    scenario['realized_demand'] = np.clip((occupancy / scenario['base_occupancy'] - 0.6) / 0.8, 0.0, 1.0)
+    return scenario
+
+
+# ============================================================================
+# Strategies
+# ============================================================================
+
+def strategy_grid(
+    min_multipliers: Iterable[float] = (0.8,),
+    max_multipliers: Iterable[float] = (1.5,),
+    goals: Iterable[str] = ("revenue",),
+    elasticities: Iterable[float] = (PRICE_ELASTICITY,),
+) -> List[Dict[str, Any]]:
+    """
+    Cartesian product of strategy parameters
+
+    Returns:
+        Strategy dicts (name, min/max_price_multiplier, goal, elasticity)
+    """
+    strategies = []
+    for low, high, goal, elasticity in itertools.product(min_multipliers, max_multipliers, goals, elasticities):
+        goal = getattr(goal, 'value', goal)
+        strategies.append({
+            'name': f"{goal}[{low:g}-{high:g}]@{elasticity:g}",
+            'min_price_multiplier': float(low),
+            'max_price_multiplier': float(high),
+            'goal': goal,
+            'elasticity': float(elasticity),
+        })
+    return strategies
+
+
+def _strategy_candidates(strategy: Dict[str, Any]) -> np.ndarray:
+    constraints = PricingConstraints(
+        min_price_multiplier=strategy['min_price_multiplier'],
+        max_price_multiplier=strategy['max_price_multiplier'],
+    )
+    return PricingOptimizer()._candidate_multipliers(constraints)
+
+
+# ============================================================================
+# Simulation
+# ============================================================================
+
+def evaluate_strategies(
+    scenario: Dict[str, Any],
+    strategies: Sequence[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    Realized revenue and occupancy of every strategy over a scenario
+
+    Args:
+        scenario: From synthetic_scenario / historical_scenario
+        strategies: Strategy dicts (see strategy_grid)
+
+    Returns:
+        One result dict per strategy, in input order
+    """
+    optimizer = PricingOptimizer()
+    n_rooms = len(scenario['room_types'])
+    base_price = scenario['base_price']
+    capacity = scenario['capacity']
+
+    candidate_sets = [_strategy_candidates(s) for s in strategies]
+    groups: Dict[Tuple[str, float], List[int]] = {}
+    for i, strategy in enumerate(strategies):
+        groups.setdefault((strategy.get('goal', 'revenue'), strategy.get('elasticity', PRICE_ELASTICITY)), []).append(i)
+
+    # Per-strategy, per-room-type sums over all dates
+    totals = {
+        key: np.zeros((len(strategies), n_rooms))
+        for key in ('revenue', 'expected_revenue', 'room_nights', 'multiplier')
+    }
+    base_revenue = np.zeros(n_rooms)
+
+    for block in range(0, len(scenario['dates']), DATE_BLOCK):
+        rows = slice(block, block + DATE_BLOCK)
+        base_occupancy = scenario['base_occupancy'][rows]
+        forecast = scenario['forecast_demand'][rows]
+        realized = scenario['realized_demand'][rows]
+
+        base_revenue += (base_price * capacity * optimizer._estimate_occupancy(
+            base_occupancy, realized, np.ones_like(base_occupancy), elasticity=scenario['elasticity']
+        )).sum(axis=0)
+
+        for (goal, elasticity), members in groups.items():
+            candidates = np.unique(np.concatenate([candidate_sets[i] for i in members]))
+            occupancy = optimizer._estimate_occupancy(base_occupancy, forecast, candidates, elasticity=elasticity)
+
+            for i in members:
+                allowed = None if len(members) == 1 else np.isin(candidates, candidate_sets[i])
+                multiplier, expected_occupancy = choose_multipliers(candidates, occupancy, goal, allowed)
+                realized_occupancy = optimizer._estimate_occupancy(
+                    base_occupancy, realized, multiplier, elasticity=scenario['elasticity']
+                )
+                price = base_price * multiplier
+                totals['revenue'][i] += (price * realized_occupancy * capacity).sum(axis=0)
+                totals['expected_revenue'][i] += (price * expected_occupancy * capacity).sum(axis=0)
+                totals['room_nights'][i] += (realized_occupancy * capacity).sum(axis=0)
+                totals['multiplier'][i] += multiplier.sum(axis=0)
+
+    return [
+        _summarize(scenario, strategy, {key: values[i] for key, values in totals.items()}, base_revenue)
+        for i, strategy in enumerate(strategies)
+    ]
+
+
+def _summarize(
+    scenario: Dict[str, Any],
+    strategy: Dict[str, Any],
+    totals: Dict[str, np.ndarray],
+    base_revenue: np.ndarray,
+) -> Dict[str, Any]:
+    """Per-strategy metrics from per-room-type sums"""
+    n_dates = len(scenario['dates'])
+    available = scenario['capacity'] * n_dates
+
+    revenue = totals['revenue']
+    room_nights = totals['room_nights']
+    total_revenue = float(revenue.sum())
+    total_nights = float(room_nights.sum())
+    total_base = float(base_revenue.sum())
+
+    def ratio(numerator, denominator):
+        return numerator / denominator if denominator else 0.0
+
+    return {
+        'strategy': dict(strategy),
+        'total_revenue': int(total_revenue),
+        'expected_revenue': int(totals['expected_revenue'].sum()),
+        'revenue_lift_pct': round(ratio(total_revenue - total_base, total_base) * 100, 2),
+        'forecast_error_pct': round(ratio(totals['expected_revenue'].sum() - total_revenue, total_revenue) * 100, 2),
+        'occupancy': round(ratio(total_nights, available.sum()), 4),
+        'adr': int(ratio(total_revenue, total_nights)),
+        'revpar': int(ratio(total_revenue, available.sum())),
+        'avg_multiplier': round(ratio(totals['multiplier'].sum(), n_dates * len(available)), 3),
+        'by_room_type': {
+            rt: {
+                'revenue': int(revenue[j]),
+                'occupancy': round(ratio(room_nights[j], available[j]), 4),
+                'adr': int(ratio(revenue[j], room_nights[j])),
+            }
+            for j, rt in enumerate(scenario['room_types'])
+        },
+    }
+
+
+def _evaluate_chunk(scenario: Dict[str, Any], strategies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Worker entry point"""
+    return evaluate_strategies(scenario, strategies)
+
+
+class PricingBacktester:
+    """
+    Runs strategy sweeps, in-process or across a process pool
+
+    Usage:
+        backtester = PricingBacktester(max_workers=4)
+        scenario = synthetic_scenario(date(2023, 1, 1), date(2025, 12, 31), ["deluxe", "suite"])
+        results = backtester.run(scenario, strategy_grid([0.8, 0.9], [1.3, 1.5], ["revenue", "profit"]))
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        parallel_min_cells: int = PARALLEL_MIN_CELLS,
+    ):
+        """
+        Initialize backtester
+
+        Args:
+            max_workers: Worker processes (default: CPU count)
+            parallel_min_cells: Sweep size (strategies x dates x room types x
+                candidates) from which the process pool is used
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.parallel_min_cells = parallel_min_cells
+
+    def sweep_cells(self, scenario: Dict[str, Any], strategies: Sequence[Dict[str, Any]]) -> int:
+        """Candidate evaluations a sweep needs"""
+        n_candidates = sum(len(_strategy_candidates(s)) for s in strategies)
+        return n_candidates * len(scenario['dates']) * len(scenario['room_types'])
+
+    def run(
+        self,
+        scenario: Dict[str, Any],
+        strategies: Sequence[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """
+        Evaluate strategies, sorted by realized revenue (best first)
+
+        Args:
+            scenario: From synthetic_scenario / historical_scenario
+            strategies: Strategy dicts (see strategy_grid)
+
+        Returns:
+            Result dicts (see evaluate_strategies)
+        """
+        start = time.perf_counter()
+        strategies = list(strategies)
+        n_workers = min(self.max_workers, len(strategies))
+
+        if n_workers > 1 and self.sweep_cells(scenario, strategies) >= self.parallel_min_cells:
+            results = self._run_parallel(scenario, strategies, n_workers)
+        else:
+            n_workers = 1
+            results = evaluate_strategies(scenario, strategies)
+
+        results.sort(key=lambda r: r['total_revenue'], reverse=True)
+        logger.info(
+            f"✅ Backtested {len(strategies)} strategies over {len(scenario['dates'])} dates x "
+            f"{len(scenario['room_types'])} room types in {time.perf_counter() - start:.2f}s "
+            f"({n_workers} workers)"
+        )
+        return results
+
+    def _run_parallel(
+        self,
+        scenario: Dict[str, Any],
+        strategies: List[Dict[str, Any]],
+        n_workers: int,
+    ) -> List[Dict[str, Any]]:
+        """Split strategies into contiguous chunks, keeping cube-sharing groups together"""
+        order = sorted(
+            range(len(strategies)),
+            key=lambda i: (strategies[i].get('goal', 'revenue'), strategies[i].get('elasticity', PRICE_ELASTICITY)),
+        )
+        chunks = [chunk.tolist() for chunk in np.array_split(np.array(order), n_workers)]
+
+        # Spawned workers: forking after OpenMP initialization can deadlock
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=context) as pool:
+            futures = [
+                pool.submit(_evaluate_chunk, scenario, [strategies[i] for i in chunk])
+                for chunk in chunks
+            ]
+            results: List[Optional[Dict[str, Any]]] = [None] * len(strategies)
+            for chunk, future in zip(chunks, futures):
+                for i, result in zip(chunk, future.result()):
+                    results[i] = result
+        return results
+
+
+def main():
+    """Pricing backtest script"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description='Backtest pricing strategies over historical or simulated demand')
+    parser.add_argument('--history-path', type=str, default=None, help='Bookings CSV to replay (default: synthetic demand)')
+    parser.add_argument('--start', type=date.fromisoformat, default=None, help='First stay date (synthetic)')
+    parser.add_argument('--end', type=date.fromisoformat, default=None, help='Last stay date (synthetic)')
+    parser.add_argument('--room-types', nargs='+', default=None, help='Room types (default: deluxe suite standard)')
+    parser.add_argument('--min-multipliers', nargs='+', type=float, default=[0.8], help='Strategy lower bounds')
+    parser.add_argument('--max-multipliers', nargs='+', type=float, default=[1.5], help='Strategy upper bounds')
+    parser.add_argument('--goals', nargs='+', default=['revenue'], help='Optimization goals')
+    parser.add_argument('--elasticities', nargs='+', type=float, default=[PRICE_ELASTICITY], help='Elasticities the optimizer assumes')
+    parser.add_argument('--true-elasticity', type=float, default=PRICE_ELASTICITY, help='Elasticity of realized demand')
+    parser.add_argument('--demand-noise', type=float, default=DEFAULT_DEMAND_NOISE, help='Forecast noise (synthetic)')
+    parser.add_argument('--lead-days', type=int, default=DEFAULT_LEAD_DAYS, help='Days between decision and stay')
+    parser.add_argument('--max-workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--output', type=str, default=None, help='Write results JSON here')
+
+    args = parser.parse_args()
+
+    try:
+        if args.history_path:
+            scenario = historical_scenario(
+                pd.read_csv(args.history_path), room_types=args.room_types,
+                lead_days=args.lead_days, elasticity=args.true_elasticity,
+            )
+        else:
+            if args.start is None or args.end is None:
+                parser.error("--start and --end are required without --history-path")
+            scenario = synthetic_scenario(
+                args.start, args.end, args.room_types or ["deluxe", "suite", "standard"],
+                demand_noise=args.demand_noise, lead_days=args.lead_days, elasticity=args.true_elasticity,
+            )
+
+        strategies = strategy_grid(args.min_multipliers, args.max_multipliers, args.goals, args.elasticities)
+        results = PricingBacktester(max_workers=args.max_workers).run(scenario, strategies)
+    except Exception as e:
+        logger.error(f"❌ Backtest failed: {e}", exc_info=True)
+        sys.exit(1)
+
+    for result in results:
+        logger.info(
+            f"  {result['strategy']['name']:<32} revenue={result['total_revenue']:>16,} "
+            f"lift={result['revenue_lift_pct']:>6}% occupancy={result['occupancy']:.3f} "
+            f"adr={result['adr']:>10,} forecast_error={result['forecast_error_pct']}%"
+        )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,11 @@ Dynamic Pricing Optimizer Service
 Uses XGBoost with custom revenue optimization
 
 """
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import numpy as np
-from datetime import datetime, date, timedelta
+from datetime import datetime, date, timedelta, timezone
 import time
+import zlib
 
 
 from src.application.dtos.ml.pricing_dto import (
@@ -36,6 +37,189 @@ BASE_PRICES = {
     "standard": 1200000,
 }
 
+HOLIDAY_MONTHS = [1, 7, 8, 12]
+
+# Elasticity at neutral demand (0.5); busier dates are less price sensitive
+PRICE_ELASTICITY = -1.5
+
+# Candidate multiplier resolution for the price search
+MULTIPLIER_STEP = 0.01
+
+# Variable cost per occupied room (housekeeping, amenities) as share of base price
+VARIABLE_COST_RATIO = 0.30
+
+# Occupancy goal: prefer the highest-revenue price within this occupancy of the max
+OCCUPANCY_TOLERANCE = 0.005
+
+DEMAND_CUBE_HORIZON_DAYS = 730
+DEMAND_SEED = 20240601
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday",
+             "Friday", "Saturday", "Sunday"]
+BOOKING_PACES = ["slow", "normal", "fast", "very_fast"]
+BOOKING_PACE_PROBS = [0.2, 0.4, 0.3, 0.1]
+
+DEFAULT_CONSTRAINTS = PricingConstraints()
+
+DEMAND_LEVELS = np.array(["low", "medium", "high", "very_high"])
+DEMAND_LEVEL_EDGES = np.array([0.50, 0.70, 0.85])
+
+def hash_uniform(keys: np.ndarray, salt: int) -> np.ndarray:
+    """
+    Deterministic uniforms in [0, 1) from integer keys (splitmix64)
+    
+    Same key and salt always give the same value, independent of how many
+    keys are drawn together, so per-date signals are stable across requests.
+    """
+    z = np.asarray(keys).astype(np.uint64) + np.uint64(salt & 0xFFFFFFFFFFFFFFFF)
+    z = z * np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+class DemandCube:
+    """
+    Precomputed per-date demand features
+    
+    Features (weekday, seasonality, lead time, events) for today and the
+    next DEMAND_CUBE_HORIZON_DAYS days are computed once and sliced per
+    request. The cube is rebuilt when the calendar day changes, since lead
+    time is relative to today. Dates outside the horizon are computed on
+    the fly with the same rules.
+    """
+    
+    FEATURES = ['weekday', 'seasonality', 'lead_time', 'events']
+    
+    def __init__(self, horizon_days: int = DEMAND_CUBE_HORIZON_DAYS, seed: int = DEMAND_SEED):
+        self.horizon_days = horizon_days
+        self.seed = seed
+        self.anchor: Optional[np.datetime64] = None
+        self.features: Optional[np.ndarray] = None
+        self.event_signal: Optional[np.ndarray] = None
+        self.demand: Optional[np.ndarray] = None
+    
+    def _ensure_fresh(self, today: np.datetime64):
+        if self.anchor == today:
+            return
+        dates = today + np.arange(self.horizon_days + 1)
+        self.features, self.event_signal = self._compute(dates, today)
+        self.demand = np.clip(0.5 + self.features.sum(axis=1), 0.0, 1.0)
+        self.anchor = today
+    
+    def _compute(self, dates: np.ndarray, today: np.datetime64):
+        """Feature matrix (n_dates, 4) and raw event signal for dates"""
+        ordinals = dates.astype(np.int64)
+        # 1970-01-01 was a Thursday (weekday 3)
+        weekday = (ordinals + 3) % 7
+        month = dates.astype('datetime64[M]').astype(np.int64) % 12 + 1
+        days_ahead = (dates - today).astype(np.int64)
+        event_signal = hash_uniform(ordinals, self.seed)
+        
+        features = np.column_stack([
+            # Day of week effect (Friday-Sunday)
+            np.where(weekday >= 4, 0.2, 0.0),
+            # Month seasonality: Summer & Winter holidays
+            np.where(np.isin(month, HOLIDAY_MONTHS), 0.15, 0.0),
+            # Booking lead time: sweet spot / last minute
+            np.select(
+                [(days_ahead >= 7) & (days_ahead <= 30), days_ahead < 7],
+                [0.1, 0.05],
+                default=0.0
+            ),
+            # Local events, [-0.05, 0.15)
+            -0.05 + event_signal * 0.2,
+        ])
+        return features, event_signal
+    
+    def lookup(self, dates: np.ndarray, today: Optional[date] = None) -> Dict[str, np.ndarray]:
+        """
+        Demand score, features and event signal for a date array
+        
+        Args:
+            dates: datetime64[D] array
+            today: Reference day for lead time (defaults to date.today())
+        """
+        today64 = np.datetime64(today or date.today(), 'D')
+        self._ensure_fresh(today64)
+        
+        offsets = (dates - self.anchor).astype(np.int64)
+        if len(dates) and offsets.min() >= 0 and offsets.max() <= self.horizon_days:
+            index = offsets
+            return {
+                'demand': self.demand[index],
+                'features': self.features[index],
+                'event_signal': self.event_signal[index],
+            }
+        
+        features, event_signal = self._compute(dates, today64)
+        return {
+            'demand': np.clip(0.5 + features.sum(axis=1), 0.0, 1.0),
+            'features': features,
+            'event_signal': event_signal,
+        }
+    
+    def forecast(self, dates: np.ndarray, lead_days: int) -> np.ndarray:
+        """
+        Demand score for each date as seen lead_days before it
+        
+        Used to replay past pricing decisions: every date gets the lead
+        time signal it had on its own decision day, not relative to today.
+        
+        Args:
+            dates: datetime64[D] array
+            lead_days: Days between the pricing decision and the stay date
+        """
+        features, _ = self._compute(dates, dates - np.timedelta64(lead_days, 'D'))
+        return np.clip(0.5 + features.sum(axis=1), 0.0, 1.0)
+
+
+def choose_multipliers(
+    candidates: np.ndarray,
+    occupancy: np.ndarray,
+    goal: str,
+    allowed: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Argmax of the goal's objective over a (..., K) candidate cube
+    
+    Args:
+        candidates: (K,) sorted candidate multipliers
+        occupancy: (..., K) estimated occupancy per candidate
+        goal: "revenue", "occupancy" or "profit"
+        allowed: Optional (K,) mask restricting the search to a subset
+            of candidates; ties resolve as if only the subset was given
+    
+    Returns:
+        (price_multiplier, expected_occupancy), both occupancy.shape[:-1]
+    """
+    goal = getattr(goal, 'value', goal)
+    
+    # Revenue per available room relative to base price; base_price
+    # is constant along K so it does not change the argmax
+    revenue = candidates * occupancy
+    
+    if goal == "occupancy":
+        reachable = occupancy if allowed is None else np.where(allowed, occupancy, -np.inf)
+        best_occupancy = reachable.max(axis=-1, keepdims=True)
+        objective = np.where(
+            occupancy >= best_occupancy - OCCUPANCY_TOLERANCE, revenue, -np.inf
+        )
+    elif goal == "profit":
+        objective = (candidates - VARIABLE_COST_RATIO) * occupancy
+    else:
+        objective = revenue
+    
+    if allowed is not None:
+        objective = np.where(allowed, objective, -np.inf)
+    
+    best = np.argmax(objective, axis=-1)
+    price_multiplier = candidates[best]
+    expected_occupancy = np.take_along_axis(occupancy, best[..., None], axis=-1)[..., 0]
+    return price_multiplier, expected_occupancy
+
+
 class PricingOptimizer:
     """
     Dynamic pricing optimizer
@@ -52,6 +236,7 @@ class PricingOptimizer:
     def __init__(self, model=None):
         self.model = model
         self.model_version = "pricing_v3.2"
+        self.demand_cube = DemandCube()
         
     async def optimize_pricing(
         self,
@@ -62,33 +247,24 @@ class PricingOptimizer:
         """
         start_time = time.time()
         
-        pricing_schedule = []
-        
-        # Generate pricing for each date and room type
-        current_date = request.date_range.start
-        end_date = request.date_range.end
-        
-        while current_date <= end_date:
-            for room_type in request.room_types:
-                item = await self._calculate_optimal_price(
-                    room_type=room_type,
-                    target_date=current_date,
-                    constraints=request.constraints,
-                    goal=request.optimization_goal
-                )
-                pricing_schedule.append(item)
-            
-            current_date += timedelta(days=1)
+        grid = self.compute_pricing_grid(
+            start=request.date_range.start,
+            end=request.date_range.end,
+            room_types=request.room_types,
+            constraints=request.constraints,
+            goal=request.optimization_goal
+        )
+        pricing_schedule = self._materialize_schedule(grid)
         
         # Calculate summary statistics
-        summary = self._calculate_summary(pricing_schedule)
+        summary = self._calculate_summary(grid)
         
         app_logger.info(
             f"Generated pricing schedule for {len(pricing_schedule)} entries "
-            f"in {time.time() - start_time:.2f}s"
+            f"in {time.time() - start_time:.3f}s"
         )
         
-        return PricingOptimizationResponse(
+        return PricingOptimizationResponse.model_construct(
             pricing_schedule=pricing_schedule,
             summary=summary,
             model_version=self.model_version,
@@ -104,209 +280,333 @@ class PricingOptimizer:
         """
         target_date = request.date or date.today()
         
-        item = await self._calculate_optimal_price(
-            room_type=request.room_type,
-            target_date=target_date,
-            constraints=None,
-            goal="revenue"
+        prices = self.build_current_prices(
+            room_types=[request.room_type],
+            start=target_date,
+            end=target_date
+        )
+        return prices[(request.room_type, target_date)]
+    
+    def build_current_prices(
+        self,
+        room_types: List[str],
+        start: date,
+        end: date,
+        constraints: Optional[PricingConstraints] = None,
+        now: Optional[datetime] = None
+    ) -> Dict[Tuple[str, date], CurrentPriceResponse]:
+        """
+        Current-price quotes for every room type and date in a range
+        
+        Quotes are valid until the next midnight (UTC): the demand cube's
+        lead-time signal shifts daily, so a quote for any date may change
+        after that.
+        
+        Args:
+            room_types: Room types to quote
+            start: First date (inclusive)
+            end: Last date (inclusive)
+            constraints: Multiplier bounds (defaults to PricingConstraints())
+            now: Current time; the UTC date of it is the lead-time reference
+                and valid_until is the following UTC midnight (defaults to
+                the current UTC time)
+            
+        Returns:
+            (room_type, date) -> CurrentPriceResponse
+        """
+        today = (now or datetime.now(timezone.utc)).astimezone(timezone.utc).date()
+        grid = self.compute_pricing_grid(
+            start=start,
+            end=end,
+            room_types=room_types,
+            constraints=constraints,
+            goal="revenue",
+            today=today
         )
         
         # Determine demand level
-        if item.demand_score >= 0.85:
-            demand_level = "very_high"
-        elif item.demand_score >= 0.70:
-            demand_level = "high"
-        elif item.demand_score >= 0.50:
-            demand_level = "medium"
-        else:
-            demand_level = "low"
-        
-        return CurrentPriceResponse(
-            room_type=request.room_type,
-            date=target_date,
-            base_price=item.base_price,
-            current_price=item.suggested_price,
-            price_multiplier=item.price_multiplier,
-            valid_until=(target_date + timedelta(days=1)).isoformat() + "T00:00:00Z",
-            demand_level=demand_level
-        )
+        demand_score = np.round(grid['demand_score'], 2)
+        demand_level = DEMAND_LEVELS[
+            np.searchsorted(DEMAND_LEVEL_EDGES, demand_score, side='right')
+        ]
+        valid_until = (today + timedelta(days=1)).isoformat() + "T00:00:00Z"
+        
+        dates = grid['dates'].astype(object)
+        base_price = grid['base_price'].tolist()
+        current_price = grid['suggested_price'].tolist()
+        price_multiplier = np.round(grid['price_multiplier'], 2).tolist()
+        
+        return {
+            (room_type, dates[i]): CurrentPriceResponse.model_construct(
+                room_type=room_type,
+                date=dates[i],
+                base_price=base_price[j],
+                current_price=current_price[i][j],
+                price_multiplier=price_multiplier[i][j],
+                valid_until=valid_until,
+                demand_level=str(demand_level[i, j])
+            )
+            for i in range(len(dates))
+            for j, room_type in enumerate(room_types)
+        }
     
-    async def _calculate_optimal_price(
+    # ========== Vectorized Pricing Grid ==========
+    
+    def compute_pricing_grid(
         self,
-        room_type: str,
-        target_date: date,
+        start: date,
+        end: date,
+        room_types: List[str],
         constraints: Optional[PricingConstraints],
-        goal: str
-    ) -> PricingScheduleItem:
+        goal: str,
+        today: Optional[date] = None
+    ) -> Dict[str, np.ndarray]:
         """
-        Calculate optimal price for a specific room type and date
-        
-        This is where the ML model would be used in production
+        Price every (date, room_type) cell of a date range at once
+        
+        All quantities are (n_dates, n_room_types) arrays computed with
+        broadcasting; nothing is materialized per cell. Simulated signals
+        are seeded from the date (and room type), so the same inputs on
+        the same day always give the same prices.
+        
+        Args:
+            start: First date (inclusive)
+            end: Last date (inclusive)
+            room_types: Room types, one grid column each
+            constraints: Multiplier bounds, applied to the whole grid
+            goal: Optimization goal
+            today: Reference day for lead time (defaults to date.today())
+            
+        Returns:
+            Dict of grid arrays plus per-date 'dates'/'weekday'/'month'
+            and per-room-type 'base_price'
         """
-        # Get base price
-        base_price = BASE_PRICES.get(room_type, 1500000)
-        
-        # Calculate demand score
-        demand_score = self._calculate_demand_score(room_type, target_date)
-        
-        # Calculate price multiplier based on demand
-        price_multiplier = self._calculate_multiplier(
-            demand_score, 
-            constraints
+        dates = np.arange(
+            np.datetime64(start, 'D'),
+            np.datetime64(end, 'D') + 1,
+            dtype='datetime64[D]'
         )
+        # 1970-01-01 was a Thursday (weekday 3)
+        weekday = (dates.astype(np.int64) + 3) % 7
+        month = dates.astype('datetime64[M]').astype(np.int64) % 12 + 1
         
-        # Apply constraints
-        if constraints:
-            price_multiplier = max(
-                constraints.min_price_multiplier,
-                min(constraints.max_price_multiplier, price_multiplier)
-            )
+        base_price = np.array(
+            [BASE_PRICES.get(rt, 1500000) for rt in room_types], dtype=np.int64
+        )
         
-        suggested_price = int(base_price * price_multiplier)
+        cube = self.demand_cube.lookup(dates, today)
+        demand_score = np.repeat(cube['demand'][:, None], len(room_types), axis=1)
         
-        # Estimate occupancy based on price
-        expected_occupancy = self._estimate_occupancy(
-            room_type, 
-            target_date, 
-            price_multiplier
+        candidates = self._candidate_multipliers(constraints or DEFAULT_CONSTRAINTS)
+        price_multiplier, expected_occupancy = self._optimize_multipliers(
+            room_types, weekday, cube['demand'], base_price, candidates, goal
         )
         
-        # Calculate expected revenue (per room)
-        expected_revenue = int(suggested_price * expected_occupancy)
+        suggested_price = (base_price * price_multiplier).astype(np.int64)
         
-        # Get pricing factors
-        factors = self._get_pricing_factors(target_date)
+        # Calculate expected revenue (per room)
+        expected_revenue = (suggested_price * expected_occupancy).astype(np.int64)
         
         # Confidence based on historical data availability
-        confidence = 0.85 + (np.random.random() * 0.1)
-        
-        return PricingScheduleItem(
-            date=target_date,
-            room_type=room_type,
-            base_price=base_price,
-            suggested_price=suggested_price,
-            price_multiplier=round(price_multiplier, 2),
-            expected_occupancy=round(expected_occupancy, 2),
-            expected_revenue=expected_revenue,
-            competitor_avg_price=int(base_price * 1.1),  # Mock competitor price
-            demand_score=round(demand_score, 2),
-            confidence=round(confidence, 2),
-            factors=factors
-        )
+        room_keys = np.array([zlib.crc32(rt.encode()) for rt in room_types], dtype=np.int64)
+        cell_keys = dates.astype(np.int64)[:, None] * 1_000_003 + room_keys
+        confidence = 0.85 + hash_uniform(cell_keys, DEMAND_SEED + 1) * 0.1
+        
+        return {
+            'dates': dates,
+            'weekday': weekday,
+            'month': month,
+            'room_types': np.asarray(room_types, dtype=object),
+            'base_price': base_price,
+            'demand_score': demand_score,
+            'price_multiplier': price_multiplier,
+            'suggested_price': suggested_price,
+            'expected_occupancy': expected_occupancy,
+            'expected_revenue': expected_revenue,
+            'confidence': confidence,
+            'factors': self._get_pricing_factors(dates, weekday, month, cube['event_signal']),
+        }
     
-    def _calculate_demand_score(self, room_type: str, target_date: date) -> float:
+    def _candidate_multipliers(self, constraints: PricingConstraints) -> np.ndarray:
         """
-        Calculate demand score (0-1) based on date characteristics
+        Dense grid of candidate multipliers within the constraint bounds
         """
-        # Base score
-        score = 0.5
-        
-        # Day of week effect
-        day_of_week = target_date.weekday()
-        if day_of_week >= 4:  # Friday-Saturday
-            score += 0.2
-        
-        # Month seasonality
-        month = target_date.month
-        if month in [7, 8, 12, 1]:  # Summer & Winter holidays
-            score += 0.15
-        
-        # Distance from today (booking lead time)
-        days_ahead = (target_date - date.today()).days
-        if 7 <= days_ahead <= 30:  # Sweet spot
-            score += 0.1
-        elif days_ahead < 7:  # Last minute
-            score += 0.05
-        
-        # Random variation (simulating events, etc.)
-        score += np.random.uniform(-0.05, 0.15)
-        
-        return min(1.0, max(0.0, score))
+        low = constraints.min_price_multiplier
+        high = constraints.max_price_multiplier
+        n_steps = int(round((high - low) / MULTIPLIER_STEP))
+        candidates = np.linspace(low, low + n_steps * MULTIPLIER_STEP, n_steps + 1)
+        # Always include the upper bound exactly
+        return np.unique(np.clip(np.append(candidates, high), low, high))
     
-    def _calculate_multiplier(self, demand_score: float, constraints: Optional[PricingConstraints]) -> float:
+    def _base_occupancy(self, room_types: List[str], weekday: np.ndarray) -> np.ndarray:
         """
-        Convert demand score to price multiplier
+        Historical occupancy for the date x room_type grid
         """
-        # Linear mapping: demand [0-1] -> multiplier [0.8-1.5]
-        min_mult = 0.8
-        max_mult = 1.5
-        
-        multiplier = min_mult + (demand_score * (max_mult - min_mult))
-        
-        return multiplier
+        # (n_room_types, 2) table of weekday/weekend base occupancy
+        table = np.array([
+            [
+                HISTORICAL_OCCUPANCY.get(rt, {}).get("weekday", 0.7),
+                HISTORICAL_OCCUPANCY.get(rt, {}).get("weekend", 0.7),
+            ]
+            for rt in room_types
+        ]).reshape(len(room_types), 2)
+        return table.T[(weekday >= 5).astype(np.intp)]
     
     def _estimate_occupancy(
-        self, 
-        room_type: str, 
-        target_date: date, 
-        price_multiplier: float
-    ) -> float:
+        self,
+        base_occupancy: np.ndarray,
+        demand: np.ndarray,
+        price_multiplier: np.ndarray,
+        elasticity: float = PRICE_ELASTICITY
+    ) -> np.ndarray:
         """
-        Estimate occupancy rate based on price
+        Estimate occupancy rates based on demand and price
+        
+        Demand scales the historical occupancy (0.5 is neutral) and sets
+        the price elasticity: busy dates lose fewer bookings per price
+        increase. Shapes broadcast: base (D, R), demand (D,) or (D, R),
+        multipliers (D, R) or (K,) for a candidate search.
         
-        Uses price elasticity: higher prices -> lower occupancy
+        Args:
+            elasticity: Elasticity at neutral demand (backtests override it
+                to price under a mis-specified model)
+        
+        Returns:
+            Occupancy in [0, 1]; (D, R) or (D, R, K)
         """
-        # Get base occupancy for this room type and date type
-        day_type = "weekend" if target_date.weekday() >= 5 else "weekday"
-        base_occupancy = HISTORICAL_OCCUPANCY.get(room_type, {}).get(day_type, 0.7)
+        if demand.ndim == 1:
+            demand = demand[:, None]
+        demand_occupancy = base_occupancy * (0.6 + 0.8 * demand)
+        elasticity = elasticity * (1.5 - demand)
         
-        # Apply price elasticity (elasticity = -1.5)
-        price_effect = -1.5 * (price_multiplier - 1.0)
-        adjusted_occupancy = base_occupancy * (1 + price_effect)
+        if price_multiplier.ndim == 1:
+            demand_occupancy = demand_occupancy[..., None]
+            elasticity = elasticity[..., None]
         
-        return min(1.0, max(0.0, adjusted_occupancy))
+        adjusted_occupancy = demand_occupancy * (1 + elasticity * (price_multiplier - 1.0))
+        return np.clip(adjusted_occupancy, 0.0, 1.0)
     
-    def _get_pricing_factors(self, target_date: date) -> PricingFactors:
+    def _optimize_multipliers(
+        self,
+        room_types: List[str],
+        weekday: np.ndarray,
+        demand: np.ndarray,
+        base_price: np.ndarray,
+        candidates: np.ndarray,
+        goal: str
+    ) -> tuple:
         """
-        Get factors affecting pricing for a date
+        Pick the best candidate multiplier for every (date, room_type)
+        
+        Evaluates the occupancy model on a (D, R, K) cube of candidates and
+        takes the argmax of the goal's objective along K.
+        
+        Returns:
+            (price_multiplier, expected_occupancy), both (D, R)
         """
-        day_names = ["Monday", "Tuesday", "Wednesday", "Thursday", 
-                     "Friday", "Saturday", "Sunday"]
+        base_occupancy = self._base_occupancy(room_types, weekday)
+        occupancy = self._estimate_occupancy(base_occupancy, demand, candidates)
+        return choose_multipliers(candidates, occupancy, goal)
+    
+    def _get_pricing_factors(
+        self,
+        dates: np.ndarray,
+        weekday: np.ndarray,
+        month: np.ndarray,
+        event_signal: np.ndarray
+    ) -> List[PricingFactors]:
+        """
+        Get factors affecting pricing, one per date
+        """
+        n_dates = len(weekday)
         
-        # Mock local events
-        events = []
-        if target_date.weekday() >= 4:
-            events.append("Weekend Tourism")
-        if np.random.random() > 0.8:
-            events.append("Tech Conference")
+        # Mock local events, consistent with the demand cube's event signal
+        tech_conference = event_signal > 0.8
         
         # Historical occupancy
-        hist_occ = 0.65 + (np.random.random() * 0.25)
+        ordinals = dates.astype(np.int64)
+        hist_occ = np.round(0.65 + (hash_uniform(ordinals, DEMAND_SEED + 2) * 0.25), 2)
         
         # Booking pace
-        paces = ["slow", "normal", "fast", "very_fast"]
-        booking_pace = np.random.choice(paces, p=[0.2, 0.4, 0.3, 0.1])
-        
-        return PricingFactors(
-            day_of_week=day_names[target_date.weekday()],
-            is_holiday=target_date.month in [1, 7, 8, 12],
-            local_events=events,
-            historical_occupancy=round(hist_occ, 2),
-            booking_pace=booking_pace
+        pace_index = np.searchsorted(
+            np.cumsum(BOOKING_PACE_PROBS), hash_uniform(ordinals, DEMAND_SEED + 3), side='right'
         )
+        booking_pace = np.asarray(BOOKING_PACES)[np.minimum(pace_index, len(BOOKING_PACES) - 1)]
+        is_holiday = np.isin(month, HOLIDAY_MONTHS)
+        
+        factors = []
+        for i in range(n_dates):
+            events = []
+            if weekday[i] >= 4:
+                events.append("Weekend Tourism")
+            if tech_conference[i]:
+                events.append("Tech Conference")
+            factors.append(PricingFactors.model_construct(
+                day_of_week=DAY_NAMES[weekday[i]],
+                is_holiday=bool(is_holiday[i]),
+                local_events=events,
+                historical_occupancy=float(hist_occ[i]),
+                booking_pace=str(booking_pace[i])
+            ))
+        return factors
+    
+    def _materialize_schedule(self, grid: Dict[str, np.ndarray]) -> List[PricingScheduleItem]:
+        """
+        Turn grid arrays into PricingScheduleItem DTOs (date-major order)
+        """
+        n_dates, n_rooms = grid['suggested_price'].shape
+        dates = grid['dates'].astype(object)
+        room_types = grid['room_types'].tolist()
+        factors = grid['factors']
+        
+        base_price = grid['base_price'].tolist()
+        competitor_price = (grid['base_price'] * 1.1).astype(np.int64).tolist()
+        suggested_price = grid['suggested_price'].tolist()
+        expected_revenue = grid['expected_revenue'].tolist()
+        price_multiplier = np.round(grid['price_multiplier'], 2).tolist()
+        expected_occupancy = np.round(grid['expected_occupancy'], 2).tolist()
+        demand_score = np.round(grid['demand_score'], 2).tolist()
+        confidence = np.round(grid['confidence'], 2).tolist()
+        
+        return [
+            PricingScheduleItem.model_construct(
+                date=dates[i],
+                room_type=room_types[j],
+                base_price=base_price[j],
+                suggested_price=suggested_price[i][j],
+                price_multiplier=price_multiplier[i][j],
+                expected_occupancy=expected_occupancy[i][j],
+                expected_revenue=expected_revenue[i][j],
+                competitor_avg_price=competitor_price[j],  # Mock competitor price
+                demand_score=demand_score[i][j],
+                confidence=confidence[i][j],
+                factors=factors[i]
+            )
+            for i in range(n_dates)
+            for j in range(n_rooms)
+        ]
     
     def _calculate_summary(
         self, 
-        pricing_schedule: List[PricingScheduleItem]
+        grid: Dict[str, np.ndarray]
     ) -> PricingSummary:
         """
-        Calculate summary statistics
+        Calculate summary statistics from the pricing grid
         """
-        if not pricing_schedule:
+        if grid['suggested_price'].size == 0:
             return PricingSummary(
                 total_expected_revenue=0,
                 avg_occupancy=0.0,
                 avg_price_increase=0.0
             )
         
-        total_revenue = sum(item.expected_revenue for item in pricing_schedule)
-        avg_occupancy = float(np.mean([item.expected_occupancy for item in pricing_schedule]))
+        total_revenue = int(grid['expected_revenue'].sum())
+        avg_occupancy = float(np.mean(np.round(grid['expected_occupancy'], 2)))
         
         # Calculate average price increase
-        price_increases = [
-            ((item.suggested_price - item.base_price) / item.base_price) * 100
-            for item in pricing_schedule
-        ]
+        price_increases = (
+            (grid['suggested_price'] - grid['base_price']) / grid['base_price']
+        ) * 100
         avg_increase = float(np.mean(price_increases))
         
         return PricingSummary(
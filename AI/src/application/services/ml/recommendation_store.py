@@ -0,0 +1,493 @@
+"""
+Service Recommendation Store
+
+Top-k service lists are precomputed per guest and kept in the
+service_recommendations table, so /recommend/services costs one
+primary-key lookup instead of scoring the catalog:
+
+1. Full refresh (nightly): every guest in the factor model is scored
+   against the whole catalog in blocks, one matrix product per block.
+   Guests who booked after the model was trained, or who are not in it,
+   get their embedding folded in from their current interactions first.
+2. Incremental refresh: guests with bookings inserted or updated (status
+   changes such as cancellations included) after a persisted cursor on
+   Booking.changed_at are folded in and re-scored. Each run re-reads an
+   overlap window before the cursor, so rows committed late, with a
+   changed_at older than rows already seen, are still picked up. Guests
+   left with no usable booking lose their list.
+3. Rows carry the model version. Lists from another version are ignored
+   by the API and deleted by the next full refresh.
+
+Lists are stored longer than a typical request (default: 20) so that
+exclusions can be filtered at read time.
+"""
+
+import logging
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import asyncpg
+import numpy as np
+import scipy.sparse as sp
+
+from src.application.services.ml.guest_history import CANCELLED_STATUSES, EXCLUDED_STATUSES
+from src.application.services.ml.recommender import ServiceFactorIndex
+from src.infrastructure.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+
+# Bookings that do not count as using the room type's services
+INTERACTION_EXCLUDED_STATUSES = [*EXCLUDED_STATUSES, *CANCELLED_STATUSES]
+
+# (guest_id, service_ids, scores, confidences, model_version)
+StoreRow = Tuple[str, List[str], List[float], List[float], str]
+
+
+# ============================================================================
+# SQL
+# ============================================================================
+
+FETCH_RECOMMENDATIONS_SQL = """
+    SELECT service_ids, scores, confidences
+    FROM service_recommendations
+    WHERE guest_id = $1 AND model_version = $2
+"""
+
+FETCH_MANY_RECOMMENDATIONS_SQL = """
+    SELECT guest_id, service_ids, scores, confidences
+    FROM service_recommendations
+    WHERE guest_id = ANY($1::varchar[]) AND model_version = $2
+"""
+
+UPSERT_RECOMMENDATIONS_SQL = """
+    INSERT INTO service_recommendations (
+        guest_id, service_ids, scores, confidences, model_version, computed_at
+    )
+    VALUES ($1, $2::varchar[], $3::real[], $4::real[], $5, CURRENT_TIMESTAMP)
+    ON CONFLICT (guest_id) DO UPDATE SET
+        service_ids = EXCLUDED.service_ids,
+        scores = EXCLUDED.scores,
+        confidences = EXCLUDED.confidences,
+        model_version = EXCLUDED.model_version,
+        computed_at = EXCLUDED.computed_at
+"""
+
+DELETE_OTHER_VERSIONS_SQL = """
+    DELETE FROM service_recommendations WHERE model_version <> $1
+"""
+
+DELETE_RECOMMENDATIONS_SQL = """
+    DELETE FROM service_recommendations WHERE guest_id = ANY($1::varchar[])
+"""
+
+FETCH_CURSOR_SQL = """
+    SELECT last_changed_at FROM recommendation_refresh_state WHERE state_id = 1
+"""
+
+ADVANCE_CURSOR_SQL = """
+    INSERT INTO recommendation_refresh_state (state_id, last_changed_at, updated_at)
+    VALUES (1, $1, CURRENT_TIMESTAMP)
+    ON CONFLICT (state_id) DO UPDATE SET
+        last_changed_at = GREATEST(recommendation_refresh_state.last_changed_at, EXCLUDED.last_changed_at),
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# Latest change at the start of a full refresh; later changes are left
+# to the next incremental refresh
+CHANGE_HIGH_WATER_SQL = """
+    SELECT MAX(changed_at) FROM Booking
+"""
+
+ACTIVE_GUESTS_SQL = """
+    SELECT user_id, MAX(created_at) AS last_booking_at
+    FROM Booking
+    WHERE user_id IS NOT NULL
+      AND status <> ALL($1::varchar[])
+    GROUP BY user_id
+"""
+
+# Every change counts, whatever the new status: a cancellation removes
+# interactions just as a new booking adds them
+CHANGED_GUESTS_SQL = """
+    SELECT user_id, MAX(changed_at) AS last_changed_at
+    FROM Booking
+    WHERE changed_at > $1
+      AND user_id IS NOT NULL
+    GROUP BY user_id
+"""
+
+# Cursor of a store that has never been refreshed
+EPOCH = datetime(1970, 1, 1)
+
+# Same interactions as train_recommender.INTERACTIONS_SQL, for some guests
+GUEST_INTERACTIONS_SQL = """
+    SELECT b.user_id, sp.service_id, COUNT(*) AS interactions
+    FROM Booking b
+    JOIN Room r ON r.room_id = b.room_id
+    JOIN ServicePossessing sp ON sp.type_id = r.type_id
+    WHERE b.user_id = ANY($1::integer[])
+      AND b.status <> ALL($2::varchar[])
+    GROUP BY b.user_id, sp.service_id
+"""
+
+
+def _chunks(items: Sequence, size: int) -> Iterable[Sequence]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _trained_on(factor_index: ServiceFactorIndex) -> Optional[date]:
+    """Training date of the loaded model, if the artifact records it"""
+    try:
+        return datetime.fromisoformat(factor_index.trained_at).date()
+    except (TypeError, ValueError):
+        return None
+
+
+def rank_rows(
+    factor_index: ServiceFactorIndex,
+    guest_ids: Sequence[str],
+    user_factors: np.ndarray,
+    n_interactions: np.ndarray,
+    k: int,
+) -> List[StoreRow]:
+    """
+    Score a block of guests and convert the top-k to store rows
+
+    Args:
+        factor_index: Loaded factor model
+        guest_ids: Guest ids, aligned with user_factors
+        user_factors: (B, factors) embeddings
+        n_interactions: (B,) interaction counts behind each embedding
+        k: List length per guest
+
+    Returns:
+        One StoreRow per guest
+    """
+    if len(guest_ids) == 0:
+        return []
+    positions, scores, confidence = factor_index.rank(user_factors, n_interactions, k)
+    service_ids = factor_index.item_ids[positions].tolist()
+    scores = scores.round(4).tolist()
+    confidence = confidence.round(4).tolist()
+    return [
+        (guest_id, service_ids[i], scores[i], confidence[i], factor_index.version)
+        for i, guest_id in enumerate(guest_ids)
+    ]
+
+
+def interaction_matrix(
+    factor_index: ServiceFactorIndex,
+    rows: Iterable[Any],
+) -> Tuple[List[str], sp.csr_matrix]:
+    """
+    Build guest x catalog counts from GUEST_INTERACTIONS_SQL rows
+
+    Services missing from the model's catalog are dropped, and so are
+    guests left with no known service.
+
+    Returns:
+        (guest ids, csr matrix with columns aligned to the catalog)
+    """
+    guest_codes: Dict[str, int] = {}
+    row_idx, col_idx, counts = [], [], []
+    for row in rows:
+        position = factor_index.item_index.get(str(row['service_id']))
+        if position is None:
+            continue
+        guest_id = str(row['user_id'])
+        row_idx.append(guest_codes.setdefault(guest_id, len(guest_codes)))
+        col_idx.append(position)
+        counts.append(row['interactions'])
+
+    matrix = sp.coo_matrix(
+        (np.asarray(counts, dtype=np.float32), (row_idx, col_idx)),
+        shape=(len(guest_codes), factor_index.n_items)
+    ).tocsr()
+    matrix.sum_duplicates()
+    return list(guest_codes), matrix
+
+
+class RecommendationStore:
+    """
+    Precomputed service recommendations in PostgreSQL
+
+    Usage:
+        store = RecommendationStore(db_pool=pool)
+        await store.refresh_all(factor_index)          # nightly
+        await store.refresh_incremental(factor_index)  # every few minutes
+        stored = await store.get("42", factor_index.version)
+    """
+
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        db_pool: Optional[asyncpg.Pool] = None,
+        top_k: Optional[int] = None,
+        block_size: Optional[int] = None,
+        overlap_seconds: Optional[int] = None,
+    ):
+        """
+        Initialize recommendation store
+
+        Args:
+            settings: Application settings (if None, will call get_settings())
+            db_pool: asyncpg pool (created in initialize() if not given)
+            top_k: Services stored per guest
+            block_size: Guests scored per matrix product / written per transaction
+            overlap_seconds: Window before the cursor re-read by incremental refreshes
+        """
+        self.settings = settings or get_settings()
+        self.db_pool = db_pool
+        self.top_k = top_k or self.settings.recommendation_store_top_k
+        self.block_size = block_size or self.settings.recommendation_store_block_size
+        self.overlap = timedelta(seconds=(
+            overlap_seconds if overlap_seconds is not None
+            else self.settings.recommendation_refresh_overlap_seconds
+        ))
+
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "errors": 0,
+            "rows_written": 0,
+            "last_refresh_at": None,
+        }
+
+    @property
+    def is_connected(self) -> bool:
+        return self.db_pool is not None
+
+    async def initialize(self):
+        """Create the database pool if it was not injected"""
+        if self.db_pool is None:
+            self.db_pool = await asyncpg.create_pool(
+                self.settings.asyncpg_url, min_size=1, max_size=4, timeout=10
+            )
+        logger.info("✅ Recommendation store connected to PostgreSQL")
+
+    async def shutdown(self):
+        """Close the database pool"""
+        if self.db_pool is not None:
+            await self.db_pool.close()
+            self.db_pool = None
+
+    # ------------------------------------------------------------------
+    # Serving
+    # ------------------------------------------------------------------
+
+    async def get(self, guest_id: str, model_version: str) -> Optional[Dict[str, List]]:
+        """
+        Precomputed list for a guest
+
+        Args:
+            guest_id: Guest identifier
+            model_version: Version of the loaded factor model; rows built
+                with another version are treated as missing
+
+        Returns:
+            Dict with service_ids, scores and confidences (best first), or
+            None on a miss, without a database, or on a database error
+        """
+        if self.db_pool is None:
+            return None
+        try:
+            row = await self.db_pool.fetchrow(FETCH_RECOMMENDATIONS_SQL, str(guest_id), model_version)
+        except (asyncpg.PostgresError, OSError) as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Recommendation store lookup failed, scoring online: {e}")
+            return None
+
+        if row is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return {
+            "service_ids": list(row["service_ids"]),
+            "scores": list(row["scores"]),
+            "confidences": list(row["confidences"]),
+        }
+
+    async def get_many(self, guest_ids: List[str], model_version: str) -> Dict[str, Dict[str, List]]:
+        """
+        Precomputed lists for many guests in one query
+
+        Args:
+            guest_ids: Guest identifiers
+            model_version: Version of the loaded factor model
+
+        Returns:
+            Dict guest_id -> list (as returned by get); misses are left out,
+            and the dict is empty without a database or on a database error
+        """
+        if self.db_pool is None or not guest_ids:
+            return {}
+        guest_ids = list(dict.fromkeys(str(g) for g in guest_ids))
+        try:
+            rows = await self.db_pool.fetch(FETCH_MANY_RECOMMENDATIONS_SQL, guest_ids, model_version)
+        except (asyncpg.PostgresError, OSError) as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Recommendation store lookup failed, scoring online: {e}")
+            return {}
+
+        found = {
+            row["guest_id"]: {
+                "service_ids": list(row["service_ids"]),
+                "scores": list(row["scores"]),
+                "confidences": list(row["confidences"]),
+            }
+            for row in rows
+        }
+        self.stats["hits"] += len(found)
+        self.stats["misses"] += len(guest_ids) - len(found)
+        return found
+
+    # ------------------------------------------------------------------
+    # Precomputation
+    # ------------------------------------------------------------------
+
+    async def refresh_all(self, factor_index: ServiceFactorIndex) -> Dict[str, Any]:
+        """
+        Rebuild the lists of every active guest
+
+        Model guests are scored from their trained embeddings, except those
+        who booked on or after the training date; those and guests unknown
+        to the model are folded in from their current interactions. Rows of
+        other model versions are deleted and the cursor is moved to the
+        latest booking change at the start of the refresh.
+
+        Returns:
+            Dict with guests scored, folded in and rows written
+        """
+        start = time.perf_counter()
+        async with self.db_pool.acquire() as conn:
+            cursor = await conn.fetchval(CHANGE_HIGH_WATER_SQL) or EPOCH
+            active = await conn.fetch(ACTIVE_GUESTS_SQL, INTERACTION_EXCLUDED_STATUSES)
+
+        trained_on = _trained_on(factor_index)
+        fold_ids = [
+            row['user_id'] for row in active
+            if not factor_index.has_user(str(row['user_id']))
+            or (trained_on is not None and row['last_booking_at'] is not None
+                and row['last_booking_at'] >= trained_on)
+        ]
+        folded = {str(user_id) for user_id in fold_ids}
+        known = [guest_id for guest_id in factor_index.user_index if guest_id not in folded]
+
+        written = 0
+        for block in _chunks(known, self.block_size):
+            positions = np.fromiter((factor_index.user_index[g] for g in block), dtype=np.intp, count=len(block))
+            rows = rank_rows(
+                factor_index,
+                block,
+                factor_index.user_factors[positions],
+                factor_index.user_interactions[positions],
+                self.top_k,
+            )
+            written += await self._write(rows)
+
+        written += await self._fold_in(factor_index, fold_ids)
+
+        async with self.db_pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(DELETE_OTHER_VERSIONS_SQL, factor_index.version)
+                await conn.execute(ADVANCE_CURSOR_SQL, cursor)
+
+        return self._finish("full", start, {
+            "guests_scored": len(known),
+            "guests_folded_in": len(fold_ids),
+            "rows_written": written,
+            "cursor": cursor.isoformat(),
+        })
+
+    async def refresh_incremental(self, factor_index: ServiceFactorIndex) -> Dict[str, Any]:
+        """
+        Re-score guests whose bookings changed since the stored cursor
+
+        Changes up to overlap_seconds before the cursor are read again, so a
+        transaction that committed after a later one was already seen is not
+        missed; re-scoring those guests is idempotent.
+
+        Returns:
+            Dict with guests changed, rows written and the new cursor
+        """
+        start = time.perf_counter()
+        async with self.db_pool.acquire() as conn:
+            cursor = await conn.fetchval(FETCH_CURSOR_SQL) or EPOCH
+            since = max(cursor - self.overlap, EPOCH)
+            changed = await conn.fetch(CHANGED_GUESTS_SQL, since)
+
+        written = 0
+        if changed:
+            written = await self._fold_in(factor_index, [row['user_id'] for row in changed])
+            cursor = max(cursor, max(row['last_changed_at'] for row in changed))
+            async with self.db_pool.acquire() as conn:
+                await conn.execute(ADVANCE_CURSOR_SQL, cursor)
+
+        return self._finish("incremental", start, {
+            "guests_changed": len(changed),
+            "rows_written": written,
+            "cursor": cursor.isoformat(),
+        })
+
+    async def _fold_in(self, factor_index: ServiceFactorIndex, user_ids: List[int]) -> int:
+        """
+        Fold in current interactions for guests, block by block, and write their lists
+
+        Guests without any remaining interaction (e.g. every booking
+        cancelled) have their stored list deleted.
+        """
+        # Imported here: the training module configures logging on import
+        from src.application.services.ml.training.train_recommender import fold_in_users
+
+        regularization = factor_index.params.get('regularization', 0.05)
+        alpha = factor_index.params.get('alpha', 20.0)
+
+        written = 0
+        for block in _chunks(user_ids, self.block_size):
+            async with self.db_pool.acquire() as conn:
+                interactions = await conn.fetch(
+                    GUEST_INTERACTIONS_SQL, list(block), INTERACTION_EXCLUDED_STATUSES
+                )
+            guest_ids, counts = interaction_matrix(factor_index, interactions)
+            emptied = sorted({str(user_id) for user_id in block} - set(guest_ids))
+            if emptied:
+                async with self.db_pool.acquire() as conn:
+                    await conn.execute(DELETE_RECOMMENDATIONS_SQL, emptied)
+            if not guest_ids:
+                continue
+            user_factors = fold_in_users(counts, factor_index.item_factors, regularization, alpha)
+            rows = rank_rows(factor_index, guest_ids, user_factors, np.diff(counts.indptr), self.top_k)
+            written += await self._write(rows)
+        return written
+
+    async def _write(self, rows: List[StoreRow]) -> int:
+        """Upsert one block of lists in a single transaction"""
+        if not rows:
+            return 0
+        async with self.db_pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.executemany(UPSERT_RECOMMENDATIONS_SQL, rows)
+        self.stats["rows_written"] += len(rows)
+        return len(rows)
+
+    def _finish(self, mode: str, start: float, result: Dict[str, Any]) -> Dict[str, Any]:
+        self.stats["last_refresh_at"] = datetime.now().isoformat()
+        result["mode"] = mode
+        result["duration_seconds"] = round(time.perf_counter() - start, 3)
+        logger.info(f"✅ Recommendation store {mode} refresh: {result}")
+        return result
+
+
+# Singleton
+_recommendation_store: Optional[RecommendationStore] = None
+
+
+def get_recommendation_store() -> RecommendationStore:
+    """Get or create recommendation store instance (connected in the ML lifespan)"""
+    global _recommendation_store
+    if _recommendation_store is None:
+        _recommendation_store = RecommendationStore()
+    return _recommendation_store
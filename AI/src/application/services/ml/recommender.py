@@ -2,10 +2,18 @@
 Recommendation Engine Service
 
 Uses collaborative filtering + content-based hybrid approach
+
+Service recommendations come from an implicit-feedback matrix
+factorization model (see training/train_recommender.py) when it is loaded
+and the guest is known; cold guests fall back to popularity and context
+rules. When a RecommendationStore is attached, lists precomputed by the
+recommendation refresh flow are served first and online scoring is only
+the fallback. Rule scoring also uses the guest's online store features
+(loyalty tier, typical length of stay) when the feature store is connected.
 """
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 import numpy as np
-from datetime import datetime
+from datetime import date, datetime
 import time
 
 from src.application.dtos.ml.recommendation_dto import (
@@ -17,6 +25,8 @@ from src.application.dtos.ml.recommendation_dto import (
     RecommendationContext,
     RoomPreferences,
 )
+from src.application.services.ml.micro_batching import MicroBatcher, build_batcher
+from src.application.services.ml.room_inventory import RoomInventory, score_rooms, top_k_rooms
 from src.utils.logger import app_logger
 
 
@@ -30,11 +40,146 @@ MOCK_SERVICES = [
 ]
 
 MOCK_ROOMS = [
-    {"number": "801", "type": "deluxe_ocean_view", "floor": 8, "price": 3500000, "features": ["ocean_view", "balcony", "king_bed"]},
-    {"number": "702", "type": "suite_premium", "floor": 7, "price": 5000000, "features": ["city_view", "living_room", "jacuzzi"]},
-    {"number": "503", "type": "standard_double", "floor": 5, "price": 2000000, "features": ["garden_view", "twin_beds"]},
+    {"number": "801", "type": "deluxe_ocean_view", "floor": 8, "price": 3500000, "capacity": 2, "features": ["ocean_view", "balcony", "king_bed"]},
+    {"number": "702", "type": "suite_premium", "floor": 7, "price": 5000000, "capacity": 4, "features": ["city_view", "living_room", "jacuzzi"]},
+    {"number": "503", "type": "standard_double", "floor": 5, "price": 2000000, "capacity": 2, "features": ["garden_view", "twin_beds"]},
 ]
 
+# Rooms returned per room recommendation request
+ROOM_TOP_K = 5
+
+# Rule boosts from online guest features
+LOYALTY_BOOST_TIERS = ("gold", "platinum")
+LOYALTY_BOOST_CATEGORIES = ("spa", "dining")
+LOYALTY_BOOST = 0.1
+LONG_STAY_NIGHTS = 4
+LONG_STAY_BOOST = 0.1
+
+
+# Model registry name of the factorization artifact
+SERVICE_MODEL_NAME = "service_recommender"
+
+
+class ServiceFactorIndex:
+    """
+    Serving index over a trained factorization artifact
+
+    Keeps the item factor matrix contiguous so a guest's scores are one
+    matrix-vector product; top-k uses argpartition, so cost is linear in
+    catalog size with no full sort.
+    """
+
+    def __init__(self, artifact: Dict):
+        self.version = artifact.get('version', 'unknown')
+        self.params = dict(artifact.get('params', {}))
+        self.trained_at = artifact.get('trained_at')
+        self.user_factors = np.asarray(artifact['user_factors'], dtype=np.float32)
+        self.item_factors = np.ascontiguousarray(artifact['item_factors'], dtype=np.float32)
+        self.user_interactions = np.asarray(artifact['user_interactions'])
+        self.item_popularity = np.asarray(artifact['item_popularity'], dtype=np.float32)
+
+        self.item_ids = np.asarray(artifact['item_ids']).astype(str)
+        self.item_names = np.asarray(artifact['item_names']).astype(str)
+        self.item_categories = np.asarray(artifact['item_categories']).astype(str)
+        self.item_prices = np.asarray(artifact['item_prices'], dtype=np.float64)
+
+        self.user_index = {uid: i for i, uid in enumerate(np.asarray(artifact['user_ids']).astype(str))}
+        self.item_index = {iid: i for i, iid in enumerate(self.item_ids)}
+
+    @property
+    def n_items(self) -> int:
+        return len(self.item_ids)
+
+    def has_user(self, guest_id: str) -> bool:
+        return guest_id in self.user_index
+
+    def exclusion_mask(self, exclude_ids: Optional[List[str]]) -> Optional[np.ndarray]:
+        """Boolean mask over the catalog for excluded service ids"""
+        if not exclude_ids:
+            return None
+        positions = [self.item_index[i] for i in exclude_ids if i in self.item_index]
+        if not positions:
+            return None
+        mask = np.zeros(self.n_items, dtype=bool)
+        mask[positions] = True
+        return mask
+
+    def score_users(self, user_rows: np.ndarray) -> np.ndarray:
+        """Raw preference scores, (len(user_rows), n_items)"""
+        return self.user_factors[user_rows] @ self.item_factors.T
+
+    def confidence(self, scores: np.ndarray, positions: np.ndarray, n_interactions) -> np.ndarray:
+        """
+        Recommendation confidence from clipped scores and item popularity
+
+        More history means a more reliable embedding; n_interactions
+        broadcasts against scores (scalar, or one value per row).
+        """
+        history_confidence = 1.0 - np.exp(-np.asarray(n_interactions, dtype=np.float64) / 5.0)
+        return np.clip(
+            scores * 0.5 + self.item_popularity[positions] * 0.2 + history_confidence * 0.3,
+            0.0, 1.0
+        )
+
+    def rank(
+        self,
+        user_factors: np.ndarray,
+        n_interactions: np.ndarray,
+        k: int,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Top-k for a block of guests in one matrix product
+
+        Args:
+            user_factors: (B, factors) guest embeddings
+            n_interactions: (B,) interaction counts behind each embedding
+            k: List length per guest
+
+        Returns:
+            (positions, clipped scores, confidence), each (B, k), best first
+        """
+        k = min(k, self.n_items)
+        scores = np.asarray(user_factors, dtype=np.float32) @ self.item_factors.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.clip(np.take_along_axis(top_scores, order, axis=1), 0.0, 1.0)
+        confidence = self.confidence(top_scores, top, np.asarray(n_interactions)[:, None])
+        return top, top_scores, confidence
+
+    def top_k(
+        self,
+        guest_id: str,
+        k: int,
+        exclude_ids: Optional[List[str]] = None,
+        scores: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k items for a known guest
+
+        Args:
+            scores: The guest's row of score_users, when already computed
+                for a block of guests (modified in place)
+
+        Returns:
+            (item positions, raw scores), best first
+        """
+        if scores is None:
+            scores = self.item_factors @ self.user_factors[self.user_index[guest_id]]
+
+        mask = self.exclusion_mask(exclude_ids)
+        if mask is not None:
+            scores[mask] = -np.inf
+
+        k = min(k, self.n_items - (int(mask.sum()) if mask is not None else 0))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return top, scores[top]
+
 
 class RecommendationEngine:
     """
@@ -48,9 +193,30 @@ class RecommendationEngine:
     For now, uses rule-based + scoring
     """
     
-    def __init__(self, model=None):
+    def __init__(self, model=None, store=None, room_inventory=None, feature_store=None):
+        """
+        Args:
+            model: Factorization artifact from train_recommender (optional)
+            store: RecommendationStore with precomputed top-k lists (optional)
+            room_inventory: RoomInventoryLoader for live availability (optional)
+            feature_store: OnlineFeatureStore for rule scoring (optional)
+        """
         self.model = model
+        self.store = store
+        self.room_inventory = room_inventory
+        self.feature_store = feature_store
         self.model_version = "recommender_v2.1"
+        self.factor_index = ServiceFactorIndex(model) if model is not None else None
+        # Coalesces concurrent recommend_services calls (set by get_recommender)
+        self.batcher: Optional[MicroBatcher] = None
+
+    def on_model_swapped(self, model_name: str, model, info: Dict):
+        """Pick up a hot-swapped factorization artifact from the registry"""
+        if model_name != SERVICE_MODEL_NAME:
+            return
+        self.factor_index = ServiceFactorIndex(model)
+        self.model = model
+        app_logger.info(f"🔄 Service recommender swapped to v{info.get('version')}")
         
     async def recommend_services(
         self,
@@ -64,13 +230,245 @@ class RecommendationEngine:
         """
         start_time = time.time()
         
+        # Coalesced with concurrent requests when batching is on
+        if self.batcher is not None:
+            return await self.batcher.submit((guest_id, top_k, context, exclude_services, start_time))
+        
+        factor_index = self.factor_index
+        recommendations = None
+        source = "rules"
+        
+        # Precomputed lists are a key lookup; serve them when they were
+        # built with the model version that is loaded now
+        if factor_index is not None and self.store is not None:
+            stored = await self.store.get(guest_id, factor_index.version)
+            if stored is not None:
+                recommendations = self._recommend_from_store(factor_index, stored, top_k, exclude_services)
+        
+        if recommendations is not None:
+            source = "store"
+        elif factor_index is not None and factor_index.has_user(guest_id):
+            recommendations = self._recommend_from_factors(
+                factor_index, guest_id, top_k, context, exclude_services
+            )
+            source = "online"
+        else:
+            guest_features = await self._load_guest_features(guest_id)
+            recommendations = self._recommend_from_rules(
+                guest_id, top_k, context, exclude_services, guest_features
+            )
+        
+        return self._services_response(guest_id, recommendations, source, factor_index, start_time)
+    
+    async def _recommend_services_coalesced(
+        self,
+        requests: List[Tuple]
+    ) -> List[ServiceRecommendationResponse]:
+        """
+        Batch version of recommend_services for coalesced requests
+        
+        Uses one store query for all guests, one matrix product for the
+        guests scored online and one feature-store lookup for cold guests.
+        
+        Args:
+            requests: (guest_id, top_k, context, exclude_services, start_time)
+            
+        Returns:
+            One ServiceRecommendationResponse per request
+        """
+        factor_index = self.factor_index
+        results: List[Optional[Tuple[List[ServiceRecommendation], str]]] = [None] * len(requests)
+        
+        if factor_index is not None and self.store is not None:
+            stored = await self.store.get_many([r[0] for r in requests], factor_index.version)
+            for i, (guest_id, top_k, _, exclude_services, _) in enumerate(requests):
+                if str(guest_id) in stored:
+                    recommendations = self._recommend_from_store(
+                        factor_index, stored[str(guest_id)], top_k, exclude_services
+                    )
+                    if recommendations is not None:
+                        results[i] = (recommendations, "store")
+        
+        online = [
+            i for i, r in enumerate(requests)
+            if results[i] is None and factor_index is not None and factor_index.has_user(r[0])
+        ]
+        if online:
+            scores = factor_index.score_users(
+                np.array([factor_index.user_index[requests[i][0]] for i in online], dtype=np.intp)
+            )
+            for row, i in enumerate(online):
+                guest_id, top_k, context, exclude_services, _ = requests[i]
+                recommendations = self._recommend_from_factors(
+                    factor_index, guest_id, top_k, context, exclude_services, scores[row]
+                )
+                results[i] = (recommendations, "online")
+        
+        cold = [i for i in range(len(requests)) if results[i] is None]
+        if cold:
+            guest_features = await self._load_guest_features_many([requests[i][0] for i in cold])
+            for i in cold:
+                guest_id, top_k, context, exclude_services, _ = requests[i]
+                recommendations = self._recommend_from_rules(
+                    guest_id, top_k, context, exclude_services, guest_features.get(str(guest_id))
+                )
+                results[i] = (recommendations, "rules")
+        
+        return [
+            self._services_response(request[0], recommendations, source, factor_index, request[4])
+            for request, (recommendations, source) in zip(requests, results)
+        ]
+    
+    def _services_response(
+        self,
+        guest_id: str,
+        recommendations: List[ServiceRecommendation],
+        source: str,
+        factor_index: Optional[ServiceFactorIndex],
+        start_time: float
+    ) -> ServiceRecommendationResponse:
+        """Log and wrap service recommendations"""
+        if source == "rules":
+            model_version = self.model_version
+        else:
+            model_version = f"{self.model_version}+mf_v{factor_index.version}"
+        
+        inference_time = (time.time() - start_time) * 1000
+        
+        app_logger.info(
+            "Generated service recommendations",
+            extra={
+                "guest_id": guest_id,
+                "recommendations_count": len(recommendations),
+                "source": source,
+                "inference_time_ms": inference_time
+            }
+        )
+        
+        return ServiceRecommendationResponse(
+            guest_id=guest_id,
+            recommendations=recommendations,
+            total_recommendations=len(recommendations),
+            inference_time_ms=round(inference_time, 2),
+            model_version=model_version
+        )
+    
+    def _recommend_from_factors(
+        self,
+        factor_index: ServiceFactorIndex,
+        guest_id: str,
+        top_k: int,
+        context: Optional[RecommendationContext],
+        exclude_services: Optional[List[str]],
+        scores: Optional[np.ndarray] = None
+    ) -> List[ServiceRecommendation]:
+        """
+        Collaborative-filtering recommendations for a known guest
+
+        Args:
+            scores: Precomputed raw scores of the guest (see ServiceFactorIndex.top_k)
+        """
+        top, raw_scores = factor_index.top_k(guest_id, top_k, exclude_services, scores)
+        
+        # ALS predicts implicit preference, roughly in [0, 1]
+        scores = np.clip(raw_scores, 0.0, 1.0)
+        n_interactions = factor_index.user_interactions[factor_index.user_index[guest_id]]
+        confidence = factor_index.confidence(scores, top, n_interactions)
+        
+        return self._factor_recommendations(factor_index, top, scores, confidence)
+    
+    def _factor_recommendations(
+        self,
+        factor_index: ServiceFactorIndex,
+        positions,
+        scores,
+        confidence
+    ) -> List[ServiceRecommendation]:
+        """Build DTOs for ranked catalog positions"""
+        return [
+            ServiceRecommendation(
+                service_id=factor_index.item_ids[i],
+                service_name=factor_index.item_names[i],
+                category=factor_index.item_categories[i],
+                score=round(float(score), 2),
+                confidence=round(float(conf), 2),
+                reason="Popular with guests who have stayed like you",
+                estimated_revenue=float(factor_index.item_prices[i]),
+                discount_eligible=bool(score > 0.8),
+                availability="available"
+            )
+            for i, score, conf in zip(positions, scores, confidence)
+        ]
+    
+    def _recommend_from_store(
+        self,
+        factor_index: ServiceFactorIndex,
+        stored: Dict,
+        top_k: int,
+        exclude_services: Optional[List[str]]
+    ) -> Optional[List[ServiceRecommendation]]:
+        """
+        Precomputed top-k list for a guest, or None if it cannot answer
+
+        Stored lists hold more entries than a typical request asks for, so
+        exclusions are filtered here; if too few entries remain the caller
+        scores online.
+        """
+        excluded = set(exclude_services or [])
+        positions, scores, confidence = [], [], []
+        for service_id, score, conf in zip(stored['service_ids'], stored['scores'], stored['confidences']):
+            position = factor_index.item_index.get(service_id)
+            if position is None or service_id in excluded:
+                continue
+            positions.append(position)
+            scores.append(score)
+            confidence.append(conf)
+            if len(positions) == top_k:
+                break
+        
+        n_excluded = sum(1 for service_id in excluded if service_id in factor_index.item_index)
+        if len(positions) < min(top_k, factor_index.n_items - n_excluded):
+            return None
+        return self._factor_recommendations(factor_index, positions, scores, confidence)
+    
+    async def _load_guest_features(self, guest_id: str) -> Optional[Dict]:
+        """Online store features of the guest, None while the store is offline"""
+        if self.feature_store is None or not self.feature_store.is_connected:
+            return None
+        try:
+            return await self.feature_store.get(guest_id)
+        except Exception as e:
+            app_logger.warning(f"Feature store lookup failed for guest {guest_id}: {e}")
+            return None
+    
+    async def _load_guest_features_many(self, guest_ids: List[str]) -> Dict[str, Dict]:
+        """Online store features of many guests, empty while the store is offline"""
+        if not guest_ids or self.feature_store is None or not self.feature_store.is_connected:
+            return {}
+        try:
+            return await self.feature_store.get_features(guest_ids)
+        except Exception as e:
+            app_logger.warning(f"Feature store lookup failed for {len(guest_ids)} guests: {e}")
+            return {}
+    
+    def _recommend_from_rules(
+        self,
+        guest_id: str,
+        top_k: int,
+        context: Optional[RecommendationContext],
+        exclude_services: Optional[List[str]],
+        guest_features: Optional[Dict] = None
+    ) -> List[ServiceRecommendation]:
+        """
+        Popularity and context rules, used for cold guests
+        """
         # Filter available services
         available = [s for s in MOCK_SERVICES if s["id"] not in (exclude_services or [])]
         
         # Score each service
         scored_services = []
         for service in available:
-            score = self._score_service(service, guest_id, context)
+            score = self._score_service(service, guest_id, context, guest_features)
             confidence = self._calculate_confidence(score, service["popularity"])
             
             scored_services.append({
@@ -101,30 +499,14 @@ class RecommendationEngine:
                 )
             )
         
-        inference_time = (time.time() - start_time) * 1000
-        
-        app_logger.info(
-            "Generated service recommendations",
-            extra={
-                "guest_id": guest_id,
-                "recommendations_count": len(recommendations),
-                "inference_time_ms": inference_time
-            }
-        )
-        
-        return ServiceRecommendationResponse(
-            guest_id=guest_id,
-            recommendations=recommendations,
-            total_recommendations=len(recommendations),
-            inference_time_ms=round(inference_time, 2),
-            model_version=self.model_version
-        )
+        return recommendations
     
     def _score_service(
         self,
         service: Dict,
         guest_id: str,
-        context: Optional[RecommendationContext]
+        context: Optional[RecommendationContext],
+        guest_features: Optional[Dict] = None
     ) -> float:
         """
         Score a service for a guest
@@ -151,6 +533,18 @@ class RecommendationEngine:
                 if service["category"] in ["spa", "dining"]:
                     base_score += 0.05
         
+        # Guest-history adjustments from the online feature store
+        if guest_features and guest_features.get("has_history"):
+            # Loyal guests spend on spa and dining
+            if guest_features["loyalty_tier"] in LOYALTY_BOOST_TIERS:
+                if service["category"] in LOYALTY_BOOST_CATEGORIES:
+                    base_score += LOYALTY_BOOST
+            
+            # Long stays need laundry
+            if (guest_features.get("avg_length_of_stay") or 0) >= LONG_STAY_NIGHTS:
+                if service["category"] == "laundry":
+                    base_score += LONG_STAY_BOOST
+        
         # Add some randomness for diversity
         base_score += np.random.uniform(-0.05, 0.05)
         
@@ -182,39 +576,56 @@ class RecommendationEngine:
         check_in: str,
         check_out: str,
         preferences: Optional[RoomPreferences],
-        party_size: int
+        party_size: int,
+        top_k: int = ROOM_TOP_K
     ) -> RoomRecommendationResponse:
         """
-        Recommend rooms based on preferences
+        Recommend rooms that are free for the stay and fit the party
+        
+        Inventory comes from one availability query when the room
+        inventory loader is connected, otherwise from the mock rooms.
         """
-        # Score each room
-        scored_rooms = []
-        for room in MOCK_ROOMS:
-            match_score = self._calculate_room_match(room, preferences)
-            scored_rooms.append({
-                "room": room,
-                "match_score": match_score
-            })
+        check_in_date = date.fromisoformat(check_in)
+        check_out_date = date.fromisoformat(check_out)
+        if check_out_date <= check_in_date:
+            raise ValueError("check_out must be after check_in")
         
-        # Sort by overall match score
-        scored_rooms.sort(key=lambda x: x["match_score"].overall, reverse=True)
+        if self.room_inventory is not None and self.room_inventory.is_connected:
+            inventory = await self.room_inventory.load(check_in_date, check_out_date)
+        else:
+            inventory = RoomInventory.from_mock(MOCK_ROOMS)
         
-        # Build recommendations
-        recommendations = []
-        for item in scored_rooms[:5]:
-            room = item["room"]
-            recommendations.append(
-                RoomRecommendation(
-                    room_number=room["number"],
-                    room_type=room["type"],
-                    floor=room["floor"],
-                    score=round(item["match_score"].overall, 2),
-                    price=room["price"],
-                    features=room["features"],
-                    availability="available",
-                    match_score=item["match_score"]
+        eligible, scores = self._score_inventory(inventory, preferences, party_size)
+        top = top_k_rooms(scores["overall"], eligible, inventory.prices, top_k)
+        
+        recommendations = [
+            RoomRecommendation(
+                room_number=str(inventory.room_numbers[i]),
+                room_type=str(inventory.room_types[i]),
+                floor=int(inventory.floors[i]),
+                score=round(float(scores["overall"][i]), 2),
+                price=float(inventory.prices[i]),
+                features=inventory.features(i),
+                availability="available",
+                match_score=RoomMatchScore(
+                    budget=round(float(scores["budget"][i]), 2),
+                    view=round(float(scores["view"][i]), 2),
+                    floor=round(float(scores["floor"][i]), 2),
+                    overall=round(float(scores["overall"][i]), 2)
                 )
             )
+            for i in top
+        ]
+        
+        app_logger.info(
+            "Generated room recommendations",
+            extra={
+                "guest_id": guest_id,
+                "available_rooms": len(inventory),
+                "eligible_rooms": int(eligible.sum()),
+                "recommendations_count": len(recommendations)
+            }
+        )
         
         return RoomRecommendationResponse(
             guest_id=guest_id,
@@ -222,40 +633,35 @@ class RecommendationEngine:
             total_recommendations=len(recommendations)
         )
     
+    def _score_inventory(
+        self,
+        inventory: RoomInventory,
+        preferences: Optional[RoomPreferences],
+        party_size: int = 1
+    ):
+        """Eligibility mask and match score arrays for a whole inventory"""
+        if not preferences:
+            return score_rooms(inventory, party_size=party_size, has_preferences=False)
+        return score_rooms(
+            inventory,
+            budget=preferences.budget,
+            view=preferences.view,
+            floor=preferences.floor,
+            party_size=party_size
+        )
+    
     def _calculate_room_match(
         self,
         room: Dict,
         preferences: Optional[RoomPreferences]
     ) -> RoomMatchScore:
-        """Calculate how well room matches preferences"""
-        if not preferences:
-            return RoomMatchScore(budget=0.8, view=0.8, floor=0.8, overall=0.8)
-        
-        # Budget matching
-        budget_map = {"low": (0, 2500000), "medium": (2000000, 4000000), "high": (3500000, 10000000)}
-        budget_range = budget_map.get(preferences.budget or "medium", (0, 10000000))
-        budget_match = 1.0 if budget_range[0] <= room["price"] <= budget_range[1] else 0.5
-        
-        # View matching
-        view_match = 1.0
-        if preferences.view:
-            view_match = 1.0 if f"{preferences.view}_view" in room["features"] else 0.7
-        
-        # Floor matching
-        floor_map = {"low": (1, 3), "medium": (4, 6), "high": (7, 10)}
-        if preferences.floor:
-            floor_range = floor_map[preferences.floor]
-            floor_match = 1.0 if floor_range[0] <= room["floor"] <= floor_range[1] else 0.6
-        else:
-            floor_match = 0.8
-        
-        overall = (budget_match * 0.4 + view_match * 0.4 + floor_match * 0.2)
-        
+        """Calculate how well a single (mock) room matches preferences"""
+        _, scores = self._score_inventory(RoomInventory.from_mock([room]), preferences)
         return RoomMatchScore(
-            budget=round(budget_match, 2),
-            view=round(view_match, 2),
-            floor=round(floor_match, 2),
-            overall=round(overall, 2)
+            budget=round(float(scores["budget"][0]), 2),
+            view=round(float(scores["view"][0]), 2),
+            floor=round(float(scores["floor"][0]), 2),
+            overall=round(float(scores["overall"][0]), 2)
         )
 
 
@@ -265,5 +671,17 @@ _recommender: Optional[RecommendationEngine] = None
 def get_recommender() -> RecommendationEngine:
     global _recommender
     if _recommender is None:
-        _recommender = RecommendationEngine()
+        from src.application.ml_models.model_registry import get_model_registry
+        from src.application.services.ml.feature_store import get_feature_store
+        from src.application.services.ml.recommendation_store import get_recommendation_store
+        from src.application.services.ml.room_inventory import get_room_inventory_loader
+        registry = get_model_registry()
+        _recommender = RecommendationEngine(
+            model=registry.get_model(SERVICE_MODEL_NAME),
+            store=get_recommendation_store(),
+            room_inventory=get_room_inventory_loader(),
+            feature_store=get_feature_store(),
+        )
+        registry.subscribe(_recommender.on_model_swapped)
+        _recommender.batcher = build_batcher("recommend_services", _recommender._recommend_services_coalesced)
     return _recommender
\ No newline at end of file
@@ -0,0 +1,313 @@
+"""
+Room Inventory for Room Recommendations
+
+Loads every room that is free for a stay with a single query (open rooms of
+a bookable room type in an active hotel, without an overlapping pending,
+accepted, cancel-requested or maintenance booking, priced for the check-in
+date) and keeps the result as column arrays, so preference
+matching is a handful of NumPy masks over the whole hotel:
+
+1. Party size filters rooms whose capacity is too small
+2. Budget, view and floor matches are scored per room with the same rule
+   values the mock recommender used (1.0 on a match, lower otherwise)
+3. The weighted overall score is ranked with argpartition; only the
+   top-k rooms are turned into DTOs
+"""
+
+import logging
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import asyncpg
+import numpy as np
+
+from src.infrastructure.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+
+# Nightly price ranges (VND) per budget level
+BUDGET_RANGES = {
+    "low": (0, 2_500_000),
+    "medium": (2_000_000, 4_000_000),
+    "high": (3_500_000, 10_000_000),
+}
+
+# Floor ranges per floor preference; "high" is open-ended for tall hotels
+FLOOR_RANGES = {
+    "low": (1, 3),
+    "medium": (4, 6),
+    "high": (7, np.inf),
+}
+
+# Match score weights
+BUDGET_WEIGHT = 0.4
+VIEW_WEIGHT = 0.4
+FLOOR_WEIGHT = 0.2
+
+# Scores without a stated preference / on a mismatch
+NO_PREFERENCE_SCORE = 0.8
+BUDGET_MISS_SCORE = 0.5
+VIEW_MISS_SCORE = 0.7
+FLOOR_MISS_SCORE = 0.6
+
+
+# ============================================================================
+# SQL
+# ============================================================================
+
+# Floor comes from location ('Floor 5'), else from the room number
+# ('Room 205' -> 2). Special prices apply when the check-in falls in their
+# event window. Maintenance blocks are stored as 'maintained' bookings and
+# hold the room like a reservation does.
+AVAILABLE_ROOMS_SQL = """
+    SELECT
+        r.room_id,
+        r.name AS room_name,
+        rt.type AS room_type,
+        COALESCE(
+            NULLIF(substring(r.location from '[0-9]+'), '')::integer,
+            NULLIF(substring(r.name from '([0-9]+)[0-9]{2}$'), '')::integer,
+            0
+        ) AS floor,
+        lower(split_part(COALESCE(r.room_view, ''), ' ', 1)) AS view,
+        COALESCE(
+            rt.max_guests,
+            COALESCE(r.number_of_single_beds, 0) + 2 * COALESCE(r.number_of_double_beds, 0)
+        ) AS capacity,
+        COALESCE(r.number_of_single_beds, 0) AS single_beds,
+        COALESCE(r.number_of_double_beds, 0) AS double_beds,
+        price.price
+    FROM Room r
+    JOIN RoomType rt ON rt.type_id = r.type_id
+    LEFT JOIN Hotel h ON h.hotel_id = rt.hotel_id
+    JOIN LATERAL (
+        SELECT MIN(
+            CASE
+                WHEN rp.special_price IS NOT NULL AND $1::date BETWEEN rp.start_date AND rp.end_date
+                THEN rp.special_price
+                ELSE rp.basic_price
+            END
+        ) AS price
+        FROM RoomPrice rp
+        WHERE rp.type_id = r.type_id
+    ) AS price ON price.price IS NOT NULL
+    WHERE r.status = 1
+      AND rt.availability
+      AND (h.hotel_id IS NULL OR h.status = 1)
+      AND ($3::integer IS NULL OR rt.hotel_id = $3)
+      AND NOT EXISTS (
+          SELECT 1 FROM Booking b
+          WHERE b.room_id = r.room_id
+            AND b.status IN ('pending', 'accepted', 'cancel requested', 'maintained')
+            AND b.check_in_date < $2
+            AND b.check_out_date > $1
+      )
+"""
+
+
+class RoomInventory:
+    """Available rooms as aligned column arrays"""
+
+    def __init__(
+        self,
+        room_numbers: Iterable[str],
+        room_types: Iterable[str],
+        floors: Iterable[int],
+        prices: Iterable[float],
+        views: Iterable[str],
+        capacity: Iterable[int],
+        single_beds: Optional[Iterable[int]] = None,
+        double_beds: Optional[Iterable[int]] = None,
+        features: Optional[List[List[str]]] = None,
+    ):
+        self.room_numbers = np.asarray(list(room_numbers), dtype=str)
+        self.room_types = np.asarray(list(room_types), dtype=str)
+        self.floors = np.asarray(list(floors), dtype=np.int64)
+        self.prices = np.asarray(list(prices), dtype=np.float64)
+        self.views = np.asarray(list(views), dtype=str)
+        self.capacity = np.asarray(list(capacity), dtype=np.int64)
+        n = len(self.room_numbers)
+        self.single_beds = np.zeros(n, dtype=np.int64) if single_beds is None else np.asarray(list(single_beds))
+        self.double_beds = np.zeros(n, dtype=np.int64) if double_beds is None else np.asarray(list(double_beds))
+        self._features = features
+
+    def __len__(self) -> int:
+        return len(self.room_numbers)
+
+    @classmethod
+    def from_rows(cls, rows: List[Any]) -> "RoomInventory":
+        """Build from AVAILABLE_ROOMS_SQL rows"""
+        return cls(
+            room_numbers=[r['room_name'] or str(r['room_id']) for r in rows],
+            room_types=[r['room_type'] or '' for r in rows],
+            floors=[r['floor'] for r in rows],
+            prices=[r['price'] for r in rows],
+            views=[r['view'] for r in rows],
+            capacity=[r['capacity'] for r in rows],
+            single_beds=[r['single_beds'] for r in rows],
+            double_beds=[r['double_beds'] for r in rows],
+        )
+
+    @classmethod
+    def from_mock(cls, rooms: List[Dict[str, Any]]) -> "RoomInventory":
+        """Build from mock room dicts (number, type, floor, price, features, capacity)"""
+        return cls(
+            room_numbers=[r['number'] for r in rooms],
+            room_types=[r['type'] for r in rooms],
+            floors=[r['floor'] for r in rooms],
+            prices=[r['price'] for r in rooms],
+            views=[next((f[:-5] for f in r['features'] if f.endswith('_view')), '') for r in rooms],
+            capacity=[r.get('capacity', 2) for r in rooms],
+            features=[list(r['features']) for r in rooms],
+        )
+
+    def features(self, position: int) -> List[str]:
+        """Feature tags of one room"""
+        if self._features is not None:
+            return self._features[position]
+        tags = [f"{self.views[position]}_view"] if self.views[position] else []
+        if self.double_beds[position] > 0:
+            tags.append("double_bed" if self.double_beds[position] == 1 else "double_beds")
+        if self.single_beds[position] > 1:
+            tags.append("twin_beds")
+        elif self.single_beds[position] == 1:
+            tags.append("single_bed")
+        return tags
+
+
+def score_rooms(
+    inventory: RoomInventory,
+    budget: Optional[str] = None,
+    view: Optional[str] = None,
+    floor: Optional[str] = None,
+    party_size: int = 1,
+    has_preferences: bool = True,
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Vectorized preference matching over the inventory
+
+    Args:
+        inventory: Available rooms
+        budget: 'low' | 'medium' | 'high' (None means medium)
+        view: Preferred view ('ocean', 'city', ...) or None
+        floor: 'low' | 'medium' | 'high' or None
+        party_size: Guests that must fit in the room
+        has_preferences: False scores every room NO_PREFERENCE_SCORE
+
+    Returns:
+        (eligible mask, dict of budget/view/floor/overall score arrays)
+    """
+    n = len(inventory)
+    eligible = inventory.capacity >= party_size
+
+    if not has_preferences:
+        constant = np.full(n, NO_PREFERENCE_SCORE)
+        return eligible, {"budget": constant, "view": constant, "floor": constant, "overall": constant}
+
+    low, high = BUDGET_RANGES.get(budget or "medium", (0, 10_000_000))
+    budget_score = np.where((inventory.prices >= low) & (inventory.prices <= high), 1.0, BUDGET_MISS_SCORE)
+
+    if view:
+        view_score = np.where(inventory.views == view, 1.0, VIEW_MISS_SCORE)
+    else:
+        view_score = np.ones(n)
+
+    if floor:
+        low, high = FLOOR_RANGES[floor]
+        floor_score = np.where((inventory.floors >= low) & (inventory.floors <= high), 1.0, FLOOR_MISS_SCORE)
+    else:
+        floor_score = np.full(n, NO_PREFERENCE_SCORE)
+
+    overall = budget_score * BUDGET_WEIGHT + view_score * VIEW_WEIGHT + floor_score * FLOOR_WEIGHT
+    return eligible, {"budget": budget_score, "view": view_score, "floor": floor_score, "overall": overall}
+
+
+def top_k_rooms(overall: np.ndarray, eligible: np.ndarray, prices: np.ndarray, k: int) -> np.ndarray:
+    """
+    Positions of the k best eligible rooms, best first
+
+    Ties on the overall score go to the cheaper room.
+    """
+    candidates = np.flatnonzero(eligible)
+    k = min(k, len(candidates))
+    if k == 0:
+        return candidates
+
+    # Rounded like the response, so ties are ties the guest would see
+    scores = np.round(overall[candidates], 2)
+    if k < len(candidates):
+        # Keep every room tied with the k-th score, then order exactly
+        kth = scores[np.argpartition(-scores, k - 1)[:k]].min()
+        keep = scores >= kth
+        candidates, scores = candidates[keep], scores[keep]
+    order = np.lexsort((prices[candidates], -scores))[:k]
+    return candidates[order]
+
+
+class RoomInventoryLoader:
+    """
+    One-query access to the rooms available for a stay
+
+    Usage:
+        loader = RoomInventoryLoader(db_pool=pool)
+        inventory = await loader.load(date(2025, 2, 1), date(2025, 2, 3))
+    """
+
+    def __init__(self, settings: Optional[Settings] = None, db_pool: Optional[asyncpg.Pool] = None):
+        """
+        Initialize room inventory loader
+
+        Args:
+            settings: Application settings (if None, will call get_settings())
+            db_pool: asyncpg pool (created in initialize() if not given)
+        """
+        self.settings = settings or get_settings()
+        self.db_pool = db_pool
+
+    @property
+    def is_connected(self) -> bool:
+        return self.db_pool is not None
+
+    async def initialize(self):
+        """Create the database pool if it was not injected"""
+        if self.db_pool is None:
+            self.db_pool = await asyncpg.create_pool(
+                self.settings.asyncpg_url, min_size=1, max_size=4, timeout=10
+            )
+        logger.info("✅ Room inventory loader connected to PostgreSQL")
+
+    async def shutdown(self):
+        """Close the database pool"""
+        if self.db_pool is not None:
+            await self.db_pool.close()
+            self.db_pool = None
+
+    async def load(self, check_in: date, check_out: date, hotel_id: Optional[int] = None) -> RoomInventory:
+        """
+        Rooms free for the whole stay
+
+        Args:
+            check_in: Arrival date
+            check_out: Departure date
+            hotel_id: Restrict to one hotel (None for all)
+
+        Returns:
+            RoomInventory of available rooms
+        """
+        if self.db_pool is None:
+            raise RuntimeError("RoomInventoryLoader is not initialized")
+        rows = await self.db_pool.fetch(AVAILABLE_ROOMS_SQL, check_in, check_out, hotel_id)
+        return RoomInventory.from_rows(rows)
+
+
+# Singleton
+_room_inventory_loader: Optional[RoomInventoryLoader] = None
+
+
+def get_room_inventory_loader() -> RoomInventoryLoader:
+    """Get or create room inventory loader instance (connected in the ML lifespan)"""
+    global _room_inventory_loader
+    if _room_inventory_loader is None:
+        _room_inventory_loader = RoomInventoryLoader()
+    return _room_inventory_loader
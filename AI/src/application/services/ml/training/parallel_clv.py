@@ -0,0 +1,590 @@
+"""
+Parallel Training Orchestrator for the CLV Models
+
+Trains the booking frequency, booking value and retention models of
+train_clv.py concurrently, with a random hyperparameter search per model:
+
+1. Features and targets are prepared once (CLVModelTrainer) and written to
+   .npy files that every worker memory-maps read-only, so trials share one
+   copy of the matrix through the page cache instead of pickling DataFrames
+2. Trials of all three models run in one process pool; each trial fits on
+   a fixed train/validation split with XGBoost early stopping
+3. A model's search stops once `patience` finished trials in a row have
+   not improved its best validation loss; its queued trials are dropped
+4. The best parameters are refitted on the full training split with the
+   early-stopped number of rounds, evaluated on the test split and saved
+   under the same artifact names as train_clv.py, so the model registry
+   hot-loads them
+
+Trial 0 of every model is the fixed parameter set train_clv.py uses, so the
+search never ships a model worse (on validation loss) than the sequential
+trainer would have.
+
+Per-trial fit and queue times are logged to MLflow when it is available.
+
+Usage:
+    python -m src.application.services.ml.training.parallel_clv \
+        --data-path data/bookings.csv \
+        --output-dir models/clv \
+        --n-trials 20 \
+        --max-workers 4 \
+        --log-mlflow
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import (
+    f1_score,
+    mean_absolute_error,
+    mean_squared_error,
+    precision_score,
+    r2_score,
+    recall_score,
+    roc_auc_score,
+)
+
+from src.application.ml_models.model_registry import save_model_artifact
+
+# MLflow for experiment tracking (optional)
+try:
+    import mlflow
+    MLFLOW_AVAILABLE = True
+except ImportError:
+    MLFLOW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+# Boosting rounds are capped here and cut by early stopping
+MAX_ESTIMATORS = 1000
+EARLY_STOPPING_ROUNDS = 20
+
+# Share of the training split held out for early stopping and selection
+VALIDATION_SIZE = 0.2
+
+# Parameters shared by every model (the train_clv.py values)
+BASE_PARAMS = {
+    'learning_rate': 0.05,
+    'min_child_weight': 3,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8,
+    'gamma': 0.1,
+    'reg_alpha': 0.1,
+    'reg_lambda': 1.0,
+    'random_state': 42,
+}
+
+# Random search space; trial 0 uses the model's default parameters instead
+SEARCH_SPACE = {
+    'max_depth': [3, 4, 5, 6, 7, 8],
+    'learning_rate': [0.02, 0.03, 0.05, 0.08, 0.1],
+    'min_child_weight': [1, 3, 5, 10],
+    'subsample': [0.6, 0.7, 0.8, 0.9, 1.0],
+    'colsample_bytree': [0.5, 0.6, 0.8, 1.0],
+    'gamma': [0.0, 0.1, 0.5, 1.0],
+    'reg_alpha': [0.0, 0.1, 1.0],
+    'reg_lambda': [0.5, 1.0, 2.0, 5.0],
+}
+
+# Column of each target in the shared target matrix
+TARGET_COLUMNS = ['future_bookings_per_year', 'future_avg_booking_value', 'is_retained']
+
+
+# The three CLV models: estimator type, target and default parameters.
+# active_only trains on guests with future bookings (booking value model).
+MODEL_SPECS = [
+    {
+        'name': 'booking_frequency',
+        'artifact_name': 'clv_booking_frequency_v1.5.pkl',
+        'target': 'future_bookings_per_year',
+        'classifier': False,
+        'active_only': False,
+        'default_params': {**BASE_PARAMS, 'objective': 'reg:squarederror', 'max_depth': 6},
+    },
+    {
+        'name': 'booking_value',
+        'artifact_name': 'clv_booking_value_v1.5.pkl',
+        'target': 'future_avg_booking_value',
+        'classifier': False,
+        'active_only': True,
+        'default_params': {**BASE_PARAMS, 'objective': 'reg:squarederror', 'max_depth': 5},
+    },
+    {
+        'name': 'retention',
+        'artifact_name': 'clv_retention_v1.5.pkl',
+        'target': 'is_retained',
+        'classifier': True,
+        'active_only': False,
+        'default_params': {**BASE_PARAMS, 'objective': 'binary:logistic', 'max_depth': 5},
+    },
+]
+
+
+# ============================================================================
+# Shared arrays
+# ============================================================================
+
+def write_shared_arrays(directory: Path, arrays: Dict[str, np.ndarray]) -> Dict[str, str]:
+    """
+    Write arrays as .npy files for memory-mapped reads in the workers
+
+    Returns:
+        Dict array name -> file path
+    """
+    paths = {}
+    for name, array in arrays.items():
+        path = directory / f"{name}.npy"
+        out = np.lib.format.open_memmap(path, mode='w+', dtype=array.dtype, shape=array.shape)
+        out[...] = array
+        out.flush()
+        del out
+        paths[name] = str(path)
+    return paths
+
+
+# Per-process cache of opened memmaps (a worker runs many trials)
+_shared_arrays: Dict[str, np.ndarray] = {}
+
+
+def open_shared_array(path: str) -> np.ndarray:
+    """Read-only memmap of a shared .npy file, opened once per process"""
+    array = _shared_arrays.get(path)
+    if array is None:
+        array = np.load(path, mmap_mode='r')
+        _shared_arrays[path] = array
+    return array
+
+
+# ============================================================================
+# Trials (run in worker processes)
+# ============================================================================
+
+def _estimator(spec: Dict[str, Any], params: Dict[str, Any], n_estimators: int, n_jobs: int, early_stopping: bool):
+    kwargs = {**params, 'n_estimators': n_estimators, 'n_jobs': n_jobs}
+    if early_stopping:
+        kwargs['early_stopping_rounds'] = EARLY_STOPPING_ROUNDS
+    if spec['classifier']:
+        return xgb.XGBClassifier(**kwargs)
+    return xgb.XGBRegressor(**kwargs)
+
+
+def _fit_trial(
+    spec: Dict[str, Any],
+    params: Dict[str, Any],
+    paths: Dict[str, str],
+    fit_rows: np.ndarray,
+    val_rows: np.ndarray,
+    n_jobs: int,
+) -> Dict[str, Any]:
+    """
+    Fit one parameter set with early stopping on the validation rows
+
+    Returns:
+        Dict with val_loss, best_iteration and fit_seconds
+    """
+    X = open_shared_array(paths['X_train'])
+    y = open_shared_array(paths['y_train'])[:, TARGET_COLUMNS.index(spec['target'])]
+
+    start = time.perf_counter()
+    model = _estimator(spec, params, MAX_ESTIMATORS, n_jobs, early_stopping=True)
+    model.fit(
+        X[fit_rows], y[fit_rows],
+        eval_set=[(X[val_rows], y[val_rows])],
+        verbose=False,
+    )
+    return {
+        'val_loss': float(model.best_score),
+        'best_iteration': int(model.best_iteration),
+        'fit_seconds': time.perf_counter() - start,
+    }
+
+
+def _fit_final(
+    spec: Dict[str, Any],
+    params: Dict[str, Any],
+    n_estimators: int,
+    paths: Dict[str, str],
+    train_rows: np.ndarray,
+    test_rows: np.ndarray,
+    artifact_path: str,
+    n_jobs: int,
+) -> Dict[str, Any]:
+    """
+    Refit the selected parameters on the full training split and save
+
+    Returns:
+        Dict with test metrics, fit_seconds and model_path
+    """
+    column = TARGET_COLUMNS.index(spec['target'])
+    X_train = open_shared_array(paths['X_train'])
+    y_train = open_shared_array(paths['y_train'])[:, column]
+    X_test = open_shared_array(paths['X_test'])
+    y_test = open_shared_array(paths['y_test'])[:, column]
+
+    start = time.perf_counter()
+    model = _estimator(spec, params, n_estimators, n_jobs, early_stopping=False)
+    model.fit(X_train[train_rows], y_train[train_rows], verbose=False)
+    fit_seconds = time.perf_counter() - start
+
+    X_test, y_test = X_test[test_rows], y_test[test_rows]
+    if spec['classifier']:
+        metrics = classification_metrics(y_test, model.predict(X_test), model.predict_proba(X_test)[:, 1])
+    else:
+        metrics = regression_metrics(y_test, model.predict(X_test))
+
+    save_model_artifact(model, Path(artifact_path))
+    return {'metrics': metrics, 'fit_seconds': fit_seconds, 'model_path': artifact_path}
+
+
+def regression_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> Dict[str, float]:
+    """Test metrics of a regressor (MAPE only over non-zero targets)"""
+    nonzero = y_true != 0
+    return {
+        'test_mae': float(mean_absolute_error(y_true, y_pred)),
+        'test_rmse': float(np.sqrt(mean_squared_error(y_true, y_pred))),
+        'test_r2': float(r2_score(y_true, y_pred)),
+        'test_mape': float(
+            np.mean(np.abs((y_true[nonzero] - y_pred[nonzero]) / y_true[nonzero])) * 100
+        ) if nonzero.any() else 0.0,
+    }
+
+
+def classification_metrics(y_true: np.ndarray, y_pred: np.ndarray, y_proba: np.ndarray) -> Dict[str, float]:
+    """Test metrics of a binary classifier (AUC is NaN for a single class)"""
+    return {
+        'test_accuracy': float((y_true == y_pred).mean()),
+        'test_precision': float(precision_score(y_true, y_pred, zero_division=0)),
+        'test_recall': float(recall_score(y_true, y_pred, zero_division=0)),
+        'test_f1': float(f1_score(y_true, y_pred, zero_division=0)),
+        'test_auc': float(roc_auc_score(y_true, y_proba)) if len(np.unique(y_true)) > 1 else float('nan'),
+    }
+
+
+# ============================================================================
+# Orchestrator
+# ============================================================================
+
+class _Search:
+    """Search state of one model"""
+
+    def __init__(
+        self,
+        spec: Dict[str, Any],
+        pending: List[Tuple[int, Dict[str, Any]]],
+        fit_rows: np.ndarray,
+        val_rows: np.ndarray,
+    ):
+        self.spec = spec
+        self.pending = pending
+        self.fit_rows = fit_rows
+        self.val_rows = val_rows
+        self.best: Optional[Dict[str, Any]] = None
+        self.since_improvement = 0
+        self.trials: List[Dict[str, Any]] = []
+
+
+class ParallelCLVTrainer:
+    """
+    Trains the three CLV models concurrently with hyperparameter search
+
+    Usage:
+        trainer = ParallelCLVTrainer(output_dir="models/clv", n_trials=20, max_workers=4)
+        results = trainer.train_all_models("data/bookings.csv")
+        results['retention']['metrics']['test_auc']
+    """
+
+    def __init__(
+        self,
+        output_dir: str = "models/clv",
+        n_trials: int = 20,
+        patience: int = 5,
+        max_workers: Optional[int] = None,
+        log_mlflow: bool = False,
+        random_state: int = 42,
+    ):
+        """
+        Initialize parallel trainer
+
+        Args:
+            output_dir: Directory to save trained models
+            n_trials: Maximum parameter sets tried per model
+            patience: Finished trials without improvement before a model's
+                search stops
+            max_workers: Worker processes (default: CPU count)
+            log_mlflow: Whether to log trials to MLflow
+            random_state: Seed for the search and the validation split
+        """
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.n_trials = max(1, n_trials)
+        self.patience = max(1, patience)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.log_mlflow = log_mlflow and MLFLOW_AVAILABLE
+        self.random_state = random_state
+
+        # Split cores between workers so trials do not oversubscribe
+        self.threads_per_worker = max(1, (os.cpu_count() or 1) // self.max_workers)
+
+        if self.log_mlflow:
+            mlflow.set_experiment("clv_training")
+
+    def sample_params(self, spec: Dict[str, Any], rng: np.random.Generator) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Parameter sets for one model: the defaults, then random draws
+
+        Returns:
+            List of (trial_id, params)
+        """
+        trials = [(0, dict(spec['default_params']))]
+        for trial_id in range(1, self.n_trials):
+            params = dict(spec['default_params'])
+            for name, values in SEARCH_SPACE.items():
+                params[name] = values[rng.integers(len(values))]
+            trials.append((trial_id, params))
+        return trials
+
+    def train_all_models(self, data_path: str, test_size: float = 0.2) -> Dict[str, Any]:
+        """
+        Prepare data once and train all three CLV models in parallel
+
+        Args:
+            data_path: Path to booking data CSV
+            test_size: Test set proportion
+
+        Returns:
+            Dict model name -> {metrics, model_path, params, n_estimators, trials}
+        """
+        from src.application.services.ml.training.train_clv import CLVModelTrainer
+
+        train_df, test_df = CLVModelTrainer(
+            output_dir=str(self.output_dir)
+        ).load_and_prepare_data(data_path, test_size)
+        return self.train(train_df, test_df)
+
+    def train(self, train_df: pd.DataFrame, test_df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Search and train all three CLV models on prepared splits
+
+        Args:
+            train_df: Training features with target columns
+            test_df: Test features with target columns
+
+        Returns:
+            Dict model name -> {metrics, model_path, params, n_estimators, trials}
+        """
+        from src.application.services.ml.clv_feature_engineering import get_feature_engineer
+        feature_names = get_feature_engineer().feature_names
+
+        start = time.perf_counter()
+        shared_dir = Path(tempfile.mkdtemp(prefix="clv_shared_"))
+        try:
+            paths = write_shared_arrays(shared_dir, {
+                'X_train': train_df[feature_names].to_numpy(dtype=np.float32),
+                'y_train': train_df[TARGET_COLUMNS].to_numpy(dtype=np.float32),
+                'X_test': test_df[feature_names].to_numpy(dtype=np.float32),
+                'y_test': test_df[TARGET_COLUMNS].to_numpy(dtype=np.float32),
+            })
+            y_train = train_df[TARGET_COLUMNS].to_numpy()
+            y_test = test_df[TARGET_COLUMNS].to_numpy()
+
+            # Spawned workers: forking after OpenMP initialization can deadlock
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context) as pool:
+                searches = self._run_searches(pool, paths, y_train)
+                results = self._fit_finals(pool, paths, searches, y_train, y_test)
+        finally:
+            shutil.rmtree(shared_dir, ignore_errors=True)
+
+        elapsed = time.perf_counter() - start
+        logger.info(f"✅ Trained {len(results)} CLV models in {elapsed:.1f}s ({self.max_workers} workers)")
+        for name, result in results.items():
+            logger.info(
+                f"  {name}: {len(result['trials'])} trials, "
+                f"{result['n_estimators']} rounds, {result['metrics']}"
+            )
+        return results
+
+    def _rows(self, spec: Dict[str, Any], targets: np.ndarray) -> np.ndarray:
+        """Row indices a model trains/evaluates on"""
+        if spec['active_only']:
+            return np.flatnonzero(targets[:, TARGET_COLUMNS.index('future_avg_booking_value')] > 0)
+        return np.arange(len(targets))
+
+    def _run_searches(
+        self,
+        pool: ProcessPoolExecutor,
+        paths: Dict[str, str],
+        y_train: np.ndarray,
+    ) -> Dict[str, _Search]:
+        """Run all models' trials through the pool, stopping each search on patience"""
+        rng = np.random.default_rng(self.random_state)
+        searches = {}
+        for spec in MODEL_SPECS:
+            rows = self._rows(spec, y_train)
+            rows = rows[rng.permutation(len(rows))]
+            n_val = max(1, int(len(rows) * VALIDATION_SIZE))
+            params = self.sample_params(spec, rng)
+            if spec['classifier']:
+                params = [(i, {**p, 'scale_pos_weight': self._scale_pos_weight(y_train, rows)}) for i, p in params]
+            searches[spec['name']] = _Search(spec, params, fit_rows=np.sort(rows[n_val:]), val_rows=np.sort(rows[:n_val]))
+
+        running: Dict[Future, Tuple[_Search, int, Dict[str, Any], float]] = {}
+
+        def submit_next():
+            # Round-robin over models so all three progress together
+            while len(running) < self.max_workers:
+                ready = [s for s in searches.values() if s.pending]
+                if not ready:
+                    return
+                for search in ready:
+                    if len(running) >= self.max_workers:
+                        return
+                    trial_id, params = search.pending.pop(0)
+                    future = pool.submit(
+                        _fit_trial, search.spec, params, paths,
+                        search.fit_rows, search.val_rows, self.threads_per_worker,
+                    )
+                    running[future] = (search, trial_id, params, time.perf_counter())
+
+        submit_next()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                search, trial_id, params, submitted_at = running.pop(future)
+                result = future.result()
+                result.update(
+                    trial_id=trial_id,
+                    params=params,
+                    wall_seconds=time.perf_counter() - submitted_at,
+                )
+                result['queue_seconds'] = max(0.0, result['wall_seconds'] - result['fit_seconds'])
+                self._record_trial(search, result)
+            submit_next()
+
+        return searches
+
+    def _record_trial(self, search: _Search, result: Dict[str, Any]):
+        """Track the best trial and stop a search that stopped improving"""
+        search.trials.append(result)
+        if search.best is None or result['val_loss'] < search.best['val_loss']:
+            search.best = result
+            search.since_improvement = 0
+        else:
+            search.since_improvement += 1
+            if search.since_improvement >= self.patience and search.pending:
+                logger.info(
+                    f"⏹️ {search.spec['name']}: no improvement in {self.patience} trials, "
+                    f"skipping {len(search.pending)} remaining"
+                )
+                search.pending.clear()
+
+        logger.info(
+            f"{search.spec['name']} trial {result['trial_id']}: val_loss={result['val_loss']:.4f} "
+            f"rounds={result['best_iteration'] + 1} fit={result['fit_seconds']:.2f}s"
+        )
+        if self.log_mlflow:
+            with mlflow.start_run(run_name=f"{search.spec['name']}_trial_{result['trial_id']}"):
+                mlflow.log_params({k: v for k, v in result['params'].items() if k != 'random_state'})
+                mlflow.log_metrics({
+                    'val_loss': result['val_loss'],
+                    'best_iteration': result['best_iteration'],
+                    'fit_seconds': result['fit_seconds'],
+                    'queue_seconds': result['queue_seconds'],
+                    'wall_seconds': result['wall_seconds'],
+                })
+
+    def _fit_finals(
+        self,
+        pool: ProcessPoolExecutor,
+        paths: Dict[str, str],
+        searches: Dict[str, _Search],
+        y_train: np.ndarray,
+        y_test: np.ndarray,
+    ) -> Dict[str, Any]:
+        """Refit each model's best parameters on the full training split"""
+        futures = {}
+        for name, search in searches.items():
+            n_estimators = search.best['best_iteration'] + 1
+            futures[name] = pool.submit(
+                _fit_final, search.spec, search.best['params'], n_estimators, paths,
+                self._rows(search.spec, y_train), self._rows(search.spec, y_test),
+                str(self.output_dir / search.spec['artifact_name']), self.threads_per_worker,
+            )
+
+        results = {}
+        for name, future in futures.items():
+            search = searches[name]
+            final = future.result()
+            results[name] = {
+                'metrics': final['metrics'],
+                'model_path': final['model_path'],
+                'params': search.best['params'],
+                'n_estimators': search.best['best_iteration'] + 1,
+                'trials': sorted(search.trials, key=lambda t: t['trial_id']),
+            }
+            if self.log_mlflow:
+                with mlflow.start_run(run_name=name):
+                    mlflow.log_params({k: v for k, v in search.best['params'].items() if k != 'random_state'})
+                    mlflow.log_metrics({
+                        **{k: v for k, v in final['metrics'].items() if np.isfinite(v)},
+                        'final_fit_seconds': final['fit_seconds'],
+                        'n_trials': len(search.trials),
+                    })
+        return results
+
+    @staticmethod
+    def _scale_pos_weight(y_train: np.ndarray, rows: np.ndarray) -> float:
+        retained = y_train[rows, TARGET_COLUMNS.index('is_retained')]
+        pos_count = int((retained == 1).sum())
+        neg_count = int((retained == 0).sum())
+        return neg_count / pos_count if pos_count > 0 else 1.0
+
+
+def main():
+    """Parallel CLV training script"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description='Train CLV models in parallel with hyperparameter search')
+    parser.add_argument('--data-path', type=str, required=True, help='Path to booking data CSV file')
+    parser.add_argument('--output-dir', type=str, default='models/clv', help='Directory to save trained models')
+    parser.add_argument('--test-size', type=float, default=0.2, help='Proportion of data for testing (default: 0.2)')
+    parser.add_argument('--n-trials', type=int, default=20, help='Maximum trials per model (default: 20)')
+    parser.add_argument('--patience', type=int, default=5, help='Trials without improvement before stopping (default: 5)')
+    parser.add_argument('--max-workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--log-mlflow', action='store_true', help='Log trials to MLflow')
+
+    args = parser.parse_args()
+
+    trainer = ParallelCLVTrainer(
+        output_dir=args.output_dir,
+        n_trials=args.n_trials,
+        patience=args.patience,
+        max_workers=args.max_workers,
+        log_mlflow=args.log_mlflow,
+    )
+
+    try:
+        trainer.train_all_models(data_path=args.data_path, test_size=args.test_size)
+        logger.info("\n✅ Training completed successfully!")
+    except Exception as e:
+        logger.error(f"❌ Training failed: {e}", exc_info=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
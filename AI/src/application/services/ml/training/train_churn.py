@@ -0,0 +1,514 @@
+"""
+Training Script for the Churn (Cancellation) Model
+
+Trains the LightGBM binary classifier served by ChurnPredictor on labelled
+bookings (churned = 1 when the booking was cancelled):
+
+1. Raw booking features are encoded column-wise with
+   ChurnFeatureEncoder.encode_frame into the 25-feature matrix
+2. The train/validation split is time-ordered (the latest bookings
+   validate) and saved as LightGBM binary Dataset files, keyed by the
+   source file and the feature definition; a rerun on the same export
+   skips parsing, encoding and histogram binning
+3. Full training early-stops on validation AUC and writes
+   ``churn_predictor_v<major>.0.pkl``
+4. Incremental training loads the previous booster and boosts extra trees
+   on bookings labelled since the last run (init_model warm start), then
+   writes ``churn_predictor_v<major>.<minor+1>.pkl``
+
+Artifacts hold a BoosterClassifier, so the model registry hot-loads them
+and ChurnPredictor calls predict_proba as before.
+
+Usage:
+    python -m src.application.services.ml.training.train_churn \
+        --data-path data/churn_bookings.csv \
+        --output-dir models/churn \
+        --log-mlflow
+
+    # Daily: add trees for bookings labelled since the last run
+    python -m src.application.services.ml.training.train_churn \
+        --data-path data/churn_bookings.csv \
+        --output-dir models/churn \
+        --incremental
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from src.application.ml_models.model_registry import (
+    ARTIFACT_PATTERN,
+    BoosterClassifier,
+    parse_version,
+    save_model_artifact,
+)
+from src.application.services.ml.feature_engineering import CHURN_FEATURES, ChurnFeatureEncoder
+
+# MLflow for experiment tracking (optional)
+try:
+    import mlflow
+    MLFLOW_AVAILABLE = True
+except ImportError:
+    MLFLOW_AVAILABLE = False
+    logging.warning("MLflow not available. Experiment tracking disabled.")
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "churn_predictor"
+
+# Version served before this pipeline existed; the first full run is 2.0
+BASE_VERSION = (1, 8)
+
+STATE_FILENAME = "churn_training_state.json"
+LABEL_COLUMN = "churned"
+DATE_COLUMN = "booking_date"
+
+# Encoded categorical columns (codes from ChurnFeatureEncoder)
+CATEGORICAL_FEATURES = [
+    'room_type_encoded',
+    'payment_method_encoded',
+    'booking_source_encoded',
+    'loyalty_tier_encoded',
+    'season_encoded',
+]
+
+# Binning parameters are stored in the binary Dataset files
+DATASET_PARAMS = {
+    'max_bin': 255,
+    'verbose': -1,
+}
+
+# Bump when the encoding or the split changes; cached Datasets are rebuilt
+DATASET_FORMAT_VERSION = 1
+
+MODEL_PARAMS = {
+    'objective': 'binary',
+    'metric': ['auc', 'binary_logloss'],
+    'boosting_type': 'gbdt',
+    'num_leaves': 31,
+    'learning_rate': 0.05,
+    'feature_fraction': 0.9,
+    'bagging_fraction': 0.8,
+    'bagging_freq': 5,
+    'seed': 42,
+    'verbose': -1,
+}
+NUM_BOOST_ROUND = 500
+EARLY_STOPPING_ROUNDS = 30
+
+# Warm starts add a few trees with a smaller step
+INCREMENTAL_ROUNDS = 100
+INCREMENTAL_LEARNING_RATE = 0.02
+
+
+class ChurnModelTrainer:
+    """
+    Trainer for the churn prediction model
+
+    Full runs train from scratch on cached binary Datasets; incremental
+    runs continue boosting the previous model on newly labelled bookings.
+    """
+
+    def __init__(
+        self,
+        output_dir: str = "models/churn",
+        cache_dir: Optional[str] = None,
+        log_mlflow: bool = False
+    ):
+        """
+        Initialize trainer
+
+        Args:
+            output_dir: Directory to save trained models and training state
+            cache_dir: Directory for binary Dataset files
+                (default: <output_dir>/.dataset_cache)
+            log_mlflow: Whether to log experiments to MLflow
+        """
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_dir = Path(cache_dir) if cache_dir else self.output_dir / ".dataset_cache"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self.log_mlflow = log_mlflow and MLFLOW_AVAILABLE
+
+        if self.log_mlflow:
+            mlflow.set_experiment("churn_training")
+
+    # ==================== Data ====================
+
+    def load_and_prepare_data(
+        self,
+        data_path: str,
+        test_size: float = 0.2
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Load labelled bookings and split them by booking date
+
+        Args:
+            data_path: CSV with booking_date, churned and raw churn features
+            test_size: Proportion of the latest bookings used for validation
+
+        Returns:
+            Tuple of (train_df, valid_df)
+        """
+        logger.info(f"Loading data from {data_path}")
+        df = pd.read_csv(data_path)
+        df[DATE_COLUMN] = pd.to_datetime(df[DATE_COLUMN])
+        df = df.sort_values(DATE_COLUMN, kind='stable').reset_index(drop=True)
+
+        train_df, valid_df = self._time_split(df, test_size)
+        logger.info(
+            f"Loaded {len(df)} bookings: {len(train_df)} train, {len(valid_df)} validation "
+            f"(churn rate {df[LABEL_COLUMN].mean():.2%})"
+        )
+        return train_df, valid_df
+
+    @staticmethod
+    def _time_split(df: pd.DataFrame, test_size: float) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Latest test_size of a date-sorted frame validates"""
+        n_valid = max(1, int(round(len(df) * test_size)))
+        return df.iloc[:-n_valid], df.iloc[-n_valid:]
+
+    @staticmethod
+    def _dataset(df: pd.DataFrame, reference: Optional[lgb.Dataset] = None) -> lgb.Dataset:
+        """Encoded LightGBM Dataset for labelled bookings"""
+        return lgb.Dataset(
+            ChurnFeatureEncoder.encode_frame(df),
+            label=df[LABEL_COLUMN].to_numpy(dtype=np.float32),
+            feature_name=list(CHURN_FEATURES),
+            categorical_feature=CATEGORICAL_FEATURES,
+            reference=reference,
+            params=DATASET_PARAMS,
+            free_raw_data=False,
+        )
+
+    def _cache_key(self, data_path: str, test_size: float) -> str:
+        """Identity of a data export + feature definition + split"""
+        stat = Path(data_path).stat()
+        fingerprint = json.dumps({
+            'path': str(Path(data_path).resolve()),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'test_size': test_size,
+            'features': CHURN_FEATURES,
+            'dataset_params': DATASET_PARAMS,
+            'format': DATASET_FORMAT_VERSION,
+        }, sort_keys=True)
+        return hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
+
+    def build_datasets(
+        self,
+        data_path: str,
+        test_size: float = 0.2
+    ) -> Tuple[lgb.Dataset, lgb.Dataset, Dict[str, Any]]:
+        """
+        Train/validation Datasets, from the binary cache when possible
+
+        Args:
+            data_path: CSV with labelled bookings
+            test_size: Proportion of the latest bookings used for validation
+
+        Returns:
+            Tuple of (train_set, valid_set, meta) where meta has the row
+            counts, trained_until and cache_hit
+        """
+        key = self._cache_key(data_path, test_size)
+        train_path = self.cache_dir / f"churn_{key}_train.bin"
+        valid_path = self.cache_dir / f"churn_{key}_valid.bin"
+        meta_path = self.cache_dir / f"churn_{key}.json"
+
+        if train_path.exists() and valid_path.exists() and meta_path.exists():
+            meta = json.loads(meta_path.read_text())
+            train_set = lgb.Dataset(str(train_path), params=DATASET_PARAMS)
+            valid_set = lgb.Dataset(str(valid_path), reference=train_set, params=DATASET_PARAMS)
+            logger.info(f"✅ Loaded cached churn datasets {key} ({meta['n_train']} train rows)")
+            return train_set, valid_set, {**meta, 'cache_hit': True}
+
+        start = time.perf_counter()
+        train_df, valid_df = self.load_and_prepare_data(data_path, test_size)
+        train_set = self._dataset(train_df).construct()
+        valid_set = self._dataset(valid_df, reference=train_set).construct()
+
+        # Write under temporary names so a crash never leaves a partial cache
+        for dataset, path in ((train_set, train_path), (valid_set, valid_path)):
+            tmp_path = path.with_name(f".{path.name}.tmp")
+            dataset.save_binary(str(tmp_path))
+            os.replace(tmp_path, path)
+
+        meta = {
+            'n_train': len(train_df),
+            'n_valid': len(valid_df),
+            'trained_until': train_df[DATE_COLUMN].max().isoformat() if len(train_df) else None,
+            'data_until': valid_df[DATE_COLUMN].max().isoformat(),
+        }
+        meta_path.write_text(json.dumps(meta))
+        logger.info(f"Built churn datasets {key} in {time.perf_counter() - start:.1f}s")
+        return train_set, valid_set, {**meta, 'cache_hit': False}
+
+    # ==================== Training ====================
+
+    def train_model(self, data_path: str, test_size: float = 0.2) -> Dict[str, Any]:
+        """
+        Train the churn model from scratch
+
+        Args:
+            data_path: CSV with labelled bookings
+            test_size: Proportion of the latest bookings used for validation
+
+        Returns:
+            Dict with model, metrics, model_path, version and cache_hit
+        """
+        logger.info("=" * 80)
+        logger.info("Training Churn Model (full)")
+        logger.info("=" * 80)
+
+        train_set, valid_set, meta = self.build_datasets(data_path, test_size)
+
+        start = time.perf_counter()
+        booster = lgb.train(
+            MODEL_PARAMS,
+            train_set,
+            num_boost_round=NUM_BOOST_ROUND,
+            valid_sets=[valid_set],
+            valid_names=['valid'],
+            callbacks=[lgb.early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)],
+        )
+        train_seconds = time.perf_counter() - start
+
+        # lgb.train returns the booster cut at the best iteration
+        metrics = self._metrics(booster, train_seconds)
+
+        version = self._next_version(full=True)
+        result = self._save(booster, version, metrics, {
+            'mode': 'full',
+            'trained_until': meta['data_until'],
+            'params': MODEL_PARAMS,
+        })
+        result['cache_hit'] = meta['cache_hit']
+        return result
+
+    def train_incremental(
+        self,
+        data_path: str,
+        rounds: int = INCREMENTAL_ROUNDS,
+        test_size: float = 0.2
+    ) -> Dict[str, Any]:
+        """
+        Continue boosting the latest model on newly labelled bookings
+
+        Only bookings dated after the previous run's trained_until are
+        encoded. The latest test_size of them validates the added trees.
+
+        Args:
+            data_path: CSV with labelled bookings (old rows are skipped)
+            rounds: Maximum trees to add
+            test_size: Proportion of the new bookings used for validation
+
+        Returns:
+            Dict with model, metrics, model_path and version, or
+            {'skipped': True, 'reason': ...}
+        """
+        logger.info("=" * 80)
+        logger.info("Training Churn Model (incremental)")
+        logger.info("=" * 80)
+
+        state = self.load_state()
+        if state is None:
+            return {'skipped': True, 'reason': 'no previous model; run a full training first'}
+
+        previous = joblib.load(state['model_path'])
+        init_booster = getattr(previous, 'booster_', previous)
+
+        df = pd.read_csv(data_path)
+        df[DATE_COLUMN] = pd.to_datetime(df[DATE_COLUMN])
+        new_df = df[df[DATE_COLUMN] > pd.Timestamp(state['trained_until'])]
+        new_df = new_df.sort_values(DATE_COLUMN, kind='stable')
+        if len(new_df) < 2:
+            logger.info("No newly labelled bookings, keeping the current model")
+            return {'skipped': True, 'reason': 'no new bookings'}
+
+        train_df, valid_df = self._time_split(new_df, test_size)
+        logger.info(f"Warm start from v{state['version']} on {len(new_df)} new bookings")
+
+        train_set = self._dataset(train_df)
+        valid_set = self._dataset(valid_df, reference=train_set)
+
+        start = time.perf_counter()
+        booster = lgb.train(
+            {**MODEL_PARAMS, 'learning_rate': INCREMENTAL_LEARNING_RATE},
+            train_set,
+            num_boost_round=rounds,
+            init_model=init_booster,
+            valid_sets=[valid_set],
+            valid_names=['valid'],
+            callbacks=[lgb.early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)],
+        )
+        train_seconds = time.perf_counter() - start
+
+        metrics = self._metrics(booster, train_seconds)
+        metrics['trees_added'] = float(booster.num_trees() - init_booster.num_trees())
+
+        version = self._next_version(full=False)
+        return self._save(booster, version, metrics, {
+            'mode': 'incremental',
+            'trained_until': new_df[DATE_COLUMN].max().isoformat(),
+            'params': {**MODEL_PARAMS, 'learning_rate': INCREMENTAL_LEARNING_RATE},
+            'previous_version': state['version'],
+        })
+
+    @staticmethod
+    def _metrics(booster: lgb.Booster, train_seconds: float) -> Dict[str, float]:
+        valid = booster.best_score.get('valid', {})
+        return {
+            'valid_auc': float(valid.get('auc', float('nan'))),
+            'valid_logloss': float(valid.get('binary_logloss', float('nan'))),
+            'best_iteration': float(booster.best_iteration or booster.current_iteration()),
+            'train_seconds': train_seconds,
+        }
+
+    # ==================== Artifacts ====================
+
+    def _next_version(self, full: bool) -> str:
+        """Next major (full) or minor (incremental) version in output_dir"""
+        versions = [
+            parse_version(match.group('version'))
+            for match in (ARTIFACT_PATTERN.match(p.name) for p in self.output_dir.iterdir())
+            if match and match.group('name') == MODEL_NAME
+        ]
+        latest = max(versions + [BASE_VERSION])
+        major = latest[0]
+        minor = latest[1] if len(latest) > 1 else 0
+        return f"{major + 1}.0" if full else f"{major}.{minor + 1}"
+
+    def load_state(self) -> Optional[Dict[str, Any]]:
+        """State of the last training run, or None"""
+        path = self.output_dir / STATE_FILENAME
+        if not path.exists():
+            return None
+        return json.loads(path.read_text())
+
+    def _save(
+        self,
+        booster: lgb.Booster,
+        version: str,
+        metrics: Dict[str, float],
+        state: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Save the artifact and the training state"""
+        model = BoosterClassifier(booster)
+        model_path = self.output_dir / f"{MODEL_NAME}_v{version}.pkl"
+        save_model_artifact(model, model_path)
+
+        state = {
+            **state,
+            'version': version,
+            'model_path': str(model_path),
+            'metrics': metrics,
+            'trained_at': datetime.utcnow().isoformat(),
+        }
+        (self.output_dir / STATE_FILENAME).write_text(json.dumps(state, indent=2))
+
+        logger.info(f"Model saved to {model_path}")
+        logger.info(f"  Valid AUC: {metrics['valid_auc']:.4f}")
+        logger.info(f"  Trees: {booster.num_trees()} ({metrics['train_seconds']:.1f}s)")
+
+        if self.log_mlflow:
+            with mlflow.start_run(run_name=f"churn_{state['mode']}"):
+                mlflow.log_params({k: v for k, v in state['params'].items() if k != 'metric'})
+                mlflow.log_metrics({k: v for k, v in metrics.items() if np.isfinite(v)})
+                mlflow.log_artifact(str(model_path))
+
+        return {
+            'model': model,
+            'metrics': metrics,
+            'model_path': str(model_path),
+            'version': version,
+        }
+
+
+def main():
+    """Main training script"""
+    parser = argparse.ArgumentParser(description='Train the churn prediction model')
+    parser.add_argument(
+        '--data-path',
+        type=str,
+        required=True,
+        help='Path to labelled booking CSV file'
+    )
+    parser.add_argument(
+        '--output-dir',
+        type=str,
+        default='models/churn',
+        help='Directory to save trained models'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        type=str,
+        default=None,
+        help='Directory for cached binary datasets (default: <output-dir>/.dataset_cache)'
+    )
+    parser.add_argument(
+        '--test-size',
+        type=float,
+        default=0.2,
+        help='Proportion of the latest bookings for validation (default: 0.2)'
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Warm-start from the previous model on newly labelled bookings'
+    )
+    parser.add_argument(
+        '--rounds',
+        type=int,
+        default=INCREMENTAL_ROUNDS,
+        help=f'Maximum trees added by an incremental run (default: {INCREMENTAL_ROUNDS})'
+    )
+    parser.add_argument(
+        '--log-mlflow',
+        action='store_true',
+        help='Log experiments to MLflow'
+    )
+
+    args = parser.parse_args()
+
+    trainer = ChurnModelTrainer(
+        output_dir=args.output_dir,
+        cache_dir=args.cache_dir,
+        log_mlflow=args.log_mlflow
+    )
+
+    try:
+        if args.incremental:
+            result = trainer.train_incremental(args.data_path, args.rounds, args.test_size)
+            if result.get('skipped'):
+                logger.info(f"Incremental training skipped: {result['reason']}")
+                return
+        else:
+            trainer.train_model(args.data_path, args.test_size)
+
+        logger.info("\n✅ Training completed successfully!")
+
+    except Exception as e:
+        logger.error(f"❌ Training failed: {e}", exc_info=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -22,7 +22,6 @@ import sys
 
 import numpy as np
 import pandas as pd
-import joblib
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import (
     mean_absolute_error, mean_squared_error, r2_score,
@@ -31,6 +30,8 @@ from sklearn.metrics import (
 )
 import xgboost as xgb
 
+from src.application.ml_models.model_registry import save_model_artifact
+
 # MLflow for experiment tracking (optional)
 try:
     import mlflow
@@ -140,39 +141,41 @@ class CLVModelTrainer:
         """
         logger.info("Creating target variables...")
         
-        targets = []
+        # Per-guest cutoff (last booking) broadcast back to every booking row
+        bookings_df = bookings_df[bookings_df['guest_id'].notna()]
+        guest_codes, guest_index = pd.factorize(bookings_df['guest_id'])
+        booking_dates = bookings_df['booking_date'].to_numpy()
+        last_booking = (
+            pd.Series(booking_dates).groupby(guest_codes).max().to_numpy()
+        )
         
-        for guest_id in features_df['guest_id']:
-            guest_bookings = bookings_df[bookings_df['guest_id'] == guest_id].copy()
-            guest_bookings = guest_bookings.sort_values('booking_date')
-            
-            # Get last booking date from features (training cutoff)
-            last_booking = guest_bookings['booking_date'].max()
-            
-            # Define future window (12 months after last booking)
-            future_start = last_booking
-            future_end = future_start + pd.Timedelta(days=365)
-            
-            # Get future bookings (this would need actual future data in production)
-            # For training, we simulate by using bookings after a certain date
-            future_bookings = guest_bookings[
-                (guest_bookings['booking_date'] > future_start) &
-                (guest_bookings['booking_date'] <= future_end)
-            ]
-            
-            # Calculate targets
-            future_booking_count = len(future_bookings)
-            future_avg_value = future_bookings['total_amount'].mean() if len(future_bookings) > 0 else 0
-            is_retained = 1 if future_booking_count > 0 else 0
-            
-            targets.append({
-                'guest_id': guest_id,
-                'future_bookings_per_year': future_booking_count,
-                'future_avg_booking_value': future_avg_value,
-                'is_retained': is_retained
-            })
+        # Future window: 12 months after last booking
+        # (this would need actual future data in production)
+        future_start = last_booking[guest_codes]
+        future_end = future_start + np.timedelta64(365, 'D')
+        in_window = (booking_dates > future_start) & (booking_dates <= future_end)
+        
+        n_guests = len(guest_index)
+        future_counts = np.bincount(guest_codes[in_window], minlength=n_guests)
+        future_values = (
+            bookings_df.loc[in_window, 'total_amount']
+            .groupby(guest_codes[in_window]).mean()
+            .reindex(range(n_guests), fill_value=0)
+            .to_numpy()
+        )
+        
+        # Align to features_df rows (guests without bookings get zero targets)
+        rows = guest_index.get_indexer(features_df['guest_id'])
+        known = rows >= 0
+        future_booking_count = np.where(known, future_counts[rows], 0)
+        future_avg_value = np.where(known, future_values[rows], 0)
         
-        targets_df = pd.DataFrame(targets)
+        targets_df = pd.DataFrame({
+            'guest_id': features_df['guest_id'].to_numpy(),
+            'future_bookings_per_year': future_booking_count,
+            'future_avg_booking_value': future_avg_value,
+            'is_retained': (future_booking_count > 0).astype(int),
+        })
         
         # Merge with features
         features_df = features_df.merge(targets_df, on='guest_id')
@@ -262,7 +265,7 @@ class CLVModelTrainer:
         
         # Save model
         model_path = self.output_dir / "clv_booking_frequency_v1.5.pkl"
-        joblib.dump(model, model_path)
+        save_model_artifact(model, model_path)
         logger.info(f"Model saved to {model_path}")
         
         # Log to MLflow
@@ -361,7 +364,7 @@ class CLVModelTrainer:
         
         # Save model
         model_path = self.output_dir / "clv_booking_value_v1.5.pkl"
-        joblib.dump(model, model_path)
+        save_model_artifact(model, model_path)
         logger.info(f"Model saved to {model_path}")
         
         # Log to MLflow
@@ -470,7 +473,7 @@ class CLVModelTrainer:
         
         # Save model
         model_path = self.output_dir / "clv_retention_v1.5.pkl"
-        joblib.dump(model, model_path)
+        save_model_artifact(model, model_path)
         logger.info(f"Model saved to {model_path}")
         
         # Log to MLflow
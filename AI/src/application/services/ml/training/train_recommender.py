@@ -0,0 +1,507 @@
+"""
+Training Script for the Service Recommender
+
+Trains an implicit-feedback matrix factorization model (weighted ALS,
+Hu/Koren/Volinsky 2008) on guest x service interactions. A guest
+interacts with a service every time they book a room type that offers it
+(Booking -> Room -> ServicePossessing); the interaction count becomes the
+confidence weight.
+
+The artifact is a plain dict of NumPy arrays (user/item factors, id maps
+and catalog metadata) saved as ``service_recommender_v<version>.pkl`` so
+the model registry can memory-map and hot-swap it. Its ``version`` is the
+format version plus a digest of the factors, so every retrain that changes
+the model gets a new version and invalidates precomputed lists.
+
+Usage:
+    python -m src.application.services.ml.training.train_recommender \
+        --data-path data/service_interactions.csv \
+        --output-dir models/recommender \
+        --factors 32 \
+        --log-mlflow
+"""
+import argparse
+import hashlib
+import logging
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from src.application.ml_models.model_registry import save_model_artifact
+
+# MLflow for experiment tracking (optional)
+try:
+    import mlflow
+    MLFLOW_AVAILABLE = True
+except ImportError:
+    MLFLOW_AVAILABLE = False
+    logging.warning("MLflow not available. Experiment tracking disabled.")
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "service_recommender"
+MODEL_VERSION = "1.0"
+
+# Hex digits of the factor digest in the artifact version
+VERSION_DIGEST_LENGTH = 12
+
+# Export query for the training CSV (one row per guest x service)
+INTERACTIONS_SQL = """
+    SELECT
+        b.user_id AS guest_id,
+        rs.service_id,
+        rs.name AS service_name,
+        COUNT(*) AS interactions
+    FROM Booking b
+    JOIN Room r ON r.room_id = b.room_id
+    JOIN ServicePossessing sp ON sp.type_id = r.type_id
+    JOIN RoomService rs ON rs.service_id = sp.service_id
+    WHERE b.user_id IS NOT NULL
+      AND b.status <> ALL($1::varchar[])
+    GROUP BY b.user_id, rs.service_id, rs.name
+"""
+
+# Bounds the (nnz, factors, factors) outer-product block per solve chunk
+ALS_CHUNK_NNZ = 8192
+
+
+def _id_strings(ids: pd.Series) -> pd.Series:
+    """Ids as strings; float columns (ints with NaN dropped) lose the '.0'"""
+    if pd.api.types.is_float_dtype(ids):
+        ids = ids.astype(np.int64)
+    return ids.astype(str)
+
+
+def build_interaction_matrix(
+    interactions: pd.DataFrame
+) -> Tuple[sp.csr_matrix, np.ndarray, np.ndarray, pd.DataFrame]:
+    """
+    Build the guest x service count matrix
+
+    Args:
+        interactions: Rows with guest_id, service_id, interactions and
+            optional service_name/category/price columns
+
+    Returns:
+        (csr matrix, user_ids, item_ids, item metadata aligned with item_ids)
+    """
+    df = interactions.dropna(subset=['guest_id', 'service_id'])
+    df = df.assign(guest_id=_id_strings(df['guest_id']), service_id=_id_strings(df['service_id']))
+    user_codes, user_ids = pd.factorize(df['guest_id'])
+    item_codes, item_ids = pd.factorize(df['service_id'])
+    counts = df['interactions'].to_numpy(dtype=np.float32) if 'interactions' in df else \
+        np.ones(len(df), dtype=np.float32)
+
+    # Duplicate (guest, service) rows are summed by the COO -> CSR conversion
+    matrix = sp.coo_matrix(
+        (counts, (user_codes, item_codes)),
+        shape=(len(user_ids), len(item_ids))
+    ).tocsr()
+    matrix.sum_duplicates()
+
+    meta = df.drop_duplicates('service_id').set_index('service_id')
+    items = pd.DataFrame({
+        'id': np.asarray(item_ids),
+        'name': meta['service_name'].reindex(item_ids).fillna('').to_numpy()
+        if 'service_name' in meta else np.asarray(item_ids),
+        'category': meta['category'].reindex(item_ids).fillna('other').to_numpy()
+        if 'category' in meta else 'other',
+        'price': meta['price'].reindex(item_ids).fillna(0).to_numpy(dtype=np.float64)
+        if 'price' in meta else 0.0,
+    })
+    return matrix, np.asarray(user_ids), np.asarray(item_ids), items
+
+
+def _solve_side(
+    confidence: sp.csr_matrix,
+    fixed: np.ndarray,
+    regularization: float,
+) -> np.ndarray:
+    """
+    One ALS half-step: solve every row's factors against the fixed side
+
+    For row u: (YtY + Yt (C_u - I) Y + lambda I) x_u = Yt C_u p_u, where
+    p_u is 1 on observed items. Rows are solved in batches with
+    np.linalg.solve; the per-row correction term is built from the
+    observed entries only, via sparse segment sums over the CSR layout.
+    """
+    n_rows = confidence.shape[0]
+    n_factors = fixed.shape[1]
+    gram = fixed.T @ fixed + regularization * np.eye(n_factors)
+    solution = np.zeros((n_rows, n_factors), dtype=np.float64)
+
+    indptr, indices, data = confidence.indptr, confidence.indices, confidence.data
+
+    start = 0
+    while start < n_rows:
+        # Grow the chunk until it holds about ALS_CHUNK_NNZ observed entries
+        end = int(np.searchsorted(indptr, indptr[start] + ALS_CHUNK_NNZ, side='right'))
+        end = min(max(end - 1, start + 1), n_rows)
+
+        lo, hi = indptr[start], indptr[end]
+        Y = fixed[indices[lo:hi]]
+        c = data[lo:hi].astype(np.float64)
+
+        # Row-segment indicator with the chunk's own CSR layout: S @ X sums
+        # the observed entries of each row (rows without entries give 0)
+        segments = sp.csr_matrix(
+            (np.ones(hi - lo), np.arange(hi - lo), indptr[start:end + 1] - lo),
+            shape=(end - start, hi - lo)
+        )
+        outer = ((c - 1.0)[:, None] * Y)[:, :, None] * Y[:, None, :]
+        A = gram + (segments @ outer.reshape(hi - lo, -1)).reshape(-1, n_factors, n_factors)
+        b = segments @ (c[:, None] * Y)
+
+        solution[start:end] = np.linalg.solve(A, b[..., None])[..., 0]
+        start = end
+
+    return solution
+
+
+def _solve_side_cg(
+    confidence: sp.csr_matrix,
+    fixed: np.ndarray,
+    current: np.ndarray,
+    regularization: float,
+    cg_steps: int = 3,
+) -> np.ndarray:
+    """
+    ALS half-step with a few conjugate-gradient iterations per row
+
+    Solves the same system as _solve_side, for all rows at once, warm
+    started from the current factors. Each step costs O(nnz * factors)
+    instead of O(nnz * factors^2): A_u v = (YtY + lambda I) v +
+    sum_i (c_ui - 1)(y_i . v) y_i is evaluated with one sparse product
+    over the confidence matrix's own structure.
+    """
+    n_factors = fixed.shape[1]
+    gram = fixed.T @ fixed + regularization * np.eye(n_factors)
+    indptr, indices, data = confidence.indptr, confidence.indices, confidence.data
+    nz_rows = np.repeat(np.arange(confidence.shape[0]), np.diff(indptr))
+    Y_nz = fixed[indices]
+
+    def _apply(v: np.ndarray) -> np.ndarray:
+        dots = np.einsum('ij,ij->i', Y_nz, v[nz_rows])
+        weighted = sp.csr_matrix(((data - 1.0) * dots, indices, indptr), shape=confidence.shape)
+        return v @ gram + weighted @ fixed
+
+    x = current.copy()
+    r = confidence @ fixed - _apply(x)
+    p = r.copy()
+    rs = np.einsum('ij,ij->i', r, r)
+
+    for _ in range(cg_steps):
+        Ap = _apply(p)
+        denom = np.einsum('ij,ij->i', p, Ap)
+        alpha = np.divide(rs, denom, out=np.zeros_like(rs), where=denom > 0)
+        x += alpha[:, None] * p
+        r -= alpha[:, None] * Ap
+        rs_new = np.einsum('ij,ij->i', r, r)
+        beta = np.divide(rs_new, rs, out=np.zeros_like(rs), where=rs > 0)
+        p = r + beta[:, None] * p
+        rs = rs_new
+
+    return x
+
+
+def _confidence(counts: sp.csr_matrix, alpha: float) -> sp.csr_matrix:
+    """C = 1 + alpha * log1p(count) on the observed entries"""
+    confidence = counts.astype(np.float64).tocsr(copy=True)
+    confidence.data = 1.0 + alpha * np.log1p(confidence.data)
+    return confidence
+
+
+def fold_in_users(
+    counts: sp.csr_matrix,
+    item_factors: np.ndarray,
+    regularization: float = 0.05,
+    alpha: float = 20.0,
+) -> np.ndarray:
+    """
+    User factors against fixed, already trained item factors
+
+    One exact ALS user half-step, so guests whose bookings changed after
+    training (or who were not in the training data) get an up-to-date
+    embedding without retraining.
+
+    Args:
+        counts: Guest x service counts, columns aligned with item_factors
+        item_factors: Trained item factors
+        regularization: L2 penalty used in training
+        alpha: Confidence scaling used in training
+
+    Returns:
+        (n_guests, factors) float32 array
+    """
+    return _solve_side(
+        _confidence(counts, alpha), np.asarray(item_factors, dtype=np.float64), regularization
+    ).astype(np.float32)
+
+
+def train_als(
+    counts: sp.csr_matrix,
+    factors: int = 32,
+    regularization: float = 0.05,
+    alpha: float = 20.0,
+    iterations: int = 15,
+    random_state: int = 42,
+    solver: str = "cg",
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Weighted ALS for implicit feedback
+
+    Args:
+        counts: Guest x service interaction counts
+        factors: Latent dimension
+        regularization: L2 penalty
+        alpha: Confidence scaling, C = 1 + alpha * log1p(count)
+        iterations: Alternating passes
+        random_state: Seed for factor initialization
+        solver: 'cg' (fast, approximate per pass) or 'exact' (batched solve)
+
+    Returns:
+        (user_factors, item_factors) as float32 arrays
+    """
+    rng = np.random.default_rng(random_state)
+    confidence = _confidence(counts, alpha)
+    confidence_t = confidence.T.tocsr()
+
+    n_users, n_items = counts.shape
+    user_factors = rng.normal(0, 0.01, (n_users, factors))
+    item_factors = rng.normal(0, 0.01, (n_items, factors))
+
+    for _ in range(iterations):
+        if solver == "exact":
+            user_factors = _solve_side(confidence, item_factors, regularization)
+            item_factors = _solve_side(confidence_t, user_factors, regularization)
+        else:
+            user_factors = _solve_side_cg(confidence, item_factors, user_factors, regularization)
+            item_factors = _solve_side_cg(confidence_t, user_factors, item_factors, regularization)
+
+    return user_factors.astype(np.float32), item_factors.astype(np.float32)
+
+
+def split_interactions(
+    counts: sp.csr_matrix,
+    test_fraction: float = 0.2,
+    random_state: int = 42,
+) -> Tuple[sp.csr_matrix, sp.csr_matrix]:
+    """Hold out a random share of observed entries for evaluation"""
+    coo = counts.tocoo()
+    rng = np.random.default_rng(random_state)
+    test_mask = rng.random(coo.nnz) < test_fraction
+
+    def _subset(mask):
+        return sp.csr_matrix(
+            (coo.data[mask], (coo.row[mask], coo.col[mask])), shape=counts.shape
+        )
+
+    return _subset(~test_mask), _subset(test_mask)
+
+
+def recall_at_k(
+    user_factors: np.ndarray,
+    item_factors: np.ndarray,
+    train: sp.csr_matrix,
+    test: sp.csr_matrix,
+    k: int = 5,
+) -> float:
+    """
+    Share of held-out interactions found in each guest's top-k
+
+    Items already seen in training are masked out before ranking.
+    """
+    users = np.flatnonzero(np.diff(test.indptr))
+    if len(users) == 0:
+        return 0.0
+    k = min(k, item_factors.shape[0])
+
+    scores = user_factors[users] @ item_factors.T
+    seen = train[users].nonzero()
+    scores[seen] = -np.inf
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+    hits = np.take_along_axis(test[users].toarray() > 0, top, axis=1).sum()
+    return float(hits / test.nnz)
+
+
+def artifact_version(artifact: Dict[str, Any]) -> str:
+    """
+    Version of a trained artifact: MODEL_VERSION plus a digest of its content
+
+    Stored recommendation lists are keyed on this version, so a retrain
+    with different factors or id maps yields a new version while an
+    identical artifact keeps its version.
+
+    Returns:
+        e.g. "1.0+3f9a0c1d2e4b"
+    """
+    digest = hashlib.sha256()
+    for key in ('user_ids', 'item_ids', 'user_factors', 'item_factors'):
+        values = np.ascontiguousarray(artifact[key])
+        digest.update(key.encode())
+        digest.update(str(values.shape).encode())
+        digest.update(values.astype(str).tobytes() if values.dtype.kind in 'OUS' else values.tobytes())
+    return f"{MODEL_VERSION}+{digest.hexdigest()[:VERSION_DIGEST_LENGTH]}"
+
+
+class ServiceRecommenderTrainer:
+    """
+    Trainer for the service recommender
+
+    Factorizes guest x service interactions into user and item embeddings
+    """
+
+    def __init__(self, output_dir: str = "models/recommender", log_mlflow: bool = False):
+        """
+        Initialize trainer
+
+        Args:
+            output_dir: Directory to save the factor artifact
+            log_mlflow: Whether to log experiments to MLflow
+        """
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        self.log_mlflow = log_mlflow and MLFLOW_AVAILABLE
+
+        if self.log_mlflow:
+            mlflow.set_experiment("recommender_training")
+
+    def train(
+        self,
+        interactions: pd.DataFrame,
+        factors: int = 32,
+        regularization: float = 0.05,
+        alpha: float = 20.0,
+        iterations: int = 15,
+        test_fraction: float = 0.2,
+    ) -> Dict[str, Any]:
+        """
+        Train, evaluate on held-out interactions, refit on all data and save
+
+        Args:
+            interactions: guest_id, service_id, interactions (+ metadata)
+            factors: Latent dimension
+            regularization: L2 penalty
+            alpha: Confidence scaling
+            iterations: ALS passes
+            test_fraction: Share of interactions held out for recall@5
+
+        Returns:
+            Dictionary with the artifact, metrics and model path
+        """
+        counts, user_ids, item_ids, items = build_interaction_matrix(interactions)
+        logger.info(
+            f"Interaction matrix: {counts.shape[0]} guests x {counts.shape[1]} services, "
+            f"{counts.nnz} non-zeros"
+        )
+
+        params = {
+            'factors': factors,
+            'regularization': regularization,
+            'alpha': alpha,
+            'iterations': iterations,
+        }
+
+        # Evaluate on a hold-out split
+        train, test = split_interactions(counts, test_fraction)
+        user_f, item_f = train_als(train, **params)
+        metrics = {'recall_at_5': recall_at_k(user_f, item_f, train, test, k=5)}
+        logger.info(f"  Recall@5: {metrics['recall_at_5']:.4f}")
+
+        # Refit on everything for serving
+        start = time.time()
+        user_factors, item_factors = train_als(counts, **params)
+        metrics['train_seconds'] = round(time.time() - start, 3)
+
+        item_counts = np.asarray(counts.sum(axis=0)).ravel()
+        artifact = {
+            'model_type': 'implicit_als',
+            'trained_at': datetime.now().isoformat(),
+            'params': params,
+            'metrics': metrics,
+            'user_ids': user_ids.astype(str),
+            'item_ids': item_ids.astype(str),
+            'user_factors': np.ascontiguousarray(user_factors),
+            'item_factors': np.ascontiguousarray(item_factors),
+            'user_interactions': np.diff(counts.indptr).astype(np.int32),
+            'item_popularity': (item_counts / max(item_counts.max(), 1)).astype(np.float32),
+            'item_names': items['name'].astype(str).to_numpy(),
+            'item_categories': items['category'].astype(str).to_numpy(),
+            'item_prices': items['price'].to_numpy(dtype=np.float64),
+        }
+        artifact['version'] = artifact_version(artifact)
+
+        model_path = self.output_dir / f"{MODEL_NAME}_v{MODEL_VERSION}.pkl"
+        save_model_artifact(artifact, model_path)
+        logger.info(f"Model saved to {model_path}")
+
+        if self.log_mlflow:
+            with mlflow.start_run(run_name="service_recommender"):
+                mlflow.log_params(params)
+                mlflow.log_metrics(metrics)
+                mlflow.log_artifact(str(model_path))
+
+        return {
+            'artifact': artifact,
+            'metrics': metrics,
+            'model_path': str(model_path)
+        }
+
+
+def main():
+    """Main training script"""
+    parser = argparse.ArgumentParser(description='Train the service recommender')
+    parser.add_argument(
+        '--data-path',
+        type=str,
+        required=True,
+        help='CSV exported with INTERACTIONS_SQL (guest_id, service_id, interactions)'
+    )
+    parser.add_argument(
+        '--output-dir',
+        type=str,
+        default='models/recommender',
+        help='Directory to save the factor artifact'
+    )
+    parser.add_argument('--factors', type=int, default=32, help='Latent dimension')
+    parser.add_argument('--iterations', type=int, default=15, help='ALS passes')
+    parser.add_argument(
+        '--log-mlflow',
+        action='store_true',
+        help='Log experiments to MLflow'
+    )
+
+    args = parser.parse_args()
+
+    trainer = ServiceRecommenderTrainer(
+        output_dir=args.output_dir,
+        log_mlflow=args.log_mlflow
+    )
+
+    try:
+        trainer.train(
+            pd.read_csv(args.data_path),
+            factors=args.factors,
+            iterations=args.iterations
+        )
+        logger.info("\n✅ Training completed successfully!")
+
+    except Exception as e:
+        logger.error(f"❌ Training failed: {e}", exc_info=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Attendance Aggregation Flows for Hotel AI System
+
+1. Aggregate Attendance - Fold new attendance_logs rows into attendance_summary
+2. Daily Attendance Report - Read precomputed summary rows and email the manager
+
+The report flow never scans attendance_logs; it relies on attendance_summary
+being kept up to date by the aggregator worker (started by the CV service)
+or the aggregate flow.
+"""
+
+from prefect import flow, task
+from typing import Dict, Optional
+from datetime import date, datetime, timedelta
+
+from src.flow.email_flow import notify_staff_attendance_flow
+
+
+@task(name="aggregate_attendance_task", retries=2, retry_delay_seconds=10)
+async def aggregate_attendance_task() -> Dict:
+    """
+    Fold all attendance_logs rows after the stored cursor
+
+    Returns:
+        Dict with number of rows read and aggregator stats
+    """
+    from src.application.services.cv.attendance_aggregator import AttendanceAggregator
+
+    aggregator = AttendanceAggregator()
+    await aggregator.initialize()
+    try:
+        rows_read = await aggregator.catch_up()
+    finally:
+        await aggregator.shutdown()
+
+    print(f"✅ Aggregated {rows_read} attendance log rows")
+    return {"rows_read": rows_read, **aggregator.stats}
+
+
+@task(name="load_attendance_report_task", retries=2, retry_delay_seconds=10)
+async def load_attendance_report_task(report_date: date) -> Dict:
+    """
+    Load daily attendance report from attendance_summary
+
+    Returns:
+        Dict with counts and absent/late staff lists
+    """
+    from src.application.services.cv.attendance_aggregator import AttendanceAggregator
+
+    aggregator = AttendanceAggregator()
+    await aggregator.initialize()
+    try:
+        # Make sure the last minutes of the day are folded in
+        await aggregator.catch_up()
+        report = await aggregator.get_daily_report(report_date)
+    finally:
+        await aggregator.shutdown()
+
+    return report
+
+
+# ==============================================================================
+# FLOW 1: AGGREGATE ATTENDANCE
+# ==============================================================================
+
+@flow(name="aggregate-attendance", log_prints=True)
+async def aggregate_attendance_flow() -> Dict:
+    """
+    Incrementally update attendance_summary from new attendance_logs rows
+
+    Schedule every minute when the CV service (which runs the aggregator
+    worker) is not deployed or ATTENDANCE_AGGREGATOR_ENABLED is false.
+    """
+    return await aggregate_attendance_task()
+
+
+# ==============================================================================
+# FLOW 2: DAILY ATTENDANCE REPORT
+# ==============================================================================
+
+@flow(name="daily-attendance-report", log_prints=True)
+async def daily_attendance_report_flow(
+    manager_email: str,
+    report_date: Optional[str] = None,
+    department: str = "All Staff",
+) -> Dict:
+    """
+    Send the staff attendance report built from attendance_summary
+
+    Args:
+        manager_email: Manager's email address
+        report_date: Date of the report (YYYY-MM-DD), defaults to yesterday
+        department: Department name shown in the report
+
+    Returns:
+        Dict with send status
+    """
+    if report_date:
+        target_date = datetime.strptime(report_date, "%Y-%m-%d").date()
+    else:
+        target_date = date.today() - timedelta(days=1)
+
+    print(f"📊 Building attendance report for {target_date.isoformat()}")
+
+    report = await load_attendance_report_task(target_date)
+
+    return await notify_staff_attendance_flow(
+        manager_email=manager_email,
+        report_date=report["report_date"],
+        department=department,
+        total_staff=report["total_staff"],
+        present_count=report["present_count"],
+        absent_count=report["absent_count"],
+        late_count=report["late_count"],
+        absent_staff=report["absent_staff"],
+        late_staff=report["late_staff"],
+    )
@@ -0,0 +1,82 @@
+"""
+Recommendation Precompute Flows for Hotel AI System
+
+1. Precompute Recommendations - Nightly: score every active guest against
+   the service catalog and rewrite service_recommendations
+2. Refresh Recommendations - Frequent: re-score only guests with bookings
+   since the last run
+
+The ML service serves /recommend/services from service_recommendations and
+scores online only for guests without a stored list.
+"""
+
+from prefect import flow, task
+from typing import Dict
+
+
+@task(name="refresh_recommendations_task", retries=2, retry_delay_seconds=30)
+async def refresh_recommendations_task(full: bool) -> Dict:
+    """
+    Run a full or incremental refresh against the current factor model
+
+    Args:
+        full: Rebuild every active guest (True) or only changed guests
+
+    Returns:
+        Dict with refresh counts, or skipped=True without a trained model
+    """
+    from src.application.ml_models.model_registry import get_model_registry
+    from src.application.services.ml.recommender import SERVICE_MODEL_NAME, ServiceFactorIndex
+    from src.application.services.ml.recommendation_store import RecommendationStore
+
+    artifact = get_model_registry().get_model(SERVICE_MODEL_NAME)
+    if artifact is None:
+        print("⚠️ No service recommender model found, nothing to precompute")
+        return {"skipped": True}
+
+    factor_index = ServiceFactorIndex(artifact)
+    store = RecommendationStore()
+    await store.initialize()
+    try:
+        if full:
+            result = await store.refresh_all(factor_index)
+        else:
+            result = await store.refresh_incremental(factor_index)
+    finally:
+        await store.shutdown()
+
+    print(f"✅ Wrote {result['rows_written']} recommendation lists ({result['mode']})")
+    return result
+
+
+# ==============================================================================
+# FLOW 1: PRECOMPUTE RECOMMENDATIONS
+# ==============================================================================
+
+@flow(name="precompute-recommendations", log_prints=True)
+async def precompute_recommendations_flow() -> Dict:
+    """
+    Rebuild all precomputed service recommendations
+
+    Schedule nightly; an incremental pass afterwards picks up bookings made
+    while the full refresh was running.
+    """
+    full = await refresh_recommendations_task(full=True)
+    if full.get("skipped"):
+        return full
+    incremental = await refresh_recommendations_task(full=False)
+    return {"full": full, "incremental": incremental}
+
+
+# ==============================================================================
+# FLOW 2: REFRESH RECOMMENDATIONS
+# ==============================================================================
+
+@flow(name="refresh-recommendations", log_prints=True)
+async def refresh_recommendations_flow() -> Dict:
+    """
+    Re-score guests with new bookings since the last run
+
+    Schedule every few minutes between nightly full refreshes.
+    """
+    return await refresh_recommendations_task(full=False)
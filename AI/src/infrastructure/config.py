@@ -101,6 +101,36 @@ class Settings(BaseSettings):
     embedding_model: str = Field(default="text-embedding-3-small", alias="EMBEDDING_MODEL")
     embedding_dimension: int = Field(default=1536, alias="EMBEDDING_DIMENSION")
 
+    # ========== LLM Client ==========
+    llm_base_url: str = Field(default="https://integrate.api.nvidia.com/v1", alias="LLM_BASE_URL")
+    llm_max_concurrency: int = Field(default=32, alias="LLM_MAX_CONCURRENCY")
+    llm_max_connections: int = Field(default=64, alias="LLM_MAX_CONNECTIONS")
+    llm_timeout_seconds: float = Field(default=60.0, alias="LLM_TIMEOUT_SECONDS")
+    llm_connect_timeout_seconds: float = Field(default=5.0, alias="LLM_CONNECT_TIMEOUT_SECONDS")
+    llm_max_retries: int = Field(default=3, alias="LLM_MAX_RETRIES")
+    llm_retry_base_delay_seconds: float = Field(default=0.5, alias="LLM_RETRY_BASE_DELAY_SECONDS")
+    llm_retry_max_delay_seconds: float = Field(default=8.0, alias="LLM_RETRY_MAX_DELAY_SECONDS")
+    # USD per 1K tokens, for cost reporting only
+    llm_prompt_cost_per_1k: float = Field(default=0.0, alias="LLM_PROMPT_COST_PER_1K")
+    llm_completion_cost_per_1k: float = Field(default=0.0, alias="LLM_COMPLETION_COST_PER_1K")
+
+    # ========== RAG Runtime ==========
+    # PGVector tables loaded at LLM service startup
+    rag_preload_tables: list[str] = Field(default=["rag_embeddings"], alias="RAG_PRELOAD_TABLES")
+
+    # ========== Semantic Cache ==========
+    semantic_cache_enabled: bool = Field(default=True, alias="SEMANTIC_CACHE_ENABLED")
+    semantic_cache_threshold: float = Field(default=0.95, alias="SEMANTIC_CACHE_THRESHOLD")
+    semantic_cache_max_entries: int = Field(default=2000, alias="SEMANTIC_CACHE_MAX_ENTRIES")
+    semantic_cache_ttl_seconds: int = Field(default=86400, alias="SEMANTIC_CACHE_TTL_SECONDS")
+
+    # ========== Chat Context ==========
+    chat_context_token_budget: int = Field(default=3000, alias="CHAT_CONTEXT_TOKEN_BUDGET")
+    chat_summary_trigger_ratio: float = Field(default=0.75, alias="CHAT_SUMMARY_TRIGGER_RATIO")
+    chat_summary_keep_ratio: float = Field(default=0.4, alias="CHAT_SUMMARY_KEEP_RATIO")
+    chat_summary_max_tokens: int = Field(default=300, alias="CHAT_SUMMARY_MAX_TOKENS")
+    chat_tokenizer_encoding: str = Field(default="o200k_base", alias="CHAT_TOKENIZER_ENCODING")
+
     # ========== API Settings ==========
     api_host: str = Field(default="0.0.0.0", alias="API_HOST")
     api_port: int = Field(default=8000, alias="API_PORT")
@@ -144,6 +174,68 @@ class Settings(BaseSettings):
         default="attendance.recognition", alias="FACE_RABBITMQ_ROUTING_KEY"
     )
 
+    # ========== Attendance Aggregation ==========
+    attendance_work_start: str = Field(default="08:00", alias="ATTENDANCE_WORK_START")
+    attendance_work_end: str = Field(default="17:00", alias="ATTENDANCE_WORK_END")
+    attendance_late_grace_minutes: int = Field(
+        default=15, alias="ATTENDANCE_LATE_GRACE_MINUTES"
+    )
+    attendance_flush_interval_seconds: float = Field(
+        default=60.0, alias="ATTENDANCE_FLUSH_INTERVAL_SECONDS"
+    )
+    attendance_queue_name: str = Field(
+        default="attendance.summary", alias="ATTENDANCE_QUEUE_NAME"
+    )
+    attendance_cursor_overlap_seconds: int = Field(
+        default=300, alias="ATTENDANCE_CURSOR_OVERLAP_SECONDS"
+    )
+    attendance_aggregator_enabled: bool = Field(
+        default=True, alias="ATTENDANCE_AGGREGATOR_ENABLED"
+    )
+
+    # ========== CLV Guest History ==========
+    clv_history_chunk_size: int = Field(default=1000, alias="CLV_HISTORY_CHUNK_SIZE")
+    clv_history_max_concurrency: int = Field(default=4, alias="CLV_HISTORY_MAX_CONCURRENCY")
+    clv_history_cache_size: int = Field(default=50_000, alias="CLV_HISTORY_CACHE_SIZE")
+
+    # ========== Online Feature Store ==========
+    feature_store_ttl_seconds: int = Field(default=3600, alias="FEATURE_STORE_TTL_SECONDS")
+    feature_store_local_ttl_seconds: float = Field(
+        default=60.0, alias="FEATURE_STORE_LOCAL_TTL_SECONDS"
+    )
+    feature_store_local_cache_size: int = Field(
+        default=100_000, alias="FEATURE_STORE_LOCAL_CACHE_SIZE"
+    )
+    feature_store_refresh_interval_seconds: float = Field(
+        default=1.0, alias="FEATURE_STORE_REFRESH_INTERVAL_SECONDS"
+    )
+    booking_events_exchange: str = Field(default="hotel_events", alias="BOOKING_EVENTS_EXCHANGE")
+    feature_store_routing_key: str = Field(default="booking.#", alias="FEATURE_STORE_ROUTING_KEY")
+
+    # ========== Pricing ==========
+    pricing_cache_days_ahead: int = Field(default=14, alias="PRICING_CACHE_DAYS_AHEAD")
+
+    # ========== Service Recommendation Store ==========
+    recommendation_store_top_k: int = Field(default=20, alias="RECOMMENDATION_STORE_TOP_K")
+    recommendation_store_block_size: int = Field(default=4096, alias="RECOMMENDATION_STORE_BLOCK_SIZE")
+    # Incremental refresh re-reads this much before its cursor (late commits)
+    recommendation_refresh_overlap_seconds: int = Field(
+        default=600, alias="RECOMMENDATION_REFRESH_OVERLAP_SECONDS"
+    )
+
+    # ========== ML Micro-Batching ==========
+    ml_micro_batching_enabled: bool = Field(default=True, alias="ML_MICRO_BATCHING_ENABLED")
+    ml_micro_batch_wait_ms: float = Field(default=2.0, alias="ML_MICRO_BATCH_WAIT_MS")
+    ml_micro_batch_max_size: int = Field(default=256, alias="ML_MICRO_BATCH_MAX_SIZE")
+
+    # ========== ML Model Registry ==========
+    ml_model_dir: str = Field(default="models", alias="ML_MODEL_DIR")
+    ml_model_watch_interval_seconds: float = Field(
+        default=30.0, alias="ML_MODEL_WATCH_INTERVAL_SECONDS"
+    )
+    ml_model_mmap_mode: str | None = Field(default="r", alias="ML_MODEL_MMAP_MODE")
+    ml_compile_tree_models: bool = Field(default=False, alias="ML_COMPILE_TREE_MODELS")
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -0,0 +1,199 @@
+"""
+Unit tests for AttendanceAggregator
+Tests change tracking, batched recompute and report building with a mocked pool
+"""
+
+import asyncio
+
+import pytest
+from datetime import date, datetime, time
+from unittest.mock import AsyncMock, MagicMock
+
+from src.application.services.cv.attendance_aggregator import (
+    AttendanceAggregator,
+    UPSERT_SUMMARY_SQL,
+    REFRESH_DERIVED_SQL,
+    ADVANCE_CURSOR_SQL,
+    EPOCH,
+)
+from src.infrastructure.config import Settings
+
+
+@pytest.fixture
+def mock_conn():
+    conn = MagicMock()
+    conn.execute = AsyncMock()
+    conn.fetch = AsyncMock(return_value=[])
+    conn.fetchval = AsyncMock(return_value=0)
+    conn.transaction.return_value.__aenter__ = AsyncMock()
+    conn.transaction.return_value.__aexit__ = AsyncMock(return_value=False)
+    return conn
+
+
+@pytest.fixture
+def aggregator(mock_conn):
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+    pool.acquire.return_value.__aexit__ = AsyncMock(return_value=False)
+    pool.close = AsyncMock()
+    return AttendanceAggregator(settings=Settings(), db_pool=pool, page_size=2)
+
+
+class TestAttendanceFolding:
+    """Test collection of (user, day) keys to recompute"""
+
+    def test_check_events_mark_user_day(self, aggregator):
+        aggregator.ingest(1, "CHECK_IN", datetime(2025, 3, 3, 8, 30))
+        aggregator.ingest(1, "CHECK_OUT", datetime(2025, 3, 3, 17, 30))
+        aggregator.ingest(1, "CHECK_IN", datetime(2025, 3, 3, 7, 55))
+
+        assert aggregator._dirty == {(1, date(2025, 3, 3))}
+        assert aggregator._max_event_at == datetime(2025, 3, 3, 17, 30)
+        assert aggregator.stats["events_ingested"] == 3
+
+    def test_ignores_failed_and_unknown_events(self, aggregator):
+        assert aggregator.ingest(None, "RECOGNITION_FAILED", datetime(2025, 3, 3, 9)) is False
+        assert aggregator.ingest(2, "RECOGNITION_SUCCESS", datetime(2025, 3, 3, 9, 5)) is False
+        assert aggregator.pending_count == 0
+        # Cursor still moves past skipped rows
+        assert aggregator._max_event_at == datetime(2025, 3, 3, 9, 5)
+
+    def test_buckets_split_by_user_and_day(self, aggregator):
+        aggregator.ingest(1, "CHECK_IN", datetime(2025, 3, 3, 8, 0))
+        aggregator.ingest(1, "CHECK_IN", datetime(2025, 3, 4, 8, 0))
+        aggregator.ingest(2, "CHECK_IN", datetime(2025, 3, 3, 8, 0))
+        assert aggregator.pending_count == 3
+
+
+def _log(log_id, user_id, event_type, event_timestamp):
+    return {"log_id": log_id, "user_id": user_id, "event_type": event_type,
+            "event_timestamp": event_timestamp}
+
+
+@pytest.mark.asyncio
+class TestAttendanceFlush:
+    """Test batched recompute and cursor handling"""
+
+    async def test_flush_single_batched_upsert(self, aggregator, mock_conn):
+        aggregator.ingest(2, "CHECK_IN", datetime(2025, 3, 3, 8, 20))
+        aggregator.ingest(1, "CHECK_IN", datetime(2025, 3, 3, 8, 0))
+        aggregator.ingest(1, "CHECK_OUT", datetime(2025, 3, 3, 17, 5))
+
+        upserted = await aggregator.flush()
+
+        assert upserted == 2
+        assert aggregator.pending_count == 0
+        statements = [c.args[0] for c in mock_conn.execute.call_args_list]
+        assert statements == [UPSERT_SUMMARY_SQL, REFRESH_DERIVED_SQL, ADVANCE_CURSOR_SQL]
+
+        upsert_args = mock_conn.execute.call_args_list[0].args[1:]
+        assert upsert_args == (
+            [1, 2], [date(2025, 3, 3)] * 2, ["CHECK_IN"], ["CHECK_OUT"],
+        )
+
+        derived_args = mock_conn.execute.call_args_list[1].args[1:]
+        assert derived_args[2] == time(8, 0)
+        assert derived_args[3] == time(17, 0)
+        assert mock_conn.execute.call_args_list[2].args[1] == datetime(2025, 3, 3, 17, 5)
+        assert aggregator._cursor == datetime(2025, 3, 3, 17, 5)
+
+    async def test_flush_noop_when_empty(self, aggregator, mock_conn):
+        aggregator._cursor = EPOCH
+        assert await aggregator.flush() == 0
+        mock_conn.execute.assert_not_called()
+
+    async def test_catch_up_pages_from_cursor(self, aggregator, mock_conn):
+        cursor = datetime(2025, 3, 3, 7, 0)
+        mock_conn.fetchval.return_value = cursor
+        mock_conn.fetch.side_effect = [
+            [
+                _log(101, 1, "CHECK_IN", datetime(2025, 3, 3, 8, 0)),
+                _log(102, 2, "CHECK_IN", datetime(2025, 3, 3, 8, 40)),
+            ],
+            [
+                _log(103, 1, "CHECK_OUT", datetime(2025, 3, 3, 17, 0)),
+            ],
+        ]
+
+        rows_read = await aggregator.catch_up()
+
+        assert rows_read == 3
+        # First page re-reads the overlap window before the cursor
+        first_page = mock_conn.fetch.call_args_list[0].args
+        assert first_page[1:3] == (cursor - aggregator.overlap, 0)
+        # Second page starts after the last (event_timestamp, log_id) of the first
+        second_page = mock_conn.fetch.call_args_list[1].args
+        assert second_page[1:3] == (datetime(2025, 3, 3, 8, 40), 102)
+        assert aggregator._cursor == datetime(2025, 3, 3, 17, 0)
+        assert aggregator.stats["rows_upserted"] == 3
+
+    async def test_late_commit_inside_overlap_is_picked_up(self, aggregator, mock_conn):
+        aggregator._cursor = datetime(2025, 3, 3, 9, 0)
+        aggregator._max_event_at = aggregator._cursor
+        # log 200 committed after the cursor passed 09:00, stamped 08:58
+        late = _log(200, 5, "CHECK_IN", datetime(2025, 3, 3, 8, 58))
+        mock_conn.fetch.side_effect = [[late]]
+
+        assert await aggregator.catch_up() == 1
+
+        assert mock_conn.fetch.call_args.args[1] <= late["event_timestamp"]
+        upsert_args = mock_conn.execute.call_args_list[0].args[1:]
+        assert upsert_args[:2] == ([5], [date(2025, 3, 3)])
+        # Cursor never moves backwards
+        assert aggregator._cursor == datetime(2025, 3, 3, 9, 0)
+
+
+@pytest.mark.asyncio
+async def test_start_and_stop_background_worker(aggregator, mock_conn):
+    await aggregator.start(use_events=False)
+    await asyncio.sleep(0)
+    assert aggregator._worker_task is not None
+
+    await aggregator.stop()
+
+    assert aggregator._worker_task is None
+    # The pool was injected; its owner closes it
+    aggregator.db_pool.close.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_shutdown_closes_pool_it_created(monkeypatch, mock_conn):
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__ = AsyncMock(return_value=mock_conn)
+    pool.acquire.return_value.__aexit__ = AsyncMock(return_value=False)
+    pool.close = AsyncMock()
+    monkeypatch.setattr(
+        "src.application.services.cv.attendance_aggregator.asyncpg.create_pool",
+        AsyncMock(return_value=pool),
+    )
+    aggregator = AttendanceAggregator(settings=Settings())
+
+    await aggregator.initialize()
+    await aggregator.shutdown()
+
+    pool.close.assert_awaited_once()
+    assert aggregator.db_pool is None
+
+
+@pytest.mark.asyncio
+async def test_daily_report_from_summary(aggregator, mock_conn):
+    mock_conn.fetch.return_value = [
+        {"user_id": 1, "name": "An", "first_check_in": datetime(2025, 3, 3, 7, 58),
+         "last_check_out": datetime(2025, 3, 3, 17, 2), "total_hours": 9.07,
+         "status": "PRESENT", "minutes_late": -2.0},
+        {"user_id": 2, "name": "Binh", "first_check_in": datetime(2025, 3, 3, 8, 40),
+         "last_check_out": None, "total_hours": None,
+         "status": "LATE", "minutes_late": 40.0},
+        {"user_id": 3, "name": "Chi", "first_check_in": None,
+         "last_check_out": None, "total_hours": None,
+         "status": None, "minutes_late": None},
+    ]
+
+    report = await aggregator.get_daily_report(date(2025, 3, 3))
+
+    assert report["total_staff"] == 3
+    assert report["present_count"] == 2
+    assert report["absent_count"] == 1
+    assert report["late_count"] == 1
+    assert report["late_staff"] == [{"name": "Binh", "id": 2, "minutes_late": 40}]
+    assert report["absent_staff"][0]["id"] == 3
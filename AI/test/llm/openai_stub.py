@@ -0,0 +1,169 @@
+"""
+Local stub of the OpenAI chat completions API
+
+Serves POST /v1/chat/completions with a canned reply, as one JSON body or
+as SSE chunks (stream=true). Scripted failure statuses are returned first,
+one per request; `dropped_streams` then cuts that many streams off before
+their first chunk, the way a peer closing the connection does. The stub records the requests it saw and the peak
+number of concurrent requests.
+
+Usage in tests:
+    stub = OpenAIStub(reply="Hello there", failures=[429])
+    client = AsyncLLMClient(base_url="http://stub/v1", http_client=stub.http_client())
+
+Standalone (e.g. for load tests):
+    python -m test.llm.openai_stub --port 8900 --delay 0.2
+"""
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+class OpenAIStub:
+    """Canned OpenAI-compatible chat completions"""
+
+    def __init__(
+        self,
+        reply: str = "Xin chào! Tôi có thể giúp gì cho bạn?",
+        failures: Optional[List[int]] = None,
+        delay: float = 0.0,
+        retry_after: Optional[str] = "0",
+        dropped_streams: int = 0,
+    ):
+        self.reply = reply
+        self.failures = list(failures or [])
+        self.delay = delay
+        self.retry_after = retry_after
+        self.dropped_streams = dropped_streams
+        self.requests: List[Dict[str, Any]] = []
+        self.active = 0
+        self.peak_active = 0
+        self.app = self._build_app()
+
+    def http_client(self) -> httpx.AsyncClient:
+        """httpx client that serves requests from the stub in-process"""
+        transport = _DroppingTransport(self, httpx.ASGITransport(app=self.app))
+        return httpx.AsyncClient(transport=transport, base_url="http://stub")
+
+    def tokens(self) -> List[str]:
+        """The reply split into stream deltas (words with their spacing)"""
+        words = self.reply.split(" ")
+        return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+    def _completion(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": f"chatcmpl-{len(self.requests)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": self.reply},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": len(self.tokens()), "total_tokens": 10 + len(self.tokens())},
+        }
+
+    def _chunk(self, body: Dict[str, Any], delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+        chunk = {
+            "id": f"chatcmpl-{len(self.requests)}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(chunk)}\n\n"
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/v1/chat/completions")
+        async def chat_completions(request: Request):
+            body = await request.json()
+            self.requests.append(body)
+
+            if self.failures:
+                status_code = self.failures.pop(0)
+                headers = {"retry-after": self.retry_after} if self.retry_after is not None else {}
+                return JSONResponse(
+                    {"error": {"message": f"stub error {status_code}", "type": "stub", "code": status_code}},
+                    status_code=status_code,
+                    headers=headers,
+                )
+
+            self.active += 1
+            self.peak_active = max(self.peak_active, self.active)
+            try:
+                await asyncio.sleep(self.delay)
+            finally:
+                self.active -= 1
+
+            if not body.get("stream"):
+                return JSONResponse(self._completion(body))
+
+            async def events():
+                yield self._chunk(body, {"role": "assistant", "content": ""})
+                for token in self.tokens():
+                    yield self._chunk(body, {"content": token})
+                yield self._chunk(body, {}, finish_reason="stop")
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        return app
+
+
+class _DroppedStream(httpx.AsyncByteStream):
+    """Response body whose connection closes before the first byte"""
+
+    def __init__(self, stream: httpx.AsyncByteStream):
+        self.stream = stream
+
+    async def __aiter__(self):
+        raise httpx.RemoteProtocolError("peer closed connection without sending complete message body")
+        yield b""  # pragma: no cover - makes this an async generator
+
+    async def aclose(self):
+        await self.stream.aclose()
+
+
+class _DroppingTransport(httpx.AsyncBaseTransport):
+    """Cuts off the stub's next `dropped_streams` SSE responses"""
+
+    def __init__(self, stub: OpenAIStub, transport: httpx.AsyncBaseTransport):
+        self.stub = stub
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self.transport.handle_async_request(request)
+        is_stream = response.headers.get("content-type", "").startswith("text/event-stream")
+        if is_stream and self.stub.dropped_streams > 0:
+            self.stub.dropped_streams -= 1
+            return httpx.Response(
+                response.status_code,
+                headers=response.headers,
+                stream=_DroppedStream(response.stream),
+                request=request,
+            )
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local OpenAI API stub")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds before each completion")
+    args = parser.parse_args()
+
+    uvicorn.run(OpenAIStub(delay=args.delay).app, host="127.0.0.1", port=args.port)
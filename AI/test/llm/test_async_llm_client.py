@@ -0,0 +1,140 @@
+"""
+Test Async LLM Client
+Runs the client against the local OpenAI stub: completions, streaming,
+retries with backoff and the concurrency limit
+"""
+import asyncio
+
+import pytest
+
+openai = pytest.importorskip("openai")
+
+from src.application.services.llm.async_llm_client import AsyncLLMClient, build_messages
+from src.infrastructure.config import get_settings
+from test.llm.openai_stub import OpenAIStub
+
+
+def _client(stub: OpenAIStub, **overrides) -> AsyncLLMClient:
+    settings = get_settings().model_copy(update={
+        "llm_retry_base_delay_seconds": 0.0,
+        "llm_max_retries": 2,
+        **overrides,
+    })
+    return AsyncLLMClient(settings=settings, base_url="http://stub/v1", api_key="test", http_client=stub.http_client())
+
+
+@pytest.mark.asyncio
+async def test_chat_sends_history_and_returns_reply():
+    stub = OpenAIStub(reply="Phòng deluxe còn trống")
+    client = _client(stub)
+    history = [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello"}]
+
+    reply = await client.chat("Còn phòng không?", history=history)
+
+    assert reply == "Phòng deluxe còn trống"
+    assert stub.requests[0]["messages"] == build_messages("Còn phòng không?", history)
+    assert stub.requests[0]["max_tokens"] == 1024
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_tokens_in_order():
+    stub = OpenAIStub(reply="one two three")
+    client = _client(stub)
+
+    tokens = [token async for token in client.stream_chat("count")]
+
+    assert tokens == ["one", " two", " three"]
+    assert stub.requests[0]["stream"] is True
+
+
+@pytest.mark.asyncio
+async def test_retries_rate_limits_and_server_errors():
+    stub = OpenAIStub(failures=[429, 503])
+    client = _client(stub)
+
+    reply = await client.chat("hello")
+
+    assert reply == stub.reply
+    assert len(stub.requests) == 3
+    assert client.stats["retries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_stream_is_retried_before_first_token():
+    stub = OpenAIStub(reply="a b", failures=[500])
+    client = _client(stub)
+
+    tokens = [token async for token in client.stream_chat("hello")]
+
+    assert "".join(tokens) == "a b"
+    assert client.stats["retries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_is_retried_when_connection_drops_before_first_token():
+    stub = OpenAIStub(reply="a b", dropped_streams=1)
+    client = _client(stub)
+
+    tokens = [token async for token in client.stream_chat("hello")]
+
+    assert "".join(tokens) == "a b"
+    assert len(stub.requests) == 2
+    assert client.stats["retries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_closing_an_abandoned_stream_releases_its_slot():
+    stub = OpenAIStub(reply="a b c")
+    client = _client(stub, llm_max_concurrency=1)
+
+    stream = client.stream_chat("hello")
+    assert await anext(stream) == "a"
+    assert client.stats["in_flight"] == 1
+    await stream.aclose()
+
+    assert client.stats["in_flight"] == 0
+    assert await asyncio.wait_for(client.chat("again"), timeout=1) == stub.reply
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    stub = OpenAIStub(failures=[429, 429, 429])
+    client = _client(stub)
+
+    with pytest.raises(openai.RateLimitError):
+        await client.chat("hello")
+
+    assert len(stub.requests) == 3
+    assert client.stats["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried():
+    stub = OpenAIStub(failures=[400])
+    client = _client(stub)
+
+    with pytest.raises(openai.BadRequestError):
+        await client.chat("hello")
+
+    assert len(stub.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped():
+    stub = OpenAIStub(delay=0.02)
+    client = _client(stub, llm_max_concurrency=2)
+
+    replies = await asyncio.gather(*(client.chat(f"q{i}") for i in range(6)))
+
+    assert len(replies) == 6
+    assert stub.peak_active == 2
+    assert client.stats["in_flight"] == 0
+
+
+def test_backoff_is_jittered_and_capped():
+    client = _client(OpenAIStub(), llm_retry_base_delay_seconds=1.0, llm_retry_max_delay_seconds=3.0)
+
+    delays = [client.retry_delay(RuntimeError(), attempt=5) for _ in range(50)]
+
+    assert all(0 <= d <= 3.0 for d in delays)
+    assert len(set(delays)) > 1
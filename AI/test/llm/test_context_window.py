@@ -0,0 +1,126 @@
+"""
+Test Chat Context Window
+Token budgeting, compaction planning and summarization cost accounting
+"""
+import pytest
+
+from src.application.services.llm.context_window import (
+    MESSAGE_OVERHEAD_TOKENS,
+    SUMMARY_PREFIX,
+    ContextWindow,
+    ConversationSummarizer,
+    TokenCounter,
+    with_summary,
+)
+from src.infrastructure.config import get_settings
+
+
+class FixedCounter(TokenCounter):
+    """One token per word, so budgets are easy to reason about"""
+
+    def __init__(self):
+        self.encoding_name = "words"
+        self._encoding = None
+
+    def count(self, text):
+        return len(text.split())
+
+
+def _window(budget=100, trigger=0.75, keep=0.4):
+    settings = get_settings().model_copy(update={
+        "chat_context_token_budget": budget,
+        "chat_summary_trigger_ratio": trigger,
+        "chat_summary_keep_ratio": keep,
+    })
+    return ContextWindow(settings=settings, counter=FixedCounter())
+
+
+def _history(n_messages, words=6):
+    # Each message costs words + MESSAGE_OVERHEAD_TOKENS = 10 tokens
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": " ".join([f"m{i}"] * words)}
+        for i in range(n_messages)
+    ]
+
+
+def test_estimate_without_tokenizer():
+    counter = TokenCounter.__new__(TokenCounter)
+    counter._encoding = None
+
+    assert counter.count("") == 0
+    assert counter.count("abcdefgh") == 2
+    assert counter.message_tokens({"role": "user", "content": "abcd"}) == 1 + MESSAGE_OVERHEAD_TOKENS
+
+
+def test_short_history_is_sent_whole():
+    history = _history(4)
+
+    plan = _window().plan(history)
+
+    assert plan["window"] == history
+    assert plan["to_summarize"] == 0
+    assert plan["history_tokens"] == 40
+
+
+def test_window_keeps_newest_messages_within_budget():
+    history = _history(30)
+
+    plan = _window(budget=100).plan(history)
+
+    assert plan["window"] == history[-10:]
+    assert plan["window_tokens"] == 100
+
+
+def test_summary_takes_part_of_the_budget():
+    history = _history(30)
+    summary = " ".join(["fact"] * 16)  # 16 + 4 overhead = 20 tokens
+
+    plan = _window(budget=100).plan(history, summary)
+
+    assert plan["summary_tokens"] == 20
+    assert plan["window"] == history[-8:]
+    assert plan["window_tokens"] == 100
+
+
+def test_compaction_starts_at_trigger_and_keeps_recent_turns():
+    window = _window(budget=100, trigger=0.75, keep=0.4)
+
+    assert window.plan(_history(7))["to_summarize"] == 0  # 70 tokens
+    plan = window.plan(_history(8))  # 80 tokens
+
+    # Everything but the newest 40 tokens is folded into the summary
+    assert plan["to_summarize"] == 4
+
+
+def test_with_summary_prepends_system_message():
+    window = _history(2)
+
+    assert with_summary(window) == window
+    assert with_summary(window, "Guest is Lan") == [
+        {"role": "system", "content": SUMMARY_PREFIX + "Guest is Lan"}
+    ] + window
+
+
+@pytest.mark.asyncio
+async def test_summarizer_reports_usage_and_cost():
+    pytest.importorskip("openai")
+    from test.llm.openai_stub import OpenAIStub
+    from src.application.services.llm.async_llm_client import AsyncLLMClient
+
+    stub = OpenAIStub(reply="Guest Lan booked a deluxe room for 12-14 May.")
+    settings = get_settings().model_copy(update={
+        "llm_prompt_cost_per_1k": 0.5,
+        "llm_completion_cost_per_1k": 1.0,
+    })
+    client = AsyncLLMClient(settings=settings, base_url="http://stub/v1", api_key="test", http_client=stub.http_client())
+    summarizer = ConversationSummarizer(client=client, settings=settings)
+
+    summary = await summarizer.summarize("", _history(4))
+
+    assert summary == "Guest Lan booked a deluxe room for 12-14 May."
+    assert "m3 m3" in stub.requests[0]["messages"][1]["content"]
+    stats = summarizer.stats
+    assert stats["summaries"] == 1 and stats["messages_summarized"] == 4
+    # Stub usage: 10 prompt tokens, one completion token per word
+    assert stats["prompt_tokens"] == 10 and stats["completion_tokens"] == 9
+    assert stats["cost_usd"] == pytest.approx((10 * 0.5 + 9 * 1.0) / 1000)
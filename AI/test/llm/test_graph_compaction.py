@@ -0,0 +1,82 @@
+"""
+Test Graph Compaction
+Background compaction and turn saves write one conversation in turn, so
+neither drops the other's update
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("langgraph.checkpoint.postgres")
+
+from langgraph.checkpoint.memory import MemorySaver
+
+
+class InstantSummarizer:
+    def __init__(self):
+        self.calls = []
+
+    async def summarize(self, summary, messages):
+        self.calls.append(messages)
+        return f"summary of {len(messages)} messages"
+
+
+@pytest.fixture
+def graph(monkeypatch):
+    from src.application.services.llm import checkpointer
+    monkeypatch.setattr(checkpointer, "_checkpointer", MemorySaver())
+    from src.application.services.llm import graph
+    return graph
+
+
+@pytest.fixture
+def writers(graph, monkeypatch):
+    """Slow update_state that records how many writers overlap"""
+    update_state = graph.chat_graph.update_state
+    lock = threading.Lock()
+    stats = {"active": 0, "max_active": 0}
+
+    def slow_update_state(*args, **kwargs):
+        with lock:
+            stats["active"] += 1
+            stats["max_active"] = max(stats["max_active"], stats["active"])
+        time.sleep(0.05)
+        try:
+            return update_state(*args, **kwargs)
+        finally:
+            with lock:
+                stats["active"] -= 1
+
+    monkeypatch.setattr(graph.chat_graph, "update_state", slow_update_state)
+    return stats
+
+
+@pytest.mark.asyncio
+async def test_compaction_and_save_turn_keep_both_updates(graph, writers):
+    conversation_id = "compaction-race"
+    for i in range(3):
+        await graph.save_turn(conversation_id, f"q{i}", f"a{i}")
+    turns, _ = await graph.load_conversation(conversation_id)
+    summarizer = InstantSummarizer()
+
+    await asyncio.gather(
+        graph._compact(conversation_id, turns[:4], "", summarizer),
+        graph.save_turn(conversation_id, "q3", "a3"),
+    )
+
+    turns, summary = await graph.load_conversation(conversation_id)
+    assert writers["max_active"] == 1
+    assert summary == "summary of 4 messages"
+    assert [m.content for m in turns] == ["q2", "a2", "q3", "a3"]
+
+
+@pytest.mark.asyncio
+async def test_other_conversations_are_not_serialized(graph, writers):
+    await asyncio.gather(
+        graph.save_turn("conversation-a", "q", "a"),
+        graph.save_turn("conversation-b", "q", "a"),
+    )
+
+    assert writers["max_active"] == 2
@@ -0,0 +1,171 @@
+"""
+Test RAG chat router
+/chat_rag and /chat_rag/stream on the shared RAG runtime, with a stubbed
+retriever and LLM
+"""
+import json
+
+import pytest
+
+pytest.importorskip("llama_index.core")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.application.controllers.llm import rag_router
+from src.application.services.llm import async_llm_client, semantic_cache
+from src.application.services.llm.rag import runtime
+from src.application.services.llm.rag.runtime import RAGRuntime
+from src.application.services.llm.semantic_cache import SemanticCache
+from src.infrastructure.config import get_settings
+from test.llm.test_semantic_cache import WordCounter, fake_embed
+
+
+class FakeNode:
+    def __init__(self, text, score):
+        self.text = text
+        self.score = score
+        self.metadata = {"file_name": "policy.txt", "page_label": "1"}
+
+    def get_content(self):
+        return self.text
+
+
+NODES = [FakeNode("Check-in từ 14:00, check-out trước 12:00", 0.91)]
+
+
+class FakeRetriever:
+    def __init__(self):
+        self.queries = []
+
+    def retrieve(self, query):
+        self.queries.append(query)
+        return NODES
+
+
+class FakeResponse:
+    def __init__(self, answer, source_nodes):
+        self.answer = answer
+        self.source_nodes = source_nodes
+
+    def __str__(self):
+        return self.answer
+
+
+class FakeQueryEngine:
+    def __init__(self):
+        self.queries = []
+
+    def update_prompts(self, prompts):
+        pass
+
+    def query(self, question):
+        self.queries.append(question)
+        return FakeResponse("Check-in từ 14:00", NODES)
+
+
+class FakeIndexer:
+    def __init__(self, table_name):
+        self.table_name = table_name
+        self.retriever = FakeRetriever()
+        self.query_engine = FakeQueryEngine()
+
+    def load_index(self):
+        pass
+
+    def get_retriever(self, similarity_top_k=5):
+        return self.retriever
+
+    def get_query_engine(self, similarity_top_k=5, response_mode="compact"):
+        return self.query_engine
+
+    def close(self):
+        pass
+
+
+class FakeLLM:
+    def __init__(self, deltas):
+        self.deltas = deltas
+        self.prompts = []
+
+    async def stream(self, messages, **params):
+        self.prompts.append(messages[-1]["content"])
+        for delta in self.deltas:
+            yield delta
+
+
+def _parse(body: str):
+    events = []
+    for frame in body.strip().split("\n\n"):
+        event_line, data_line = frame.split("\n")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    llm = FakeLLM(["Check-in ", "từ 14:00"])
+    monkeypatch.setattr(async_llm_client, "get_async_llm_client", lambda: llm)
+    return llm
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    settings = get_settings().model_copy(update={"semantic_cache_enabled": True})
+    cache = SemanticCache(embed_fn=fake_embed, settings=settings, counter=WordCounter())
+    monkeypatch.setattr(semantic_cache, "_semantic_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def client(monkeypatch, cache):
+    monkeypatch.setattr(runtime, "_rag_runtime", RAGRuntime(indexer_factory=FakeIndexer))
+    monkeypatch.setattr(rag_router, "_rag_indexer", None)
+    monkeypatch.setattr(rag_router, "_rag_query_engine", None)
+    monkeypatch.setattr(rag_router, "_rag_initialized", False)
+    app = FastAPI()
+    app.include_router(rag_router.router, prefix="/api/llm")
+    return TestClient(app)
+
+
+def test_stream_frames_sources_tokens_and_done(client, llm):
+    response = client.post("/api/llm/chat_rag/stream", json={"message": "Check-in mấy giờ?", "top_k": 1})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse(response.text)
+    conversation_id = events[0][1]["conversation_id"]
+    assert [name for name, _ in events] == ["start", "sources", "token", "token", "done"]
+    assert events[1][1]["sources"][0]["file_name"] == "policy.txt"
+    assert [data["content"] for name, data in events if name == "token"] == ["Check-in ", "từ 14:00"]
+    assert events[-1] == ("done", {
+        "conversation_id": conversation_id,
+        "response": "Check-in từ 14:00",
+        "sources": 1,
+    })
+    # The prompt carries the retrieved context
+    assert NODES[0].text in llm.prompts[0]
+    assert rag_router._rag_indexer.table_name == rag_router.RAG_TABLE
+
+
+def test_repeated_stream_question_is_answered_from_cache(client, llm, cache):
+    client.post("/api/llm/chat_rag/stream", json={"message": "Check-in mấy giờ?"})
+    response = client.post("/api/llm/chat_rag/stream", json={"message": "check-in   mấy giờ"})
+
+    events = _parse(response.text)
+    assert [name for name, _ in events] == ["start", "sources", "token", "done"]
+    assert events[-1][1]["response"] == "Check-in từ 14:00"
+    assert events[-1][1]["cached"] is True
+    assert len(llm.prompts) == 1
+    assert cache.stats["hits"] == 1
+    assert cache.stats["tokens_saved"] > 0
+
+
+def test_repeated_question_is_answered_from_cache(client, cache):
+    first = client.post("/api/llm/chat_rag", json={"message": "Check-in mấy giờ?"})
+    second = client.post("/api/llm/chat_rag", json={"message": "Check-in mấy giờ?"})
+
+    assert first.status_code == second.status_code == 200
+    assert second.json()["response"] == first.json()["response"] == "Check-in từ 14:00"
+    assert rag_router._rag_indexer.query_engine.queries == ["Check-in mấy giờ?"]
+    assert cache.stats["hits"] == 1
@@ -0,0 +1,104 @@
+"""
+Test RAG Runtime
+Indexers and retrievers are built once per table and reused across requests
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("llama_index.core")
+
+from src.application.services.llm.rag.runtime import RAGRuntime
+
+
+class FakeRetriever:
+    def __init__(self, table_name, top_k):
+        self.table_name = table_name
+        self.top_k = top_k
+        self.queries = []
+
+    def retrieve(self, query):
+        self.queries.append(query)
+        return [f"{self.table_name}:{query}"] * self.top_k
+
+
+class FakeIndexer:
+    def __init__(self, table_name, fail=False):
+        self.table_name = table_name
+        self.fail = fail
+        self.loads = 0
+        self.closed = False
+
+    def load_index(self):
+        self.loads += 1
+
+    def get_retriever(self, similarity_top_k=5):
+        if self.fail:
+            raise ConnectionError("database unavailable")
+        return FakeRetriever(self.table_name, similarity_top_k)
+
+    def close(self):
+        self.closed = True
+
+
+def _runtime(failing=()):
+    created = []
+
+    def factory(table_name):
+        indexer = FakeIndexer(table_name, fail=table_name in failing)
+        created.append(indexer)
+        return indexer
+
+    return RAGRuntime(indexer_factory=factory), created
+
+
+def test_indexer_and_retriever_are_built_once_per_table():
+    runtime, created = _runtime()
+
+    for _ in range(3):
+        runtime.retrieve("wifi", table_name="rag_embeddings", top_k=2)
+    runtime.retrieve("wifi", table_name="policies", top_k=2)
+
+    assert [i.table_name for i in created] == ["rag_embeddings", "policies"]
+    assert all(i.loads == 1 for i in created)
+    assert runtime.retriever("rag_embeddings", 2).queries == ["wifi"] * 3
+
+
+def test_retrievers_are_cached_per_top_k():
+    runtime, created = _runtime()
+
+    assert len(runtime.retrieve("wifi", top_k=1)) == 1
+    assert len(runtime.retrieve("wifi", top_k=3)) == 3
+
+    assert len(created) == 1
+    assert runtime.stats["retrievers"] == ["rag_embeddings:1", "rag_embeddings:3"]
+
+
+def test_concurrent_first_requests_load_once():
+    runtime, created = _runtime()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda i: runtime.retrieve(f"q{i}"), range(32)))
+
+    assert len(created) == 1 and created[0].loads == 1
+
+
+def test_preload_skips_failing_tables():
+    runtime, created = _runtime(failing={"missing"})
+
+    loaded = runtime.preload(["rag_embeddings", "missing"])
+
+    assert loaded == ["rag_embeddings"]
+    assert runtime.stats["tables"] == ["rag_embeddings"]
+    assert created[1].closed
+
+
+def test_close_releases_every_table():
+    runtime, created = _runtime()
+    runtime.retrieve("wifi", table_name="a")
+    runtime.retrieve("wifi", table_name="b")
+
+    runtime.close()
+
+    assert all(i.closed for i in created)
+    assert runtime.stats == {"tables": [], "retrievers": []}
@@ -0,0 +1,153 @@
+"""
+Test Semantic Cache
+Similarity threshold, scoping, invalidation, eviction and hit accounting
+"""
+import unicodedata
+
+import pytest
+
+from src.application.services.llm.semantic_cache import SemanticCache, normalize_question
+from src.infrastructure.config import get_settings
+
+VOCABULARY = ["check-in", "check-out", "mấy", "giờ", "khách", "sạn", "hồ", "bơi", "có", "không", "wifi"]
+
+
+def fake_embed(text):
+    """Bag of words over a tiny vocabulary, so similarity is predictable"""
+    words = text.split()
+    return [float(words.count(w)) for w in VOCABULARY] + [1.0 if not words else 0.0]
+
+
+class WordCounter:
+    def count(self, text):
+        return len(text.split())
+
+
+def _cache(threshold=0.9, max_entries=100, ttl=3600, **overrides):
+    settings = get_settings().model_copy(update={
+        "semantic_cache_enabled": True,
+        "semantic_cache_threshold": threshold,
+        "semantic_cache_max_entries": max_entries,
+        "semantic_cache_ttl_seconds": ttl,
+        **overrides,
+    })
+    calls = []
+
+    def embed(text):
+        calls.append(text)
+        return fake_embed(text)
+
+    cache = SemanticCache(embed_fn=embed, settings=settings, counter=WordCounter())
+    return cache, calls
+
+
+def test_normalize_question():
+    decomposed = unicodedata.normalize("NFD", "Khách sạn có wifi không ?")
+
+    assert normalize_question("  Check-in   MẤY giờ?? ") == "check-in mấy giờ"
+    assert normalize_question(decomposed) == normalize_question("khách sạn có wifi không")
+
+
+def test_similar_question_hits_and_dissimilar_misses():
+    cache, _ = _cache(threshold=0.9)
+    cache.store("check-in mấy giờ khách sạn", {"answer": "14:00"}, "rag_embeddings")
+
+    hit = cache.lookup("Khách sạn check-in mấy giờ?", "rag_embeddings")
+
+    assert hit["answer"] == "14:00"
+    assert hit["similarity"] == pytest.approx(1.0)
+    assert cache.lookup("khách sạn có hồ bơi không", "rag_embeddings") is None
+
+
+def test_exact_repeat_skips_embedding():
+    cache, calls = _cache()
+    cache.store("Check-in mấy giờ?", {"answer": "14:00"}, "rag_embeddings")
+
+    assert cache.lookup("check-in   mấy giờ", "rag_embeddings")["answer"] == "14:00"
+    assert calls == ["check-in mấy giờ"]
+    assert cache.stats["exact_hits"] == 1
+
+
+def test_answers_are_scoped_by_table():
+    cache, _ = _cache()
+    cache.store("wifi", {"answer": "wifi from documents"}, "rag_embeddings")
+
+    assert cache.lookup("wifi", "rag_embeddings")["answer"] == "wifi from documents"
+    assert cache.lookup("wifi", "other_table") is None
+
+
+def test_reindex_invalidates_only_that_table():
+    cache, _ = _cache()
+    cache.store("wifi", {"answer": "a"}, "rag_embeddings")
+    cache.store("hồ bơi", {"answer": "b"}, "rag_embeddings")
+    cache.store("wifi", {"answer": "c"}, "policies")
+
+    assert cache.invalidate("rag_embeddings") == 2
+    assert cache.lookup("wifi", "rag_embeddings") is None
+    assert cache.lookup("wifi", "policies")["answer"] == "c"
+
+
+def test_answer_computed_before_reindex_is_not_stored():
+    cache, _ = _cache()
+    generation = cache.generation("rag_embeddings")
+    assert cache.lookup("wifi", "rag_embeddings") is None
+
+    cache.invalidate("rag_embeddings")
+    cache.store("wifi", {"answer": "old documents"}, "rag_embeddings", generation=generation)
+
+    assert cache.lookup("wifi", "rag_embeddings") is None
+    assert cache.stats["stale_stores"] == 1
+
+
+def test_generation_changes_only_for_invalidated_scopes():
+    cache, _ = _cache()
+    policies = cache.generation("policies")
+
+    cache.invalidate("rag_embeddings")
+    cache.store("wifi", {"answer": "c"}, "policies", generation=policies)
+    assert cache.lookup("wifi", "policies")["answer"] == "c"
+
+    cache.invalidate()
+    assert cache.generation("policies") != policies
+
+
+def test_oldest_entries_are_evicted():
+    cache, _ = _cache(max_entries=2)
+    for question in ["wifi", "hồ bơi", "check-out"]:
+        cache.store(question, {"answer": question}, "rag_embeddings")
+
+    assert cache.lookup("wifi", "rag_embeddings") is None
+    assert cache.lookup("check-out", "rag_embeddings")["answer"] == "check-out"
+    assert cache.stats["entries"] == 2 and cache.stats["evictions"] == 1
+
+
+def test_expired_entries_miss():
+    cache, _ = _cache(ttl=-1)
+    cache.store("wifi", {"answer": "yes"}, "rag_embeddings")
+
+    assert cache.lookup("wifi", "rag_embeddings") is None
+
+
+def test_stats_report_hit_rate_and_saved_tokens():
+    cache, _ = _cache()
+    cache.store("wifi", {"answer": "có wifi miễn phí"}, "rag_embeddings", tokens=250)
+    cache.store("hồ bơi", {"answer": "có"}, "rag_embeddings")  # estimated: 2 + 1 words
+
+    cache.lookup("wifi", "rag_embeddings")
+    cache.lookup("wifi?", "rag_embeddings")
+    cache.lookup("hồ bơi", "rag_embeddings")
+    cache.lookup("check-out", "rag_embeddings")
+
+    stats = cache.stats
+    assert stats["lookups"] == 4 and stats["hits"] == 3 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.75
+    assert stats["tokens_saved"] == 250 * 2 + 3
+    assert stats["scopes"] == {"rag_embeddings": 2}
+
+
+def test_disabled_cache_never_hits():
+    cache, calls = _cache(semantic_cache_enabled=False)
+    cache.store("wifi", {"answer": "yes"}, "rag_embeddings")
+
+    assert cache.lookup("wifi", "rag_embeddings") is None
+    assert calls == []
@@ -0,0 +1,134 @@
+"""
+Test SSE streaming helpers
+Frame formatting, in-band errors, closing abandoned streams and the thread
+bridge for sync graphs
+"""
+import json
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.application.controllers.llm.sse import iterate_in_thread, sse_event, sse_response
+
+
+def _parse(body: str):
+    events = []
+    for frame in body.strip().split("\n\n"):
+        event_line, data_line = frame.split("\n")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+def _app(events_factory):
+    app = FastAPI()
+
+    @app.get("/stream")
+    async def stream():
+        return sse_response("conv-1", events_factory())
+
+    return TestClient(app)
+
+
+def test_sse_event_frame():
+    assert sse_event("token", {"content": "Xin chào"}) == 'event: token\ndata: {"content": "Xin chào"}\n\n'
+
+
+def test_stream_starts_with_conversation_and_keeps_order():
+    async def events():
+        yield "token", {"content": "Hel"}
+        yield "token", {"content": "lo"}
+        yield "done", {"response": "Hello"}
+
+    response = _app(events).get("/stream")
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    assert _parse(response.text) == [
+        ("start", {"conversation_id": "conv-1"}),
+        ("token", {"content": "Hel"}),
+        ("token", {"content": "lo"}),
+        ("done", {"response": "Hello"}),
+    ]
+
+
+def test_failures_are_reported_in_band():
+    async def events():
+        yield "token", {"content": "partial"}
+        raise RuntimeError("LLM unavailable")
+
+    response = _app(events).get("/stream")
+
+    assert response.status_code == 200
+    assert _parse(response.text)[-1] == ("error", {"detail": "LLM unavailable"})
+
+
+@pytest.mark.asyncio
+async def test_abandoned_stream_is_closed_after_the_response():
+    closed = []
+
+    async def events():
+        try:
+            yield "token", {"content": "Hel"}
+            yield "token", {"content": "lo"}
+        finally:
+            closed.append(True)
+
+    response = sse_response("conv-1", events())
+    frames = response.body_iterator
+    await anext(frames)
+    await anext(frames)
+    await response.background()
+
+    assert closed == [True]
+
+
+@pytest.mark.asyncio
+async def test_iterate_in_thread_yields_items_from_worker():
+    thread_ids = set()
+
+    def produce(n):
+        for i in range(n):
+            thread_ids.add(threading.get_ident())
+            yield i
+
+    items = [item async for item in iterate_in_thread(produce, 5)]
+
+    assert items == [0, 1, 2, 3, 4]
+    assert threading.get_ident() not in thread_ids
+
+
+@pytest.mark.asyncio
+async def test_iterate_in_thread_reraises_worker_errors():
+    def produce():
+        yield "step"
+        raise ValueError("graph failed")
+
+    seen = []
+    with pytest.raises(ValueError, match="graph failed"):
+        async for item in iterate_in_thread(produce):
+            seen.append(item)
+
+    assert seen == ["step"]
+
+
+@pytest.mark.asyncio
+async def test_iterate_in_thread_stops_worker_when_consumer_leaves():
+    produced = []
+
+    def produce():
+        for i in range(1000):
+            produced.append(i)
+            time.sleep(0.001)
+            yield i
+
+    stream = iterate_in_thread(produce)
+    async for item in stream:
+        if item == 2:
+            break
+    await stream.aclose()
+
+    time.sleep(0.05)
+    assert len(produced) < 1000
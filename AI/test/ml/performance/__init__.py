@@ -0,0 +1 @@
+"""Performance tests and benchmarks for ML service"""
@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Performance benchmark for the ML Service
+
+Benchmarks (each at several data scales):
+1. ChurnPredictor.predict (single booking) and predict_batch
+2. CLVCalculator.predict_clv_batch
+3. PricingOptimizer.optimize_pricing over long date ranges
+4. RecommendationEngine factor top-k over growing catalogs
+5. CLVFeatureEngineer.engineer_features_for_training
+6. The same endpoints through an ASGI client under concurrency
+
+Results (p50/p95/p99 latency and throughput) are written as JSON. Passing
+a previous results file as --baseline fails the run when a case got slower
+than the tolerance allows.
+
+Usage:
+    python test/ml/performance/benchmark_ml_inference.py --output bench.json
+    python test/ml/performance/benchmark_ml_inference.py --baseline bench.json --tolerance 0.25
+"""
+
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import platform
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+
+
+# ============================================================================
+# Scales
+# ============================================================================
+
+SCALES = {
+    "small": {
+        "churn_batch": 100, "clv_guests": 100, "pricing_days": 30,
+        "catalog_items": 500, "training_bookings": 1_000, "repeats": 50,
+    },
+    "medium": {
+        "churn_batch": 1_000, "clv_guests": 1_000, "pricing_days": 180,
+        "catalog_items": 5_000, "training_bookings": 10_000, "repeats": 20,
+    },
+    "large": {
+        "churn_batch": 10_000, "clv_guests": 10_000, "pricing_days": 730,
+        "catalog_items": 50_000, "training_bookings": 100_000, "repeats": 5,
+    },
+}
+
+ROOM_TYPES = ["standard", "deluxe", "suite"]
+
+
+# ============================================================================
+# Utilities
+# ============================================================================
+
+
+def print_section(title: str):
+    """Print section header"""
+    print(f"\n{'=' * 80}")
+    print(f"  {title}")
+    print(f"{'=' * 80}\n")
+
+
+def summarize(latencies_s: List[float], items_per_call: int, wall_s: Optional[float] = None) -> Dict[str, float]:
+    """
+    Latency percentiles and throughput for one case
+
+    Args:
+        latencies_s: Per-call latencies in seconds
+        items_per_call: Predictions produced by one call
+        wall_s: Wall time of the whole run (defaults to the sum of
+            latencies, i.e. sequential calls)
+    """
+    ms = np.asarray(latencies_s) * 1000
+    wall_s = wall_s if wall_s is not None else float(np.sum(latencies_s))
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "calls": len(ms),
+        "items_per_call": items_per_call,
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "throughput_per_s": round(len(ms) * items_per_call / wall_s, 1) if wall_s > 0 else 0.0,
+    }
+
+
+async def time_calls(fn: Callable[[], Any], repeats: int, warmup: int = 2) -> List[float]:
+    """Latencies of sequential calls to a sync or async function"""
+    latencies = []
+    for i in range(warmup + repeats):
+        start = time.perf_counter()
+        result = fn()
+        if inspect.isawaitable(result):
+            await result
+        if i >= warmup:
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def print_result(name: str, result: Dict[str, float]):
+    """Print one result line"""
+    print(
+        f"  {name:<45} p50 {result['p50_ms']:>9.3f}ms  p95 {result['p95_ms']:>9.3f}ms  "
+        f"p99 {result['p99_ms']:>9.3f}ms  {result['throughput_per_s']:>12,.1f}/s"
+    )
+
+
+# ============================================================================
+# Synthetic Inputs
+# ============================================================================
+
+
+def churn_feature_dicts(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Random booking features in the ChurnFeatures schema"""
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            'booking_lead_time_days': int(rng.integers(0, 120)),
+            'room_type': str(rng.choice(ROOM_TYPES)),
+            'total_amount': float(rng.integers(1, 10) * 1_000_000),
+            'payment_method': str(rng.choice(['cash', 'credit_card', 'bank_transfer'])),
+            'booking_source': str(rng.choice(['website', 'ota', 'phone'])),
+            'is_first_booking': bool(rng.random() < 0.4),
+            'previous_bookings_count': int(rng.integers(0, 10)),
+            'cancellation_rate': float(rng.random() * 0.5),
+            'loyalty_tier': str(rng.choice(['none', 'silver', 'gold', 'platinum'])),
+            'booking_modifications': int(rng.integers(0, 4)),
+            'days_until_checkin': int(rng.integers(1, 60)),
+        }
+        for _ in range(n)
+    ]
+
+
+def factor_artifact(n_items: int, n_users: int = 1_000, n_factors: int = 64, seed: int = 0) -> Dict[str, Any]:
+    """Random factorization artifact in the train_recommender format"""
+    rng = np.random.default_rng(seed)
+    return {
+        'version': 'bench',
+        'user_ids': np.array([f"G{i}" for i in range(n_users)]),
+        'item_ids': np.array([f"SVC_{i}" for i in range(n_items)]),
+        'user_factors': rng.normal(0, 0.3, (n_users, n_factors)).astype(np.float32),
+        'item_factors': rng.normal(0, 0.3, (n_items, n_factors)).astype(np.float32),
+        'user_interactions': rng.integers(1, 20, n_users).astype(np.int32),
+        'item_popularity': rng.random(n_items).astype(np.float32),
+        'item_names': np.array([f"Service {i}" for i in range(n_items)]),
+        'item_categories': np.array(["dining", "spa", "transport", "laundry"])[np.arange(n_items) % 4],
+        'item_prices': rng.integers(100_000, 2_000_000, n_items).astype(np.float64),
+    }
+
+
+def training_bookings(n: int, seed: int = 0) -> pd.DataFrame:
+    """Random booking history in the CLV training export format"""
+    rng = np.random.default_rng(seed)
+    booking_date = pd.Timestamp("2022-01-01") + pd.to_timedelta(rng.integers(0, 900, n), unit="D")
+    checkin = booking_date + pd.to_timedelta(rng.integers(1, 60, n), unit="D")
+    return pd.DataFrame({
+        'guest_id': rng.integers(0, max(n // 5, 1), n).astype(str),
+        'booking_date': booking_date,
+        'checkin_date': checkin,
+        'checkout_date': checkin + pd.to_timedelta(rng.integers(1, 7, n), unit="D"),
+        'total_amount': rng.integers(1, 20, n) * 500_000.0,
+        'cancelled': rng.random(n) < 0.15,
+        'services_used': [['spa'] if r < 0.3 else [] for r in rng.random(n)],
+    })
+
+
+# ============================================================================
+# In-Process Benchmarks
+# ============================================================================
+
+
+async def benchmark_in_process(scale_name: str) -> Dict[str, Dict[str, float]]:
+    """Benchmark service methods directly"""
+    from unittest.mock import Mock
+
+    from src.application.dtos.ml.churn_dto import ChurnFeatures
+    from src.application.dtos.ml.clv_dto import CLVBatchPredictRequest
+    from src.application.dtos.ml.pricing_dto import DateRange, PricingOptimizationRequest
+    from src.application.services.ml.churn_predictor import ChurnPredictor
+    from src.application.services.ml.clv_calculator import CLVCalculator
+    from src.application.services.ml.clv_feature_engineering import CLVFeatureEngineer
+    from src.application.services.ml.pricing_optimizer import PricingOptimizer
+    from src.application.services.ml.recommender import RecommendationEngine
+
+    print_section(f"In-Process Benchmarks ({scale_name})")
+    scale = SCALES[scale_name]
+    repeats = scale["repeats"]
+    results = {}
+
+    def record(name: str, result: Dict[str, float]):
+        key = f"inprocess/{name}/{scale_name}"
+        results[key] = result
+        print_result(name, result)
+
+    # 1. Churn
+    predictor = ChurnPredictor()
+    dicts = churn_feature_dicts(scale["churn_batch"])
+    single = ChurnFeatures(**dicts[0])
+    record("churn.predict", summarize(await time_calls(lambda: predictor.predict(single), repeats * 10), 1))
+
+    bookings = [{'booking_id': str(i), 'features': d} for i, d in enumerate(dicts)]
+    record(
+        "churn.predict_batch",
+        summarize(await time_calls(lambda: predictor.predict_batch(bookings), repeats), len(bookings)),
+    )
+
+    # 2. CLV (mock histories; model_construct skips the 100-guest request limit)
+    registry = Mock()
+    registry.get_model = Mock(return_value=None)
+    calculator = CLVCalculator(registry, None)
+    request = CLVBatchPredictRequest.model_construct(
+        guest_ids=[f"G{i}" for i in range(scale["clv_guests"])], time_horizon_months=12
+    )
+    record(
+        "clv.predict_clv_batch",
+        summarize(await time_calls(lambda: calculator.predict_clv_batch(request), repeats), scale["clv_guests"]),
+    )
+
+    # 3. Pricing over a long range
+    optimizer = PricingOptimizer()
+    start = date.today()
+    pricing_request = PricingOptimizationRequest(
+        date_range=DateRange(start=start, end=start + timedelta(days=scale["pricing_days"] - 1)),
+        room_types=ROOM_TYPES,
+    )
+    record(
+        "pricing.optimize_pricing",
+        summarize(
+            await time_calls(lambda: optimizer.optimize_pricing(pricing_request), repeats),
+            scale["pricing_days"] * len(ROOM_TYPES),
+        ),
+    )
+
+    # 4. Recommendation top-k over the catalog
+    recommender = RecommendationEngine(model=factor_artifact(scale["catalog_items"]))
+    guests = iter(f"G{i % 1000}" for i in range(10 ** 9))
+    record(
+        "recommender.recommend_services",
+        summarize(
+            await time_calls(lambda: recommender.recommend_services(next(guests), top_k=20, context=None), repeats * 10),
+            1,
+        ),
+    )
+
+    # 5. CLV training features
+    engineer = CLVFeatureEngineer()
+    bookings_df = training_bookings(scale["training_bookings"])
+    record(
+        "clv_features.engineer_features_for_training",
+        summarize(
+            await time_calls(lambda: engineer.engineer_features_for_training(bookings_df), max(repeats // 5, 2), warmup=1),
+            len(bookings_df),
+        ),
+    )
+
+    return results
+
+
+# ============================================================================
+# ASGI Benchmarks
+# ============================================================================
+
+
+async def run_concurrent(
+    send: Callable[[Any, int], Awaitable[Any]],
+    client: Any,
+    total: int,
+    concurrency: int,
+) -> Dict[str, float]:
+    """Issue `total` requests from `concurrency` workers and summarize them"""
+    latencies: List[float] = []
+    failures = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal failures
+        for i in counter:
+            start = time.perf_counter()
+            response = await send(client, i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                failures += 1
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result = summarize(latencies, 1, time.perf_counter() - wall_start)
+    result["failures"] = failures
+    return result
+
+
+async def benchmark_asgi(scale_name: str, concurrency: int, total_requests: int) -> Dict[str, Dict[str, float]]:
+    """Benchmark the ML endpoints through an in-memory ASGI client"""
+    import httpx
+
+    from src.application.controllers.ml.main import app
+
+    print_section(f"ASGI Benchmarks ({scale_name}, concurrency={concurrency})")
+    scale = SCALES[scale_name]
+    results = {}
+    dicts = churn_feature_dicts(total_requests)
+    start = date.today()
+
+    cases = {
+        "POST /churn/predict": lambda client, i: client.post(
+            "/api/ml/churn/predict",
+            json={'booking_id': f"B{i}", 'guest_id': f"G{i}", 'features': dicts[i]},
+        ),
+        "POST /clv/predict": lambda client, i: client.post(
+            "/api/ml/clv/predict", json={'guest_id': f"G{i}", 'time_horizon_months': 12}
+        ),
+        "POST /recommend/services": lambda client, i: client.post(
+            "/api/ml/recommend/services", json={'guest_id': f"G{i}", 'top_k': 5}
+        ),
+        "POST /pricing/optimize": lambda client, i: client.post(
+            "/api/ml/pricing/optimize",
+            json={
+                'date_range': {
+                    'start': start.isoformat(),
+                    'end': (start + timedelta(days=scale["pricing_days"] - 1)).isoformat(),
+                },
+                'room_types': ROOM_TYPES,
+            },
+        ),
+    }
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for name, send in cases.items():
+            await run_concurrent(send, client, min(concurrency, total_requests), concurrency)  # warm-up
+            result = await run_concurrent(send, client, total_requests, concurrency)
+            results[f"asgi/{name}/{scale_name}"] = result
+            print_result(name, result)
+            if result["failures"]:
+                print(f"  ⚠️  {result['failures']} requests failed")
+
+    return results
+
+
+# ============================================================================
+# Baseline Comparison
+# ============================================================================
+
+
+def compare_to_baseline(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+) -> List[str]:
+    """
+    Cases that regressed against a baseline
+
+    A case regresses when its p95 latency grew, or its throughput dropped,
+    by more than `tolerance` (0.25 = 25%). Cases missing from either side
+    are skipped.
+
+    Returns:
+        Human-readable regression messages
+    """
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if base["p95_ms"] > 0 and result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{key}: p95 {base['p95_ms']:.3f}ms -> {result['p95_ms']:.3f}ms")
+        if base["throughput_per_s"] > 0 and result["throughput_per_s"] < base["throughput_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{key}: throughput {base['throughput_per_s']:,.1f}/s -> {result['throughput_per_s']:,.1f}/s"
+            )
+    return regressions
+
+
+# ============================================================================
+# Main Runner
+# ============================================================================
+
+
+async def run_all_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the selected benchmarks"""
+    results: Dict[str, Dict[str, float]] = {}
+    for scale_name in args.scales:
+        if args.mode in ("inprocess", "both"):
+            results.update(await benchmark_in_process(scale_name))
+        if args.mode in ("asgi", "both"):
+            results.update(await benchmark_asgi(scale_name, args.concurrency, args.requests))
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "scales": args.scales,
+            "mode": args.mode,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+        },
+        "results": results,
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="ML service inference benchmarks")
+    parser.add_argument("--scales", default="small,medium", type=lambda s: s.split(","),
+                        help=f"Comma-separated scales ({', '.join(SCALES)})")
+    parser.add_argument("--mode", choices=["inprocess", "asgi", "both"], default="both")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent ASGI clients")
+    parser.add_argument("--requests", type=int, default=500, help="ASGI requests per endpoint")
+    parser.add_argument("--output", type=Path, help="Write results JSON here")
+    parser.add_argument("--baseline", type=Path, help="Results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed p95 / throughput regression (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+    unknown = set(args.scales) - set(SCALES)
+    if unknown:
+        parser.error(f"Unknown scales: {', '.join(sorted(unknown))}")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    print("\n🚀 Starting ML Service Performance Benchmarks...\n")
+
+    report = asyncio.run(run_all_benchmarks(args))
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"\n✅ Results written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["results"]
+        regressions = compare_to_baseline(report["results"], baseline, args.tolerance)
+        print_section("Baseline Comparison")
+        if regressions:
+            for message in regressions:
+                print(f"  ❌ REGRESSION {message}")
+            return 1
+        print(f"  ✅ No regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    import logging
+
+    logging.basicConfig(level=logging.WARNING)
+    # Per-request INFO logs would dominate the output; the access logger
+    # sets its own level, so quieting the parent is not enough
+    from src.utils.logger import access_logger, app_logger
+    for benchmark_logger in (app_logger, access_logger):
+        benchmark_logger.setLevel(logging.WARNING)
+
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""
+Test Churn Explainer
+Unit tests for the rule table, tree contributions and batch top-k selection
+"""
+import lightgbm as lgb
+import numpy as np
+import pytest
+
+from src.application.dtos.ml.churn_dto import ChurnFeatures
+from src.application.ml_models.model_registry import CompiledTreePredictor
+from src.application.services.ml.churn_explainer import (
+    ChurnExplainer,
+    RULES,
+    model_contributions,
+    recommend_batch,
+    rule_contributions,
+    top_factors,
+)
+from src.application.services.ml.churn_predictor import ChurnPredictor
+from src.application.services.ml.feature_engineering import CHURN_FEATURES, ChurnFeatureEncoder
+
+
+def _features(**overrides):
+    values = dict(
+        booking_lead_time_days=14,
+        room_type="deluxe",
+        total_amount=3000000,
+        payment_method="bank_transfer",
+        booking_source="website",
+        is_first_booking=False,
+        loyalty_tier="silver",
+        days_until_checkin=7,
+    )
+    values.update(overrides)
+    return ChurnFeatures(**values)
+
+
+def _factors(factors):
+    return {f.factor: (f.impact_score, f.description) for f in factors}
+
+
+@pytest.fixture(scope="module")
+def tree_model():
+    rng = np.random.default_rng(0)
+    X = ChurnFeatureEncoder.encode_batch([
+        {
+            'booking_lead_time_days': int(lead),
+            'total_amount': 3_000_000,
+            'cancellation_rate': float(rate),
+            'is_first_booking': bool(first),
+        }
+        for lead, rate, first in zip(rng.integers(0, 120, 800), rng.random(800) * 0.6, rng.random(800) < 0.4)
+    ])
+    logit = -3 + X[:, 0] / 20 + 3 * X[:, 9]
+    y = (rng.random(800) < 1 / (1 + np.exp(-logit))).astype(int)
+    return lgb.LGBMClassifier(n_estimators=30, num_leaves=8, verbose=-1).fit(X, y), X
+
+
+def test_rule_table_high_risk_booking():
+    predictor = ChurnPredictor()
+    features = _features(
+        booking_lead_time_days=75,
+        payment_method="cash",
+        is_first_booking=True,
+        cancellation_rate=0.5,
+        loyalty_tier="none",
+        price_vs_avg_ratio=1.3,
+        booking_modifications=4,
+    )
+
+    risk, protective = predictor.analyze_risk_factors(features)
+
+    assert _factors(risk) == {
+        'long_lead_time': (0.15, "Bookings made 75+ days in advance have higher cancellation rates"),
+        'first_time_guest': (0.10, "First-time guests have higher cancellation rates"),
+        'high_historical_cancellation': (0.15, "Guest has 50% historical cancellation rate"),
+        'no_loyalty_membership': (0.05, "Non-loyalty member has less commitment"),
+        'cash_payment': (0.05, "Cash payment has no financial commitment"),
+        'price_sensitivity': (0.12, "Price point above guest's typical spending"),
+        'multiple_modifications': (0.15, "Booking has been modified 4 times"),
+    }
+    assert protective == []
+    # Strongest factors first
+    impacts = [f.impact_score for f in risk]
+    assert impacts == sorted(impacts, reverse=True)
+
+
+def test_rule_table_protective_booking():
+    predictor = ChurnPredictor()
+    features = _features(
+        booking_lead_time_days=3,
+        payment_method="credit_card",
+        previous_bookings_count=5,
+        loyalty_tier="platinum",
+        price_vs_avg_ratio=0.8,
+    )
+
+    risk, protective = predictor.analyze_risk_factors(features)
+
+    assert risk == []
+    assert _factors(protective) == {
+        'loyalty_member': (-0.12, "Platinum member status indicates commitment"),
+        'short_lead_time': (-0.10, "Short booking window indicates urgency and commitment"),
+        'repeat_guest': (-0.10, "Guest has completed 5 previous stays"),
+        'credit_card_payment': (-0.05, "Credit card payment indicates commitment"),
+        'good_value': (-0.05, "Booking price is below typical spending"),
+    }
+    assert protective[0].factor == 'loyalty_member'
+
+
+def test_unknown_payment_method_is_not_reported_as_cash():
+    predictor = ChurnPredictor()
+
+    unknown, _ = predictor.analyze_risk_factors(_features(payment_method="paypal"))
+    cash, _ = predictor.analyze_risk_factors(_features(payment_method="Cash"))
+
+    assert 'cash_payment' not in _factors(unknown)
+    assert 'cash_payment' in _factors(cash)
+
+
+def _reference_recommendations(risk_level, f):
+    """Actions of the original per-booking if/else chain"""
+    actions = []
+    if risk_level in ['medium', 'high']:
+        actions.append(('send_confirmation_email', 'high', 0.05, None))
+    if f.booking_lead_time_days > 30 and f.days_until_checkin > 7:
+        actions.append(('send_reminder_communications', 'medium', 0.03, None))
+    if f.loyalty_tier in ['gold', 'platinum'] and not f.discount_applied:
+        actions.append(('apply_loyalty_discount', 'high', 0.12, {
+            'discount_percentage': 10 if f.loyalty_tier == 'gold' else 15,
+            'estimated_cost': int(f.total_amount * 0.10),
+        }))
+    if risk_level == 'high':
+        actions.append(('personal_outreach', 'high', 0.10, None))
+        actions.append(('offer_flexible_cancellation', 'medium', 0.08, None))
+    if f.is_first_booking:
+        actions.append(('send_welcome_package', 'medium', 0.05, None))
+    order = {'high': 0, 'medium': 1, 'low': 2}
+    actions.sort(key=lambda a: (order[a[1]], -a[2]))
+    return [(a[0], a[3]) for a in actions[:5]]
+
+
+def test_recommendations_follow_rule_table():
+    bookings = [
+        ('high', _features(booking_lead_time_days=45, days_until_checkin=30, loyalty_tier='gold', is_first_booking=True)),
+        ('medium', _features(booking_lead_time_days=90, days_until_checkin=5, loyalty_tier='platinum', discount_applied=True)),
+        ('low', _features(booking_lead_time_days=10, loyalty_tier='platinum', total_amount=4_500_000)),
+        ('high', _features(is_first_booking=True)),
+    ]
+    X = ChurnFeatureEncoder.encode_batch([f.model_dump() for _, f in bookings])
+
+    batch = recommend_batch(X, [level for level, _ in bookings])
+
+    predictor = ChurnPredictor()
+    for (level, features), actions in zip(bookings, batch):
+        assert [(a.action, a.details) for a in actions] == _reference_recommendations(level, features)
+        assert actions == predictor.generate_recommendations(0.5, level, features, [])
+
+
+def test_rule_thresholds_are_exclusive():
+    X = ChurnFeatureEncoder.encode_batch([
+        {'booking_lead_time_days': 30, 'cancellation_rate': 0.3, 'price_vs_avg_ratio': 1.2,
+         'booking_modifications': 2, 'is_first_booking': False, 'loyalty_tier': 'silver',
+         'payment_method': 'bank_transfer'},
+    ])
+
+    C = rule_contributions(X)
+
+    assert C.shape == (1, len(RULES))
+    assert not C.any()
+
+
+def test_batch_matches_single_explanations():
+    predictor = ChurnPredictor()
+    bookings = [
+        _features(booking_lead_time_days=lead, cancellation_rate=rate, loyalty_tier=tier)
+        for lead, rate, tier in [(5, 0.0, 'gold'), (45, 0.4, 'none'), (90, 0.8, 'platinum')]
+    ]
+    X = ChurnFeatureEncoder.encode_batch([f.model_dump() for f in bookings])
+
+    batch = ChurnExplainer().explain_batch(X)
+
+    assert batch == [predictor.analyze_risk_factors(f) for f in bookings]
+
+
+def test_top_factors_limits_and_orders_each_side():
+    C = np.array([[0.3, -0.2, 0.1, 0.0, -0.4], [0.0, 0.0, 0.0, 0.0, 0.0]])
+    names = list("abcde")
+
+    results = top_factors(C, names, lambda i, j: f"{i}:{j}", top_k=1)
+
+    risk, protective = results[0]
+    assert [(f.factor, f.description) for f in risk] == [('a', "0:0")]
+    assert [(f.factor, f.impact_score) for f in protective] == [('e', -0.4)]
+    assert results[1] == ([], [])
+
+
+def test_model_contributions_follow_tree_shap(tree_model):
+    model, X = tree_model
+    probabilities = model.predict_proba(X[:50])[:, 1]
+
+    C = model_contributions(model, X[:50], probabilities)
+
+    raw = model.booster_.predict(X[:50], pred_contrib=True)
+    np.testing.assert_allclose(C, raw[:, :-1] * (probabilities * (1 - probabilities))[:, None])
+    # Compiled predictors expose the same booster
+    np.testing.assert_allclose(model_contributions(CompiledTreePredictor.compile(model), X[:50], probabilities), C)
+
+
+def test_model_mode_reports_feature_factors(tree_model):
+    model, X = tree_model
+    probabilities = model.predict_proba(X[:20])[:, 1]
+
+    explanations = ChurnExplainer(top_k=3).explain_batch(X[:20], model, probabilities)
+
+    assert len(explanations) == 20
+    for risk, protective in explanations:
+        assert len(risk) <= 3 and len(protective) <= 3
+        assert all(f.factor in CHURN_FEATURES and f.impact_score > 0 for f in risk)
+        assert all(f.impact_score < 0 and "lowers" in f.description for f in protective)
+
+
+def test_unsupported_model_falls_back_to_rules():
+    class Constant:
+        def predict_proba(self, X):
+            return np.tile([0.5, 0.5], (len(X), 1))
+
+    X = ChurnFeatureEncoder.encode_batch([{'booking_lead_time_days': 90}])
+
+    explanations = ChurnExplainer().explain_batch(X, Constant(), np.array([0.5]))
+
+    assert explanations == ChurnExplainer().explain_batch(X)
+
+
+@pytest.mark.asyncio
+async def test_predict_batch_attaches_factors_on_request():
+    predictor = ChurnPredictor()
+    features = _features(booking_lead_time_days=90, loyalty_tier="gold")
+    bookings = [{'booking_id': 'B1', 'features': features.model_dump()}]
+
+    plain = await predictor.predict_batch(bookings)
+    explained = await predictor.predict_batch(bookings, explain=True)
+
+    assert plain[0].risk_factors is None
+    risk, protective = predictor.analyze_risk_factors(features)
+    assert explained[0].risk_factors == risk
+    assert explained[0].protective_factors == protective
@@ -3,10 +3,14 @@ Test Churn Predictor Service
 Unit tests for churn prediction logic
 """
 import pytest
+import numpy as np
+from pydantic import ValidationError
+from unittest.mock import Mock
 from src.application.services.ml.churn_predictor import (
     ChurnPredictor,
     get_churn_predictor,
-    RISK_THRESHOLDS
+    RISK_THRESHOLDS,
+    RISK_LEVELS,
 )
 from src.application.dtos.ml.churn_dto import ChurnFeatures
 
@@ -103,4 +107,150 @@ class TestChurnFeatureEngineering:
             days_until_checkin=5
         )
         
-        assert features is not None
\ No newline at end of file
+        assert features is not None
+
+class TestChurnBatchScoring:
+    """Test vectorized batch scoring path"""
+
+    @staticmethod
+    def _sample_rows():
+        return [
+            {
+                "booking_lead_time_days": lead,
+                "room_type": room,
+                "total_amount": 1_250_000 * (i + 1),
+                "payment_method": payment,
+                "booking_source": source,
+                "is_first_booking": i % 2 == 0,
+                "cancellation_rate": (i % 5) / 10,
+                "loyalty_tier": tier,
+                "booking_modifications": i % 4,
+                "days_until_checkin": i,
+                "price_vs_avg_ratio": 0.9 + (i % 6) * 0.1,
+                "days_since_last_booking": None if i % 3 == 0 else i * 7,
+                "season": "Peak" if i % 2 else "low",
+            }
+            for i, (lead, room, payment, source, tier) in enumerate([
+                (5, "deluxe", "credit_card", "website", "gold"),
+                (20, "Suite", "cash", "ota", "none"),
+                (45, "standard", "debit_card", "mobile_app", "silver"),
+                (90, "presidential", "bank_transfer", "agency", "platinum"),
+                (61, "unknown", "crypto", "direct", "diamond"),
+                (31, "deluxe", "credit_card", "phone", "Gold"),
+            ])
+        ]
+
+    def test_encode_batch_matches_encode_features(self):
+        """encode_batch produces the same rows as encode_features"""
+        from src.application.services.ml.feature_engineering import (
+            ChurnFeatureEncoder,
+            CHURN_FEATURES,
+        )
+
+        rows = self._sample_rows()
+        X = ChurnFeatureEncoder.encode_batch(rows)
+
+        assert X.shape == (len(rows), len(CHURN_FEATURES))
+        assert X.dtype.name == "float32"
+        for i, row in enumerate(rows):
+            np.testing.assert_array_equal(X[i], ChurnFeatureEncoder.encode_features(row))
+
+    @pytest.mark.asyncio
+    async def test_predict_batch_matches_single_predictions(self):
+        """Vectorized mock path agrees with per-row predict"""
+        predictor = ChurnPredictor()
+        rows = self._sample_rows()
+        bookings = [{"booking_id": f"B{i}", "features": row} for i, row in enumerate(rows)]
+
+        predictions = await predictor.predict_batch(bookings)
+
+        assert [p.booking_id for p in predictions] == [b["booking_id"] for b in bookings]
+        for prediction, row in zip(predictions, rows):
+            expected, _ = predictor.predict(ChurnFeatures(**row))
+            assert prediction.churn_probability == pytest.approx(round(expected, 4), abs=1e-4)
+            assert prediction.risk_level == predictor.get_risk_level(prediction.churn_probability)
+
+    @pytest.mark.asyncio
+    async def test_predict_batch_single_model_call(self):
+        """Model is invoked once on the whole matrix"""
+        model = Mock()
+        model.predict_proba.side_effect = lambda X: np.column_stack(
+            [np.zeros(len(X)), np.linspace(0.1, 0.9, len(X))]
+        )
+        predictor = ChurnPredictor(model=model)
+        bookings = [{"booking_id": f"B{i}", "features": row} for i, row in enumerate(self._sample_rows())]
+
+        predictions = await predictor.predict_batch(bookings)
+
+        assert model.predict_proba.call_count == 1
+        assert model.predict_proba.call_args.args[0].shape == (len(bookings), 25)
+        assert [p.risk_level for p in predictions] == ["low", "low", "medium", "medium", "high", "high"]
+
+    def test_get_risk_levels_boundaries(self):
+        """Vectorized risk bucketing matches threshold semantics"""
+        predictor = ChurnPredictor()
+        probabilities = np.array([0.0, 0.2999, 0.3, 0.5999, 0.6, 1.0])
+        levels = RISK_LEVELS[predictor.get_risk_levels(probabilities)]
+        assert levels.tolist() == [predictor.get_risk_level(p) for p in probabilities]
+
+    @pytest.mark.asyncio
+    async def test_predict_batch_empty(self):
+        assert await ChurnPredictor().predict_batch([]) == []
+
+    @pytest.mark.asyncio
+    async def test_predict_batch_validates_each_row(self):
+        """Rows get the same ChurnFeatures check as single predictions"""
+        model = Mock()
+        predictor = ChurnPredictor(model=model)
+        rows = self._sample_rows()
+        rows[2]["booking_hour"] = 25
+        bookings = [{"booking_id": f"B{i}", "features": row} for i, row in enumerate(rows)]
+
+        with pytest.raises(ValueError, match="booking B2"):
+            await predictor.predict_batch(bookings)
+        model.predict_proba.assert_not_called()
+
+    @pytest.mark.parametrize("change, field", [
+        ({"booking_hour": 25}, "booking_hour"),
+        ({"cancellation_rate": -0.1}, "cancellation_rate"),
+        ({"booking_lead_time_days": "soon"}, "booking_lead_time_days"),
+        ({"pages_viewed": 2.5}, "pages_viewed"),
+        ({"is_first_booking": "maybe"}, "is_first_booking"),
+        ({"room_type": 3}, "room_type"),
+        ({"days_until_checkin": None}, "days_until_checkin"),
+    ])
+    def test_validate_batch_agrees_with_churn_features(self, change, field):
+        """Column checks reject what ChurnFeatures rejects, naming the field"""
+        rows = self._sample_rows()
+        rows[1].update(change)
+
+        with pytest.raises(ValidationError):
+            ChurnFeatures.model_validate(rows[1])
+        _, errors = ChurnPredictor().validate_batch(rows)
+
+        assert errors[1].startswith(f"{field}: ")
+        assert errors[:1] + errors[2:] == [None] * (len(rows) - 1)
+
+    def test_validate_batch_coerces_like_churn_features(self, monkeypatch):
+        """Valid rows encode as their ChurnFeatures dump, without a model per row"""
+        from src.application.services.ml.feature_engineering import ChurnFeatureEncoder
+
+        rows = self._sample_rows()
+        rows[0].update(booking_lead_time_days="5", is_first_booking="yes", special_requests_count=2)
+        expected = ChurnFeatureEncoder.encode_batch([ChurnFeatures.model_validate(r).model_dump() for r in rows])
+        monkeypatch.setattr(ChurnFeatures, "model_validate", Mock(side_effect=AssertionError("per-row validation")))
+
+        frame, errors = ChurnPredictor().validate_batch(rows)
+
+        assert errors == [None] * len(rows)
+        np.testing.assert_array_equal(ChurnFeatureEncoder.encode_frame(frame), expected)
+
+    @pytest.mark.asyncio
+    async def test_predict_batch_accepts_validated_features(self):
+        predictor = ChurnPredictor()
+        rows = self._sample_rows()
+        raw = await predictor.predict_batch([{"booking_id": "B0", "features": rows[0]}])
+        validated = await predictor.predict_batch(
+            [{"booking_id": "B0", "features": ChurnFeatures(**rows[0])}]
+        )
+        assert validated[0].churn_probability == raw[0].churn_probability
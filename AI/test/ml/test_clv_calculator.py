@@ -300,3 +300,134 @@ class TestRFMBins:
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
+
+
+def _history(guest_id, n_bookings, start, gap_days, amount, cancelled_every=0):
+    from src.application.services.ml.guest_history import summarize_bookings
+    bookings = [
+        {
+            'booking_date': start + timedelta(days=i * gap_days),
+            'checkin_date': start + timedelta(days=i * gap_days + 10),
+            'checkout_date': start + timedelta(days=i * gap_days + 12 + i % 3),
+            'total_amount': amount * (1 + 0.1 * i),
+            'room_type': 'deluxe',
+            'cancelled': bool(cancelled_every) and i % cancelled_every == 0,
+            'services_used': ['spa', 'restaurant'][: i % 3],
+        }
+        for i in range(n_bookings)
+    ]
+    return summarize_bookings(guest_id, bookings, now=datetime(2025, 6, 1))
+
+
+def _batch_histories():
+    histories = {
+        'G1': _history('G1', 1, datetime(2025, 5, 1), 0, 3_000_000),
+        'G2': _history('G2', 4, datetime(2024, 1, 1), 60, 9_000_000, cancelled_every=3),
+        'G3': _history('G3', 12, datetime(2022, 1, 1), 45, 12_000_000),
+        'G4': {'has_history': False},
+        'G5': _history('G5', 25, datetime(2020, 1, 1), 20, 40_000_000, cancelled_every=5),
+        'G6': _history('G6', 2, datetime(2023, 1, 1), 0, 1_000_000),
+    }
+    return histories
+
+
+def _train_tiny_models():
+    import xgboost as xgb
+    rng = np.random.default_rng(0)
+    X = rng.random((200, 19)) * 100
+    y_reg = X[:, 11] * 0.5 + rng.random(200)
+    y_val = X[:, 7] * 1000 + rng.random(200)
+    y_cls = (X[:, 6] < 50).astype(int)
+    split = 150
+    frequency = xgb.XGBRegressor(n_estimators=30, max_depth=3, early_stopping_rounds=5)
+    frequency.fit(X[:split], y_reg[:split], eval_set=[(X[split:], y_reg[split:])], verbose=False)
+    value = xgb.XGBRegressor(n_estimators=20, max_depth=3)
+    value.fit(X, y_val)
+    retention = xgb.XGBClassifier(n_estimators=20, max_depth=3)
+    retention.fit(X, y_cls)
+    return {
+        'clv_booking_frequency': frequency,
+        'clv_booking_value': value,
+        'clv_retention': retention,
+    }
+
+
+class TestCLVBatchInference:
+    """Vectorized batch inference matches per-guest predict_clv"""
+
+    async def _assert_batch_matches_single(self, calculator, horizon):
+        histories = _batch_histories()
+        calculator._load_guest_histories = AsyncMock(side_effect=lambda ids: histories)
+
+        response = await calculator.predict_clv_batch(
+            CLVBatchPredictRequest(guest_ids=list(histories), time_horizon_months=horizon)
+        )
+
+        assert [p.guest_id for p in response.predictions] == list(histories)
+        for prediction in response.predictions:
+            single = await calculator._predict_from_history(
+                prediction.guest_id, horizon, histories[prediction.guest_id]
+            )
+            assert prediction.predicted_clv == single.predicted_clv
+            assert prediction.segment == single.segment
+            assert prediction.retention_probability == single.retention_probability
+            assert prediction.confidence == single.confidence
+
+        assert response.summary['total_clv'] == pytest.approx(
+            sum(p.predicted_clv for p in response.predictions)
+        )
+        assert sum(response.summary['segment_counts'].values()) == len(histories)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("horizon", [6, 12, 36])
+    async def test_matches_single_without_models(self, horizon):
+        registry = Mock()
+        registry.get_model = Mock(return_value=None)
+        await self._assert_batch_matches_single(CLVCalculator(registry, None), horizon)
+
+    @pytest.mark.asyncio
+    async def test_matches_single_with_xgboost_models(self):
+        models = _train_tiny_models()
+        registry = Mock()
+        registry.get_model = Mock(side_effect=models.get)
+        await self._assert_batch_matches_single(CLVCalculator(registry, None), 12)
+
+    @pytest.mark.asyncio
+    async def test_each_model_called_once(self):
+        models = _train_tiny_models()
+        registry = Mock()
+        registry.get_model = Mock(side_effect=models.get)
+        calculator = CLVCalculator(registry, None)
+        histories = _batch_histories()
+
+        with patch.object(
+            CLVCalculator, '_predict_model_batch', wraps=CLVCalculator._predict_model_batch
+        ) as spy:
+            result = calculator._predict_batch_arrays(list(histories.values()), 12)
+
+        assert spy.call_count == 3
+        assert {call.args[1].shape for call in spy.call_args_list} == {(5, 19)}
+        assert result['clv'].shape == (6,)
+
+    def test_recommendations_broadcast(self):
+        registry = Mock()
+        registry.get_model = Mock(return_value=None)
+        calculator = CLVCalculator(registry, None)
+        histories = list(_batch_histories().values())
+
+        result = calculator._predict_batch_arrays(histories, 12)
+
+        for i, history in enumerate(histories):
+            if not history['has_history']:
+                assert result['loyalty_tier'][i] == 'bronze'
+                assert not result['personalized_offers'][i]
+                continue
+            clv_result = {'clv': float(result['clv'][i])}
+            segment = calculator._determine_segment(clv_result['clv'])
+            expected = calculator._generate_recommendations(
+                clv_result, segment, float(result['retention_probability'][i])
+            )
+            assert result['max_acquisition_cost'][i] == expected['max_acquisition_cost']
+            assert result['loyalty_tier'][i] == expected['loyalty_tier']
+            assert bool(result['personalized_offers'][i]) == expected['personalized_offers']
+            assert result['priority_level'][i] == expected['priority_level']
@@ -299,5 +299,103 @@ class TestRFMBinsValidation:
             assert bins[0] == 0, f"{bin_type} bins don't start at 0"
 
 
+class FixedDatetime(datetime):
+    """datetime with a frozen now() so recency is comparable across runs"""
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2025, 6, 1, 9, 30)
+
+
+def _synthetic_bookings(n_guests=60, seed=7, guest_id_type=int):
+    rng = np.random.default_rng(seed)
+    services = ['spa', 'restaurant', 'laundry', 'airport', 'minibar']
+    rows = []
+    for guest in range(n_guests):
+        n = int(rng.integers(1, 8))
+        start = datetime(2022, 1, 1) + timedelta(days=int(rng.integers(0, 700)))
+        for _ in range(n):
+            booking_date = start + timedelta(
+                days=int(rng.integers(0, 200)), hours=int(rng.integers(0, 24))
+            )
+            checkin = booking_date + timedelta(days=int(rng.integers(0, 60)), hours=14)
+            rows.append({
+                'guest_id': guest_id_type(guest * 37 % 101),
+                'booking_date': booking_date,
+                'checkin_date': checkin,
+                'checkout_date': checkin + timedelta(days=int(rng.integers(1, 6)), hours=-2),
+                'total_amount': float(rng.integers(500, 30_000)) * 1000 + rng.random(),
+                'cancelled': bool(rng.random() < 0.2),
+                'services_used': list(rng.choice(services, size=int(rng.integers(0, 4)))),
+            })
+    # Same-day rebooking (avg interval 0) and a single-booking guest
+    same_day = datetime(2024, 3, 3, 10)
+    for hours in (0, 3):
+        rows.append({
+            'guest_id': guest_id_type(500), 'booking_date': same_day + timedelta(hours=hours),
+            'checkin_date': same_day, 'checkout_date': same_day + timedelta(days=1),
+            'total_amount': 1_000_000.0, 'cancelled': False, 'services_used': [],
+        })
+    return pd.DataFrame(rows).sample(frac=1.0, random_state=seed).reset_index(drop=True)
+
+
+def _legacy_features_for_training(engineer, bookings_df):
+    """Original per-guest loop, kept as the reference implementation"""
+    features_list = []
+    for guest_id, guest_bookings in bookings_df.groupby('guest_id'):
+        try:
+            feature_vector = engineer.engineer_features_from_history(
+                guest_bookings.to_dict('records')
+            )
+            features_list.append({
+                'guest_id': guest_id,
+                **{name: feature_vector[0, i] for i, name in enumerate(engineer.feature_names)}
+            })
+        except Exception:
+            continue
+    return pd.DataFrame(features_list)
+
+
+class TestVectorizedTrainingFeatures:
+    """Vectorized engineer_features_for_training matches the per-guest code"""
+
+    @pytest.mark.parametrize("guest_id_type", [int, str])
+    def test_matches_per_guest_implementation(self, monkeypatch, guest_id_type):
+        monkeypatch.setattr(
+            'src.application.services.ml.clv_feature_engineering.datetime', FixedDatetime
+        )
+        engineer = CLVFeatureEngineer()
+        bookings_df = _synthetic_bookings(guest_id_type=guest_id_type)
+
+        expected = _legacy_features_for_training(engineer, bookings_df)
+        actual = engineer.engineer_features_for_training(bookings_df)
+
+        pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+
+    def test_non_iterable_services_skip_guest(self, monkeypatch):
+        monkeypatch.setattr(
+            'src.application.services.ml.clv_feature_engineering.datetime', FixedDatetime
+        )
+        engineer = CLVFeatureEngineer()
+        bookings_df = _synthetic_bookings(n_guests=10)
+        bookings_df['services_used'] = bookings_df['services_used'].astype(object)
+        bookings_df.at[0, 'services_used'] = np.nan
+        bookings_df.at[0, 'cancelled'] = False
+
+        expected = _legacy_features_for_training(engineer, bookings_df)
+        actual = engineer.engineer_features_for_training(bookings_df)
+
+        assert bookings_df.at[0, 'guest_id'] not in set(actual['guest_id'])
+        pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+
+    def test_bin_scores_match_bin_score(self):
+        engineer = CLVFeatureEngineer()
+        for key, reverse in (('recency', True), ('frequency', False), ('monetary', False)):
+            bins = RFM_BINS[key]
+            values = np.array([-1, 0, 1, 2, 5, 29.9, 30, 90, 365, 1e9, 5_000_000, 50_000_000, np.inf])
+            expected = [engineer._bin_score(v, bins, reverse=reverse) for v in values]
+            assert engineer._bin_scores(values, bins, reverse=reverse).tolist() == expected
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
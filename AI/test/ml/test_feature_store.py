@@ -0,0 +1,308 @@
+"""
+Test Online Feature Store
+Unit tests for cache tiers, booking-event invalidation and predictor integration
+"""
+import asyncio
+import json
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+from src.application.dtos.ml.churn_dto import ChurnFeatures
+from src.application.dtos.ml.clv_dto import CLVBatchPredictRequest
+from src.application.services.ml.churn_predictor import ChurnPredictor
+from src.application.services.ml.clv_calculator import CLVCalculator
+from src.application.services.ml.feature_store import (
+    REDIS_KEY_PREFIX,
+    OnlineFeatureStore,
+    features_from_summary,
+    loyalty_tier,
+)
+from src.application.services.ml.guest_history import summarize_bookings
+from src.infrastructure.config import Settings
+
+
+def _booking(days_ago, amount=5_000_000, cancelled=False, nights=2):
+    booked = datetime.now() - timedelta(days=days_ago)
+    return {
+        'booking_date': booked,
+        'checkin_date': booked,
+        'checkout_date': booked + timedelta(days=nights),
+        'total_amount': amount,
+        'room_type': 'Deluxe',
+        'cancelled': cancelled,
+        'services_used': ['Spa'],
+    }
+
+
+class FakeHistoryLoader:
+    """Summaries from in-memory bookings; counts batched loads"""
+
+    def __init__(self, bookings):
+        self.bookings = bookings
+        self.loads = []
+        self.is_connected = True
+        self.gate = None
+
+    async def load_many(self, guest_ids):
+        self.loads.append(list(guest_ids))
+        if self.gate is not None:
+            await self.gate.wait()
+        return {g: summarize_bookings(g, self.bookings.get(g, [])) for g in guest_ids}
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def set(self, key, value, ex=None):
+        self.ops.append((key, value, ex))
+
+    async def execute(self):
+        for key, value, ex in self.ops:
+            self.redis.data[key] = value
+            self.redis.ttls[key] = ex
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.mgets = 0
+
+    async def mget(self, keys):
+        self.mgets += 1
+        return [self.data.get(k) for k in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def loader():
+    return FakeHistoryLoader({
+        "1": [_booking(40), _booking(10, cancelled=True)],
+        "2": [_booking(d, amount=12_000_000) for d in (300, 200, 100, 50, 20)],
+    })
+
+
+@pytest.fixture
+def redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def store(loader, redis, clock):
+    return OnlineFeatureStore(settings=Settings(), history_loader=loader, redis_client=redis, clock=clock)
+
+
+def test_loyalty_tiers():
+    assert loyalty_tier(0, 0) == "none"
+    assert loyalty_tier(2, 0) == "silver"
+    assert loyalty_tier(1, 60_000_000) == "gold"
+    assert loyalty_tier(10, 0) == "platinum"
+
+
+def test_features_drop_booking_rows(loader):
+    summary = summarize_bookings("2", loader.bookings["2"])
+
+    features = features_from_summary(summary)
+
+    assert "bookings" not in features
+    assert features["loyalty_tier"] == "gold"
+    json.dumps(features)
+    assert features_from_summary({'has_history': False})["loyalty_tier"] == "none"
+
+
+@pytest.mark.asyncio
+class TestCacheTiers:
+    """Local LRU, then Redis, then one batched history load"""
+
+    async def test_computes_missing_guests_in_one_load(self, store, loader, redis):
+        features = await store.get_features(["1", "2", "3", "1"])
+
+        assert loader.loads == [["1", "2", "3"]]
+        assert features["1"]["cancelled_bookings"] == 1
+        assert features["3"]["has_history"] is False
+        assert redis.ttls[REDIS_KEY_PREFIX + "2"] == store.ttl_seconds
+
+    async def test_second_read_is_local(self, store, loader, redis):
+        await store.get_features(["1", "2"])
+
+        await store.get_features(["1", "2"])
+
+        assert len(loader.loads) == 1
+        assert redis.mgets == 1
+        assert store.stats["local_hits"] == 2
+
+    async def test_other_worker_reads_redis(self, store, loader, redis, clock):
+        await store.get_features(["1", "2"])
+        other = OnlineFeatureStore(settings=Settings(), history_loader=loader, redis_client=redis, clock=clock)
+
+        features = await other.get_features(["1", "2"])
+
+        assert len(loader.loads) == 1
+        assert other.stats["redis_hits"] == 2
+        assert features["2"]["total_bookings"] == 5
+
+    async def test_local_entries_expire(self, store, redis, clock):
+        await store.get_features(["1"])
+        clock.now += store.local_ttl_seconds + 1
+
+        await store.get_features(["1"])
+
+        assert store.stats["redis_hits"] == 1
+
+    async def test_recency_is_computed_at_read_time(self, store):
+        await store.get("1")
+        cached = store._local["1"][1]
+        cached["last_booking_date"] = (datetime.now() - timedelta(days=25)).isoformat()
+
+        assert (await store.get("1"))["days_since_last_booking"] == 25
+
+    async def test_redis_errors_fall_through(self, store, loader, redis):
+        async def broken(keys):
+            raise ConnectionError("down")
+        redis.mget = broken
+
+        features = await store.get_features(["2"])
+
+        assert features["2"]["has_history"] is True
+        assert store.stats["redis_errors"] == 1
+
+
+@pytest.mark.asyncio
+class TestBookingEvents:
+    """Events mark guests dirty; dirty guests skip every cache"""
+
+    async def test_dirty_guest_is_recomputed(self, store, loader):
+        await store.get_features(["1", "2"])
+        loader.bookings["1"].append(_booking(0))
+
+        store.handle_booking_event({"event": "booking.created", "user_id": 1})
+        features = await store.get_features(["1", "2"])
+
+        assert loader.loads[-1] == ["1"]
+        assert features["1"]["total_bookings"] == 3
+        assert "1" not in store._dirty
+
+    async def test_refresh_dirty_batches_events(self, store, loader):
+        store.handle_booking_event({"user_id": 1})
+        store.handle_booking_event({"user_id": 2})
+        store.handle_booking_event({"user_id": 1})
+
+        assert await store.refresh_dirty() == 2
+        assert loader.loads == [["1", "2"]]
+        assert await store.refresh_dirty() == 0
+
+    async def test_event_during_load_keeps_guest_dirty(self, store, loader, redis):
+        loader.gate = asyncio.Event()
+        read = asyncio.create_task(store.get_features(["1"]))
+        await asyncio.sleep(0)
+
+        store.handle_booking_event({"user_id": 1})
+        loader.gate.set()
+        await read
+
+        # The load started before the event: nothing cached, still dirty
+        assert "1" in store._dirty
+        assert "1" not in store._local
+        assert REDIS_KEY_PREFIX + "1" not in redis.data
+
+    async def test_event_without_guest_is_ignored(self, store):
+        store.handle_booking_event({"booking_id": 5})
+
+        assert store._dirty == {}
+        assert store.stats["events"] == 0
+
+
+@pytest.mark.asyncio
+class TestPredictorIntegration:
+    """CLV, churn and recommendations read the same store features"""
+
+    async def test_clv_batch_uses_store(self, store, loader):
+        registry = Mock()
+        registry.get_model = Mock(return_value=None)
+        calculator = CLVCalculator(registry, None, feature_store=store)
+
+        response = await calculator.predict_clv_batch(CLVBatchPredictRequest(guest_ids=["1", "2"]))
+
+        assert loader.loads == [["1", "2"]]
+        assert [p.guest_id for p in response.predictions] == ["1", "2"]
+        assert response.predictions[1].predicted_clv > response.predictions[0].predicted_clv
+
+    async def test_churn_overrides_request_history(self, store):
+        predictor = ChurnPredictor(feature_store=store)
+        features = ChurnFeatures(
+            booking_lead_time_days=14,
+            room_type="deluxe",
+            total_amount=3_000_000,
+            payment_method="credit_card",
+            booking_source="website",
+            is_first_booking=True,
+            days_until_checkin=7,
+        )
+
+        with_store = await predictor.predict_single("B1", "2", features)
+        without = await ChurnPredictor().predict_single("B1", "2", features)
+
+        # A gold guest with five stays is not a risky first booking
+        assert with_store.churn_probability < without.churn_probability
+        assert ChurnPredictor.history_overrides(await store.get("2"))["previous_bookings_count"] == 5
+
+    async def test_churn_batch_single_store_call(self, store, loader):
+        predictor = ChurnPredictor(feature_store=store)
+        base = {
+            "booking_lead_time_days": 14, "room_type": "deluxe", "total_amount": 3_000_000,
+            "payment_method": "credit_card", "booking_source": "website",
+            "is_first_booking": True, "days_until_checkin": 7,
+        }
+        bookings = [
+            {"booking_id": "B1", "guest_id": "2", "features": dict(base)},
+            {"booking_id": "B2", "guest_id": "1", "features": dict(base)},
+            {"booking_id": "B3", "features": dict(base)},
+        ]
+
+        with_store = await predictor.predict_batch(bookings)
+        without = await ChurnPredictor().predict_batch(bookings)
+
+        assert loader.loads == [["2", "1"]]
+        assert with_store[0].churn_probability < without[0].churn_probability
+        assert with_store[2].churn_probability == without[2].churn_probability
+
+    async def test_rules_boost_loyal_guests(self, store):
+        from src.application.services.ml.recommender import (
+            LOYALTY_BOOST,
+            MOCK_SERVICES,
+            RecommendationEngine,
+        )
+        spa = next(s for s in MOCK_SERVICES if s["category"] == "spa")
+        engine = RecommendationEngine(feature_store=store)
+
+        gold = await engine._load_guest_features("2")
+        new = await engine._load_guest_features("3")
+
+        assert gold["loyalty_tier"] == "gold"
+        with patch("numpy.random.uniform", return_value=0.0):
+            boost = engine._score_service(spa, "2", None, gold) - engine._score_service(spa, "3", None, new)
+        assert boost == pytest.approx(LOYALTY_BOOST)
@@ -0,0 +1,170 @@
+"""
+Test Guest History Loader
+Unit tests for batched, cached booking history loading with a mocked pool
+"""
+import pytest
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock, Mock
+
+from src.application.services.ml.guest_history import (
+    GuestHistoryLoader,
+    GUEST_VERSIONS_SQL,
+    GUEST_BOOKINGS_SQL,
+    summarize_bookings,
+)
+from src.application.services.ml.clv_calculator import CLVCalculator
+from src.application.dtos.ml.clv_dto import CLVBatchPredictRequest
+from src.infrastructure.config import Settings
+
+
+def _booking_row(user_id, booking_id, created_at, status="accepted", total_price=5_000_000):
+    return {
+        "user_id": user_id,
+        "booking_id": booking_id,
+        "created_at": created_at,
+        "check_in_date": created_at,
+        "check_out_date": date(created_at.year, created_at.month, created_at.day + 2),
+        "total_price": total_price,
+        "status": status,
+        "room_type": "Deluxe",
+        "services_used": ["Spa"],
+    }
+
+
+BOOKINGS = {
+    1: [_booking_row(1, 10, date(2024, 1, 5)), _booking_row(1, 14, date(2024, 3, 1), status="cancelled")],
+    2: [_booking_row(2, 11, date(2024, 2, 10))],
+}
+
+
+class FakeConnection:
+    """Answers version/booking queries from BOOKINGS"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def fetch(self, sql, user_ids, excluded):
+        self.calls.append((sql, list(user_ids)))
+        if sql == GUEST_VERSIONS_SQL:
+            return [
+                {
+                    "user_id": uid,
+                    "last_booking_at": max(r["created_at"] for r in BOOKINGS[uid]),
+                    "last_booking_id": max(r["booking_id"] for r in BOOKINGS[uid]),
+                    "cancelled_count": sum(r["status"] == "cancelled" for r in BOOKINGS[uid]),
+                }
+                for uid in user_ids if uid in BOOKINGS
+            ]
+        return [row for uid in sorted(user_ids) for row in BOOKINGS.get(uid, [])]
+
+
+@pytest.fixture
+def conn():
+    return FakeConnection()
+
+
+@pytest.fixture
+def loader(conn):
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__ = AsyncMock(return_value=conn)
+    pool.acquire.return_value.__aexit__ = AsyncMock(return_value=False)
+    return GuestHistoryLoader(settings=Settings(), db_pool=pool, chunk_size=2, max_concurrency=2)
+
+
+@pytest.mark.asyncio
+class TestGuestHistoryLoader:
+    """Test batched loading, grouping and caching"""
+
+    async def test_groups_rows_per_guest(self, loader, conn):
+        histories = await loader.load_many(["1", "2", "3", "abc"])
+
+        assert histories["1"]["total_bookings"] == 2
+        assert histories["1"]["cancellation_rate"] == 0.5
+        assert histories["1"]["total_revenue"] == 5_000_000.0
+        assert histories["2"]["total_bookings"] == 1
+        assert histories["3"] == {"has_history": False}
+        assert histories["abc"] == {"has_history": False}
+
+    async def test_queries_per_chunk_not_per_guest(self, loader, conn):
+        await loader.load_many(["1", "2", "3"])
+
+        # 2 chunks (chunk_size=2), each with one version and at most one bookings query
+        version_calls = [ids for sql, ids in conn.calls if sql == GUEST_VERSIONS_SQL]
+        booking_calls = [ids for sql, ids in conn.calls if sql == GUEST_BOOKINGS_SQL]
+        assert sorted(map(sorted, version_calls)) == [[1, 2], [3]]
+        assert booking_calls == [[1, 2]]
+
+    async def test_cache_hit_skips_bookings_query(self, loader, conn):
+        await loader.load_many(["1", "2"])
+        conn.calls.clear()
+
+        histories = await loader.load_many(["1", "2"])
+
+        assert [sql for sql, _ in conn.calls] == [GUEST_VERSIONS_SQL]
+        assert histories["1"]["total_bookings"] == 2
+        assert loader.stats["cache_hits"] == 2
+
+    async def test_new_booking_invalidates_cache(self, loader, conn):
+        await loader.load_many(["2"])
+        BOOKINGS[2].append(_booking_row(2, 20, date(2024, 6, 1)))
+        try:
+            conn.calls.clear()
+            histories = await loader.load_many(["2"])
+        finally:
+            BOOKINGS[2].pop()
+
+        assert [sql for sql, _ in conn.calls] == [GUEST_VERSIONS_SQL, GUEST_BOOKINGS_SQL]
+        assert histories["2"]["total_bookings"] == 2
+
+    async def test_lru_eviction(self, conn):
+        pool = MagicMock()
+        pool.acquire.return_value.__aenter__ = AsyncMock(return_value=conn)
+        pool.acquire.return_value.__aexit__ = AsyncMock(return_value=False)
+        loader = GuestHistoryLoader(settings=Settings(), db_pool=pool, cache_size=1)
+
+        await loader.load_many(["1"])
+        await loader.load_many(["2"])
+
+        assert list(loader._cache) == ["2"]
+
+
+def test_summarize_bookings_matches_metrics():
+    bookings = [
+        {"booking_date": datetime(2024, 1, 1), "checkin_date": datetime(2024, 1, 10),
+         "checkout_date": datetime(2024, 1, 13), "total_amount": 4_000_000,
+         "room_type": "deluxe", "cancelled": False, "services_used": ["spa"]},
+        {"booking_date": datetime(2024, 1, 31), "checkin_date": datetime(2024, 2, 10),
+         "checkout_date": datetime(2024, 2, 11), "total_amount": 2_000_000,
+         "room_type": "standard", "cancelled": False, "services_used": ["spa", "laundry"]},
+    ]
+    summary = summarize_bookings("7", bookings, now=datetime(2024, 3, 1))
+
+    assert summary["avg_booking_value"] == 3_000_000
+    assert summary["avg_days_between_bookings"] == 30.0
+    assert summary["days_since_last_booking"] == 30
+    assert summary["avg_length_of_stay"] == 2.0
+    assert summary["unique_services_used"] == 2
+
+
+@pytest.mark.asyncio
+async def test_clv_batch_loads_histories_once():
+    registry = Mock()
+    registry.get_model = Mock(return_value=None)
+    history_loader = Mock()
+    history_loader.is_connected = True
+    history_loader.load_many = AsyncMock(return_value={
+        "1": summarize_bookings("1", [
+            {"booking_date": datetime(2024, 1, 1), "checkin_date": datetime(2024, 1, 2),
+             "checkout_date": datetime(2024, 1, 4), "total_amount": 9_000_000,
+             "room_type": "suite", "cancelled": False, "services_used": []},
+        ]),
+        "2": {"has_history": False},
+    })
+    calculator = CLVCalculator(registry, None, history_loader=history_loader)
+
+    response = await calculator.predict_clv_batch(
+        CLVBatchPredictRequest(guest_ids=["1", "2"], time_horizon_months=12)
+    )
+
+    history_loader.load_many.assert_awaited_once_with(["1", "2"])
+    assert [p.guest_id for p in response.predictions] == ["1", "2"]
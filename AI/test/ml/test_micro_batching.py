@@ -0,0 +1,214 @@
+"""
+Test Micro-Batching
+Unit tests for request coalescing and the coalesced churn, CLV and
+recommendation paths
+"""
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock
+
+import numpy as np
+import pytest
+
+from src.application.dtos.ml.churn_dto import ChurnFeatures
+from src.application.dtos.ml.clv_dto import CLVPredictRequest
+from src.application.services.ml.churn_predictor import ChurnPredictor
+from src.application.services.ml.clv_calculator import CLVCalculator
+from src.application.services.ml.guest_history import summarize_bookings
+from src.application.services.ml.micro_batching import Histogram, MicroBatcher
+from src.application.services.ml.recommender import RecommendationEngine
+
+
+def _history(guest_id, n_bookings, gap_days, amount):
+    start = datetime(2024, 1, 1)
+    bookings = [
+        {
+            'booking_date': start + timedelta(days=i * gap_days),
+            'checkin_date': start + timedelta(days=i * gap_days + 10),
+            'checkout_date': start + timedelta(days=i * gap_days + 12),
+            'total_amount': amount,
+            'room_type': 'deluxe',
+            'cancelled': i % 4 == 3,
+            'services_used': ['spa'],
+        }
+        for i in range(n_bookings)
+    ]
+    return summarize_bookings(guest_id, bookings, now=datetime(2025, 6, 1))
+
+
+def _factor_artifact(n_users=20, n_items=50, n_factors=8):
+    rng = np.random.default_rng(0)
+    return {
+        'version': '1.0',
+        'user_ids': np.array([f"G{i}" for i in range(n_users)]),
+        'item_ids': np.array([f"SVC_{i}" for i in range(n_items)]),
+        'user_factors': rng.normal(0, 0.3, (n_users, n_factors)).astype(np.float32),
+        'item_factors': rng.normal(0, 0.3, (n_items, n_factors)).astype(np.float32),
+        'user_interactions': rng.integers(1, 20, n_users).astype(np.int32),
+        'item_popularity': rng.random(n_items).astype(np.float32),
+        'item_names': np.array([f"Service {i}" for i in range(n_items)]),
+        'item_categories': np.array(["dining", "spa"] * (n_items // 2)),
+        'item_prices': rng.integers(100_000, 2_000_000, n_items).astype(np.float64),
+    }
+
+
+class TestHistogram:
+
+    def test_cumulative_buckets(self):
+        histogram = Histogram((1, 2, 4))
+        for value in (1, 2, 3, 10):
+            histogram.observe(value)
+
+        snapshot = histogram.snapshot()
+
+        assert snapshot['buckets'] == {'1': 1, '2': 2, '4': 3, '+Inf': 4}
+        assert snapshot['sum'] == 16
+        assert snapshot['count'] == 4
+
+
+class TestMicroBatcher:
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_batch(self):
+        calls = []
+
+        def double(items):
+            calls.append(list(items))
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher("test", double, max_wait_ms=5)
+
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+
+        assert results == [i * 2 for i in range(10)]
+        assert calls == [list(range(10))]
+        stats = batcher.stats
+        assert stats['requests'] == 10 and stats['batches'] == 1
+        assert stats['batch_size']['buckets']['16'] == 1
+        assert stats['wait_time_ms']['count'] == 10
+
+    @pytest.mark.asyncio
+    async def test_full_batch_dispatches_without_waiting(self):
+        sizes = []
+
+        async def record(items):
+            sizes.append(len(items))
+            return items
+
+        batcher = MicroBatcher("test", record, max_wait_ms=10_000, max_batch_size=4)
+
+        results = await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(8))), timeout=1)
+
+        assert results == list(range(8))
+        assert sizes == [4, 4]
+
+    @pytest.mark.asyncio
+    async def test_item_errors_only_fail_their_caller(self):
+        batcher = MicroBatcher(
+            "test", lambda items: [ValueError(item) if item < 0 else item for item in items]
+        )
+
+        ok, failed = await asyncio.gather(batcher.submit(1), batcher.submit(-1), return_exceptions=True)
+
+        assert ok == 1
+        assert isinstance(failed, ValueError)
+
+    @pytest.mark.asyncio
+    async def test_batch_errors_fail_every_caller(self):
+        def broken(items):
+            raise RuntimeError("model unavailable")
+
+        batcher = MicroBatcher("test", broken)
+
+        results = await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert batcher.stats['failed_batches'] == 1
+
+
+class TestCoalescedPredictors:
+
+    @pytest.mark.asyncio
+    async def test_churn_predictions_match_unbatched(self):
+        features = [
+            ChurnFeatures(
+                booking_lead_time_days=lead,
+                room_type="deluxe",
+                total_amount=3_000_000,
+                payment_method=payment,
+                booking_source="website",
+                is_first_booking=lead % 2 == 0,
+                loyalty_tier=tier,
+                days_until_checkin=7,
+            )
+            for lead, payment, tier in [(5, "cash", "none"), (45, "credit_card", "gold"), (90, "cash", "platinum")]
+        ]
+        plain = ChurnPredictor()
+        batched = ChurnPredictor()
+        batched.batcher = MicroBatcher("churn", batched._predict_coalesced)
+
+        responses = await asyncio.gather(*(
+            batched.predict_single(f"B{i}", f"G{i}", f) for i, f in enumerate(features)
+        ))
+
+        assert batched.batcher.stats['batches'] == 1
+        for i, (f, response) in enumerate(zip(features, responses)):
+            expected = await plain.predict_single(f"B{i}", f"G{i}", f)
+            assert response.churn_probability == pytest.approx(expected.churn_probability)
+            assert response.confidence == expected.confidence
+            assert response.risk_factors == expected.risk_factors
+
+    @pytest.mark.asyncio
+    async def test_clv_predictions_match_unbatched(self):
+        registry = Mock()
+        registry.get_model = Mock(return_value=None)
+        calculator = CLVCalculator(registry, None)
+        histories = {
+            'G1': _history('G1', 3, 90, 4_000_000),
+            'G2': _history('G2', 12, 30, 9_000_000),
+            'G3': {'has_history': False},
+        }
+        calculator._load_guest_histories = AsyncMock(side_effect=lambda ids: {g: histories[g] for g in ids})
+        calculator.batcher = MicroBatcher("clv", calculator._predict_clv_coalesced)
+        requests = [('G1', 12), ('G2', 12), ('G3', 12), ('G2', 24)]
+
+        responses = await asyncio.gather(*(
+            calculator.predict_clv(CLVPredictRequest(guest_id=g, time_horizon_months=h)) for g, h in requests
+        ))
+
+        calculator._load_guest_histories.assert_awaited_once()
+        for (guest_id, horizon), response in zip(requests, responses):
+            expected = await calculator._predict_from_history(guest_id, horizon, histories[guest_id])
+            assert response.model_dump(exclude={'predicted_at'}) == expected.model_dump(exclude={'predicted_at'})
+
+    @pytest.mark.asyncio
+    async def test_service_recommendations_match_unbatched(self):
+        plain = RecommendationEngine(model=_factor_artifact())
+        batched = RecommendationEngine(model=_factor_artifact())
+        batched.batcher = MicroBatcher("recommend_services", batched._recommend_services_coalesced)
+        requests = [("G1", 5, None), ("G2", 3, ["SVC_1", "SVC_2"]), ("G1", 10, None)]
+
+        responses = await asyncio.gather(*(
+            batched.recommend_services(g, top_k=k, context=None, exclude_services=exclude)
+            for g, k, exclude in requests
+        ))
+
+        assert batched.batcher.stats['batches'] == 1
+        for (guest_id, k, exclude), response in zip(requests, responses):
+            expected = await plain.recommend_services(guest_id, top_k=k, context=None, exclude_services=exclude)
+            assert response.recommendations == expected.recommendations
+            assert response.model_version == expected.model_version
+
+    @pytest.mark.asyncio
+    async def test_cold_guests_use_rules_in_a_batch(self):
+        recommender = RecommendationEngine(model=_factor_artifact())
+        recommender.batcher = MicroBatcher("recommend_services", recommender._recommend_services_coalesced)
+
+        known, cold = await asyncio.gather(
+            recommender.recommend_services("G4", top_k=3, context=None),
+            recommender.recommend_services("NEW_GUEST", top_k=3, context=None),
+        )
+
+        assert known.model_version.endswith("+mf_v1.0")
+        assert cold.model_version == "recommender_v2.1"
+        assert len(cold.recommendations) == 3
@@ -0,0 +1,211 @@
+"""
+Test Model Registry
+Unit tests for artifact discovery, hot-swap, mmap loading and compiled predictors
+"""
+import asyncio
+import json
+import os
+import pytest
+import numpy as np
+from unittest.mock import Mock, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.application.ml_models.model_registry import (
+    CompiledTreePredictor,
+    ModelRegistry,
+    save_model_artifact,
+)
+
+
+def _write(path, model, mtime_offset=0):
+    save_model_artifact(model, path)
+    if mtime_offset:
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_offset))
+    return path
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    (tmp_path / "clv").mkdir()
+    return tmp_path
+
+
+class TestArtifactDiscovery:
+    """Test version selection from file names and manifest"""
+
+    def test_highest_version_wins(self, model_dir):
+        _write(model_dir / "churn_predictor_v1.9.pkl", {"v": "1.9"})
+        _write(model_dir / "churn_predictor_v1.10.pkl", {"v": "1.10"})
+        _write(model_dir / "clv" / "clv_retention_v1.5.pkl", {"v": "1.5"})
+        (model_dir / "notes.txt").write_text("ignored")
+
+        artifacts = ModelRegistry(model_dir=model_dir).discover_artifacts()
+
+        assert artifacts["churn_predictor"]["version"] == "1.10"
+        assert artifacts["clv_retention"]["version"] == "1.5"
+        assert set(artifacts) == {"churn_predictor", "clv_retention"}
+
+    def test_manifest_pins_version(self, model_dir):
+        _write(model_dir / "churn_predictor_v1.9.pkl", {"v": "1.9"})
+        _write(model_dir / "churn_predictor_v2.0.pkl", {"v": "2.0"})
+        (model_dir / "registry.json").write_text(json.dumps({
+            "models": {"churn_predictor": {
+                "path": "churn_predictor_v1.9.pkl", "version": "1.9", "stage": "Production",
+            }}
+        }))
+
+        registry = ModelRegistry(model_dir=model_dir)
+        assert registry.scan_directory() == ["churn_predictor"]
+
+        assert registry.get_model("churn_predictor") == {"v": "1.9"}
+        assert registry.get_model_info("churn_predictor")["stage"] == "Production"
+
+
+class TestHotSwap:
+    """Test reloading changed artifacts"""
+
+    def test_scan_swaps_new_version_and_notifies(self, model_dir):
+        registry = ModelRegistry(model_dir=model_dir)
+        listener = Mock()
+        registry.subscribe(listener)
+
+        _write(model_dir / "churn_predictor_v1.0.pkl", {"v": 1})
+        assert registry.scan_directory() == ["churn_predictor"]
+        assert registry.scan_directory() == []
+
+        held = registry.get_model("churn_predictor")
+        _write(model_dir / "churn_predictor_v1.1.pkl", {"v": 2})
+        assert registry.scan_directory() == ["churn_predictor"]
+
+        # Requests that already hold the old model keep it
+        assert held == {"v": 1}
+        assert registry.get_model("churn_predictor") == {"v": 2}
+        info = registry.get_model_info("churn_predictor")
+        assert info["version"] == "1.1"
+        assert info["previous_version"] == "1.0"
+        assert info["swap_count"] == 1
+        assert info["load_time_ms"] >= 0
+        assert info["artifact_size_bytes"] > 0
+        assert listener.call_count == 2
+        assert listener.call_args.args[:2] == ("churn_predictor", {"v": 2})
+
+    def test_rewritten_artifact_is_reloaded(self, model_dir):
+        registry = ModelRegistry(model_dir=model_dir)
+        path = _write(model_dir / "clv_retention_v1.5.pkl", {"v": 1})
+        registry.scan_directory()
+
+        _write(path, {"v": 2, "retrained": True}, mtime_offset=10**9)
+
+        assert registry.scan_directory() == ["clv_retention"]
+        assert registry.get_model("clv_retention")["retrained"] is True
+
+    def test_failed_load_keeps_serving_previous(self, model_dir):
+        registry = ModelRegistry(model_dir=model_dir)
+        _write(model_dir / "churn_predictor_v1.0.pkl", {"v": 1})
+        registry.scan_directory()
+
+        (model_dir / "churn_predictor_v1.1.pkl").write_bytes(b"not a pickle")
+
+        assert registry.scan_directory() == []
+        assert registry.get_model("churn_predictor") == {"v": 1}
+        assert registry.get_model_info("churn_predictor")["version"] == "1.0"
+
+    def test_mmap_mode_shares_arrays(self, model_dir):
+        _write(model_dir / "embeddings_v1.pkl", {"weights": np.arange(10_000, dtype=np.float64)})
+
+        registry = ModelRegistry(model_dir=model_dir, mmap_mode="r")
+        registry.scan_directory()
+
+        weights = registry.get_model("embeddings")["weights"]
+        assert isinstance(weights, np.memmap)
+        assert registry.get_model_info("embeddings")["mmap_mode"] == "r"
+
+    @pytest.mark.asyncio
+    async def test_watcher_swaps_in_background(self, model_dir):
+        registry = ModelRegistry(model_dir=model_dir)
+        _write(model_dir / "churn_predictor_v1.0.pkl", {"v": 1})
+        registry.scan_directory()
+
+        await registry.start_watching(0.01)
+        try:
+            _write(model_dir / "churn_predictor_v1.1.pkl", {"v": 2})
+            for _ in range(200):
+                if registry.get_model("churn_predictor") == {"v": 2}:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await registry.stop_watching()
+
+        assert registry.get_model("churn_predictor") == {"v": 2}
+
+
+class TestCompiledTreePredictor:
+    """Compiled predictors return exactly what the estimators return"""
+
+    @pytest.fixture
+    def data(self):
+        rng = np.random.default_rng(1)
+        X = rng.random((120, 6)).astype(np.float32)
+        return X, X[:, 0] * 3 + X[:, 1], (X[:, 2] > 0.5).astype(int)
+
+    def test_xgboost_regressor_and_classifier(self, data):
+        import xgboost as xgb
+        X, y_reg, y_cls = data
+        reg = xgb.XGBRegressor(n_estimators=15, max_depth=3, early_stopping_rounds=3)
+        reg.fit(X[:90], y_reg[:90], eval_set=[(X[90:], y_reg[90:])], verbose=False)
+        clf = xgb.XGBClassifier(n_estimators=15, max_depth=3).fit(X, y_cls)
+
+        compiled_reg = CompiledTreePredictor.compile(reg)
+        compiled_clf = CompiledTreePredictor.compile(clf)
+
+        np.testing.assert_array_equal(compiled_reg.predict(X[:1]), reg.predict(X[:1]))
+        np.testing.assert_array_equal(compiled_reg.predict(X), reg.predict(X))
+        np.testing.assert_array_equal(compiled_clf.predict_proba(X), clf.predict_proba(X))
+        np.testing.assert_array_equal(compiled_clf.predict(X), clf.predict(X))
+
+    def test_lightgbm_classifier(self, data):
+        import lightgbm as lgb
+        X, _, y_cls = data
+        clf = lgb.LGBMClassifier(n_estimators=15, num_leaves=7, verbose=-1).fit(X, y_cls)
+
+        compiled = CompiledTreePredictor.compile(clf)
+
+        np.testing.assert_allclose(compiled.predict_proba(X), clf.predict_proba(X))
+        np.testing.assert_array_equal(compiled.predict(X), clf.predict(X))
+
+    def test_unsupported_model_is_not_compiled(self):
+        assert CompiledTreePredictor.compile({"v": 1}) is None
+
+    def test_registry_compiles_on_load(self, model_dir, data):
+        import xgboost as xgb
+        X, y_reg, _ = data
+        _write(model_dir / "clv_booking_value_v1.5.pkl", xgb.XGBRegressor(n_estimators=5).fit(X, y_reg))
+
+        registry = ModelRegistry(model_dir=model_dir, compile_trees=True)
+        registry.scan_directory()
+
+        assert isinstance(registry.get_model("clv_booking_value"), CompiledTreePredictor)
+        info = registry.get_model_info("clv_booking_value")
+        assert info["compiled"] is True
+        assert info["predictor"] == "xgboost"
+
+
+def test_model_info_endpoint_reports_load_stats(model_dir):
+    from src.application.controllers.ml.router import router
+
+    registry = ModelRegistry(model_dir=model_dir)
+    _write(model_dir / "clv_retention_v1.5.pkl", {"v": 1})
+    registry.scan_directory()
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/ml")
+    with patch("src.application.controllers.ml.router.get_model_registry", return_value=registry):
+        with TestClient(app) as client:
+            info = client.get("/api/ml/models/clv_retention/info").json()
+            missing = client.get("/api/ml/models/unknown/info")
+
+    assert info["version"] == "1.5"
+    assert {"load_time_ms", "memory_rss_delta_bytes", "artifact_size_bytes"} <= set(info)
+    assert missing.status_code == 404
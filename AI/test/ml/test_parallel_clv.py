@@ -0,0 +1,109 @@
+"""
+Test Parallel CLV Trainer
+Unit tests for shared feature arrays, trial early stopping and the parallel search
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.application.ml_models.model_registry import ModelRegistry
+from src.application.services.ml.clv_feature_engineering import CLVFeatureEngineer
+from src.application.services.ml.training import parallel_clv
+from src.application.services.ml.training.parallel_clv import (
+    MODEL_SPECS,
+    TARGET_COLUMNS,
+    ParallelCLVTrainer,
+    _Search,
+    open_shared_array,
+    write_shared_arrays,
+)
+
+
+def _splits(n_train=400, n_test=100, seed=0):
+    rng = np.random.default_rng(seed)
+    names = CLVFeatureEngineer().feature_names
+
+    def frame(n):
+        X = rng.normal(size=(n, len(names)))
+        df = pd.DataFrame(X, columns=names)
+        df['guest_id'] = [f"G{i}" for i in range(n)]
+        df['future_bookings_per_year'] = np.maximum(0, 2 + X[:, 0] + rng.normal(0, 0.3, n)).round()
+        df['is_retained'] = (df['future_bookings_per_year'] > 0).astype(int)
+        df['future_avg_booking_value'] = np.where(
+            df['is_retained'] == 1, 3_000_000 + 500_000 * X[:, 1], 0
+        )
+        return df
+
+    return frame(n_train), frame(n_test)
+
+
+def test_shared_arrays_are_read_only_memmaps(tmp_path):
+    X = np.arange(12, dtype=np.float32).reshape(4, 3)
+
+    paths = write_shared_arrays(tmp_path, {'X_train': X})
+    shared = open_shared_array(paths['X_train'])
+
+    assert isinstance(shared, np.memmap)
+    np.testing.assert_array_equal(shared, X)
+    assert open_shared_array(paths['X_train']) is shared
+    with pytest.raises(ValueError):
+        shared[0, 0] = 1
+
+
+def test_first_trial_is_the_sequential_parameter_set(tmp_path):
+    trainer = ParallelCLVTrainer(output_dir=str(tmp_path), n_trials=5)
+
+    trials = trainer.sample_params(MODEL_SPECS[0], np.random.default_rng(0))
+
+    assert trials[0] == (0, MODEL_SPECS[0]['default_params'])
+    assert [trial_id for trial_id, _ in trials] == list(range(5))
+    assert all(p['objective'] == 'reg:squarederror' for _, p in trials)
+
+
+def test_search_stops_after_patience(tmp_path):
+    trainer = ParallelCLVTrainer(output_dir=str(tmp_path), n_trials=10, patience=2)
+    search = _Search(MODEL_SPECS[0], pending=[(i, {}) for i in range(3, 10)], fit_rows=None, val_rows=None)
+
+    for trial_id, loss in enumerate([1.0, 0.8, 0.9]):
+        trainer._record_trial(search, {'trial_id': trial_id, 'val_loss': loss, 'best_iteration': 5, 'fit_seconds': 0.1})
+    assert len(search.pending) == 7
+
+    trainer._record_trial(search, {'trial_id': 3, 'val_loss': 0.85, 'best_iteration': 5, 'fit_seconds': 0.1})
+
+    assert search.pending == []
+    assert search.best['trial_id'] == 1
+
+
+def test_booking_value_rows_are_active_guests(tmp_path):
+    train_df, _ = _splits()
+    trainer = ParallelCLVTrainer(output_dir=str(tmp_path))
+    y = train_df[TARGET_COLUMNS].to_numpy()
+
+    rows = trainer._rows(MODEL_SPECS[1], y)
+
+    assert (train_df['future_avg_booking_value'].to_numpy()[rows] > 0).all()
+    assert len(trainer._rows(MODEL_SPECS[0], y)) == len(train_df)
+
+
+def test_parallel_training_saves_registry_artifacts(tmp_path):
+    train_df, test_df = _splits()
+    trainer = ParallelCLVTrainer(output_dir=str(tmp_path), n_trials=3, max_workers=2)
+
+    results = trainer.train(train_df, test_df)
+
+    assert set(results) == {'booking_frequency', 'booking_value', 'retention'}
+    for spec in MODEL_SPECS:
+        result = results[spec['name']]
+        assert len(result['trials']) == 3
+        assert all(t['fit_seconds'] > 0 and t['queue_seconds'] >= 0 for t in result['trials'])
+        # Early stopping cut the rounds below the cap
+        assert result['n_estimators'] <= parallel_clv.MAX_ESTIMATORS
+        assert (tmp_path / spec['artifact_name']).exists()
+
+    assert results['booking_frequency']['metrics']['test_r2'] > 0.5
+    assert results['retention']['metrics']['test_auc'] > 0.8
+
+    registry = ModelRegistry(model_dir=str(tmp_path))
+    assert sorted(registry.scan_directory()) == ['clv_booking_frequency', 'clv_booking_value', 'clv_retention']
+    model = registry.get_model('clv_retention')
+    assert model.predict_proba(test_df[CLVFeatureEngineer().feature_names].to_numpy()[:5]).shape == (5, 2)
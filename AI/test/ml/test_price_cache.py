@@ -0,0 +1,168 @@
+"""
+Test Price Cache
+Unit tests for precomputed, TTL-bound current-price quotes
+"""
+import time
+
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.application.dtos.ml.pricing_dto import PricingConstraints
+from src.application.services.ml import pricing_optimizer
+from src.application.services.ml.pricing_optimizer import PricingOptimizer
+from src.application.services.ml.price_cache import PriceCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = datetime.now(timezone.utc)
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def restore_base_prices():
+    original = dict(pricing_optimizer.BASE_PRICES)
+    yield
+    pricing_optimizer.BASE_PRICES.clear()
+    pricing_optimizer.BASE_PRICES.update(original)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(clock):
+    optimizer = PricingOptimizer()
+    with patch.object(optimizer, "build_current_prices", wraps=optimizer.build_current_prices):
+        yield PriceCache(optimizer, days_ahead=7, clock=clock)
+
+
+@pytest.fixture
+def non_utc_timezone(monkeypatch):
+    """A local timezone whose date differs from the UTC date right now"""
+    utc_hour = datetime.now(timezone.utc).hour
+    # POSIX TZ signs are inverted: Etc/GMT+12 is UTC-12
+    monkeypatch.setenv("TZ", "Etc/GMT+12" if utc_hour < 12 else "Etc/GMT-14")
+    time.tzset()
+    assert date.today() != datetime.now(timezone.utc).date()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_quotes_are_deterministic():
+    now = datetime.now(timezone.utc)
+    today = now.date()
+    first = PricingOptimizer().build_current_prices(["deluxe", "suite"], today, today + timedelta(days=30), now=now)
+    second = PricingOptimizer().build_current_prices(["deluxe", "suite"], today, today + timedelta(days=30), now=now)
+
+    assert first == second
+    assert first[("deluxe", today)].valid_until == (today + timedelta(days=1)).isoformat() + "T00:00:00Z"
+
+
+class TestPriceCache:
+    """Test precomputation, hits, TTL and invalidation"""
+
+    def test_precomputes_window_once(self, cache, clock):
+        today = clock.now.date()
+
+        first = cache.get_quote("deluxe")
+        for offset in range(8):
+            cache.get_quote("suite", today + timedelta(days=offset))
+
+        assert cache.optimizer.build_current_prices.call_count == 1
+        assert cache.stats["cached_quotes"] == len(pricing_optimizer.BASE_PRICES) * 8
+        assert cache.stats["hits"] == 9
+        assert cache.get_quote("deluxe", today) is first
+
+    def test_matches_uncached_price(self, cache, clock):
+        target = clock.now.date() + timedelta(days=3)
+        uncached = PricingOptimizer().build_current_prices(["standard"], target, target, now=clock.now)
+
+        assert cache.get_quote("standard", target) == uncached[("standard", target)]
+
+    def test_outside_window_is_computed_not_cached(self, cache, clock):
+        cache.get_quote("deluxe")
+        far = clock.now.date() + timedelta(days=60)
+
+        quote = cache.get_quote("penthouse", far)
+
+        assert quote.room_type == "penthouse"
+        assert ("penthouse", far) not in cache._prices
+        assert cache.stats["misses"] == 1
+
+    def test_expires_at_valid_until(self, cache, clock):
+        cache.get_quote("deluxe")
+        assert cache.seconds_until_expiry() > 0
+
+        clock.now = cache._expires_at + timedelta(seconds=1)
+        cache.get_quote("deluxe")
+
+        assert cache.stats["rebuilds"] == 2
+
+    def test_base_price_change_invalidates(self, cache):
+        before = cache.get_quote("deluxe")
+
+        cache.update_base_prices({"deluxe": before.base_price * 2})
+        after = cache.get_quote("deluxe")
+
+        assert after.base_price == before.base_price * 2
+        assert cache.stats["invalidations"] == 1
+
+    def test_direct_base_price_edit_is_detected(self, cache):
+        cache.get_quote("suite")
+        pricing_optimizer.BASE_PRICES["suite"] = 4_000_000
+
+        assert cache.get_quote("suite").base_price == 4_000_000
+        assert cache.stats["rebuilds"] == 2
+
+    def test_constraints_change_invalidates(self, cache):
+        cache.get_quote("deluxe")
+
+        cache.update_constraints(PricingConstraints(min_price_multiplier=1.0, max_price_multiplier=1.0))
+
+        assert cache.get_quote("deluxe").price_multiplier == 1.0
+
+    def test_fresh_west_and_east_of_utc(self, non_utc_timezone):
+        cache = PriceCache(PricingOptimizer(), days_ahead=7)
+        utc_today = datetime.now(timezone.utc).date()
+
+        cache.get_quote("deluxe")
+        quote = cache.get_quote("deluxe")
+
+        assert cache.stats["rebuilds"] == 1
+        assert quote.date == utc_today
+        assert quote.valid_until == (utc_today + timedelta(days=1)).isoformat() + "T00:00:00Z"
+        assert cache.seconds_until_expiry() > 0
+
+    @pytest.mark.asyncio
+    async def test_scheduled_refresh(self, cache):
+        await cache.start()
+        try:
+            assert cache.stats["rebuilds"] == 1
+            assert cache._refresh_task is not None
+        finally:
+            await cache.stop()
+        assert cache._refresh_task is None
+
+
+def test_current_price_endpoint_sets_cache_headers(cache):
+    from src.application.controllers.ml.router import router
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/ml")
+    with patch("src.application.controllers.ml.router.get_price_cache", return_value=cache):
+        with TestClient(app) as client:
+            response = client.post("/api/ml/pricing/current", json={"room_type": "deluxe"})
+
+    assert response.status_code == 200
+    assert response.json()["room_type"] == "deluxe"
+    max_age = int(response.headers["cache-control"].split("max-age=")[1])
+    assert 0 < max_age <= 2 * 24 * 3600
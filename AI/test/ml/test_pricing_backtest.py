@@ -0,0 +1,115 @@
+"""
+Test Pricing Backtest
+Unit tests for scenario construction, grouped strategy evaluation and the
+process pool path
+"""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.application.dtos.ml.pricing_dto import PricingConstraints
+from src.application.services.ml.pricing_backtest import (
+    PricingBacktester,
+    evaluate_strategies,
+    historical_scenario,
+    strategy_grid,
+    synthetic_scenario,
+)
+from src.application.services.ml.pricing_optimizer import PricingOptimizer, choose_multipliers
+
+ROOM_TYPES = ["deluxe", "suite", "standard"]
+
+
+@pytest.fixture(scope="module")
+def scenario():
+    return synthetic_scenario(date(2024, 1, 1), date(2024, 12, 31), ROOM_TYPES, seed=7)
+
+
+def test_masked_choice_matches_subset_search(scenario):
+    optimizer = PricingOptimizer()
+    subset = optimizer._candidate_multipliers(PricingConstraints(min_price_multiplier=0.9, max_price_multiplier=1.2))
+    other = optimizer._candidate_multipliers(PricingConstraints(min_price_multiplier=0.5, max_price_multiplier=2.5))
+    full = np.unique(np.concatenate([subset, other]))
+    args = (scenario['base_occupancy'], scenario['forecast_demand'])
+
+    for goal in ("revenue", "profit", "occupancy"):
+        masked = choose_multipliers(full, optimizer._estimate_occupancy(*args, full), goal, np.isin(full, subset))
+        direct = choose_multipliers(subset, optimizer._estimate_occupancy(*args, subset), goal)
+        np.testing.assert_array_equal(masked[0], direct[0])
+        np.testing.assert_array_equal(masked[1], direct[1])
+
+
+def test_perfect_forecast_realizes_expected_revenue():
+    scenario = synthetic_scenario(date(2024, 1, 1), date(2024, 3, 31), ROOM_TYPES, demand_noise=0.0)
+
+    [result] = evaluate_strategies(scenario, strategy_grid())
+
+    assert result['forecast_error_pct'] == pytest.approx(0.0, abs=0.01)
+    assert result['revenue_lift_pct'] > 0
+
+
+def test_base_price_strategy_has_no_lift(scenario):
+    [result] = evaluate_strategies(scenario, strategy_grid([1.0], [1.0]))
+
+    assert result['revenue_lift_pct'] == 0.0
+    assert result['avg_multiplier'] == 1.0
+    assert result['adr'] == pytest.approx(
+        sum(r['revenue'] for r in result['by_room_type'].values()) / (result['occupancy'] * 366 * 3), rel=1e-3
+    )
+
+
+def test_grouped_sweep_matches_individual_runs(scenario):
+    strategies = strategy_grid([0.7, 0.9], [1.2, 1.8], ["revenue", "occupancy"], [-1.0, -1.5])
+
+    grouped = evaluate_strategies(scenario, strategies)
+
+    assert [r['strategy'] for r in grouped] == strategies
+    for strategy, result in zip(strategies, grouped):
+        assert evaluate_strategies(scenario, [strategy]) == [result]
+
+
+def test_mis_specified_elasticity_costs_revenue():
+    scenario = synthetic_scenario(date(2024, 1, 1), date(2024, 12, 31), ROOM_TYPES, demand_noise=0.0)
+
+    results = PricingBacktester(max_workers=1).run(
+        scenario, strategy_grid([0.5], [2.5], ["revenue"], [-1.5, -0.5])
+    )
+
+    assert results[0]['strategy']['elasticity'] == -1.5
+    assert results[1]['forecast_error_pct'] > 0
+
+
+def test_historical_replay_counts_room_nights():
+    bookings = pd.DataFrame({
+        'checkin_date': ['2024-03-04', '2024-03-04', '2024-03-05', '2024-03-04'],
+        'checkout_date': ['2024-03-06', '2024-03-05', '2024-03-07', '2024-03-07'],
+        'room_type': ['deluxe', 'deluxe', 'suite', 'deluxe'],
+        'cancelled': [False, False, False, True],
+    })
+
+    scenario = historical_scenario(bookings)
+
+    assert scenario['room_types'] == ['deluxe', 'suite']
+    np.testing.assert_array_equal(scenario['dates'], np.arange('2024-03-04', '2024-03-07', dtype='datetime64[D]'))
+    # Busiest deluxe night has 2 rooms
+    np.testing.assert_array_equal(scenario['capacity'], [2, 1])
+    # Base-price occupancy is reproduced by the inverted demand, censored
+    # to what the demand model can reach
+    base = scenario['base_occupancy']
+    occupancy = PricingOptimizer()._estimate_occupancy(base, scenario['realized_demand'], np.ones((3, 2)))
+    assert occupancy[1, 0] == pytest.approx(0.5)
+    assert occupancy[0, 0] == pytest.approx(min(1.0, base[0, 0] * 1.4))
+    assert occupancy[2, 0] == pytest.approx(base[2, 0] * 0.6)
+
+
+def test_process_pool_matches_serial(scenario):
+    strategies = strategy_grid([0.8, 1.0], [1.3, 1.5], ["revenue", "profit"])
+
+    serial = PricingBacktester(max_workers=1).run(scenario, strategies)
+    parallel = PricingBacktester(max_workers=2, parallel_min_cells=0).run(scenario, strategies)
+
+    assert parallel == serial
+    revenues = [r['total_revenue'] for r in serial]
+    assert revenues == sorted(revenues, reverse=True)
@@ -54,4 +54,117 @@ async def test_current_price():
     assert response.room_type == "deluxe"
     assert response.current_price > 0
     assert response.price_multiplier >= 0.8
-    assert response.demand_level in ["low", "medium", "high", "very_high"]
\ No newline at end of file
+    assert response.demand_level in ["low", "medium", "high", "very_high"]
+
+def test_demand_cube_follows_calendar_rules():
+    """Cached demand cube applies weekday, season, lead time and event effects"""
+    import numpy as np
+    from src.application.services.ml.pricing_optimizer import DemandCube
+
+    cube = DemandCube(horizon_days=90)
+    today = date.today()
+    dates = np.arange(np.datetime64(today), np.datetime64(today) + 61)
+
+    looked_up = cube.lookup(dates)
+
+    for i, day in enumerate(dates.astype(object)):
+        days_ahead = (day - today).days
+        expected_base = 0.5 + (0.2 if day.weekday() >= 4 else 0) \
+            + (0.15 if day.month in [7, 8, 12, 1] else 0) \
+            + (0.1 if 7 <= days_ahead <= 30 else 0.05 if days_ahead < 7 else 0)
+        demand = looked_up['demand'][i]
+        assert max(0.0, expected_base - 0.05) - 1e-9 <= demand <= min(1.0, expected_base + 0.15) + 1e-9
+
+    # Reused across requests; dates past the horizon use the same rules
+    anchor_features = cube.features
+    far = dates + 60
+    far_lookup = cube.lookup(far)
+    assert cube.features is anchor_features
+    np.testing.assert_array_equal(far_lookup['demand'][:31], cube.lookup(far[:31])['demand'])
+    np.testing.assert_array_equal(cube.lookup(dates)['demand'], looked_up['demand'])
+
+
+@pytest.mark.parametrize("goal", ["revenue", "occupancy", "profit"])
+def test_price_search_picks_best_candidate(goal):
+    """Grid search returns the objective-maximizing multiplier per cell"""
+    from src.application.services.ml.pricing_optimizer import (
+        BASE_PRICES, HISTORICAL_OCCUPANCY, PricingOptimizer,
+    )
+
+    optimizer = PricingOptimizer()
+    start = date.today()
+    room_types = ["deluxe", "suite", "standard", "unknown"]
+    constraints = PricingConstraints(min_price_multiplier=0.9, max_price_multiplier=1.3)
+
+    grid = optimizer.compute_pricing_grid(
+        start, start + timedelta(days=30), room_types, constraints, goal
+    )
+    candidates = [round(0.9 + k * 0.01, 2) for k in range(41)]
+
+    def occupancy_at(room_type, day, demand, multiplier):
+        day_type = "weekend" if day.weekday() >= 5 else "weekday"
+        base_occ = HISTORICAL_OCCUPANCY.get(room_type, {}).get(day_type, 0.7)
+        elasticity = -1.5 * (1.5 - demand)
+        occ = base_occ * (0.6 + 0.8 * demand) * (1 + elasticity * (multiplier - 1.0))
+        return min(1.0, max(0.0, occ))
+
+    for i, day in enumerate(grid['dates'].astype(object)):
+        for j, room_type in enumerate(room_types):
+            demand = grid['demand_score'][i, j]
+            chosen = grid['price_multiplier'][i, j]
+            occupancies = [occupancy_at(room_type, day, demand, m) for m in candidates]
+            if goal == "revenue":
+                objective = [m * o for m, o in zip(candidates, occupancies)]
+            elif goal == "profit":
+                objective = [(m - 0.3) * o for m, o in zip(candidates, occupancies)]
+            else:
+                top = max(occupancies)
+                objective = [m * o if o >= top - 0.005 else -1 for m, o in zip(candidates, occupancies)]
+
+            assert 0.9 <= chosen <= 1.3
+            assert objective[candidates.index(round(chosen, 2))] == pytest.approx(max(objective))
+            assert grid['expected_occupancy'][i, j] == pytest.approx(
+                occupancy_at(room_type, day, demand, chosen)
+            )
+            base_price = BASE_PRICES.get(room_type, 1500000)
+            assert grid['suggested_price'][i, j] == int(base_price * chosen)
+
+
+@pytest.mark.asyncio
+async def test_goals_trade_revenue_for_occupancy():
+    """Revenue goal earns the most; occupancy goal fills the most rooms"""
+    optimizer = get_pricing_optimizer()
+    summaries = {}
+    for goal in OptimizationGoal:
+        response = await optimizer.optimize_pricing(PricingOptimizationRequest(
+            date_range=DateRange(start=date.today(), end=date.today() + timedelta(days=90)),
+            room_types=["deluxe", "suite", "standard"],
+            optimization_goal=goal,
+        ))
+        summaries[goal] = response.summary
+
+    revenue = summaries[OptimizationGoal.REVENUE]
+    occupancy = summaries[OptimizationGoal.OCCUPANCY]
+    assert revenue.total_expected_revenue >= occupancy.total_expected_revenue
+    assert occupancy.avg_occupancy >= revenue.avg_occupancy
+
+
+@pytest.mark.asyncio
+async def test_year_long_schedule_is_date_major():
+    """365 x 10 schedule comes back in date-major order with consistent summary"""
+    optimizer = get_pricing_optimizer()
+    room_types = ["deluxe", "suite", "standard"] + [f"custom_{i}" for i in range(7)]
+    start = date.today()
+
+    response = await optimizer.optimize_pricing(PricingOptimizationRequest(
+        date_range=DateRange(start=start, end=start + timedelta(days=364)),
+        room_types=room_types,
+    ))
+
+    schedule = response.pricing_schedule
+    assert len(schedule) == 3650
+    assert [item.room_type for item in schedule[:10]] == room_types
+    assert schedule[10].date == start + timedelta(days=1)
+    assert schedule[-1].date == start + timedelta(days=364)
+    assert response.summary.total_expected_revenue == sum(i.expected_revenue for i in schedule)
+    assert schedule[0].factors.day_of_week == start.strftime("%A")
@@ -0,0 +1,326 @@
+"""
+Test Recommendation Store
+Unit tests for precomputed top-k lists, incremental refresh and store-first serving
+"""
+import numpy as np
+import pytest
+from datetime import date, datetime, timedelta
+
+from src.application.services.ml import recommendation_store as rs
+from src.application.services.ml.recommendation_store import RecommendationStore
+from src.application.services.ml.recommender import RecommendationEngine, ServiceFactorIndex
+from src.application.services.ml.training.train_recommender import (
+    fold_in_users,
+    _confidence,
+    _solve_side,
+)
+from src.infrastructure.config import Settings
+
+
+def _artifact(n_users=30, n_items=40, n_factors=8, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        'version': '1.0',
+        'trained_at': '2025-01-10T03:00:00',
+        'params': {'regularization': 0.05, 'alpha': 20.0},
+        'user_ids': np.array([str(i) for i in range(1, n_users + 1)]),
+        'item_ids': np.array([str(100 + i) for i in range(n_items)]),
+        'user_factors': rng.normal(0, 0.3, (n_users, n_factors)).astype(np.float32),
+        'item_factors': rng.normal(0, 0.3, (n_items, n_factors)).astype(np.float32),
+        'user_interactions': rng.integers(1, 10, n_users).astype(np.int32),
+        'item_popularity': rng.random(n_items).astype(np.float32),
+        'item_names': np.array([f"Service {i}" for i in range(n_items)]),
+        'item_categories': np.array(["dining", "spa"] * (n_items // 2)),
+        'item_prices': rng.integers(100_000, 2_000_000, n_items).astype(np.float64),
+    }
+
+
+class FakeDatabase:
+    """In-memory Booking table (with its changed_at trigger), service_recommendations and refresh cursor"""
+
+    def __init__(self, bookings):
+        # booking_id -> (user_id, service_id, created_at)
+        self.bookings = bookings
+        self.status = {}
+        self.changed_at = {}
+        self.clock = datetime(2025, 3, 1)
+        self.table = {}
+        self.cursor = None
+        self.lookups = 0
+
+    def touch(self, booking_id, at=None):
+        """What the booking_changed_at trigger does on insert/update"""
+        self.clock += timedelta(minutes=1)
+        self.changed_at[booking_id] = at or self.clock
+
+    def cancel(self, booking_id):
+        self.status[booking_id] = "cancelled"
+        self.touch(booking_id)
+
+    def _sync(self):
+        # Rows added to self.bookings count as inserted now
+        for booking_id in sorted(self.bookings):
+            if booking_id not in self.changed_at:
+                self.touch(booking_id)
+
+    # Pool API
+    def acquire(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def transaction(self):
+        return self
+
+    async def fetchrow(self, sql, guest_id, version):
+        self.lookups += 1
+        row = self.table.get(guest_id)
+        if row is None or row[4] != version:
+            return None
+        return {"service_ids": row[1], "scores": row[2], "confidences": row[3]}
+
+    async def fetchval(self, sql):
+        self._sync()
+        if sql == rs.CHANGE_HIGH_WATER_SQL:
+            return max(self.changed_at.values(), default=None)
+        assert sql == rs.FETCH_CURSOR_SQL
+        return self.cursor
+
+    async def fetch(self, sql, *args):
+        self._sync()
+        if sql == rs.ACTIVE_GUESTS_SQL:
+            return self._per_guest(lambda booking_id: self.status.get(booking_id) not in args[0])
+        if sql == rs.CHANGED_GUESTS_SQL:
+            return self._per_guest(lambda booking_id: self.changed_at[booking_id] > args[0])
+        if sql == rs.FETCH_MANY_RECOMMENDATIONS_SQL:
+            self.lookups += 1
+            return [
+                {"guest_id": g, "service_ids": row[1], "scores": row[2], "confidences": row[3]}
+                for g, row in self.table.items() if g in args[0] and row[4] == args[1]
+            ]
+        assert sql == rs.GUEST_INTERACTIONS_SQL
+        counts = {}
+        for booking_id, (user_id, service_id, _) in self.bookings.items():
+            if user_id in args[0] and self.status.get(booking_id) not in args[1]:
+                counts[(user_id, service_id)] = counts.get((user_id, service_id), 0) + 1
+        return [{"user_id": u, "service_id": s, "interactions": c} for (u, s), c in counts.items()]
+
+    async def execute(self, sql, arg):
+        if sql == rs.DELETE_OTHER_VERSIONS_SQL:
+            self.table = {g: row for g, row in self.table.items() if row[4] == arg}
+        elif sql == rs.DELETE_RECOMMENDATIONS_SQL:
+            self.table = {g: row for g, row in self.table.items() if g not in arg}
+        elif sql == rs.ADVANCE_CURSOR_SQL:
+            self.cursor = arg if self.cursor is None else max(self.cursor, arg)
+
+    async def executemany(self, sql, rows):
+        assert sql == rs.UPSERT_RECOMMENDATIONS_SQL
+        for row in rows:
+            self.table[row[0]] = row
+
+    def _per_guest(self, keep):
+        guests = {}
+        for booking_id, (user_id, _, created_at) in sorted(self.bookings.items()):
+            if keep(booking_id):
+                guest = guests.setdefault(user_id, {"user_id": user_id})
+                guest["last_booking_at"] = created_at
+                guest["last_changed_at"] = max(guest.get("last_changed_at", rs.EPOCH), self.changed_at[booking_id])
+        return list(guests.values())
+
+
+@pytest.fixture
+def factor_index():
+    return ServiceFactorIndex(_artifact())
+
+
+@pytest.fixture
+def db():
+    old = date(2024, 12, 1)
+    return FakeDatabase({
+        1: (1, 100, old),
+        2: (2, 101, old),
+        3: (3, 102, date(2025, 2, 1)),   # booked after training
+        4: (999, 103, old),              # not in the model
+        5: (999, 104, old),
+    })
+
+
+@pytest.fixture
+def store(db):
+    return RecommendationStore(settings=Settings(), db_pool=db, top_k=10, block_size=7, overlap_seconds=0)
+
+
+def test_fold_in_matches_exact_half_step(factor_index):
+    import scipy.sparse as sp
+    counts = sp.csr_matrix(np.array([[0, 2, 0, 1], [1, 0, 0, 0]], dtype=np.float32))
+    item_factors = factor_index.item_factors[:4]
+
+    folded = fold_in_users(counts, item_factors, 0.05, 20.0)
+
+    expected = _solve_side(_confidence(counts, 20.0), item_factors.astype(np.float64), 0.05)
+    np.testing.assert_allclose(folded, expected, rtol=1e-5)
+    assert folded.dtype == np.float32
+
+
+def test_block_ranking_matches_single_guest_top_k(factor_index):
+    rows = np.arange(len(factor_index.user_index))
+    positions, scores, _ = factor_index.rank(
+        factor_index.user_factors[rows], factor_index.user_interactions[rows], 10
+    )
+
+    for guest_id, row in list(factor_index.user_index.items())[:5]:
+        top, raw = factor_index.top_k(guest_id, 10)
+        np.testing.assert_array_equal(positions[row], top)
+        np.testing.assert_allclose(scores[row], np.clip(raw, 0, 1), rtol=1e-5)
+
+
+@pytest.mark.asyncio
+class TestRecommendationStore:
+    """Test full and incremental refresh against the fake tables"""
+
+    async def test_full_refresh_scores_every_active_guest(self, store, db, factor_index):
+        result = await store.refresh_all(factor_index)
+
+        # 30 model guests, minus guest 3 who booked after training, plus 3 and 999 folded in
+        assert result["guests_scored"] == 29
+        assert result["guests_folded_in"] == 2
+        assert set(db.table) == set(factor_index.user_index) | {"999"}
+        assert db.cursor == db.changed_at[5]
+
+        # Trained embeddings are used as is for unchanged guests
+        top, _ = factor_index.top_k("7", 10)
+        assert db.table["7"][1] == factor_index.item_ids[top].tolist()
+        assert len(db.table["999"][1]) == 10
+
+    async def test_full_refresh_drops_other_versions(self, store, db, factor_index):
+        db.table["old"] = ("old", ["100"], [0.5], [0.5], "0.9")
+
+        await store.refresh_all(factor_index)
+
+        assert "old" not in db.table
+
+    async def test_incremental_refresh_rescores_changed_guests_only(self, store, db, factor_index):
+        await store.refresh_all(factor_index)
+        before = dict(db.table)
+
+        db.bookings[6] = (7, 110, date(2025, 3, 1))
+        db.bookings[7] = (7, 110, date(2025, 3, 2))
+        db.bookings[8] = (1234, 111, date(2025, 3, 2))
+        result = await store.refresh_incremental(factor_index)
+
+        assert result["guests_changed"] == 2
+        assert result["rows_written"] == 2
+        assert db.cursor == db.changed_at[8]
+        assert db.table["7"] != before["7"]
+        assert "1234" in db.table
+        assert all(db.table[g] == before[g] for g in before if g != "7")
+
+        # Nothing new: no work
+        again = await store.refresh_incremental(factor_index)
+        assert again["guests_changed"] == 0
+
+    async def test_status_change_of_old_booking_rescores_guest(self, store, db, factor_index):
+        db.bookings[6] = (7, 110, date(2024, 11, 1))
+        db.bookings[7] = (7, 111, date(2024, 11, 2))
+        await store.refresh_all(factor_index)
+        before = db.table["7"]
+
+        # Old bookings: a cancellation is seen although no booking was added
+        db.cancel(6)
+        db.cancel(2)
+        result = await store.refresh_incremental(factor_index)
+
+        assert result["guests_changed"] == 2
+        assert db.table["7"] != before
+        # Guest 2 has no usable booking left
+        assert "2" not in db.table
+
+    async def test_overlap_window_picks_up_late_commits(self, db, factor_index):
+        store = RecommendationStore(settings=Settings(), db_pool=db, top_k=10, block_size=7, overlap_seconds=300)
+        await store.refresh_all(factor_index)
+        cursor = db.cursor
+
+        # Committed after the refresh, stamped before the cursor
+        db.bookings[9] = (1234, 111, date(2025, 3, 2))
+        db.touch(9, at=cursor - timedelta(minutes=2))
+        result = await store.refresh_incremental(factor_index)
+
+        assert "1234" in db.table
+        assert db.cursor == cursor
+        assert result["guests_changed"] >= 1
+
+    async def test_get_ignores_other_model_versions(self, store, db, factor_index):
+        await store.refresh_all(factor_index)
+
+        assert (await store.get("7", "1.0"))["service_ids"] == db.table["7"][1]
+        assert await store.get("7", "2.0") is None
+        assert await store.get("unknown", "1.0") is None
+        assert store.stats["hits"] == 1
+        assert store.stats["misses"] == 2
+
+    async def test_get_many_is_one_lookup(self, store, db, factor_index):
+        await store.refresh_all(factor_index)
+        db.lookups = 0
+
+        found = await store.get_many(["7", "8", "unknown", "7"], "1.0")
+
+        assert set(found) == {"7", "8"}
+        assert found["7"] == await store.get("7", "1.0")
+        assert db.lookups == 2
+        assert await store.get_many(["7"], "2.0") == {}
+
+    async def test_get_without_database_is_a_miss(self):
+        assert await RecommendationStore(settings=Settings()).get("7", "1.0") is None
+
+
+@pytest.mark.asyncio
+class TestStoreFirstServing:
+    """The engine serves stored lists and scores online otherwise"""
+
+    async def test_serves_from_store(self, store, db, factor_index):
+        await store.refresh_all(factor_index)
+        engine = RecommendationEngine(model=_artifact(), store=store)
+        engine.factor_index.rank = None  # online scoring must not run
+
+        response = await engine.recommend_services("999", top_k=5, context=None)
+
+        assert [r.service_id for r in response.recommendations] == db.table["999"][1][:5]
+        assert response.model_version.endswith("+mf_v1.0")
+        assert db.lookups == 1
+
+    async def test_store_matches_online_scoring(self, store, factor_index):
+        await store.refresh_all(factor_index)
+        online = await RecommendationEngine(model=_artifact()).recommend_services("12", 5, None)
+        stored = await RecommendationEngine(model=_artifact(), store=store).recommend_services("12", 5, None)
+
+        assert [(r.service_id, r.score, r.confidence) for r in stored.recommendations] == \
+            [(r.service_id, r.score, r.confidence) for r in online.recommendations]
+
+    async def test_exclusions_filtered_from_stored_list(self, store, db, factor_index):
+        await store.refresh_all(factor_index)
+        engine = RecommendationEngine(model=_artifact(), store=store)
+        stored_ids = db.table["12"][1]
+
+        response = await engine.recommend_services("12", 5, None, exclude_services=stored_ids[:2])
+
+        assert [r.service_id for r in response.recommendations] == stored_ids[2:7]
+
+    async def test_short_stored_list_falls_back_online(self, store, db, factor_index):
+        await store.refresh_all(factor_index)
+        engine = RecommendationEngine(model=_artifact(), store=store)
+
+        response = await engine.recommend_services("12", 5, None, exclude_services=db.table["12"][1][:8])
+
+        online, _ = factor_index.top_k("12", 5, db.table["12"][1][:8])
+        assert [r.service_id for r in response.recommendations] == factor_index.item_ids[online].tolist()
+
+    async def test_cold_guest_without_list_uses_rules(self, store):
+        engine = RecommendationEngine(model=_artifact(), store=store)
+
+        response = await engine.recommend_services("NEW_GUEST", 3, None)
+
+        assert response.model_version == "recommender_v2.1"
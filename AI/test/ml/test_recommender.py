@@ -154,4 +154,84 @@ class TestRecommendationEngine:
         assert 0.0 <= match_score.budget <= 1.0
         assert 0.0 <= match_score.view <= 1.0
         assert 0.0 <= match_score.floor <= 1.0
-        assert 0.0 <= match_score.overall <= 1.0
\ No newline at end of file
+        assert 0.0 <= match_score.overall <= 1.0
+
+def _factor_artifact(n_users=50, n_items=5000, n_factors=32, seed=0):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    return {
+        'version': '1.0',
+        'user_ids': np.array([f"G{i}" for i in range(n_users)]),
+        'item_ids': np.array([f"SVC_{i}" for i in range(n_items)]),
+        'user_factors': rng.normal(0, 0.3, (n_users, n_factors)).astype(np.float32),
+        'item_factors': rng.normal(0, 0.3, (n_items, n_factors)).astype(np.float32),
+        'user_interactions': rng.integers(1, 20, n_users).astype(np.int32),
+        'item_popularity': rng.random(n_items).astype(np.float32),
+        'item_names': np.array([f"Service {i}" for i in range(n_items)]),
+        'item_categories': np.array(["dining", "spa", "transport"] * (n_items // 3) + ["other"] * (n_items % 3)),
+        'item_prices': rng.integers(100_000, 2_000_000, n_items).astype(np.float64),
+    }
+
+
+class TestFactorizationRecommendations:
+    """Collaborative filtering path over a factor artifact"""
+
+    @pytest.mark.asyncio
+    async def test_top_k_matches_full_ranking(self):
+        import numpy as np
+        artifact = _factor_artifact()
+        recommender = RecommendationEngine(model=artifact)
+
+        response = await recommender.recommend_services("G7", top_k=10, context=None)
+
+        scores = artifact['item_factors'] @ artifact['user_factors'][7]
+        expected = [f"SVC_{i}" for i in np.argsort(-scores)[:10]]
+        assert [r.service_id for r in response.recommendations] == expected
+        assert response.model_version.endswith("+mf_v1.0")
+        assert all(0.0 <= r.score <= 1.0 and 0.0 <= r.confidence <= 1.0 for r in response.recommendations)
+
+    @pytest.mark.asyncio
+    async def test_exclusions_are_masked(self):
+        recommender = RecommendationEngine(model=_factor_artifact())
+        first = await recommender.recommend_services("G3", top_k=5, context=None)
+        excluded = [r.service_id for r in first.recommendations[:3]] + ["UNKNOWN"]
+
+        response = await recommender.recommend_services(
+            "G3", top_k=5, context=None, exclude_services=excluded
+        )
+
+        ids = [r.service_id for r in response.recommendations]
+        assert len(ids) == 5
+        assert not set(ids) & set(excluded)
+        assert ids[:2] == [r.service_id for r in first.recommendations[3:]]
+
+    @pytest.mark.asyncio
+    async def test_cold_guest_falls_back_to_rules(self):
+        recommender = RecommendationEngine(model=_factor_artifact())
+
+        response = await recommender.recommend_services("NEW_GUEST", top_k=3, context=None)
+
+        assert {r.service_id for r in response.recommendations} <= {s["id"] for s in MOCK_SERVICES}
+        assert response.model_version == "recommender_v2.1"
+
+    def test_hot_swap_replaces_index(self):
+        recommender = RecommendationEngine()
+        recommender.on_model_swapped("service_recommender", _factor_artifact(n_items=30), {"version": "1.0"})
+
+        assert recommender.factor_index.n_items == 30
+        recommender.on_model_swapped("churn_predictor", object(), {})
+        assert recommender.factor_index.n_items == 30
+
+    def test_single_digit_ms_for_large_catalog(self):
+        import time
+        recommender = RecommendationEngine(model=_factor_artifact(n_items=5000))
+        index = recommender.factor_index
+        exclude = [f"SVC_{i}" for i in range(0, 5000, 50)]
+
+        timings = []
+        for _ in range(50):
+            start = time.perf_counter()
+            index.top_k("G1", 20, exclude)
+            timings.append(time.perf_counter() - start)
+
+        assert sorted(timings)[len(timings) // 2] < 0.005
@@ -0,0 +1,232 @@
+"""
+Test Room Inventory
+Unit tests for vectorized room matching against live availability
+"""
+import re
+import time
+import numpy as np
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock
+
+from src.application.dtos.ml.recommendation_dto import RoomPreferences
+from src.application.services.ml.recommender import RecommendationEngine
+from src.application.services.ml.room_inventory import (
+    AVAILABLE_ROOMS_SQL,
+    RoomInventory,
+    RoomInventoryLoader,
+    score_rooms,
+    top_k_rooms,
+)
+from src.infrastructure.config import Settings
+
+
+VIEWS = np.array(["ocean", "city", "garden", ""])
+
+
+def _inventory(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return RoomInventory(
+        room_numbers=[f"Room {i}" for i in range(n)],
+        room_types=rng.choice(["standard", "deluxe", "suite"], n),
+        floors=rng.integers(1, 30, n),
+        prices=rng.integers(10, 80, n) * 100_000,
+        views=VIEWS[rng.integers(0, 4, n)],
+        capacity=rng.integers(1, 6, n),
+    )
+
+
+def _reference_match(price, view, floor, preferences):
+    """Per-room rules of the original mock recommender"""
+    budget_map = {"low": (0, 2500000), "medium": (2000000, 4000000), "high": (3500000, 10000000)}
+    low, high = budget_map[preferences.budget or "medium"]
+    budget = 1.0 if low <= price <= high else 0.5
+    view_match = 1.0 if not preferences.view else (1.0 if view == preferences.view else 0.7)
+    if preferences.floor:
+        f_low, f_high = {"low": (1, 3), "medium": (4, 6), "high": (7, 10**6)}[preferences.floor]
+        floor_match = 1.0 if f_low <= floor <= f_high else 0.6
+    else:
+        floor_match = 0.8
+    return budget * 0.4 + view_match * 0.4 + floor_match * 0.2
+
+
+def _row(room_id, name, floor, view, capacity, price, singles=0, doubles=1):
+    return {
+        "room_id": room_id, "room_name": name, "room_type": "Deluxe", "floor": floor,
+        "view": view, "capacity": capacity, "single_beds": singles, "double_beds": doubles,
+        "price": price,
+    }
+
+
+class TestVectorizedMatching:
+    """Masks and scores match the per-room rules"""
+
+    @pytest.mark.parametrize("preferences", [
+        RoomPreferences(budget="high", view="ocean", floor="high"),
+        RoomPreferences(budget="low", view="garden", floor="low"),
+        RoomPreferences(budget=None, view=None, floor="medium"),
+    ])
+    def test_scores_match_per_room_rules(self, preferences):
+        inventory = _inventory()
+
+        eligible, scores = score_rooms(
+            inventory, preferences.budget, preferences.view, preferences.floor, party_size=3
+        )
+
+        expected = [
+            _reference_match(p, v, f, preferences)
+            for p, v, f in zip(inventory.prices, inventory.views, inventory.floors)
+        ]
+        np.testing.assert_allclose(scores["overall"], expected)
+        np.testing.assert_array_equal(eligible, inventory.capacity >= 3)
+
+    def test_top_k_matches_full_sort(self):
+        inventory = _inventory()
+        eligible, scores = score_rooms(inventory, "medium", "city", "low", party_size=2)
+
+        top = top_k_rooms(scores["overall"], eligible, inventory.prices, 10)
+
+        candidates = [i for i in range(len(inventory)) if eligible[i]]
+        candidates.sort(key=lambda i: (-round(scores["overall"][i], 2), inventory.prices[i]))
+        assert top.tolist()[:10] == candidates[:10]
+
+    def test_top_k_with_few_eligible_rooms(self):
+        inventory = _inventory(n=20)
+        eligible = np.zeros(20, dtype=bool)
+        eligible[[3, 7]] = True
+
+        assert sorted(top_k_rooms(np.ones(20), eligible, inventory.prices, 5)) == [3, 7]
+        assert len(top_k_rooms(np.ones(20), np.zeros(20, dtype=bool), inventory.prices, 5)) == 0
+
+    def test_thousands_of_rooms_in_milliseconds(self):
+        inventory = _inventory(n=20_000)
+
+        timings = []
+        for _ in range(20):
+            start = time.perf_counter()
+            eligible, scores = score_rooms(inventory, "high", "ocean", "high", party_size=2)
+            top_k_rooms(scores["overall"], eligible, inventory.prices, 5)
+            timings.append(time.perf_counter() - start)
+
+        assert sorted(timings)[len(timings) // 2] < 0.01
+
+
+class FakeInventoryPool:
+    """Applies the availability predicates of AVAILABLE_ROOMS_SQL to fixture tables"""
+
+    def __init__(self, rooms, bookings, room_types, hotels):
+        self.rooms = rooms
+        self.bookings = bookings
+        self.room_types = room_types
+        self.hotels = hotels
+
+    async def fetch(self, sql, check_in, check_out, hotel_id):
+        statuses = re.findall(r"'([^']+)'", re.search(r"b\.status IN \(([^)]*)\)", sql).group(1))
+        rows = []
+        for room in self.rooms:
+            room_type = self.room_types[room["type_id"]]
+            hotel = self.hotels.get(room_type["hotel_id"])
+            if "rt.availability" in sql and not room_type["availability"]:
+                continue
+            if "h.status = 1" in sql and hotel is not None and hotel["status"] != 1:
+                continue
+            if any(
+                b["room_id"] == room["room_id"] and b["status"] in statuses
+                and b["check_in_date"] < check_out and b["check_out_date"] > check_in
+                for b in self.bookings
+            ):
+                continue
+            rows.append(room["row"])
+        return rows
+
+
+@pytest.mark.asyncio
+class TestAvailabilityFilters:
+    """Rooms held by bookings, maintenance or closed types/hotels are excluded"""
+
+    @pytest.fixture
+    def pool(self):
+        rooms = [
+            {"room_id": 1, "type_id": 1, "row": _row(1, "Room 101", 1, "city", 2, 900_000)},
+            {"room_id": 2, "type_id": 1, "row": _row(2, "Room 102", 1, "city", 2, 900_000)},
+            {"room_id": 3, "type_id": 1, "row": _row(3, "Room 103", 1, "city", 2, 900_000)},
+            {"room_id": 4, "type_id": 2, "row": _row(4, "Room 201", 2, "city", 2, 900_000)},
+            {"room_id": 5, "type_id": 3, "row": _row(5, "Room 301", 3, "city", 2, 900_000)},
+            {"room_id": 6, "type_id": 1, "row": _row(6, "Room 104", 1, "city", 2, 900_000)},
+        ]
+        bookings = [
+            {"room_id": 2, "status": "accepted",
+             "check_in_date": date(2025, 2, 2), "check_out_date": date(2025, 2, 4)},
+            {"room_id": 3, "status": "maintained",
+             "check_in_date": date(2025, 1, 30), "check_out_date": date(2025, 2, 2)},
+            {"room_id": 6, "status": "cancelled",
+             "check_in_date": date(2025, 2, 1), "check_out_date": date(2025, 2, 3)},
+        ]
+        room_types = {
+            1: {"hotel_id": 1, "availability": True},
+            2: {"hotel_id": 1, "availability": False},
+            3: {"hotel_id": 2, "availability": True},
+        }
+        hotels = {1: {"status": 1}, 2: {"status": 0}}
+        return FakeInventoryPool(rooms, bookings, room_types, hotels)
+
+    async def test_only_free_rooms_are_recommended(self, pool):
+        engine = RecommendationEngine(room_inventory=RoomInventoryLoader(settings=Settings(), db_pool=pool))
+
+        response = await engine.recommend_rooms("GUEST_001", "2025-02-01", "2025-02-03", None, party_size=2)
+
+        # 102 is booked, 103 is under maintenance, 201's type and 301's hotel are closed
+        assert sorted(r.room_number for r in response.recommendations) == ["Room 101", "Room 104"]
+
+
+@pytest.mark.asyncio
+class TestLiveInventoryRecommendations:
+    """Room recommendations from one availability query"""
+
+    @pytest.fixture
+    def pool(self):
+        pool = MagicMock()
+        pool.fetch = AsyncMock(return_value=[
+            _row(1, "Room 101", 1, "city", 2, 900_000, singles=1, doubles=0),
+            _row(6, "Room 205", 2, "ocean", 2, 3_800_000),
+            _row(9, "Room 901", 9, "ocean", 4, 4_500_000, singles=2, doubles=1),
+            _row(12, "Room 902", 9, "ocean", 1, 3_600_000),
+        ])
+        return pool
+
+    async def test_one_query_for_the_stay(self, pool):
+        engine = RecommendationEngine(room_inventory=RoomInventoryLoader(settings=Settings(), db_pool=pool))
+
+        response = await engine.recommend_rooms(
+            guest_id="GUEST_001",
+            check_in="2025-02-01",
+            check_out="2025-02-03",
+            preferences=RoomPreferences(budget="high", view="ocean", floor="high"),
+            party_size=2
+        )
+
+        pool.fetch.assert_awaited_once_with(AVAILABLE_ROOMS_SQL, date(2025, 2, 1), date(2025, 2, 3), None)
+        rooms = [r.room_number for r in response.recommendations]
+        # Room 902 is too small for two guests
+        assert rooms == ["Room 901", "Room 205", "Room 101"]
+        assert response.recommendations[0].match_score.overall == 1.0
+        assert response.recommendations[0].features == ["ocean_view", "double_bed", "twin_beds"]
+        assert response.recommendations[0].floor == 9
+
+    async def test_no_room_fits_the_party(self, pool):
+        engine = RecommendationEngine(room_inventory=RoomInventoryLoader(settings=Settings(), db_pool=pool))
+
+        response = await engine.recommend_rooms("GUEST_001", "2025-02-01", "2025-02-03", None, party_size=6)
+
+        assert response.total_recommendations == 0
+
+    async def test_mock_rooms_without_database(self):
+        engine = RecommendationEngine(room_inventory=RoomInventoryLoader(settings=Settings()))
+
+        response = await engine.recommend_rooms("GUEST_001", "2025-02-01", "2025-02-03", None, party_size=3)
+
+        assert [r.room_number for r in response.recommendations] == ["702"]
+
+    async def test_rejects_empty_stay(self):
+        with pytest.raises(ValueError):
+            await RecommendationEngine().recommend_rooms("GUEST_001", "2025-02-03", "2025-02-03", None, 2)
@@ -0,0 +1,142 @@
+"""
+Tests for NDJSON streaming batch endpoints
+"""
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.application.controllers.ml.router import router
+from src.application.controllers.ml.streaming import (
+    NDJSONLineError,
+    iter_ndjson_lines,
+    iter_micro_batches,
+)
+
+
+FEATURES = {
+    "booking_lead_time_days": 40,
+    "room_type": "deluxe",
+    "total_amount": 3_000_000,
+    "payment_method": "cash",
+    "booking_source": "ota",
+    "is_first_booking": True,
+    "days_until_checkin": 3,
+}
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(router, prefix="/api/ml")
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+class FakeRequest:
+    """Request stand-in that yields the body in fixed chunks"""
+
+    def __init__(self, body: bytes, chunk_size: int):
+        self.chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def _read_ndjson(text: str):
+    return [json.loads(line) for line in text.splitlines() if line]
+
+
+class TestNDJSONParsing:
+    """Test incremental line parsing"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("chunk_size", [1, 7, 1024])
+    async def test_lines_split_across_chunks(self, chunk_size):
+        body = b'{"a": 1}\n\n{"a": 2}\n{bad\n{"a": 3}'
+        items = [item async for item in iter_ndjson_lines(FakeRequest(body, chunk_size))]
+
+        assert [line_no for line_no, _ in items] == [1, 3, 4, 5]
+        assert items[0][1] == {"a": 1}
+        assert isinstance(items[2][1], NDJSONLineError)
+        assert items[3][1] == {"a": 3}
+
+    @pytest.mark.asyncio
+    async def test_oversized_line_is_skipped(self):
+        body = b'{"a": "' + b"x" * 100 + b'"}\n{"a": 2}\n'
+        items = [
+            item async for item in iter_ndjson_lines(FakeRequest(body, 16), max_line_bytes=32)
+        ]
+
+        assert isinstance(items[0][1], NDJSONLineError)
+        assert items[1][1] == {"a": 2}
+
+    @pytest.mark.asyncio
+    async def test_micro_batches_are_bounded(self):
+        body = b"".join(json.dumps({"i": i}).encode() + b"\n" for i in range(10))
+        batches = [
+            batch async for batch in iter_micro_batches(iter_ndjson_lines(FakeRequest(body, 5)), 4)
+        ]
+        assert [len(batch) for batch in batches] == [4, 4, 2]
+
+
+class TestStreamingEndpoints:
+    """Test streaming churn and CLV endpoints"""
+
+    def test_churn_stream(self, client):
+        lines = [json.dumps({"booking_id": f"B{i}", "features": FEATURES}) for i in range(5)]
+        lines.append('{"booking_id": "B5"}')
+        response = client.post(
+            "/api/ml/churn/batch/stream?batch_size=2",
+            content="\n".join(lines),
+            headers={"content-type": "application/x-ndjson"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        records = _read_ndjson(response.text)
+
+        predictions = [r for r in records if "booking_id" in r]
+        assert [p["booking_id"] for p in predictions] == [f"B{i}" for i in range(5)]
+        assert records[-2] == {"line": 6, "error": "Expected an object with booking_id and features"}
+        assert records[-1]["done"] is True
+        assert records[-1]["total_processed"] == 5
+        assert records[-1]["total_errors"] == 1
+
+    def test_churn_stream_rejects_invalid_features_per_line(self, client):
+        invalid = dict(FEATURES, booking_hour=25)
+        lines = [
+            json.dumps({"booking_id": "B0", "features": FEATURES}),
+            json.dumps({"booking_id": "B1", "features": invalid}),
+            json.dumps({"booking_id": "B2", "features": FEATURES}),
+        ]
+        response = client.post("/api/ml/churn/batch/stream?batch_size=3", content="\n".join(lines))
+
+        records = _read_ndjson(response.text)
+        assert [r["booking_id"] for r in records if "booking_id" in r] == ["B0", "B2"]
+        errors = [r for r in records if "error" in r]
+        assert [e["line"] for e in errors] == [2]
+        assert errors[0]["error"].startswith("Invalid features")
+        assert records[-1]["total_errors"] == 1
+
+    def test_clv_stream(self, client):
+        body = "\n".join(json.dumps({"guest_id": f"G{i}"}) for i in range(3))
+        response = client.post("/api/ml/clv/batch/stream?batch_size=2", content=body)
+
+        assert response.status_code == 200
+        records = _read_ndjson(response.text)
+        assert [r["guest_id"] for r in records[:-1]] == ["G0", "G1", "G2"]
+        assert records[-1]["total_processed"] == 3
+        assert records[-1]["total_clv"] == pytest.approx(sum(r["predicted_clv"] for r in records[:-1]))
+
+    def test_empty_body_returns_summary_only(self, client):
+        response = client.post("/api/ml/churn/batch/stream", content=b"")
+        assert _read_ndjson(response.text) == [
+            {"done": True, "total_processed": 0, "total_errors": 0,
+             "high_risk_count": 0, "medium_risk_count": 0, "low_risk_count": 0}
+        ]
+
+    def test_batch_size_validated(self, client):
+        response = client.post("/api/ml/churn/batch/stream?batch_size=0", content=b"")
+        assert response.status_code == 422
@@ -0,0 +1,132 @@
+"""
+Test Churn Model Trainer
+Unit tests for frame encoding, cached binary datasets and warm-start retraining
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.application.ml_models.model_registry import (
+    BoosterClassifier,
+    CompiledTreePredictor,
+    ModelRegistry,
+)
+from src.application.services.ml.churn_predictor import ChurnPredictor
+from src.application.services.ml.feature_engineering import ChurnFeatureEncoder
+from src.application.services.ml.training.train_churn import ChurnModelTrainer
+
+
+def _bookings(n=3000, start="2023-01-01", seed=0):
+    rng = np.random.default_rng(seed)
+    lead_time = rng.integers(0, 120, n)
+    first = rng.random(n) < 0.4
+    cancel_rate = np.where(first, 0.0, rng.random(n) * 0.5)
+    logit = -3 + lead_time / 20 + 1.5 * first + 3 * cancel_rate
+    return pd.DataFrame({
+        'booking_id': np.arange(n),
+        'booking_date': pd.date_range(start, periods=n, freq='2h'),
+        'booking_lead_time_days': lead_time,
+        'room_type': rng.choice(['standard', 'deluxe', 'suite'], n),
+        'total_amount': rng.integers(1, 10, n) * 1_000_000,
+        'payment_method': rng.choice(['cash', 'credit_card', ''], n),
+        'booking_source': rng.choice(['website', 'ota', None], n),
+        'is_first_booking': first,
+        'previous_bookings_count': np.where(first, 0, rng.integers(1, 10, n)),
+        'cancellation_rate': cancel_rate,
+        'days_since_last_booking': np.where(first, 0, rng.integers(1, 400, n)),
+        'loyalty_tier': rng.choice(['none', 'silver', 'gold'], n),
+        'days_until_checkin': lead_time,
+        'discount_applied': rng.random(n) < 0.2,
+        'churned': (rng.random(n) < 1 / (1 + np.exp(-logit))).astype(int),
+    })
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    path = tmp_path / "churn.csv"
+    _bookings().to_csv(path, index=False)
+    return path
+
+
+@pytest.fixture
+def trainer(tmp_path):
+    return ChurnModelTrainer(output_dir=str(tmp_path / "models"))
+
+
+def test_encode_frame_matches_encode_batch():
+    df = _bookings(n=500)
+    rows = [
+        {k: v for k, v in row.items() if not (isinstance(v, float) and np.isnan(v))}
+        for row in df.drop(columns=['booking_date']).astype(object).to_dict('records')
+    ]
+
+    np.testing.assert_array_equal(ChurnFeatureEncoder.encode_frame(df), ChurnFeatureEncoder.encode_batch(rows))
+
+
+def test_encode_frame_defaults_for_missing_columns():
+    X = ChurnFeatureEncoder.encode_frame(pd.DataFrame({'total_amount': [2_000_000]}))
+
+    np.testing.assert_array_equal(X, ChurnFeatureEncoder.encode_batch([{'total_amount': 2_000_000}]))
+
+
+def test_full_training_writes_registry_artifact(trainer, data_path):
+    result = trainer.train_model(str(data_path))
+
+    assert result['version'] == "2.0"
+    assert result['metrics']['valid_auc'] > 0.7
+    assert isinstance(result['model'], BoosterClassifier)
+
+    registry = ModelRegistry(model_dir=str(trainer.output_dir))
+    assert registry.scan_directory() == ['churn_predictor']
+    assert registry.get_model_info('churn_predictor')['version'] == "2.0"
+
+    # ChurnPredictor scores through predict_proba, plain or compiled
+    X = ChurnFeatureEncoder.encode_frame(_bookings(n=20, seed=1))
+    expected = ChurnPredictor(model=registry.get_model('churn_predictor')).predict_proba_batch(X)
+    compiled = CompiledTreePredictor.compile(registry.get_model('churn_predictor'))
+    np.testing.assert_allclose(ChurnPredictor(model=compiled).predict_proba_batch(X), expected)
+
+
+def test_second_run_uses_cached_datasets(trainer, data_path):
+    first = trainer.train_model(str(data_path))
+    second = trainer.train_model(str(data_path))
+
+    assert first['cache_hit'] is False
+    assert second['cache_hit'] is True
+    assert second['version'] == "3.0"
+    assert second['metrics']['valid_auc'] == pytest.approx(first['metrics']['valid_auc'])
+
+
+def test_changed_export_rebuilds_datasets(trainer, data_path):
+    trainer.train_model(str(data_path))
+    _bookings(seed=3).to_csv(data_path, index=False)
+
+    assert trainer.build_datasets(str(data_path))[2]['cache_hit'] is False
+
+
+def test_incremental_training_continues_previous_booster(trainer, data_path):
+    full = trainer.train_model(str(data_path))
+    trees_before = full['model'].booster_.num_trees()
+    new = _bookings(n=600, start="2023-09-01", seed=2)
+    pd.concat([_bookings(), new]).to_csv(data_path, index=False)
+
+    result = trainer.train_incremental(str(data_path))
+
+    assert result['version'] == "2.1"
+    booster = result['model'].booster_
+    assert booster.num_trees() == trees_before + result['metrics']['trees_added']
+    assert trainer.load_state()['trained_until'] == new['booking_date'].max().isoformat()
+    assert trainer.load_state()['previous_version'] == "2.0"
+
+    # Registry serves the newest version
+    registry = ModelRegistry(model_dir=str(trainer.output_dir))
+    registry.scan_directory()
+    assert registry.get_model_info('churn_predictor')['version'] == "2.1"
+
+
+def test_incremental_without_new_bookings_is_skipped(trainer, data_path):
+    assert trainer.train_incremental(str(data_path))['skipped'] is True
+
+    trainer.train_model(str(data_path))
+
+    assert trainer.train_incremental(str(data_path)) == {'skipped': True, 'reason': 'no new bookings'}
@@ -0,0 +1,131 @@
+"""
+Test Service Recommender Training
+Unit tests for the interaction matrix and vectorized ALS solvers
+"""
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+
+from src.application.ml_models.model_registry import ModelRegistry
+from src.application.services.ml.training import train_recommender
+from src.application.services.ml.training.train_recommender import (
+    MODEL_VERSION,
+    ServiceRecommenderTrainer,
+    artifact_version,
+    build_interaction_matrix,
+    recall_at_k,
+    split_interactions,
+    train_als,
+    _solve_side,
+    _solve_side_cg,
+)
+
+
+def _naive_solve(confidence, fixed, regularization):
+    """Reference: one dense solve per row"""
+    n_items, n_factors = fixed.shape
+    out = np.zeros((confidence.shape[0], n_factors))
+    for u in range(confidence.shape[0]):
+        c_u = np.ones(n_items)
+        p_u = np.zeros(n_items)
+        row = confidence[u]
+        c_u[row.indices] = row.data
+        p_u[row.indices] = 1
+        A = fixed.T @ (c_u[:, None] * fixed) + regularization * np.eye(n_factors)
+        out[u] = np.linalg.solve(A, fixed.T @ (c_u * p_u))
+    return out
+
+
+def _block_interactions(n_users=600, n_items=60, n_groups=6, per_user=6, seed=0):
+    """Guests in a group use the services of that group"""
+    rng = np.random.default_rng(seed)
+    group = rng.integers(0, n_groups, n_users)
+    items_per_group = n_items // n_groups
+    rows = np.repeat(np.arange(n_users), per_user)
+    cols = rng.integers(0, items_per_group, n_users * per_user) * n_groups + np.repeat(group, per_user)
+    return pd.DataFrame({
+        'guest_id': rows,
+        'service_id': [f"SVC_{c}" for c in cols],
+        'service_name': [f"Service {c}" for c in cols],
+        'interactions': 1,
+    })
+
+
+@pytest.fixture
+def confidence():
+    counts = sp.random(40, 25, density=0.25, random_state=3, format='csr')
+    counts.data = np.ceil(counts.data * 4)
+    conf = counts.copy()
+    conf.data = 1.0 + 20.0 * np.log1p(conf.data)
+    return conf
+
+
+def test_interaction_matrix_sums_duplicates():
+    df = pd.DataFrame({
+        'guest_id': [1, 1, 2, None],
+        'service_id': [10, 10, 11, None],
+        'service_name': ['Spa', 'Spa', 'Gym', 'Bar'],
+        'interactions': [2, 3, 1, 5],
+    })
+
+    matrix, user_ids, item_ids, items = build_interaction_matrix(df)
+
+    assert list(user_ids) == ['1', '2']
+    assert list(item_ids) == ['10', '11']
+    assert matrix.toarray().tolist() == [[5.0, 0.0], [0.0, 1.0]]
+    assert items['name'].tolist() == ['Spa', 'Gym']
+
+
+@pytest.mark.parametrize("chunk_nnz", [1, 7, 8192])
+def test_batched_solve_matches_per_row_solve(confidence, monkeypatch, chunk_nnz):
+    monkeypatch.setattr(train_recommender, 'ALS_CHUNK_NNZ', chunk_nnz)
+    fixed = np.random.default_rng(1).normal(size=(25, 6))
+
+    np.testing.assert_allclose(
+        _solve_side(confidence, fixed, 0.05), _naive_solve(confidence, fixed, 0.05), atol=1e-10
+    )
+
+
+def test_conjugate_gradient_converges_to_exact(confidence):
+    fixed = np.random.default_rng(2).normal(size=(25, 6))
+    exact = _solve_side(confidence, fixed, 0.05)
+
+    approx = _solve_side_cg(confidence, fixed, np.zeros((40, 6)), 0.05, cg_steps=6)
+
+    np.testing.assert_allclose(approx, exact, atol=1e-6)
+
+
+@pytest.mark.parametrize("solver", ["cg", "exact"])
+def test_als_recovers_group_structure(solver):
+    counts, *_ = build_interaction_matrix(_block_interactions())
+    train, test = split_interactions(counts, test_fraction=0.2)
+
+    user_f, item_f = train_als(train, factors=8, iterations=8, solver=solver)
+
+    # Random ranking would find about 5 / 60 of held-out items
+    assert recall_at_k(user_f, item_f, train, test, k=5) > 0.3
+
+
+def test_trainer_writes_registry_loadable_artifact(tmp_path):
+    trainer = ServiceRecommenderTrainer(output_dir=str(tmp_path / "recommender"))
+
+    result = trainer.train(_block_interactions(), factors=8, iterations=5)
+
+    registry = ModelRegistry(model_dir=tmp_path, mmap_mode="r")
+    assert registry.scan_directory() == ["service_recommender"]
+    artifact = registry.get_model("service_recommender")
+    assert artifact['item_factors'].shape == (len(artifact['item_ids']), 8)
+    assert artifact['user_factors'].shape == (600, 8)
+    assert 0 <= result['metrics']['recall_at_5'] <= 1
+
+
+def test_artifact_version_follows_model_content(tmp_path):
+    trainer = ServiceRecommenderTrainer(output_dir=str(tmp_path / "recommender"))
+
+    first = trainer.train(_block_interactions(seed=0), factors=8, iterations=3)['artifact']
+    retrained = trainer.train(_block_interactions(seed=1), factors=8, iterations=3)['artifact']
+
+    assert first['version'].startswith(MODEL_VERSION + "+")
+    assert retrained['version'] != first['version']
+    assert artifact_version(dict(first)) == first['version']